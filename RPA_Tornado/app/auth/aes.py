@@ -5,6 +5,7 @@
 from Crypto.Cipher import AES
 import base64
 import hashlib
+from functools import lru_cache
 
 BLOCK_SIZE = 16  # Bytes
 
@@ -14,6 +15,12 @@ def do_pad(text):
         chr(BLOCK_SIZE - len(text) % BLOCK_SIZE)
 
 
+@lru_cache(maxsize=32)
+def _ecb_cipher(key: str):
+    """按密钥缓存 ECB 加密器(ECB 无 IV/计数器状态, 同一对象可重复加密), 避免每次签名都 AES.new"""
+    return AES.new(key.encode('utf-8'), AES.MODE_ECB)
+
+
 def aes_encrypt(key, data):
     """
     AES的ECB模式加密方法
@@ -21,10 +28,9 @@ def aes_encrypt(key, data):
     :param data:被加密字符串（明文）
     :return:密文
     """
-    key = key.encode('utf-8')
     # 字符串补位
     data = do_pad(data)
-    cipher = AES.new(key, AES.MODE_ECB)
+    cipher = _ecb_cipher(key)
     # 加密后得到的是bytes类型的数据，使用Base64进行编码,返回byte字符串
     result = cipher.encrypt(data.encode())
     encode_str = base64.b64encode(result)
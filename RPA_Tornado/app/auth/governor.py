@@ -0,0 +1,242 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+"""
+领星 OpenAPI 出站限流
+按 route_name 维护令牌桶, 调用前先排队取令牌; 接口返回限流时自动退避并降低补充速率,
+恢复正常后逐步回升。排队按优先级出队, 交互请求(看板查询等)优先于批量同步任务
+"""
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+from contextvars import ContextVar
+from functools import wraps
+from typing import Any, Dict, Optional, Tuple
+
+# 配置日志记录器
+logger = logging.getLogger(__name__)
+
+# 请求优先级, 数值越小越优先
+PRIORITY_INTERACTIVE = 0
+PRIORITY_BULK = 10
+
+# 领星接口表示请求过于频繁的错误码
+THROTTLE_CODES = {3001008}
+
+_request_priority: ContextVar[int] = ContextVar('llx_request_priority', default=PRIORITY_INTERACTIVE)
+
+
+def current_priority() -> int:
+    """当前上下文中出站请求的优先级"""
+    return _request_priority.get()
+
+
+def bulk_priority(func):
+    """装饰批量任务协程, 其中发起的领星请求都以低优先级排队(包括其内部创建的子任务)"""
+    @wraps(func)
+    async def wrapper(*args, **kwargs):
+        token = _request_priority.set(PRIORITY_BULK)
+        try:
+            return await func(*args, **kwargs)
+        finally:
+            _request_priority.reset(token)
+    return wrapper
+
+
+class AsyncTokenBucket(object):
+    """
+    asyncio 版令牌桶(参考 app/core/security/rate_limiter.TokenBucket)
+    令牌不足时不拒绝请求, 而是按 (优先级, 到达顺序) 排队等待
+    """
+
+    def __init__(self, capacity: int, refill_rate: float,
+                 base_backoff: float = 1.0, max_backoff: float = 60.0, min_rate_ratio: float = 0.1):
+        """
+        :param capacity: 桶容量(允许的突发请求数)
+        :param refill_rate: 令牌补充速率(每秒)
+        :param base_backoff: 首次限流后暂停发放令牌的秒数, 连续限流时翻倍
+        :param max_backoff: 退避时间上限(秒)
+        :param min_rate_ratio: 限流降速时补充速率的下限(相对初始速率的比例)
+        """
+        self.capacity = capacity
+        self.base_rate = refill_rate
+        self.refill_rate = refill_rate
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.min_rate_ratio = min_rate_ratio
+
+        self.tokens = float(capacity)
+        self.last_refill = time.monotonic()
+        self.backoff = 0.0
+        self.blocked_until = 0.0
+
+        self._waiters = []
+        self._seq = itertools.count()
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+        self._stats = {'granted': 0, 'queued': 0, 'throttled': 0, 'total_wait': 0.0, 'max_wait': 0.0}
+
+    def _refill(self, now: float):
+        """补充令牌"""
+        self.tokens = min(self.capacity, self.tokens + (now - self.last_refill) * self.refill_rate)
+        self.last_refill = now
+
+    def _bind_loop(self) -> asyncio.AbstractEventLoop:
+        """排队的 future/定时器与事件循环绑定, 事件循环变化时重置"""
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            self._waiters = []
+            self._timer = None
+        return loop
+
+    async def acquire(self, priority: int = PRIORITY_INTERACTIVE):
+        """取一个令牌, 令牌不足或处于退避期时排队等待"""
+        loop = self._bind_loop()
+        start = time.monotonic()
+        self._refill(start)
+        if not self._waiters and start >= self.blocked_until and self.tokens >= 1:
+            self.tokens -= 1
+            self._record_grant(0.0)
+            return
+
+        future = loop.create_future()
+        heapq.heappush(self._waiters, (priority, next(self._seq), future))
+        self._stats['queued'] += 1
+        self._dispatch()
+        try:
+            await future
+        except asyncio.CancelledError:
+            # 已分到令牌但调用方被取消时归还令牌
+            if future.done() and not future.cancelled():
+                self.tokens = min(self.capacity, self.tokens + 1)
+            raise
+        self._record_grant(time.monotonic() - start)
+
+    def _record_grant(self, wait: float):
+        self._stats['granted'] += 1
+        self._stats['total_wait'] += wait
+        self._stats['max_wait'] = max(self._stats['max_wait'], wait)
+
+    def _dispatch(self):
+        """按优先级给排队的请求发放令牌, 令牌不足时定时再次发放"""
+        now = time.monotonic()
+        self._refill(now)
+        while self._waiters and now >= self.blocked_until and self.tokens >= 1:
+            _, _, future = heapq.heappop(self._waiters)
+            if future.done():
+                # 等待者已取消
+                continue
+            self.tokens -= 1
+            future.set_result(None)
+
+        if self._waiters and self._timer is None:
+            delay = max(self.blocked_until - now, (1 - self.tokens) / self.refill_rate, 0.001)
+            self._timer = self._loop.call_later(delay, self._on_timer)
+
+    def _on_timer(self):
+        self._timer = None
+        self._dispatch()
+
+    def on_throttled(self):
+        """接口返回限流: 暂停发放令牌并将补充速率减半(指数退避)"""
+        now = time.monotonic()
+        self._refill(now)
+        self._stats['throttled'] += 1
+        self.backoff = min(self.max_backoff, self.backoff * 2 if self.backoff else self.base_backoff)
+        self.blocked_until = max(self.blocked_until, now + self.backoff)
+        self.refill_rate = max(self.base_rate * self.min_rate_ratio, self.refill_rate / 2)
+        self.tokens = 0.0
+
+    def on_success(self):
+        """请求未被限流: 清除退避, 补充速率逐步恢复到初始值"""
+        self.backoff = 0.0
+        if self.refill_rate < self.base_rate:
+            self._refill(time.monotonic())
+            self.refill_rate = min(self.base_rate, self.refill_rate + self.base_rate * 0.1)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """令牌桶状态"""
+        now = time.monotonic()
+        self._refill(now)
+        granted = self._stats['granted']
+        return {
+            'capacity': self.capacity,
+            'tokens': round(self.tokens, 3),
+            'refill_rate': round(self.refill_rate, 3),
+            'waiting': sum(1 for _, _, f in self._waiters if not f.done()),
+            'backoff_remaining': round(max(self.blocked_until - now, 0.0), 3),
+            'granted': granted,
+            'queued': self._stats['queued'],
+            'throttled': self._stats['throttled'],
+            'avg_wait_ms': round(self._stats['total_wait'] / granted * 1000, 3) if granted else None,
+            'max_wait_ms': round(self._stats['max_wait'] * 1000, 3)
+        }
+
+
+class RateGovernor(object):
+    """按 route_name 管理令牌桶的出站限流器"""
+
+    def __init__(self, capacity: int = 10, refill_rate: float = 10.0,
+                 route_limits: Optional[Dict[str, Tuple[int, float]]] = None, max_retries: int = 3,
+                 processes: int = 1):
+        """
+        :param capacity: 默认桶容量
+        :param refill_rate: 默认每秒补充令牌数
+        :param route_limits: 单独配置的路由 {route_name: (capacity, refill_rate)}
+        :param max_retries: 被限流后的最大重试次数
+        :param processes: 共用同一领星配额的进程数(多进程模式), 每个进程的桶容量和速率按比例缩小
+        """
+        self.capacity = capacity
+        self.refill_rate = refill_rate
+        self.route_limits = dict(route_limits or {})
+        self.max_retries = max_retries
+        self.processes = processes
+        self._buckets: Dict[str, AsyncTokenBucket] = {}
+
+    def configure(self, **kwargs):
+        """更新限流参数, 已创建的令牌桶会被重建"""
+        for key, value in kwargs.items():
+            if value is not None and hasattr(self, key) and not key.startswith('_'):
+                setattr(self, key, value)
+        self._buckets.clear()
+
+    def bucket(self, route_name: str) -> AsyncTokenBucket:
+        """获取路由对应的令牌桶, 不存在时按配置创建"""
+        bucket = self._buckets.get(route_name)
+        if bucket is None:
+            capacity, refill_rate = self.route_limits.get(route_name, (self.capacity, self.refill_rate))
+            if self.processes > 1:
+                capacity = max(1, capacity // self.processes)
+                refill_rate = refill_rate / self.processes
+            bucket = self._buckets[route_name] = AsyncTokenBucket(capacity, refill_rate)
+        return bucket
+
+    async def acquire(self, route_name: str, priority: Optional[int] = None):
+        """发起请求前取令牌, 未指定优先级时使用当前上下文的优先级"""
+        if priority is None:
+            priority = current_priority()
+        await self.bucket(route_name).acquire(priority)
+
+    @staticmethod
+    def is_throttled(code: Optional[int]) -> bool:
+        return code in THROTTLE_CODES
+
+    def feedback(self, route_name: str, throttled: bool):
+        """根据请求结果调整该路由的发放速率"""
+        bucket = self.bucket(route_name)
+        if throttled:
+            bucket.on_throttled()
+            logger.warning(f"领星接口限流: {route_name}, 退避 {bucket.backoff} 秒, 速率降为 {bucket.refill_rate:.3f}/s")
+        else:
+            bucket.on_success()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """各路由令牌桶状态"""
+        return {route: bucket.get_stats() for route, bucket in self._buckets.items()}
+
+
+# 全局出站限流器
+rate_governor = RateGovernor()
@@ -1,29 +1,169 @@
 #!/usr/bin/python3
 # -*- coding: utf-8 -*-
 """封装 Openapi的 http请求"""
+import asyncio
+import logging
+import re
 import aiohttp
 import orjson
-from typing import Optional
-from .resp_schema import ResponseResult
+from typing import Optional, Union
+from .resp_schema import RawResponse, ResponseResult
+
+logger = logging.getLogger(__name__)
+
+# 响应开头: 顶层的标量字段(msg、request_id、空的 error_details 等)之后紧跟 code
+_HEAD_CODE_RE = re.compile(
+    rb'\s*\{(?:\s*"\w+"\s*:\s*(?:"(?:[^"\\]|\\.)*"|-?\d+(?:\.\d+)?|true|false|null|\[\]|\{\})\s*,)*?'
+    rb'\s*"code"\s*:\s*(-?\d+)'
+)
+# 只在响应开头查找 code, 避免扫描整个响应体
+_PEEK_LIMIT = 4096
+
+
+def peek_code(body: bytes) -> Optional[int]:
+    """
+    读取响应体顶层的 code 而不解析整个 JSON
+    code 不在开头(例如 data 字段排在前面)时退回完整解析, 解析失败返回 None
+    """
+    match = _HEAD_CODE_RE.match(body, 0, min(len(body), _PEEK_LIMIT))
+    if match:
+        return int(match.group(1))
+    try:
+        parsed = orjson.loads(body)
+    except orjson.JSONDecodeError:
+        return None
+    return parsed.get('code') if isinstance(parsed, dict) else None
+
+
+class ClientSessionPool(object):
+    """
+    应用级共享的 aiohttp 连接池
+    所有基于 OpenApiBase 的服务复用同一个 ClientSession, 保持长连接, 避免每次请求都重新进行 TCP+TLS 握手
+    """
+
+    def __init__(self, limit: int = 100, limit_per_host: int = 30,
+                 keepalive_timeout: float = 30, ttl_dns_cache: int = 300):
+        self.limit = limit                          # 连接池总连接数上限
+        self.limit_per_host = limit_per_host        # 单个host的连接数上限
+        self.keepalive_timeout = keepalive_timeout  # 空闲连接保活时间(秒)
+        self.ttl_dns_cache = ttl_dns_cache          # DNS缓存时间(秒)
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._sessions_created = 0
+        self._request_count = 0
+
+    def configure(self, **kwargs):
+        """更新连接池参数, 在下一次创建 session 时生效"""
+        for key, value in kwargs.items():
+            if value is not None and hasattr(self, key) and not key.startswith('_'):
+                setattr(self, key, value)
+
+    def get_session(self) -> aiohttp.ClientSession:
+        """获取当前事件循环下的共享 session, 不存在或已关闭时懒创建; 事件循环变化时先释放旧 session 的连接"""
+        loop = asyncio.get_running_loop()
+        if self._session is None or self._session.closed or self._loop is not loop:
+            if self._session is not None and not self._session.closed:
+                self._discard(self._session, self._loop)
+            connector = aiohttp.TCPConnector(
+                limit=self.limit,
+                limit_per_host=self.limit_per_host,
+                keepalive_timeout=self.keepalive_timeout,
+                use_dns_cache=True,
+                ttl_dns_cache=self.ttl_dns_cache,
+            )
+            self._session = aiohttp.ClientSession(connector=connector)
+            self._loop = loop
+            self._sessions_created += 1
+        self._request_count += 1
+        return self._session
+
+    @staticmethod
+    def _discard(session: aiohttp.ClientSession, loop: Optional[asyncio.AbstractEventLoop]):
+        """
+        释放绑定在其他事件循环上的 session: 原循环仍在(其他线程中)运行时交给它关闭;
+        否则不能在当前循环中 await, 直接关闭连接器上的连接(原循环已关闭时连接已随之失效), 再把连接器从 session 上摘下
+        """
+        if loop is not None and loop.is_running() and not loop.is_closed():
+            asyncio.run_coroutine_threadsafe(session.close(), loop)
+            return
+        connector = session.connector
+        session.detach()
+        if connector is not None:
+            # aiohttp 只提供需要在原循环中 await 的 close(), _close() 同步关闭连接并返回等待对象(这里不需要)
+            connector._close()
+        logger.info("事件循环已变化, 已释放旧的 aiohttp 连接池")
+
+    async def close(self):
+        """关闭共享 session 及其连接, 应用退出时调用"""
+        session, self._session = self._session, None
+        self._loop = None
+        if session is not None and not session.closed:
+            await session.close()
+
+    def get_stats(self) -> dict:
+        """连接池指标: 打开/空闲/使用中的连接数"""
+        idle = in_use = 0
+        session = self._session
+        if session is not None and not session.closed:
+            connector = session.connector
+            # aiohttp 未暴露公开的统计接口, 这里读取 connector 内部状态
+            conns = getattr(connector, '_conns', None) or {}
+            idle = sum(len(v) for v in conns.values())
+            in_use = len(getattr(connector, '_acquired', None) or ())
+        return {
+            'open': idle + in_use,
+            'idle': idle,
+            'in_use': in_use,
+            'limit': self.limit,
+            'limit_per_host': self.limit_per_host,
+            'sessions_created': self._sessions_created,
+            'requests': self._request_count,
+        }
+
+
+# 全局共享连接池
+session_pool = ClientSessionPool()
+
+
+class ThrottledError(ValueError):
+    """服务端返回 HTTP 429, 请求被限流"""
 
 
 class HttpBase(object):
 
-    def __init__(self, default_timeout=30):
+    def __init__(self, default_timeout=30, pool: Optional[ClientSessionPool] = None):
         self.default_timeout = default_timeout
+        self.pool = pool or session_pool
 
     async def request(self, method: str, req_url: str,
                       params: Optional[dict] = None,
                       json: Optional[dict] = None,
                       headers: Optional[dict] = None,
-                      **kwargs) -> ResponseResult:
+                      raw: bool = False,
+                      body: Optional[bytes] = None,
+                      **kwargs) -> Union[ResponseResult, RawResponse]:
+        """
+        :param raw: 为True时返回 RawResponse(原始字节 + 预读的 code), 不解析响应体
+        :param body: 已序列化的请求体(如签名时生成的 PreparedBody.data), 传入时忽略 json
+        """
         timeout = kwargs.pop('timeout', self.default_timeout)
+        if isinstance(timeout, (int, float)):
+            timeout = aiohttp.ClientTimeout(total=timeout)
         # 需要保持与加密算法一致的请求数据传递
-        data = orjson.dumps(json, option=orjson.OPT_SORT_KEYS) if json else None
-        async with aiohttp.ClientSession() as aio_session:
-            async with aio_session.request(method=method, url=req_url, params=params, data=data,
-                                           timeout=timeout, headers=headers, **kwargs) as resp:
-                if resp.status != 200:
-                    raise ValueError(f"Response error, status code: {resp.status}, body: {await resp.text()}")
-                resp_json = await resp.json()
-                return ResponseResult(**resp_json)
+        if body is not None:
+            data = body
+        else:
+            data = orjson.dumps(json, option=orjson.OPT_SORT_KEYS) if json else None
+        aio_session = self.pool.get_session()
+        async with aio_session.request(method=method, url=req_url, params=params, data=data,
+                                       timeout=timeout, headers=headers, **kwargs) as resp:
+            if resp.status == 429:
+                raise ThrottledError(f"Response throttled, status code: 429, body: {await resp.text()}")
+            if resp.status != 200:
+                raise ValueError(f"Response error, status code: {resp.status}, body: {await resp.text()}")
+            if raw:
+                body = await resp.read()
+                return RawResponse(body=body, code=peek_code(body), status=resp.status,
+                                   content_type=resp.content_type or 'application/json')
+            resp_json = await resp.json()
+            return ResponseResult(**resp_json)
@@ -1,21 +1,35 @@
 #!/usr/bin/python3
 # -*- coding: utf-8 -*-
 """封装Openapi基础操作"""
-import copy
 import time
-from typing import Optional
+from typing import Callable, Optional, Union
 
-from .http_util import HttpBase
-from .resp_schema import AccessTokenDto, ResponseResult
-from .sign import SignBase
+from .governor import RateGovernor, rate_governor
+from .http_util import HttpBase, ThrottledError
+from .resp_schema import AccessTokenDto, RawResponse, ResponseResult
+from .sign import PreparedBody, SignBase
+
+# 出站请求耗时回调 observer(route_name, outcome, seconds), outcome 为 ok/error/throttled/exception;
+# 由应用注册(例如指标采集), 未注册时不记录
+_request_observer: Optional[Callable[[str, str, float], None]] = None
+
+
+def set_request_observer(observer: Optional[Callable[[str, str, float], None]]):
+    """注册出站请求耗时回调, 传 None 取消"""
+    global _request_observer
+    _request_observer = observer
 
 
 class OpenApiBase(object):
 
-    def __init__(self, host: str, app_id: str, app_secret: str):
+    def __init__(self, host: str, app_id: str, app_secret: str, governor: Optional[RateGovernor] = None):
         self.host = host
         self.app_id = app_id
         self.app_secret = app_secret
+        # 复用全局连接池, 不再每次请求都新建 HttpBase/ClientSession
+        self.http = HttpBase()
+        # 出站限流, 所有实例共享同一组按路由划分的令牌桶
+        self.governor = governor or rate_governor
 
     async def generate_access_token(self) -> AccessTokenDto:
         """
@@ -27,7 +41,7 @@ class OpenApiBase(object):
             "appId": self.app_id,
             "appSecret": self.app_secret,
         }
-        resp_result = await HttpBase().request("POST", req_url, params=req_params)
+        resp_result = await self.http.request("POST", req_url, params=req_params)
         if resp_result.code != 200:
             error_msg = f"generate_access_token failed, reason: {resp_result.message}"
             raise ValueError(error_msg)
@@ -43,7 +57,7 @@ class OpenApiBase(object):
             "appId": self.app_id,
             "refreshToken": refresh_token,
         }
-        resp_result = await HttpBase().request("POST", req_url, params=req_params)
+        resp_result = await self.http.request("POST", req_url, params=req_params)
         if resp_result.code != 200:
             error_msg = f"refresh_token failed, reason: {resp_result.message}"
             raise ValueError(error_msg)
@@ -54,21 +68,62 @@ class OpenApiBase(object):
     async def request(self, access_token: str, route_name: str, method: str,
                       req_params: Optional[dict] = None,
                       req_body: Optional[dict] = None,
-                      **kwargs) -> ResponseResult:
+                      **kwargs) -> Union[ResponseResult, RawResponse]:
         """
         :param access_token:
         :param route_name: 请求路径
         :param method: GET/POST/PUT,etc
         :param req_params: query参数放这里, 没有则不传
         :param req_body: 请求体参数放这里, 没有则不传
-        :param kwargs: timeout 等其他字段可以放这里
+        :param kwargs: timeout 等其他字段可以放这里; priority 指定排队优先级, 默认取当前上下文;
+                       raw=True 时返回 RawResponse(原始字节 + 顶层 code), 用于直接透传给客户端
         :return:
         """
         req_url = self.host + route_name
         headers = kwargs.pop('headers', {})
+        priority = kwargs.pop('priority', None)
+
+        # 对于带有请求体的, 需要设置默认的Content-Type
+        if req_body and 'Content-Type' not in headers:
+            headers['Content-Type'] = 'application/json'
 
-        req_params = req_params or {}
-        gen_sign_params = copy.deepcopy(req_body) if req_body else {}
+        # 请求体只序列化一次, 签名和发送共用同一份字节, 重试时也不再重复序列化
+        prepared = PreparedBody.from_dict(req_body) if req_body else None
+        attempts = self.governor.max_retries + 1
+        for attempt in range(attempts):
+            await self.governor.acquire(route_name, priority)
+            # 退避后重试需要重新生成时间戳和签名
+            query_params = self._signed_params(access_token, req_params, prepared)
+            start = time.perf_counter()
+            try:
+                resp = await self.http.request(method, req_url, params=query_params, headers=headers,
+                                               body=prepared.data if prepared else None, **kwargs)
+            except ThrottledError:
+                self._observe(route_name, 'throttled', start)
+                self.governor.feedback(route_name, throttled=True)
+                if attempt == attempts - 1:
+                    raise
+                continue
+            except Exception:
+                self._observe(route_name, 'exception', start)
+                raise
+            throttled = self.governor.is_throttled(resp.code)
+            self._observe(route_name, 'throttled' if throttled else 'ok' if resp.code == 0 else 'error', start)
+            self.governor.feedback(route_name, throttled)
+            if not throttled or attempt == attempts - 1:
+                return resp
+
+    @staticmethod
+    def _observe(route_name: str, outcome: str, start: float):
+        if _request_observer is not None:
+            _request_observer(route_name, outcome, time.perf_counter() - start)
+
+    def _signed_params(self, access_token: str, req_params: Optional[dict],
+                       prepared: Optional[PreparedBody]) -> dict:
+        """生成带签名的 query 参数"""
+        req_params = dict(req_params or {})
+        # 签名只读取请求体, 浅拷贝即可, 嵌套字段直接复用 prepared 中已序列化的字节
+        gen_sign_params = dict(prepared.body) if prepared else {}
         if req_params:
             gen_sign_params.update(req_params)
 
@@ -78,12 +133,12 @@ class OpenApiBase(object):
             "timestamp": f'{int(time.time())}',
         }
         gen_sign_params.update(sign_params)
-        sign = SignBase.generate_sign(self.app_id, gen_sign_params)
+        serialized = {}
+        if prepared:
+            # 被 query 参数或签名参数覆盖的字段不能复用请求体中的序列化结果
+            serialized = {k: v for k, v in prepared.fields.items()
+                          if k not in req_params and k not in sign_params}
+        sign = SignBase.generate_sign(self.app_id, gen_sign_params, serialized)
         sign_params["sign"] = sign
         req_params.update(sign_params)
-
-        # 对于带有请求体的, 需要设置默认的Content-Type
-        if req_body and 'Content-Type' not in headers:
-            headers['Content-Type'] = 'application/json'
-        return await HttpBase().request(method, req_url, params=req_params,
-                                        headers=headers, json=req_body, **kwargs)
+        return req_params
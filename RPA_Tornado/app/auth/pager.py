@@ -0,0 +1,116 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+"""领星 offset/length 分页接口的自动翻页"""
+import asyncio
+from collections import deque
+from typing import Any, AsyncIterator, List, Optional
+
+from .openapi import OpenApiBase
+from .resp_schema import ResponseResult
+
+
+def page_total(resp: ResponseResult) -> Optional[int]:
+    """读取总条数, 兼容顶层 total 与 data.total 两种结构"""
+    if resp.total is not None:
+        return resp.total
+    if isinstance(resp.data, dict) and resp.data.get('total') is not None:
+        return int(resp.data['total'])
+    return None
+
+
+def page_records(resp: ResponseResult) -> List[Any]:
+    """读取单页记录, 兼容 data 为数组或 {'list': [...]} 两种结构"""
+    data = resp.data
+    if isinstance(data, list):
+        return data
+    if isinstance(data, dict) and isinstance(data.get('list'), list):
+        return data['list']
+    return []
+
+
+class OffsetPager(object):
+    """
+    offset/length 分页接口的异步迭代器
+    先请求首页得到 total, 之后按窗口并发预取后续页, 按 offset 顺序逐页产出,
+    调用方无需自己循环翻页; 任意一页失败时抛出异常并取消尚未完成的预取
+    """
+
+    def __init__(self, api: OpenApiBase, access_token: str, route_name: str,
+                 method: str = 'POST', req_body: Optional[dict] = None,
+                 prefetch: int = 3, default_length: int = 1000):
+        """
+        :param api: 领星OpenAPI客户端
+        :param access_token: 访问令牌
+        :param route_name: 接口路由
+        :param method: 请求方法
+        :param req_body: 查询参数, 其中 offset 为起始偏移, length 为每页条数
+        :param prefetch: 同时预取的页数
+        :param default_length: 查询参数未指定 length 时的每页条数
+        """
+        self.api = api
+        self.access_token = access_token
+        self.route_name = route_name
+        self.method = method
+        self.req_body = dict(req_body or {})
+        self.prefetch = max(1, prefetch)
+        self.start_offset = self.req_body.get('offset') or 0
+        self.page_size = self.req_body.get('length') or default_length
+        self.total: Optional[int] = None
+        self.pages_fetched = 0
+
+    async def fetch_page(self, offset: int) -> ResponseResult:
+        """请求单页, code 非 0 视为失败"""
+        body = dict(self.req_body, offset=offset, length=self.page_size)
+        resp = await self.api.request(self.access_token, self.route_name, self.method, req_body=body)
+        if resp.code != 0:
+            raise ValueError(f"分页请求失败(offset={offset}): code={resp.code}, msg={resp.message}")
+        self.pages_fetched += 1
+        return resp
+
+    async def iter_pages(self) -> AsyncIterator[List[Any]]:
+        """按 offset 顺序逐页产出记录列表"""
+        first = await self.fetch_page(self.start_offset)
+        self.total = page_total(first)
+        records = page_records(first)
+        yield records
+
+        if self.total is None:
+            # 接口未返回 total 时只能顺序翻页, 直到返回不足一页
+            offset = self.start_offset
+            while len(records) >= self.page_size:
+                offset += self.page_size
+                records = page_records(await self.fetch_page(offset))
+                if not records:
+                    break
+                yield records
+            return
+
+        offsets = iter(range(self.start_offset + self.page_size, self.total, self.page_size))
+        pending = deque()
+        try:
+            for offset in offsets:
+                pending.append(asyncio.ensure_future(self.fetch_page(offset)))
+                if len(pending) >= self.prefetch:
+                    break
+            while pending:
+                resp = await pending.popleft()
+                offset = next(offsets, None)
+                if offset is not None:
+                    pending.append(asyncio.ensure_future(self.fetch_page(offset)))
+                yield page_records(resp)
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def iter_records(self) -> AsyncIterator[Any]:
+        """逐条产出全部记录"""
+        async for records in self.iter_pages():
+            for record in records:
+                yield record
+
+    async def fetch_all(self) -> List[Any]:
+        """一次性取回全部记录"""
+        result = []
+        async for records in self.iter_pages():
+            result.extend(records)
+        return result
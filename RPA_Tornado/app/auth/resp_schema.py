@@ -1,9 +1,12 @@
 #!/usr/bin/python3
 # -*- coding: utf-8 -*-
 """openapi接口响应 schema"""
+from dataclasses import dataclass
 from pydantic import BaseModel, root_validator
 from typing import Any, Optional
 
+import orjson
+
 
 def reset_msg_and_trace_id(cls, values: dict):
     """重置异常信息"""
@@ -29,6 +32,22 @@ class ResponseResult(BaseModel):
     )
 
 
+@dataclass
+class RawResponse:
+    """
+    透传模式的响应: 保留接口返回的原始字节, 只预先读取顶层 code
+    代理接口可以直接把 body 写给客户端, 省去 JSON 解析、pydantic 校验和重新序列化
+    """
+    body: bytes                             # 原始响应体(已解压)
+    code: Optional[int]                     # 响应码
+    status: int = 200                       # HTTP 状态码
+    content_type: str = 'application/json'
+
+    def parse(self) -> ResponseResult:
+        """需要读取 message 等字段时(如错误处理)再完整解析"""
+        return ResponseResult(**orjson.loads(self.body))
+
+
 class AccessTokenDto(BaseModel):
     access_token: str           # 接口访问认证信息
     refresh_token: str          # RefreshToken用于续费AccessToken，只能使用一次
@@ -1,20 +1,45 @@
 #!/usr/bin/python3
 # -*- coding: utf-8 -*-
 """基于 aes文件 基础加密功能 封装 openapi签名算法"""
+import hashlib
 import orjson
-from typing import Union
+from dataclasses import dataclass
+from typing import Dict, Optional, Union
 from .aes import aes_encrypt, md5_encrypt
 
 
+@dataclass
+class PreparedBody:
+    """
+    预先序列化的请求体
+    每个顶层字段只用 orjson(OPT_SORT_KEYS) 序列化一次, 同一份字节既用于签名串, 也拼接成发送的请求体,
+    与 orjson.dumps(req_body, option=orjson.OPT_SORT_KEYS) 的结果一致
+    """
+    body: dict
+    fields: Dict[str, bytes]
+    data: bytes
+
+    @classmethod
+    def from_dict(cls, body: dict) -> 'PreparedBody':
+        fields = {k: orjson.dumps(v, option=orjson.OPT_SORT_KEYS) for k, v in body.items()}
+        data = b'{' + b','.join(orjson.dumps(k) + b':' + fields[k] for k in sorted(fields)) + b'}'
+        return cls(body=body, fields=fields, data=data)
+
+
 class SignBase(object):
 
     @classmethod
-    def generate_sign(cls, encrypt_key: str, request_params: dict) -> str:
+    def generate_sign(cls, encrypt_key: str, request_params: dict,
+                      serialized: Optional[Dict[str, bytes]] = None) -> str:
         """
         生成签名
+        :param serialized: request_params 中 dict/list 字段已序列化的字节(PreparedBody.fields), 有则直接复用
         """
-        canonical_querystring = cls.format_params(request_params)
-        md5_str = md5_encrypt(canonical_querystring).upper()
+        if serialized is None:
+            canonical_querystring = cls.format_params(request_params)
+            md5_str = md5_encrypt(canonical_querystring).upper()
+        else:
+            md5_str = hashlib.md5(cls.format_params_bytes(request_params, serialized)).hexdigest().upper()
         sign = aes_encrypt(encrypt_key, md5_str)
         return sign
 
@@ -39,3 +64,23 @@ class SignBase(object):
             else:
                 canonical_strs.append(f"{k}={v}")
         return "&".join(canonical_strs)
+
+    @classmethod
+    def format_params_bytes(cls, request_params: dict, serialized: Dict[str, bytes]) -> bytes:
+        """
+        与 format_params 相同的签名串, 直接以 UTF-8 字节拼接
+        dict/list 字段优先取 serialized 中的字节, 不再重复序列化和 decode/encode 大字符串
+        """
+        canonical = []
+        for k in sorted(request_params.keys()):
+            v = request_params[k]
+            if v == "":
+                continue
+            elif isinstance(v, (dict, list)):
+                value = serialized.get(k)
+                if value is None:
+                    value = orjson.dumps(v, option=orjson.OPT_SORT_KEYS)
+                canonical.append(f"{k}=".encode('utf-8') + value)
+            else:
+                canonical.append(f"{k}={v}".encode('utf-8'))
+        return b"&".join(canonical)
@@ -30,15 +30,52 @@ class BaseConfig:
         self.APP_DEBUG = os.getenv('APP_DEBUG', 'false').lower() == 'true'
         self.APP_HOST = os.getenv('APP_HOST', '0.0.0.0')
         self.APP_PORT = int(os.getenv('APP_PORT', '8888'))
+        # 工作进程数: 1 为单进程, 0 为按 CPU 核数, 大于 1 时预先绑定端口后 fork 多个工作进程
+        self.APP_WORKERS = int(os.getenv('APP_WORKERS', '1'))
         
         # 领星API配置
         self.LLX_API_HOST = os.getenv('LLX_API_HOST', 'https://openapi.lingxing.com')
         self.LLX_APP_ID = os.getenv('LLX_APP_ID', 'ak_LmR8frklEqfe2')
         self.LLX_APP_SECRET = os.getenv('LLX_APP_SECRET', 'gS/Qn/dLNtD9qKwYaBLkZA==')
         
+        # 领星API连接池配置
+        self.LLX_HTTP_POOL_LIMIT = int(os.getenv('LLX_HTTP_POOL_LIMIT', '100'))
+        self.LLX_HTTP_POOL_LIMIT_PER_HOST = int(os.getenv('LLX_HTTP_POOL_LIMIT_PER_HOST', '30'))
+        self.LLX_HTTP_KEEPALIVE_TIMEOUT = int(os.getenv('LLX_HTTP_KEEPALIVE_TIMEOUT', '30'))
+        self.LLX_HTTP_DNS_CACHE_TTL = int(os.getenv('LLX_HTTP_DNS_CACHE_TTL', '300'))
+        # 多店铺(sid)并发查询的最大并发数
+        self.LLX_FAN_OUT_CONCURRENCY = int(os.getenv('LLX_FAN_OUT_CONCURRENCY', '5'))
+        # 全量分页(fetch_all)时同时预取的页数
+        self.LLX_PAGE_PREFETCH = int(os.getenv('LLX_PAGE_PREFETCH', '3'))
+        # 领星出站限流(按接口路由的令牌桶), 单独配置格式: route=容量:每秒速率,route2=容量:每秒速率
+        self.LLX_RATE_CAPACITY = int(os.getenv('LLX_RATE_CAPACITY', '10'))
+        self.LLX_RATE_REFILL_RATE = float(os.getenv('LLX_RATE_REFILL_RATE', '5'))
+        self.LLX_RATE_MAX_RETRIES = int(os.getenv('LLX_RATE_MAX_RETRIES', '3'))
+        self.LLX_RATE_ROUTE_LIMITS = os.getenv('LLX_RATE_ROUTE_LIMITS', '')
+        # 店铺注册表后台刷新间隔（秒）
+        self.SHOP_REGISTRY_REFRESH_INTERVAL = int(os.getenv('SHOP_REGISTRY_REFRESH_INTERVAL', '3600'))
+        # 多平台同步任务: 同时执行的同步单元数、每页条数、单元最大尝试次数、失败重试间隔（秒）
+        self.SYNC_JOB_CONCURRENCY = int(os.getenv('SYNC_JOB_CONCURRENCY', '4'))
+        self.SYNC_JOB_PAGE_SIZE = int(os.getenv('SYNC_JOB_PAGE_SIZE', '1000'))
+        self.SYNC_JOB_MAX_ATTEMPTS = int(os.getenv('SYNC_JOB_MAX_ATTEMPTS', '3'))
+        self.SYNC_JOB_RETRY_DELAY = float(os.getenv('SYNC_JOB_RETRY_DELAY', '30'))
+        # 同步单元心跳间隔（秒）; 负责进程超过 SYNC_JOB_STALE_AFTER 秒没有心跳时, 其单元由其他进程认领
+        self.SYNC_JOB_HEARTBEAT_INTERVAL = float(os.getenv('SYNC_JOB_HEARTBEAT_INTERVAL', '30'))
+        self.SYNC_JOB_STALE_AFTER = float(os.getenv('SYNC_JOB_STALE_AFTER', '120'))
+        # 增量同步时从水位往前回溯的秒数, 覆盖领星侧数据延迟写入与时钟偏差
+        self.SYNC_WATERMARK_OVERLAP = int(os.getenv('SYNC_WATERMARK_OVERLAP', '600'))
+        # 看板销售数据按水位补数时单次最多同步的天数, 水位落后更多时分多次向前补齐
+        self.SALES_SYNC_MAX_DAYS = int(os.getenv('SALES_SYNC_MAX_DAYS', '31'))
+        
         # 数据库配置
         self.DATABASE_URL = os.getenv('DATABASE_URL')
         self.REDIS_URL = os.getenv('REDIS_URL', 'redis://localhost:6379/0')
+        # 批量 upsert 每条语句写入的最大记录数
+        self.DB_BULK_CHUNK_SIZE = int(os.getenv('DB_BULK_CHUNK_SIZE', '500'))
+        # 数据库连接池大小；同步查询在线程池中执行，线程数默认 cpu_count + 4，且不超过连接池容量（pool_size + max_overflow）
+        self.DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', '5'))
+        self.DB_MAX_OVERFLOW = int(os.getenv('DB_MAX_OVERFLOW', '10'))
+        self.DB_EXECUTOR_WORKERS = int(os.getenv('DB_EXECUTOR_WORKERS', '0'))
         
         # 日志配置
         self.LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO')
@@ -55,8 +92,13 @@ class BaseConfig:
         # API限流配置
         self.RATE_LIMIT_REQUESTS = int(os.getenv('RATE_LIMIT_REQUESTS', '100'))
         self.RATE_LIMIT_WINDOW = int(os.getenv('RATE_LIMIT_WINDOW', '60'))
+        # 限流后端: memory(每个进程各自计数) 或 redis(多进程/多实例共享, 使用 REDIS_URL)
+        self.RATE_LIMIT_BACKEND = os.getenv('RATE_LIMIT_BACKEND', 'memory').lower()
+        # 进程内限流器的分片数, 以及令牌桶闲置多久(且令牌已补满)后回收（秒）
+        self.RATE_LIMIT_SHARDS = int(os.getenv('RATE_LIMIT_SHARDS', '64'))
+        self.RATE_LIMIT_IDLE_TTL = float(os.getenv('RATE_LIMIT_IDLE_TTL', '600'))
         
-        # 监控配置
+        # 监控配置: 开启时在 METRICS_PORT 上暴露 Prometheus 指标(/metrics), 多进程模式下端口为 METRICS_PORT + 工作进程编号
         self.MONITORING_ENABLED = os.getenv('MONITORING_ENABLED', 'true').lower() == 'true'
         self.METRICS_PORT = int(os.getenv('METRICS_PORT', '9090'))
         self.HEALTH_CHECK_ENDPOINT = os.getenv('HEALTH_CHECK_ENDPOINT', '/health')
@@ -74,6 +116,8 @@ class BaseConfig:
         # 缓存配置
         self.CACHE_TTL = int(os.getenv('CACHE_TTL', '3600'))
         self.CACHE_MAX_SIZE = int(os.getenv('CACHE_MAX_SIZE', '1000'))
+        # 缓存后端: memory(进程内) 或 redis(使用 REDIS_URL)
+        self.CACHE_BACKEND = os.getenv('CACHE_BACKEND', 'memory').lower()
         
         # 开发环境配置
         self.DEV_RELOAD = os.getenv('DEV_RELOAD', 'true').lower() == 'true'
@@ -90,6 +134,18 @@ class BaseConfig:
         """获取CORS允许的源列表"""
         return [origin.strip() for origin in self.DEV_CORS_ORIGINS.split(',')]
     
+    @property
+    def llx_rate_route_limits(self) -> Dict[str, tuple]:
+        """获取单独配置的领星接口限流 {route_name: (容量, 每秒速率)}"""
+        limits = {}
+        for item in self.LLX_RATE_ROUTE_LIMITS.split(','):
+            if '=' not in item:
+                continue
+            route, limit = item.strip().rsplit('=', 1)
+            capacity, _, rate = limit.partition(':')
+            limits[route] = (int(capacity), float(rate or capacity))
+        return limits
+    
     def get_database_config(self) -> Dict[str, Any]:
         """获取数据库配置"""
         if not self.DATABASE_URL:
@@ -0,0 +1,150 @@
+# -*- coding: utf-8 -*-
+"""
+批量 upsert
+按唯一键批量写入, 已存在的记录更新、不存在的插入。根据数据库方言生成
+INSERT ... ON CONFLICT DO UPDATE (SQLite/PostgreSQL) 或 INSERT ... ON DUPLICATE KEY UPDATE (MySQL),
+按块批量执行, 几千行只需要几次往返, 代替逐行 SELECT + INSERT/UPDATE
+"""
+
+import logging
+import sqlite3
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+from sqlalchemy import bindparam, tuple_
+from sqlalchemy.orm import Session
+
+# 配置日志记录器
+logger = logging.getLogger(__name__)
+
+# SQLite 单条语句允许的绑定参数上限
+SQLITE_MAX_VARIABLES = 32766 if sqlite3.sqlite_version_info >= (3, 32, 0) else 999
+
+
+@dataclass
+class UpsertResult:
+    """批量 upsert 结果"""
+    inserted: int = 0
+    updated: int = 0
+    statements: int = 0
+
+    @property
+    def total(self) -> int:
+        return self.inserted + self.updated
+
+
+def dialect_insert(dialect_name: str):
+    """返回支持冲突处理的方言 insert 构造函数"""
+    if dialect_name == 'sqlite':
+        from sqlalchemy.dialects.sqlite import insert
+    elif dialect_name == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert
+    elif dialect_name in ('mysql', 'mariadb'):
+        from sqlalchemy.dialects.mysql import insert
+    else:
+        return None
+    return insert
+
+
+def _chunks(rows: List[Dict[str, Any]], size: int) -> Iterable[List[Dict[str, Any]]]:
+    for start in range(0, len(rows), size):
+        yield rows[start:start + size]
+
+
+def bulk_upsert(
+    session: Session,
+    model,
+    rows: Sequence[Dict[str, Any]],
+    conflict_columns: Sequence[str],
+    update_columns: Optional[Sequence[str]] = None,
+    chunk_size: int = 500
+) -> UpsertResult:
+    """
+    按唯一键批量 upsert
+
+    Args:
+        session: 数据库会话（由调用方负责提交）
+        model: ORM 模型类
+        rows: 待写入的记录, 每条记录的字段需一致
+        conflict_columns: 唯一键字段（与表上的唯一约束一致）
+        update_columns: 记录已存在时更新的字段, 默认为除唯一键外的全部字段
+        chunk_size: 每条语句写入的最大记录数
+
+    Returns:
+        UpsertResult: 新增/更新条数及执行的语句数
+    """
+    result = UpsertResult()
+    if not rows:
+        return result
+
+    conflict_columns = list(conflict_columns)
+    # 同一批次内唯一键重复时以最后一条为准, 避免同一语句重复更新同一行
+    deduped = {tuple(row[c] for c in conflict_columns): row for row in rows}
+    rows = list(deduped.values())
+    if update_columns is None:
+        update_columns = [c for c in rows[0] if c not in conflict_columns]
+
+    dialect_name = session.get_bind().dialect.name
+    if dialect_name == 'sqlite':
+        # 查询已存在唯一键的 IN 子句受绑定参数上限约束
+        chunk_size = max(1, min(chunk_size, SQLITE_MAX_VARIABLES // len(conflict_columns)))
+    insert = dialect_insert(dialect_name)
+    table = model.__table__
+    key_columns = [table.c[c] for c in conflict_columns]
+    if insert is not None:
+        # 以 executemany 方式执行同一条语句, 语句只编译一次, 由驱动批量发送
+        stmt = insert(table)
+        if dialect_name in ('mysql', 'mariadb'):
+            # MySQL 没有 DO NOTHING, 无需更新字段时用唯一键自身赋值代替
+            set_columns = update_columns or conflict_columns[:1]
+            stmt = stmt.on_duplicate_key_update({c: stmt.inserted[c] for c in set_columns})
+        elif update_columns:
+            stmt = stmt.on_conflict_do_update(
+                index_elements=conflict_columns,
+                set_={c: stmt.excluded[c] for c in update_columns}
+            )
+        else:
+            stmt = stmt.on_conflict_do_nothing(index_elements=conflict_columns)
+
+    for chunk in _chunks(rows, chunk_size):
+        # 统计已存在的唯一键, 用于区分新增与更新
+        keys = [tuple(row[c] for c in conflict_columns) for row in chunk]
+        existing = {tuple(row) for row in session.execute(
+            table.select().with_only_columns(*key_columns).where(tuple_(*key_columns).in_(keys))
+        )}
+        result.statements += 1
+
+        if insert is None:
+            _fallback_upsert(session, table, chunk, conflict_columns, update_columns, existing, result)
+            continue
+
+        session.execute(stmt, chunk)
+        result.statements += 1
+        result.updated += sum(1 for key in keys if key in existing)
+        result.inserted += sum(1 for key in keys if key not in existing)
+
+    logger.debug(f"批量 upsert {table.name}: 新增 {result.inserted}, 更新 {result.updated}, 语句 {result.statements}")
+    return result
+
+
+def _fallback_upsert(session, table, chunk, conflict_columns, update_columns, existing, result):
+    """不支持冲突子句的数据库: 新记录批量插入, 已存在的记录按唯一键批量更新"""
+    new_rows, old_rows = [], []
+    for row in chunk:
+        key = tuple(row[c] for c in conflict_columns)
+        (old_rows if key in existing else new_rows).append(row)
+    if new_rows:
+        session.execute(table.insert(), new_rows)
+        result.statements += 1
+    if old_rows and update_columns:
+        stmt = table.update().where(
+            *[table.c[c] == bindparam(f'key_{c}') for c in conflict_columns]
+        ).values({c: bindparam(f'val_{c}') for c in update_columns})
+        params = [
+            dict({f'key_{c}': row[c] for c in conflict_columns}, **{f'val_{c}': row[c] for c in update_columns})
+            for row in old_rows
+        ]
+        session.execute(stmt, params)
+        result.statements += 1
+    result.inserted += len(new_rows)
+    result.updated += len(old_rows)
@@ -0,0 +1,248 @@
+# -*- coding: utf-8 -*-
+"""
+领星基础数据响应缓存
+店铺、市场、品牌、分类等数据一天只变化几次, 缓存后避免每个请求都调用远程接口。
+默认使用进程内 LRU+TTL 缓存, 配置 CACHE_BACKEND=redis 时改用 Redis(多进程共享);
+并发的相同未命中请求只加载一次(single-flight), 对应的写接口成功后主动失效
+"""
+
+import asyncio
+import json
+import logging
+import time
+from collections import OrderedDict
+from functools import wraps
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+import orjson
+
+from app.config import settings
+
+try:
+    import redis.asyncio as aioredis
+except ImportError:
+    aioredis = None
+
+# 配置日志记录器
+logger = logging.getLogger(__name__)
+
+
+class MemoryCache(object):
+    """
+    进程内 LRU 缓存, 每个条目带过期时间
+    与 RedisCache 接口一致, 未部署 Redis 时(包括测试环境)作为替代
+    缓存的对象会被多个请求共享, 调用方不应修改返回值
+    """
+
+    def __init__(self, max_size: int = 1000, ttl: int = 3600):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._data: 'OrderedDict[str, tuple]' = OrderedDict()
+
+    async def get(self, key: str) -> Optional[Any]:
+        item = self._data.get(key)
+        if item is None:
+            return None
+        expire_at, value = item
+        if expire_at <= time.monotonic():
+            del self._data[key]
+            return None
+        self._data.move_to_end(key)
+        return value
+
+    async def set(self, key: str, value: Any, ttl: Optional[int] = None):
+        self._data[key] = (time.monotonic() + (ttl or self.ttl), value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_size:
+            self._data.popitem(last=False)
+
+    async def delete_prefix(self, prefix: str) -> int:
+        keys = [k for k in self._data if k.startswith(prefix)]
+        for key in keys:
+            del self._data[key]
+        return len(keys)
+
+    async def close(self):
+        self._data.clear()
+
+    def size(self) -> int:
+        return len(self._data)
+
+
+class RedisCache(object):
+    """Redis 缓存, 值以 JSON 存储, 多个进程/实例共享"""
+
+    def __init__(self, url: Optional[str] = None, ttl: int = 3600,
+                 prefix: str = 'rpa_tornado:cache:', client: Any = None):
+        """
+        :param url: Redis 连接地址
+        :param ttl: 默认过期时间(秒)
+        :param prefix: 键前缀
+        :param client: 已创建的 redis.asyncio 客户端, 传入时忽略 url
+        """
+        if client is None:
+            if aioredis is None:
+                raise ImportError("使用 Redis 缓存需要安装 redis: pip install redis")
+            client = aioredis.from_url(url)
+        self.client = client
+        self.ttl = ttl
+        self.prefix = prefix
+
+    async def get(self, key: str) -> Optional[Any]:
+        raw = await self.client.get(self.prefix + key)
+        return orjson.loads(raw) if raw is not None else None
+
+    async def set(self, key: str, value: Any, ttl: Optional[int] = None):
+        await self.client.set(self.prefix + key, orjson.dumps(value), ex=ttl or self.ttl)
+
+    async def delete_prefix(self, prefix: str) -> int:
+        keys = [k async for k in self.client.scan_iter(match=self.prefix + prefix + '*')]
+        if keys:
+            await self.client.delete(*keys)
+        return len(keys)
+
+    async def close(self):
+        await self.client.close()
+
+    def size(self) -> Optional[int]:
+        return None
+
+
+class ResponseCache(object):
+    """按命名空间组织的响应缓存, 提供 single-flight 加载、失效和命中率统计"""
+
+    def __init__(self, backend):
+        self.backend = backend
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._stats: Dict[str, Dict[str, int]] = {}
+        # 每次失效递增, 失效前发起的加载结果不再写入缓存
+        self._generations: Dict[str, int] = {}
+
+    def _ns_stats(self, namespace: str) -> Dict[str, int]:
+        stats = self._stats.get(namespace)
+        if stats is None:
+            stats = self._stats[namespace] = {'hits': 0, 'misses': 0, 'coalesced': 0,
+                                              'load_errors': 0, 'invalidations': 0}
+        return stats
+
+    async def get_or_load(self, namespace: str, key: str,
+                          loader: Callable[[], Awaitable[Any]], ttl: Optional[int] = None) -> Any:
+        """
+        读取缓存, 未命中时调用 loader 加载并写入缓存
+        同一 key 的并发未命中只会调用一次 loader, 其余请求等待同一结果
+        """
+        full_key = f'{namespace}:{key}'
+        stats = self._ns_stats(namespace)
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            self._inflight = {}
+
+        try:
+            value = await self.backend.get(full_key)
+        except Exception as e:
+            logger.warning(f"读取缓存失败, 直接调用接口: {full_key}, {e}")
+            value = None
+        if value is not None:
+            stats['hits'] += 1
+            return value
+
+        stats['misses'] += 1
+        future = self._inflight.get(full_key)
+        if future is not None:
+            stats['coalesced'] += 1
+            return await asyncio.shield(future)
+
+        future = asyncio.ensure_future(self._load(namespace, full_key, loader, ttl))
+        self._inflight[full_key] = future
+        future.add_done_callback(lambda f: self._clear_inflight(full_key, f))
+        return await asyncio.shield(future)
+
+    def _clear_inflight(self, full_key: str, future: asyncio.Future):
+        if self._inflight.get(full_key) is future:
+            del self._inflight[full_key]
+
+    async def _load(self, namespace: str, full_key: str,
+                    loader: Callable[[], Awaitable[Any]], ttl: Optional[int]) -> Any:
+        generation = self._generations.get(namespace, 0)
+        try:
+            value = await loader()
+        except Exception:
+            self._ns_stats(namespace)['load_errors'] += 1
+            raise
+        if value is not None and generation == self._generations.get(namespace, 0):
+            try:
+                await self.backend.set(full_key, value, ttl)
+            except Exception as e:
+                logger.warning(f"写入缓存失败: {full_key}, {e}")
+        return value
+
+    async def invalidate(self, *namespaces: str):
+        """清除命名空间下的全部缓存"""
+        for namespace in namespaces:
+            self._ns_stats(namespace)['invalidations'] += 1
+            self._generations[namespace] = self._generations.get(namespace, 0) + 1
+            for full_key in [k for k in self._inflight if k.startswith(f'{namespace}:')]:
+                del self._inflight[full_key]
+            try:
+                count = await self.backend.delete_prefix(f'{namespace}:')
+                logger.info(f"缓存已失效: {namespace}, 清除 {count} 条")
+            except Exception as e:
+                logger.warning(f"清除缓存失败: {namespace}, {e}")
+
+    async def close(self):
+        await self.backend.close()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """缓存指标: 各命名空间的命中/未命中/合并/失效次数及命中率"""
+        namespaces = {}
+        for namespace, stats in self._stats.items():
+            lookups = stats['hits'] + stats['misses']
+            namespaces[namespace] = dict(stats, hit_rate=round(stats['hits'] / lookups, 4) if lookups else None)
+        return {
+            'backend': type(self.backend).__name__,
+            'size': self.backend.size(),
+            'namespaces': namespaces
+        }
+
+
+def _build_backend():
+    """按配置创建缓存后端, Redis 不可用时退回进程内缓存"""
+    if settings.CACHE_BACKEND == 'redis':
+        if aioredis is not None:
+            return RedisCache(settings.REDIS_URL, ttl=settings.CACHE_TTL)
+        logger.warning("CACHE_BACKEND=redis 但未安装 redis, 改用进程内缓存")
+    return MemoryCache(max_size=settings.CACHE_MAX_SIZE, ttl=settings.CACHE_TTL)
+
+
+# 全局响应缓存
+response_cache = ResponseCache(_build_backend())
+
+
+def cached(namespace: str, ttl: Optional[int] = None):
+    """
+    缓存服务方法的返回值, 方法签名需为 (self, access_token, *args, **kwargs)
+    缓存键只由 access_token 之外的参数组成, 令牌续约后缓存仍然有效
+    """
+    def decorator(func):
+        @wraps(func)
+        async def wrapper(self, access_token, *args, **kwargs):
+            key = json.dumps([args, kwargs], sort_keys=True, ensure_ascii=False, default=str)
+            return await response_cache.get_or_load(
+                namespace, key, lambda: func(self, access_token, *args, **kwargs), ttl
+            )
+        return wrapper
+    return decorator
+
+
+def invalidates(*namespaces: str):
+    """写接口调用成功(未抛出异常)后清除对应命名空间的缓存"""
+    def decorator(func):
+        @wraps(func)
+        async def wrapper(*args, **kwargs):
+            result = await func(*args, **kwargs)
+            await response_cache.invalidate(*namespaces)
+            return result
+        return wrapper
+    return decorator
@@ -4,14 +4,21 @@
 提供数据库会话管理和连接池功能
 """
 
+import asyncio
+import functools
 import logging
 import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from contextlib import contextmanager
-from typing import Generator
-from sqlalchemy import create_engine, MetaData
+from typing import Any, Callable, Dict, Generator, Optional, TypeVar
+from sqlalchemy import create_engine, event, MetaData
 from sqlalchemy.orm import sessionmaker, Session
 from sqlalchemy.pool import QueuePool
 
+from .metrics import DB_CALL_DURATION, DB_CALL_WAIT, DB_QUERY_DURATION
+
 # 配置日志记录器
 logger = logging.getLogger(__name__)
 
@@ -19,30 +26,50 @@ logger = logging.getLogger(__name__)
 engine = None
 SessionLocal = None
 
+T = TypeVar('T')
+
+# 执行数据库调用的线程池, 首次使用时创建(按进程创建, fork 出的子进程会重新创建)
+_db_executor: Optional[ThreadPoolExecutor] = None
+_db_executor_pid: Optional[int] = None
+_db_executor_workers = 0
+_db_executor_lock = threading.Lock()
+_db_stats_lock = threading.Lock()
+_db_stats = {'submitted': 0, 'active': 0, 'failed': 0, 'total_wait': 0.0, 'max_wait': 0.0}
+
 
-def init_database(database_url: str = None):
+def init_database(database_url: str = None, pool_size: int = None, max_overflow: int = None,
+                  executor_workers: int = None):
     """
     初始化数据库连接
     
     Args:
         database_url: 数据库连接URL，如果为None则从环境变量读取
+        pool_size: 连接池常驻连接数，如果为None则从环境变量 DB_POOL_SIZE 读取
+        max_overflow: 连接池允许的额外连接数，如果为None则从环境变量 DB_MAX_OVERFLOW 读取
+        executor_workers: 数据库线程池大小，0 表示 cpu_count + 4，为None则从环境变量 DB_EXECUTOR_WORKERS 读取
     """
     if database_url is None:
         # 从环境变量读取数据库配置
         database_url = os.getenv('DATABASE_URL', 'sqlite:///./data/dashboard.db')
-    global engine, SessionLocal
+    if pool_size is None:
+        pool_size = int(os.getenv('DB_POOL_SIZE', '5'))
+    if max_overflow is None:
+        max_overflow = int(os.getenv('DB_MAX_OVERFLOW', '10'))
+    global engine, SessionLocal, _db_executor_workers
     
     try:
         # 创建数据库引擎
         engine = create_engine(
             database_url,
             poolclass=QueuePool,
-            pool_size=5,
-            max_overflow=10,
+            pool_size=pool_size,
+            max_overflow=max_overflow,
             pool_pre_ping=True,
             echo=False  # 设置为True可以看到SQL语句
         )
         
+        _instrument_engine(engine)
+        
         # 创建会话工厂
         SessionLocal = sessionmaker(
             autocommit=False,
@@ -50,6 +77,13 @@ def init_database(database_url: str = None):
             bind=engine
         )
         
+        # 线程池大小不超过连接池容量, 工作线程取连接时不会因连接池耗尽而阻塞;
+        # 未配置时沿用标准库的 cpu_count + 4, 避免查询线程过多与事件循环争抢 CPU
+        workers = executor_workers if executor_workers is not None else int(os.getenv('DB_EXECUTOR_WORKERS', '0'))
+        if workers <= 0:
+            workers = (os.cpu_count() or 1) + 4
+        _db_executor_workers = min(workers, pool_size + max_overflow)
+        
         logger.info(f"数据库连接初始化成功: {database_url}")
         
     except Exception as e:
@@ -57,12 +91,33 @@ def init_database(database_url: str = None):
         raise
 
 
+def _instrument_engine(db_engine):
+    """记录每条 SQL 语句的执行耗时, 按语句类型（SELECT/INSERT/UPDATE/DELETE 等）分组"""
+    @event.listens_for(db_engine, 'before_cursor_execute')
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault('query_start', []).append(time.perf_counter())
+
+    @event.listens_for(db_engine, 'after_cursor_execute')
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        start = conn.info['query_start'].pop()
+        verb = statement.lstrip()[:6].upper()
+        DB_QUERY_DURATION.observe(time.perf_counter() - start, (verb if verb.isalpha() else 'OTHER',))
+
+    @event.listens_for(db_engine, 'handle_error')
+    def handle_error(context):
+        # 执行失败时 after_cursor_execute 不会触发, 丢弃对应的开始时间
+        starts = context.connection.info.get('query_start') if context.connection is not None else None
+        if starts:
+            starts.pop()
+
+
 def create_tables():
     """
     创建数据库表
     """
     try:
         from ..models.dashboard_models import Base
+        from ..models import sync_models  # noqa: F401  注册同步任务相关的表
         
         if engine is None:
             raise RuntimeError("数据库引擎未初始化，请先调用 init_database()")
@@ -71,6 +126,14 @@ def create_tables():
         Base.metadata.create_all(bind=engine)
         logger.info("数据库表创建成功")
         
+        # 每日销售汇总由 sales 派生：升级前的旧库汇总为空时自动回填
+        from ..models.dashboard_models import DailySalesRollup
+        with get_db_session() as session:
+            DailySalesRollup.ensure_built(session)
+        # 同步单元表在旧库中可能缺少后加的列
+        with get_db_session() as session:
+            sync_models.SyncTaskUnit.ensure_columns(session)
+        
     except Exception as e:
         logger.error(f"数据库表创建失败: {str(e)}")
         raise
@@ -112,11 +175,100 @@ def get_db() -> Session:
     return SessionLocal()
 
 
+def _get_executor() -> ThreadPoolExecutor:
+    """获取当前进程的数据库线程池"""
+    global _db_executor, _db_executor_pid
+    pid = os.getpid()
+    if _db_executor is None or _db_executor_pid != pid:
+        with _db_executor_lock:
+            if _db_executor is None or _db_executor_pid != pid:
+                _db_executor = ThreadPoolExecutor(
+                    max_workers=_db_executor_workers or 5,
+                    thread_name_prefix='db'
+                )
+                _db_executor_pid = pid
+    return _db_executor
+
+
+def _tracked(func: Callable[..., T], submitted_at: float) -> T:
+    """在工作线程中执行数据库调用并记录排队时间"""
+    started_at = time.perf_counter()
+    wait = started_at - submitted_at
+    DB_CALL_WAIT.observe(wait)
+    with _db_stats_lock:
+        _db_stats['total_wait'] += wait
+        _db_stats['max_wait'] = max(_db_stats['max_wait'], wait)
+        _db_stats['active'] += 1
+    outcome = 'error'
+    try:
+        result = func()
+        outcome = 'ok'
+        return result
+    except Exception:
+        with _db_stats_lock:
+            _db_stats['failed'] += 1
+        raise
+    finally:
+        DB_CALL_DURATION.observe(time.perf_counter() - started_at, (outcome,))
+        with _db_stats_lock:
+            _db_stats['active'] -= 1
+
+
+async def run_in_db(func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """
+    在数据库线程池中执行同步的数据库调用, 不阻塞事件循环
+    
+    同时执行的调用数不超过线程池大小(不超过连接池容量 pool_size + max_overflow), 超出的调用在线程池中排队
+    
+    Args:
+        func: 同步函数
+        *args: 位置参数
+        **kwargs: 关键字参数
+        
+    Returns:
+        func 的返回值
+    """
+    loop = asyncio.get_running_loop()
+    _db_stats['submitted'] += 1
+    call = functools.partial(func, *args, **kwargs)
+    return await loop.run_in_executor(_get_executor(), _tracked, call, time.perf_counter())
+
+
+async def run_in_session(func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """
+    在数据库线程池中打开会话并执行 func(session, *args, **kwargs), 正常返回时提交事务
+    
+    func 中不要返回 ORM 对象(会话关闭后无法加载属性), 应在函数内转换为字典等普通数据
+    """
+    def call():
+        with get_db_session() as session:
+            return func(session, *args, **kwargs)
+    return await run_in_db(call)
+
+
+def get_db_stats() -> Dict[str, Any]:
+    """连接池与数据库线程池状态"""
+    submitted = _db_stats['submitted']
+    return {
+        'pool': engine.pool.status() if engine is not None else None,
+        'executor_workers': _db_executor_workers,
+        'submitted': submitted,
+        'active': _db_stats['active'],
+        'failed': _db_stats['failed'],
+        'avg_wait_ms': round(_db_stats['total_wait'] / submitted * 1000, 3) if submitted else None,
+        'max_wait_ms': round(_db_stats['max_wait'] * 1000, 3)
+    }
+
+
 def close_database():
     """
     关闭数据库连接
     """
-    global engine
+    global engine, _db_executor
+    
+    if _db_executor is not None:
+        _db_executor.shutdown(wait=True)
+        _db_executor = None
     
     if engine:
         engine.dispose()
@@ -0,0 +1,300 @@
+# -*- coding: utf-8 -*-
+"""
+运行指标
+进程内的计数器/仪表/直方图, 以 Prometheus 文本格式(0.0.4)在独立端口的 /metrics 上暴露。
+记录路径只做一次字典查找、一次二分查找和几次整数加法, 不依赖 prometheus_client;
+在数据库线程中记录的指标使用锁, 其余指标只在事件循环线程中更新, 不加锁。
+多进程模式下每个工作进程各自暴露指标, 端口为 METRICS_PORT + 工作进程编号
+"""
+
+import logging
+import math
+import threading
+from bisect import bisect_left
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import tornado.httpserver
+import tornado.web
+from tornado import httputil
+
+from app.auth.openapi import set_request_observer
+
+# 配置日志记录器
+logger = logging.getLogger(__name__)
+
+# 默认的耗时分桶（秒）
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def _escape(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence, extra: str = '') -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _format_value(value: float) -> str:
+    if math.isnan(value):
+        return 'NaN'
+    if math.isinf(value):
+        return '+Inf' if value > 0 else '-Inf'
+    if value == int(value):
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Metric(object):
+    """指标基类, 按标签值元组保存各序列"""
+    kind = ''
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 lock: Optional[threading.Lock] = None):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = lock
+
+    def _header(self) -> List[str]:
+        return [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} {self.kind}']
+
+    def render(self) -> List[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    """只增不减的计数器"""
+    kind = 'counter'
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: Dict[Tuple, float] = {}
+
+    def inc(self, labels: Tuple = (), amount: float = 1):
+        if self._lock is None:
+            self._values[labels] = self._values.get(labels, 0) + amount
+        else:
+            with self._lock:
+                self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self) -> List[str]:
+        lines = self._header()
+        for labels, value in list(self._values.items()):
+            lines.append(f'{self.name}_total{_format_labels(self.labelnames, labels)} {_format_value(value)}')
+        return lines
+
+
+class Gauge(_Metric):
+    """可增可减的仪表, 也可以绑定一个在采集时取值的函数"""
+    kind = 'gauge'
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: Dict[Tuple, float] = {}
+        self._function: Optional[Callable[[], float]] = None
+
+    def inc(self, labels: Tuple = (), amount: float = 1):
+        self._values[labels] = self._values.get(labels, 0) + amount
+
+    def dec(self, labels: Tuple = (), amount: float = 1):
+        self._values[labels] = self._values.get(labels, 0) - amount
+
+    def set(self, value: float, labels: Tuple = ()):
+        self._values[labels] = value
+
+    def set_function(self, function: Callable[[], float]):
+        """采集时调用 function 取值（无标签）"""
+        self._function = function
+
+    def render(self) -> List[str]:
+        lines = self._header()
+        if self._function is not None:
+            try:
+                lines.append(f'{self.name} {_format_value(self._function())}')
+            except Exception as e:
+                logger.warning(f"采集指标 {self.name} 失败: {e}")
+            return lines
+        for labels, value in list(self._values.items()):
+            lines.append(f'{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}')
+        return lines
+
+
+class Histogram(_Metric):
+    """
+    直方图
+    每个序列是一个列表: 前 len(buckets)+1 项为各分桶(最后一项为 +Inf)的非累计计数, 末项为累计和;
+    采集时再换算为 Prometheus 要求的累计计数
+    """
+    kind = 'histogram'
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS, lock: Optional[threading.Lock] = None):
+        super().__init__(name, documentation, labelnames, lock)
+        self._upper = tuple(sorted(buckets))
+        self._size = len(self._upper) + 1
+        self._series: Dict[Tuple, list] = {}
+
+    def observe(self, value: float, labels: Tuple = ()):
+        if self._lock is None:
+            self._observe(value, labels)
+        else:
+            with self._lock:
+                self._observe(value, labels)
+
+    def _observe(self, value: float, labels: Tuple):
+        series = self._series.get(labels)
+        if series is None:
+            series = self._series[labels] = [0] * self._size + [0.0]
+        # le 为闭区间: value <= upper 的第一个分桶
+        series[bisect_left(self._upper, value)] += 1
+        series[-1] += value
+
+    def _snapshot(self) -> List[Tuple[Tuple, list]]:
+        if self._lock is None:
+            return [(labels, list(series)) for labels, series in list(self._series.items())]
+        with self._lock:
+            return [(labels, list(series)) for labels, series in self._series.items()]
+
+    def render(self) -> List[str]:
+        lines = self._header()
+        for labels, series in self._snapshot():
+            cumulative = 0
+            for upper, count in zip(self._upper + (float('inf'),), series):
+                cumulative += count
+                le = '+Inf' if upper == float('inf') else _format_value(upper)
+                bucket_labels = _format_labels(self.labelnames, labels, 'le="' + le + '"')
+                lines.append(f'{self.name}_bucket{bucket_labels} {cumulative}')
+            label_str = _format_labels(self.labelnames, labels)
+            lines.append(f'{self.name}_sum{label_str} {_format_value(series[-1])}')
+            lines.append(f'{self.name}_count{label_str} {cumulative}')
+        return lines
+
+
+class MetricsRegistry(object):
+    """指标注册表"""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+
+    def _register(self, metric: _Metric) -> _Metric:
+        if metric.name in self._metrics:
+            raise ValueError(f"指标 {metric.name} 已注册")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                threadsafe: bool = False) -> Counter:
+        return self._register(Counter(name, documentation, labelnames, threading.Lock() if threadsafe else None))
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS, threadsafe: bool = False) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets,
+                                        threading.Lock() if threadsafe else None))
+
+    def render(self) -> str:
+        """Prometheus 文本格式"""
+        lines = []
+        for metric in list(self._metrics.values()):
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+# 全局指标注册表
+metrics = MetricsRegistry()
+
+HTTP_REQUEST_DURATION = metrics.histogram(
+    'http_request_duration_seconds', '处理请求的耗时（按处理器、方法、状态码）', ('handler', 'method', 'status'))
+HTTP_REQUESTS_IN_FLIGHT = metrics.gauge('http_requests_in_flight', '正在处理的请求数')
+LLX_REQUEST_DURATION = metrics.histogram(
+    'llx_request_duration_seconds', '领星接口单次调用耗时（不含限流排队）', ('route_name', 'outcome'))
+LLX_TOKEN_REFRESH_DURATION = metrics.histogram(
+    'llx_token_refresh_duration_seconds', '获取/续约 access_token 的耗时', ('outcome',))
+DB_CALL_DURATION = metrics.histogram(
+    'db_call_duration_seconds', '数据库线程池中一次调用（含事务提交）的执行耗时', ('outcome',), threadsafe=True)
+DB_CALL_WAIT = metrics.histogram(
+    'db_call_wait_seconds', '数据库调用在线程池中的排队时间', threadsafe=True)
+DB_QUERY_DURATION = metrics.histogram(
+    'db_query_duration_seconds', '单条 SQL 语句的执行耗时（按语句类型）', ('statement',), threadsafe=True)
+
+# 领星出站请求耗时
+set_request_observer(lambda route_name, outcome, seconds: LLX_REQUEST_DURATION.observe(seconds, (route_name, outcome)))
+
+
+class InFlightDelegate(httputil.HTTPMessageDelegate):
+    """
+    包装 Application.find_handler 返回的 delegate, 统计正在处理的请求数: 收到请求头时加一;
+    请求结束(Application.log_request)或请求体读完之前连接关闭(客户端中途断开、请求格式错误,
+    这时不会执行处理器, 也不会调用 log_request)时减一, 同一请求只减一次
+    """
+
+    def __init__(self, delegate: httputil.HTTPMessageDelegate, request: httputil.HTTPServerRequest):
+        self.delegate = delegate
+        self._released = False
+        request.in_flight = self
+        HTTP_REQUESTS_IN_FLIGHT.inc()
+
+    def release(self):
+        if not self._released:
+            self._released = True
+            HTTP_REQUESTS_IN_FLIGHT.dec()
+
+    def headers_received(self, start_line, headers):
+        return self.delegate.headers_received(start_line, headers)
+
+    def data_received(self, chunk):
+        return self.delegate.data_received(chunk)
+
+    def finish(self):
+        return self.delegate.finish()
+
+    def on_connection_close(self):
+        try:
+            return self.delegate.on_connection_close()
+        finally:
+            self.release()
+
+    def __getattr__(self, name):
+        # execute 等 _HandlerDelegate 的其他属性
+        return getattr(self.delegate, name)
+
+
+def track_request(request: httputil.HTTPServerRequest,
+                  delegate: httputil.HTTPMessageDelegate) -> InFlightDelegate:
+    """请求开始（Application.find_handler 中调用）, 返回包装后的 delegate"""
+    return InFlightDelegate(delegate, request)
+
+
+def request_finished(handler: tornado.web.RequestHandler):
+    """请求结束（Application.log_request 中调用）"""
+    in_flight = getattr(handler.request, 'in_flight', None)
+    if in_flight is not None:
+        in_flight.release()
+    HTTP_REQUEST_DURATION.observe(
+        handler.request.request_time(),
+        (type(handler).__name__, handler.request.method, handler.get_status())
+    )
+
+
+class MetricsHandler(tornado.web.RequestHandler):
+    """Prometheus 采集接口"""
+
+    def get(self):
+        self.set_header('Content-Type', CONTENT_TYPE)
+        self.write(metrics.render())
+
+
+def start_metrics_server(port: int, address: str = '') -> tornado.httpserver.HTTPServer:
+    """在独立端口上启动 /metrics, 与业务端口分开, 不经过业务中间件和日志"""
+    app = tornado.web.Application([('/metrics', MetricsHandler)])
+    server = tornado.httpserver.HTTPServer(app)
+    server.listen(port, address=address)
+    logger.info(f"指标接口已启动: http://{address or '0.0.0.0'}:{port}/metrics")
+    return server
@@ -1,11 +1,14 @@
 # 安全相关模块
 # 包含认证、授权、加密等安全功能
 
-from .rate_limiter import RateLimiter, TokenBucket
+from .rate_limiter import AsyncRateLimiter, RateLimiter, RateLimitResult, RedisRateLimiter, TokenBucket
 from .validators import validate_request_data, sanitize_input
 
 __all__ = [
     'RateLimiter',
+    'AsyncRateLimiter',
+    'RedisRateLimiter',
+    'RateLimitResult',
     'TokenBucket',
     'validate_request_data',
     'sanitize_input'
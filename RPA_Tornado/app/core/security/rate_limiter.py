@@ -1,18 +1,34 @@
 # 限流器模块
 # 实现API请求的限流功能，防止接口被恶意调用
+#
+# 限流键按哈希分到多个分片, 每个分片用 dict(键 -> 槽位) + array('d') 保存令牌数、上次更新时间、容量和速率,
+# 每个键只占 4 个 double 和一个字典项, 不再为每个 IP/用户创建一个带锁的 TokenBucket 对象。
+# 闲置到令牌已经补满的桶与新建的桶完全等价, 定期按分片轮流回收, 回收不会改变限流结果。
+#   - RateLimiter:       线程安全版本, 每个分片一把锁, 没有全局锁
+#   - AsyncRateLimiter:  asyncio 版本, 只在事件循环线程中使用, 不加锁
+#   - RedisRateLimiter:  共享后端, 多个工作进程/实例共用同一组令牌桶(Lua 脚本原子执行)
 
+import asyncio
 import time
-from typing import Dict, Optional
+from array import array
 from threading import Lock
+from typing import Any, Dict, List, NamedTuple, Optional
+
+from app.config import settings
+
+try:
+    import redis.asyncio as aioredis
+except ImportError:
+    aioredis = None
 
 
 class TokenBucket:
     """令牌桶算法实现"""
-    
+
     def __init__(self, capacity: int, refill_rate: float):
         """
         初始化令牌桶
-        
+
         Args:
             capacity: 桶容量
             refill_rate: 令牌补充速率（每秒补充的令牌数）
@@ -22,99 +38,410 @@ class TokenBucket:
         self.refill_rate = refill_rate
         self.last_refill = time.time()
         self.lock = Lock()
-    
+
     def consume(self, tokens: int = 1) -> bool:
         """
         消费令牌
-        
+
         Args:
             tokens: 需要消费的令牌数
-            
+
         Returns:
             bool: 是否成功消费令牌
         """
         with self.lock:
             self._refill()
-            
+
             if self.tokens >= tokens:
                 self.tokens -= tokens
                 return True
             return False
-    
+
     def _refill(self):
         """补充令牌"""
         now = time.time()
         time_passed = now - self.last_refill
         tokens_to_add = time_passed * self.refill_rate
-        
+
         self.tokens = min(self.capacity, self.tokens + tokens_to_add)
         self.last_refill = now
 
 
-class RateLimiter:
-    """限流器"""
-    
-    def __init__(self):
-        self.buckets: Dict[str, TokenBucket] = {}
-        self.lock = Lock()
-    
+class RateLimitResult(NamedTuple):
+    """一次限流检查的结果"""
+    allowed: bool
+    remaining: float      # 检查后桶内剩余令牌数
+    retry_after: float    # 被拒绝时还需等待的秒数, 允许时为 0
+
+
+class _Shard(object):
+    """一个分片: 键 -> 槽位, 槽位上的状态保存在定长 double 数组中, 回收的槽位放入空闲列表复用"""
+    __slots__ = ('index', 'tokens', 'stamp', 'capacity', 'rate', 'free', 'lock')
+
+    def __init__(self, lock: Optional[Lock]):
+        self.index: Dict[str, int] = {}
+        self.tokens = array('d')
+        self.stamp = array('d')
+        self.capacity = array('d')
+        self.rate = array('d')
+        self.free: List[int] = []
+        self.lock = lock
+
+    def take(self, key: str, capacity: float, refill_rate: float, requested: float, now: float):
+        """补充并消费令牌, 返回 (是否允许, 剩余令牌数)"""
+        slot = self.index.get(key)
+        if slot is None:
+            tokens = capacity
+            if self.free:
+                slot = self.free.pop()
+                self.stamp[slot] = now
+                self.capacity[slot] = capacity
+                self.rate[slot] = refill_rate
+            else:
+                slot = len(self.tokens)
+                self.tokens.append(capacity)
+                self.stamp.append(now)
+                self.capacity.append(capacity)
+                self.rate.append(refill_rate)
+            self.index[key] = slot
+        else:
+            tokens = self.tokens[slot] + (now - self.stamp[slot]) * refill_rate
+            if tokens > capacity:
+                tokens = capacity
+            self.stamp[slot] = now
+            # 同一个键的限流配置通常不变, 只在变化时写入
+            if self.rate[slot] != refill_rate or self.capacity[slot] != capacity:
+                self.capacity[slot] = capacity
+                self.rate[slot] = refill_rate
+        if tokens >= requested:
+            tokens -= requested
+            self.tokens[slot] = tokens
+            return True, tokens
+        self.tokens[slot] = tokens
+        return False, tokens
+
+    def status(self, key: str, now: float) -> Optional[Dict[str, float]]:
+        slot = self.index.get(key)
+        if slot is None:
+            return None
+        capacity, rate = self.capacity[slot], self.rate[slot]
+        return {
+            'capacity': capacity,
+            'tokens': min(capacity, self.tokens[slot] + (now - self.stamp[slot]) * rate),
+            'refill_rate': rate
+        }
+
+    def delete(self, key: str):
+        slot = self.index.pop(key, None)
+        if slot is not None:
+            self.free.append(slot)
+
+    def evict(self, now: float, idle_ttl: float) -> int:
+        """回收至少闲置 idle_ttl 秒且令牌已补满的桶(与新建的桶等价)"""
+        tokens, stamp, capacity, rate = self.tokens, self.stamp, self.capacity, self.rate
+        expired = []
+        for key, slot in self.index.items():
+            idle = now - stamp[slot]
+            if idle >= idle_ttl and (rate[slot] <= 0 and tokens[slot] >= capacity[slot]
+                                     or rate[slot] > 0 and tokens[slot] + idle * rate[slot] >= capacity[slot]):
+                expired.append(key)
+        for key in expired:
+            self.free.append(self.index.pop(key))
+        # 大部分键已回收时收缩数组, 否则保留空闲槽位复用
+        if self.free and len(self.free) > 1024 and len(self.free) * 2 > len(tokens):
+            self._compact()
+        return len(expired)
+
+    def _compact(self):
+        order = list(self.index.items())
+        self.tokens = array('d', (self.tokens[slot] for _, slot in order))
+        self.stamp = array('d', (self.stamp[slot] for _, slot in order))
+        self.capacity = array('d', (self.capacity[slot] for _, slot in order))
+        self.rate = array('d', (self.rate[slot] for _, slot in order))
+        self.index = {key: i for i, (key, _) in enumerate(order)}
+        self.free = []
+
+
+# 跳过 NamedTuple.__new__ 的参数处理, 请求路径上每次构造结果省去约一半开销
+_new_result = tuple.__new__
+
+
+def _result(allowed: bool, remaining: float, requested: float, refill_rate: float) -> RateLimitResult:
+    if allowed:
+        return _new_result(RateLimitResult, (True, remaining, 0.0))
+    return _new_result(RateLimitResult, (False, remaining,
+                                         (requested - remaining) / refill_rate if refill_rate > 0 else float('inf')))
+
+
+class _ShardedBuckets(object):
+    """分片令牌桶的公共部分: 分片选择、按分片轮流回收闲置桶、统计"""
+
+    def __init__(self, shards: int, idle_ttl: float, sweep_interval: float, threadsafe: bool):
+        size = 1
+        while size < max(1, shards):
+            size <<= 1
+        self._mask = size - 1
+        self._shards = [_Shard(Lock() if threadsafe else None) for _ in range(size)]
+        self.idle_ttl = idle_ttl
+        # 每个分片的回收间隔为 sweep_interval, 各分片错开, 单次回收只扫描一个分片
+        self._sweep_step = sweep_interval / size
+        self._next_sweep = time.monotonic() + self._sweep_step
+        self._sweep_cursor = 0
+        self._sweep_lock = Lock() if threadsafe else None
+        self._evicted = 0
+
+    def _shard(self, key: str) -> _Shard:
+        # 分片只在进程内使用, 直接用 str 的哈希值(已缓存在字符串对象上)
+        return self._shards[hash(key) & self._mask]
+
+    def _sweep_one(self, now: float) -> int:
+        shard = self._shards[self._sweep_cursor]
+        self._sweep_cursor = (self._sweep_cursor + 1) & self._mask
+        self._next_sweep = now + self._sweep_step
+        if shard.lock is None:
+            evicted = shard.evict(now, self.idle_ttl)
+        else:
+            with shard.lock:
+                evicted = shard.evict(now, self.idle_ttl)
+        self._evicted += evicted
+        return evicted
+
+    def evict_idle(self) -> int:
+        """立即回收全部分片中的闲置桶"""
+        now = time.monotonic()
+        return sum(self._sweep_one(now) for _ in range(len(self._shards)))
+
+    def size(self) -> int:
+        return sum(len(shard.index) for shard in self._shards)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            'keys': self.size(),
+            'shards': len(self._shards),
+            'idle_ttl': self.idle_ttl,
+            'evicted': self._evicted
+        }
+
+
+class RateLimiter(_ShardedBuckets):
+    """线程安全的限流器, 每个分片一把锁, 不同分片上的请求互不阻塞"""
+
+    def __init__(self, shards: int = 64, idle_ttl: float = 600, sweep_interval: float = 60):
+        """
+        Args:
+            shards: 分片数（向上取整为 2 的幂）
+            idle_ttl: 桶闲置多久(且令牌已补满)后回收（秒）
+            sweep_interval: 每个分片的回收周期（秒）, 回收在请求路径上按分片轮流进行
+        """
+        super().__init__(shards, idle_ttl, sweep_interval, threadsafe=True)
+
+    def _take(self, key: str, capacity: float, refill_rate: float, tokens: float):
+        now = time.monotonic()
+        if now >= self._next_sweep and self._sweep_lock.acquire(blocking=False):
+            try:
+                self._sweep_one(now)
+            finally:
+                self._sweep_lock.release()
+        shard = self._shards[hash(key) & self._mask]
+        with shard.lock:
+            return shard.take(key, capacity, refill_rate, tokens, now)
+
+    def check(self, key: str, capacity: int = 10, refill_rate: float = 1.0, tokens: int = 1) -> RateLimitResult:
+        """检查并消费令牌, 返回是否允许、剩余令牌数和需要等待的秒数"""
+        allowed, remaining = self._take(key, capacity, refill_rate, tokens)
+        return _result(allowed, remaining, tokens, refill_rate)
+
     def is_allowed(
-        self, 
-        key: str, 
-        capacity: int = 10, 
-        refill_rate: float = 1.0, 
+        self,
+        key: str,
+        capacity: int = 10,
+        refill_rate: float = 1.0,
         tokens: int = 1
     ) -> bool:
         """
         检查是否允许请求
-        
+
         Args:
             key: 限流键（通常是IP地址或用户ID）
             capacity: 桶容量
             refill_rate: 令牌补充速率
             tokens: 需要消费的令牌数
-            
+
         Returns:
             bool: 是否允许请求
         """
-        with self.lock:
-            if key not in self.buckets:
-                self.buckets[key] = TokenBucket(capacity, refill_rate)
-            
-            return self.buckets[key].consume(tokens)
-    
+        return self._take(key, capacity, refill_rate, tokens)[0]
+
     def get_bucket_status(self, key: str) -> Optional[Dict[str, float]]:
         """
         获取桶状态
-        
+
         Args:
             key: 限流键
-            
+
         Returns:
             Dict: 桶状态信息
         """
-        if key in self.buckets:
-            bucket = self.buckets[key]
-            with bucket.lock:
-                bucket._refill()
-                return {
-                    'capacity': bucket.capacity,
-                    'tokens': bucket.tokens,
-                    'refill_rate': bucket.refill_rate
-                }
-        return None
-    
+        shard = self._shard(key)
+        with shard.lock:
+            return shard.status(key, time.monotonic())
+
     def clear_bucket(self, key: str):
         """清除指定的桶"""
-        with self.lock:
-            if key in self.buckets:
-                del self.buckets[key]
-    
+        shard = self._shard(key)
+        with shard.lock:
+            shard.delete(key)
+
     def clear_all_buckets(self):
         """清除所有桶"""
-        with self.lock:
-            self.buckets.clear()
+        for i, shard in enumerate(self._shards):
+            with shard.lock:
+                self._shards[i] = _Shard(Lock())
+
+
+class AsyncRateLimiter(_ShardedBuckets):
+    """
+    asyncio 版限流器, 只在事件循环线程中调用, 不加锁;
+    闲置桶由事件循环上的定时器按分片轮流回收, 不占用请求路径
+    """
+
+    def __init__(self, shards: int = 64, idle_ttl: float = 600, sweep_interval: float = 60):
+        super().__init__(shards, idle_ttl, sweep_interval, threadsafe=False)
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._sweep_handle: Optional[asyncio.TimerHandle] = None
+
+    def _bind_loop(self):
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            self._sweep_handle = loop.call_later(self._sweep_step, self._on_sweep_timer)
+
+    def _on_sweep_timer(self):
+        self._sweep_one(time.monotonic())
+        self._sweep_handle = self._loop.call_later(self._sweep_step, self._on_sweep_timer)
+
+    def check_nowait(self, key: str, capacity: int = 10, refill_rate: float = 1.0,
+                     tokens: int = 1) -> RateLimitResult:
+        """同步检查, 供事件循环中的同步代码使用"""
+        if self._loop is None or self._loop.is_closed():
+            self._bind_loop()
+        allowed, remaining = self._shards[hash(key) & self._mask].take(
+            key, capacity, refill_rate, tokens, time.monotonic())
+        return _result(allowed, remaining, tokens, refill_rate)
+
+    async def check(self, key: str, capacity: int = 10, refill_rate: float = 1.0,
+                    tokens: int = 1) -> RateLimitResult:
+        """检查并消费令牌（与 RedisRateLimiter 接口一致）"""
+        return self.check_nowait(key, capacity, refill_rate, tokens)
+
+    async def is_allowed(self, key: str, capacity: int = 10, refill_rate: float = 1.0, tokens: int = 1) -> bool:
+        return self.check_nowait(key, capacity, refill_rate, tokens).allowed
+
+    async def get_bucket_status(self, key: str) -> Optional[Dict[str, float]]:
+        return self._shard(key).status(key, time.monotonic())
+
+    async def clear_bucket(self, key: str):
+        self._shard(key).delete(key)
+
+    async def close(self):
+        """取消回收定时器"""
+        if self._sweep_handle is not None:
+            self._sweep_handle.cancel()
+            self._sweep_handle = None
+        self._loop = None
+
+
+# 令牌桶 Lua 脚本: 以 Redis 服务器时间计算补充的令牌, 多个进程/实例之间没有时钟偏差;
+# 桶在令牌补满所需的时间之后自动过期, 过期与新建的桶等价, 不需要额外回收
+_TOKEN_BUCKET_SCRIPT = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local requested = tonumber(ARGV[3])
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1])
+if tokens == nil then
+    tokens = capacity
+else
+    tokens = math.min(capacity, tokens + math.max(0, now - tonumber(state[2])) * rate)
+end
+local allowed = 0
+if tokens >= requested then
+    tokens = tokens - requested
+    allowed = 1
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(now))
+local ttl = 1000
+if rate > 0 then
+    ttl = math.ceil((capacity - tokens) / rate * 1000) + 1000
+else
+    ttl = 86400000
+end
+redis.call('PEXPIRE', KEYS[1], ttl)
+return {allowed, tostring(tokens)}
+"""
+
+
+class RedisRateLimiter(object):
+    """共享后端限流器, 多个工作进程/实例共用令牌桶, 接口与 AsyncRateLimiter 一致"""
+
+    def __init__(self, url: Optional[str] = None, prefix: str = 'rpa_tornado:ratelimit:', client: Any = None):
+        """
+        :param url: Redis 连接地址
+        :param prefix: 键前缀
+        :param client: 已创建的 redis.asyncio 客户端, 传入时忽略 url
+        """
+        if client is None:
+            if aioredis is None:
+                raise ImportError("使用 Redis 限流需要安装 redis: pip install redis")
+            client = aioredis.from_url(url)
+        self.client = client
+        self.prefix = prefix
+        self._script = client.register_script(_TOKEN_BUCKET_SCRIPT)
+        self._stats = {'allowed': 0, 'rejected': 0, 'errors': 0}
+
+    async def check(self, key: str, capacity: int = 10, refill_rate: float = 1.0,
+                    tokens: int = 1) -> RateLimitResult:
+        """检查并消费令牌; Redis 不可用时放行(限流不应成为单点故障)"""
+        try:
+            allowed, remaining = await self._script(keys=[self.prefix + key], args=[capacity, refill_rate, tokens])
+        except Exception:
+            self._stats['errors'] += 1
+            return RateLimitResult(True, float(capacity), 0.0)
+        remaining = float(remaining)
+        if int(allowed):
+            self._stats['allowed'] += 1
+            return RateLimitResult(True, remaining, 0.0)
+        self._stats['rejected'] += 1
+        return RateLimitResult(False, remaining, (tokens - remaining) / refill_rate if refill_rate > 0 else float('inf'))
+
+    async def is_allowed(self, key: str, capacity: int = 10, refill_rate: float = 1.0, tokens: int = 1) -> bool:
+        return (await self.check(key, capacity, refill_rate, tokens)).allowed
+
+    async def get_bucket_status(self, key: str) -> Optional[Dict[str, float]]:
+        tokens = await self.client.hget(self.prefix + key, 'tokens')
+        return {'tokens': float(tokens)} if tokens is not None else None
+
+    async def clear_bucket(self, key: str):
+        await self.client.delete(self.prefix + key)
+
+    async def close(self):
+        await self.client.close()
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {'backend': 'redis', **self._stats}
+
+
+def create_async_rate_limiter(backend: str = 'memory'):
+    """按配置创建异步限流器: memory(进程内) 或 redis(多进程共享, 使用 REDIS_URL)"""
+    if backend == 'redis':
+        return RedisRateLimiter(settings.REDIS_URL)
+    return AsyncRateLimiter(settings.RATE_LIMIT_SHARDS, settings.RATE_LIMIT_IDLE_TTL)
 
 
 # 全局限流器实例
-rate_limiter = RateLimiter()
\ No newline at end of file
+rate_limiter = RateLimiter(settings.RATE_LIMIT_SHARDS, settings.RATE_LIMIT_IDLE_TTL)
+
+# 全局异步限流器实例（处理器的异步 prepare 中使用）
+async_rate_limiter = create_async_rate_limiter(settings.RATE_LIMIT_BACKEND)
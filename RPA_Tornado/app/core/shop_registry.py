@@ -0,0 +1,235 @@
+# -*- coding: utf-8 -*-
+"""
+店铺注册表
+从领星 /erp/sc/data/seller/lists 加载全部已授权店铺, 按 seller_id、sid、市场、地区建立内存索引,
+后台定时刷新; 刷新失败时沿用上次加载成功的店铺列表, 从未成功时退回本地 shops 表
+(两种情况均为降级状态, 见 get_stats()['degraded'], 仍按重试间隔重新加载)。
+所有需要 sid 解析的服务共享同一个实例
+"""
+
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+from app.auth.openapi import OpenApiBase
+from app.config import settings
+from app.core.token_provider import token_provider
+
+# 配置日志记录器
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class ShopInfo:
+    """店铺信息（领星店铺列表字段）"""
+    sid: int
+    name: str = ''
+    seller_id: Optional[str] = None
+    mid: Optional[int] = None
+    marketplace_id: Optional[str] = None
+    country: Optional[str] = None
+    region: Optional[str] = None
+    status: Optional[int] = None
+    raw: Dict[str, Any] = field(default_factory=dict, repr=False)
+
+    @classmethod
+    def from_api(cls, item: Dict[str, Any]) -> 'ShopInfo':
+        return cls(
+            sid=int(item['sid']),
+            name=item.get('name') or item.get('seller_name') or '',
+            seller_id=item.get('seller_id'),
+            mid=item.get('mid'),
+            marketplace_id=item.get('marketplace_id'),
+            country=item.get('country'),
+            region=item.get('region'),
+            status=item.get('status'),
+            raw=item
+        )
+
+
+class ShopRegistry:
+    """店铺注册表"""
+
+    def __init__(self, api: OpenApiBase, refresh_interval: int = 3600, retry_interval: int = 60):
+        """
+        初始化店铺注册表
+
+        Args:
+            api: 领星OpenAPI客户端
+            refresh_interval: 后台刷新间隔（秒）
+            retry_interval: 刷新失败后的重试间隔（秒）
+        """
+        self.api = api
+        self.refresh_interval = refresh_interval
+        self.retry_interval = retry_interval
+
+        self._by_sid: Dict[int, ShopInfo] = {}
+        self._by_seller_id: Dict[str, List[int]] = {}
+        self._by_marketplace: Dict[str, List[int]] = {}
+        self._by_region: Dict[str, List[int]] = {}
+
+        self._loaded_at: Optional[float] = None   # 最近一次加载完整店铺列表的时间, 降级数据不计入
+        self._failed_at: Optional[float] = None   # 最近一次刷新失败的时间, 成功加载后清空
+        self._source: Optional[str] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._inflight: Optional[asyncio.Future] = None
+        self._refresh_handle: Optional[asyncio.TimerHandle] = None
+        self._stats = {'refresh_count': 0, 'failure_count': 0, 'last_error': None}
+
+    async def ensure_loaded(self):
+        """首次使用时加载店铺数据, 之后由后台定时刷新; 降级状态下距上次失败超过重试间隔时重新加载"""
+        self._bind_loop()
+        if self._loaded_at is None:
+            if self._failed_at is None or time.time() - self._failed_at >= self.retry_interval:
+                await self.refresh()
+
+    async def refresh(self):
+        """刷新店铺数据, 并发调用只触发一次远程请求"""
+        self._bind_loop()
+        if self._inflight is None:
+            self._inflight = asyncio.ensure_future(self._do_refresh())
+            self._inflight.add_done_callback(self._clear_inflight)
+        await asyncio.shield(self._inflight)
+
+    def _bind_loop(self):
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            self._inflight = None
+            self._refresh_handle = None
+
+    def _clear_inflight(self, future: asyncio.Future):
+        if self._inflight is future:
+            self._inflight = None
+
+    async def _do_refresh(self):
+        try:
+            access_token = await token_provider.get_token()
+            resp = await self.api.request(
+                access_token=access_token,
+                route_name="/erp/sc/data/seller/lists",
+                method="GET",
+                req_body=None
+            )
+            if resp.code != 0:
+                raise ValueError(f"code={resp.code}, msg={resp.message}")
+            self.load([ShopInfo.from_api(item) for item in resp.data or [] if item.get('sid')], source='api')
+            self._stats['refresh_count'] += 1
+            self._schedule_refresh(self.refresh_interval)
+            logger.info(f"店铺注册表已刷新，共 {len(self._by_sid)} 个店铺")
+        except Exception as e:
+            self._stats['failure_count'] += 1
+            self._stats['last_error'] = str(e)
+            self._failed_at = time.time()
+            if self._loaded_at is None:
+                logger.error(f"刷新店铺注册表失败，改用 shops 表，{self.retry_interval} 秒后重试: {e}")
+                await self._load_fallback()
+            else:
+                logger.error(f"刷新店铺注册表失败，沿用上次加载的 {len(self._by_sid)} 个店铺，"
+                             f"{self.retry_interval} 秒后重试: {e}")
+            self._schedule_refresh(self.retry_interval)
+
+    async def _load_fallback(self):
+        """
+        接口不可用且尚未加载成功时的降级数据: 本地 shops 表中同步过的店铺。
+        shops 表没有 seller_id 等字段, 按 seller_id、市场、地区查询在接口恢复前返回空列表。
+        不标记为已加载, ensure_loaded 会继续重试
+        """
+        shops: Dict[int, ShopInfo] = {}
+        try:
+            from app.core.database import run_in_session
+            from app.models.dashboard_models import Shop
+            shops = await run_in_session(lambda session: {
+                int(shop_id): ShopInfo(sid=int(shop_id), name=shop_name)
+                for shop_id, shop_name in session.query(Shop.shop_id, Shop.shop_name)
+                if str(shop_id).isdigit()
+            })
+        except Exception as e:
+            logger.warning(f"从 shops 表加载店铺失败: {e}")
+        self._install(list(shops.values()), source='shops_table')
+
+    def load(self, shops: List[ShopInfo], source: str = 'api'):
+        """用给定店铺列表整体替换索引（例如店铺同步任务拿到最新列表后）"""
+        self._install(shops, source)
+        self._loaded_at = time.time()
+        self._failed_at = None
+
+    def _install(self, shops: List[ShopInfo], source: str):
+        by_sid, by_seller_id, by_marketplace, by_region = {}, {}, {}, {}
+        for shop in shops:
+            by_sid[shop.sid] = shop
+            if shop.seller_id:
+                by_seller_id.setdefault(shop.seller_id, []).append(shop.sid)
+            for key in {shop.marketplace_id, shop.country}:
+                if key:
+                    by_marketplace.setdefault(key, []).append(shop.sid)
+            if shop.region:
+                by_region.setdefault(shop.region.upper(), []).append(shop.sid)
+        # 一次性替换, 读取方不会看到构建到一半的索引
+        self._by_sid, self._by_seller_id = by_sid, by_seller_id
+        self._by_marketplace, self._by_region = by_marketplace, by_region
+        self._source = source
+
+    def _schedule_refresh(self, delay: float):
+        if self._refresh_handle is not None:
+            self._refresh_handle.cancel()
+        self._refresh_handle = asyncio.get_running_loop().call_later(delay, self._background_refresh)
+
+    def _background_refresh(self):
+        self._refresh_handle = None
+        asyncio.ensure_future(self.refresh())
+
+    def close(self):
+        """取消后台刷新定时器"""
+        if self._refresh_handle is not None:
+            self._refresh_handle.cancel()
+            self._refresh_handle = None
+
+    async def get_all_sids(self) -> List[int]:
+        """全部店铺的 sid"""
+        await self.ensure_loaded()
+        return sorted(self._by_sid)
+
+    async def get_sids_by_seller_id(self, seller_id: str) -> List[int]:
+        """seller_id 下的全部 sid"""
+        await self.ensure_loaded()
+        return list(self._by_seller_id.get(seller_id, []))
+
+    async def get_shop(self, sid: int) -> Optional[ShopInfo]:
+        """按 sid 获取店铺"""
+        await self.ensure_loaded()
+        return self._by_sid.get(int(sid))
+
+    async def get_sids_by_marketplace(self, marketplace: str) -> List[int]:
+        """按 marketplace_id 或国家名称获取 sid"""
+        await self.ensure_loaded()
+        return list(self._by_marketplace.get(marketplace, []))
+
+    async def get_sids_by_region(self, region: str) -> List[int]:
+        """按地区（如 NA/EU/FE）获取 sid"""
+        await self.ensure_loaded()
+        return list(self._by_region.get(region.upper(), []))
+
+    def get_stats(self) -> Dict[str, Any]:
+        """注册表状态"""
+        return {
+            'shops': len(self._by_sid),
+            'sellers': len(self._by_seller_id),
+            'source': self._source,
+            'loaded_at': self._loaded_at,
+            'failed_at': self._failed_at,
+            # 最近一次刷新失败: 正在使用上次加载成功的数据或 shops 表
+            'degraded': self._failed_at is not None,
+            'refresh_count': self._stats['refresh_count'],
+            'failure_count': self._stats['failure_count'],
+            'last_error': self._stats['last_error']
+        }
+
+
+# 全局店铺注册表
+shop_registry = ShopRegistry(
+    OpenApiBase(settings.LLX_API_HOST, settings.LLX_APP_ID, settings.LLX_APP_SECRET),
+    refresh_interval=settings.SHOP_REGISTRY_REFRESH_INTERVAL
+)
@@ -0,0 +1,711 @@
+# -*- coding: utf-8 -*-
+"""
+多平台同步任务引擎
+一个同步任务按 平台/数据类型/店铺 拆分为若干同步单元, 单元由有界的 asyncio 工作协程池并发执行:
+逐页拉取领星数据, 每页的记录与断点(下一页 offset)、进度在同一事务中提交, 服务重启后从断点继续。
+任务与单元状态全部保存在数据库(sync_tasks / sync_task_units), 状态查询直接读库, 与由哪个实例、
+哪个工作进程执行无关; 取消任务只需把任务状态改为 cancelled, 执行方在提交下一页时发现并停止。
+未完成的单元记录负责执行的进程并定期心跳, 进程退出或心跳超时后由其他进程(或重启后的进程)认领, 从断点继续。
+增量同步(sync_type=incremental)按 接口/店铺 的水位只拉取更新时间在水位之后的数据, 单元完成时推进水位
+"""
+
+import asyncio
+import hashlib
+import logging
+import math
+import os
+import socket
+import uuid
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+import orjson
+from sqlalchemy import or_
+from sqlalchemy.orm import selectinload
+
+from app.auth.governor import bulk_priority
+from app.auth.openapi import OpenApiBase
+from app.auth.pager import page_records, page_total
+from app.config import settings
+from app.core.bulk_upsert import bulk_upsert
+from app.core.database import run_in_session
+from app.core.shop_registry import shop_registry
+from app.core.token_provider import token_provider
+from app.core.watermarks import advance_watermark, get_watermark
+from app.models.sync_models import (
+    STATUS_CANCELLED, STATUS_COMPLETED, STATUS_FAILED, STATUS_PENDING, STATUS_RUNNING, STATUS_SKIPPED,
+    TERMINAL_STATUSES, PlatformSyncRecord, SyncTask, SyncTaskUnit
+)
+
+# 配置日志记录器
+logger = logging.getLogger(__name__)
+
+# 未指定数据类型时同步的全部类型
+DEFAULT_DATA_TYPES = ['orders', 'products', 'inventory']
+
+# 尚未结束、需要有进程负责的单元状态
+UNFINISHED_UNIT_STATUSES = (STATUS_PENDING, STATUS_RUNNING)
+
+
+# 增量同步的更新时间过滤方式
+INCREMENTAL_UPDATE_DATE = 'update_date'  # 日期范围按更新时间过滤(date_type=2)
+INCREMENTAL_UPDATE_TIME = 'update_time'  # update_time_start / update_time_end 时间戳
+
+
+@dataclass(frozen=True)
+class SyncUnitSpec:
+    """同步单元的拉取方式: 领星接口、是否按店铺拆分、记录唯一键字段、增量过滤方式(为空时每次全量)"""
+    route_name: str
+    key_fields: Tuple[str, ...]
+    per_sid: bool = True
+    date_range: bool = False
+    incremental: Optional[str] = None
+
+    def build_body(self, params: Dict[str, Any], sid: Optional[int],
+                   window_start: Optional[datetime] = None, window_end: Optional[datetime] = None) -> Dict[str, Any]:
+        """不含 offset/length 的查询参数, window_start 不为空时只查询该时间之后更新的数据"""
+        body: Dict[str, Any] = {}
+        if self.per_sid:
+            body['sid'] = sid
+        incremental = window_start is not None and window_end is not None
+        if self.date_range:
+            if incremental and self.incremental == INCREMENTAL_UPDATE_DATE:
+                body['start_date'] = window_start.strftime('%Y-%m-%d')
+                body['end_date'] = window_end.strftime('%Y-%m-%d')
+                body['date_type'] = 2
+            else:
+                body['start_date'] = params['start_date']
+                body['end_date'] = params['end_date']
+                body['date_type'] = 1
+        if incremental and self.incremental == INCREMENTAL_UPDATE_TIME:
+            body['update_time_start'] = int(window_start.timestamp())
+            body['update_time_end'] = int(window_end.timestamp())
+        return body
+
+    def record_key(self, record: Dict[str, Any]) -> str:
+        """记录唯一键, 唯一键字段缺失时退回整条记录的摘要"""
+        values = [record.get(field) for field in self.key_fields]
+        if any(value in (None, '') for value in values):
+            return hashlib.md5(orjson.dumps(record, option=orjson.OPT_SORT_KEYS)).hexdigest()
+        return '|'.join(str(value) for value in values)[:255]
+
+
+# 已接入的 平台/数据类型, 其余组合的单元直接标记为 skipped
+SYNC_UNIT_SPECS: Dict[Tuple[str, str], SyncUnitSpec] = {
+    ('amazon', 'orders'): SyncUnitSpec('/erp/sc/data/mws_report/allOrders', ('amazon_order_id', 'sku'),
+                                       date_range=True, incremental=INCREMENTAL_UPDATE_DATE),
+    # 库存接口没有更新时间过滤, 增量同步时同样拉取全量快照
+    ('amazon', 'inventory'): SyncUnitSpec('/erp/sc/data/mws_report/manageInventory', ('sku',)),
+    ('amazon', 'products'): SyncUnitSpec('/erp/sc/routing/data/local_inventory/productList', ('sku',),
+                                         per_sid=False, incremental=INCREMENTAL_UPDATE_TIME),
+}
+
+
+def _now() -> datetime:
+    return datetime.now()
+
+
+def _fmt(value: Optional[datetime]) -> Optional[str]:
+    return value.strftime('%Y-%m-%d %H:%M:%S') if value else None
+
+
+def _owner_alive(owner: str) -> bool:
+    """
+    单元的负责进程是否可能仍在运行。只能判断本机进程: pid 已不存在, 或 pid 与当前进程相同
+    (owner 不是本进程, 说明是重启前使用同一 pid 的进程)时视为已退出; 其他主机的进程只按心跳判断
+    """
+    host, _, rest = owner.partition(':')
+    pid, _, _ = rest.partition(':')
+    if host != socket.gethostname() or not pid.isdigit():
+        return True
+    if int(pid) == os.getpid():
+        return False
+    try:
+        os.kill(int(pid), 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def _unit_to_dict(unit: SyncTaskUnit) -> Dict[str, Any]:
+    return {
+        'unit_id': unit.id,
+        'platform': unit.platform,
+        'data_type': unit.data_type,
+        'sid': unit.sid,
+        'status': unit.status,
+        'pages_done': unit.pages_done,
+        'pages_total': unit.pages_total,
+        'records_done': unit.records_done,
+        'records_total': unit.records_total,
+        'attempts': unit.attempts,
+        'window_start': _fmt(unit.window_start),
+        'window_end': _fmt(unit.window_end),
+        'error_message': unit.error_message,
+        'owner': unit.owner if unit.status in UNFINISHED_UNIT_STATUSES else None,
+        'started_at': _fmt(unit.started_at),
+        'finished_at': _fmt(unit.finished_at)
+    }
+
+
+def _task_to_dict(task: SyncTask, units: List[SyncTaskUnit], with_units: bool = True) -> Dict[str, Any]:
+    """
+    任务状态, 进度按实际页数计算: 已完成页数 / 总页数。
+    首页返回前总页数未知的单元按至少还剩一页计; 预计剩余时间按已完成页的平均耗时外推
+    """
+    pages_done = pages_total = 0
+    for unit in units:
+        if unit.status == STATUS_SKIPPED:
+            continue
+        pages_done += unit.pages_done
+        if unit.status in TERMINAL_STATUSES:
+            pages_total += max(unit.pages_done, unit.pages_total or 0) if unit.status == STATUS_COMPLETED \
+                else unit.pages_done
+        else:
+            pages_total += unit.pages_total if unit.pages_total is not None else unit.pages_done + 1
+
+    if task.status == STATUS_COMPLETED:
+        progress = 100.0
+    else:
+        progress = round(pages_done * 100 / pages_total, 2) if pages_total else 0.0
+
+    eta_seconds = None
+    estimated_completion = None
+    if task.status == STATUS_RUNNING and task.started_at and pages_done:
+        elapsed = (_now() - task.started_at).total_seconds()
+        eta_seconds = round(elapsed / pages_done * max(pages_total - pages_done, 0), 1)
+        estimated_completion = _fmt(_now() + timedelta(seconds=eta_seconds))
+
+    params = task.params or {}
+    result = {
+        'task_id': task.task_id,
+        'platforms': task.platforms,
+        'data_types': task.data_types,
+        'sync_type': task.sync_type,
+        'start_date': params.get('start_date'),
+        'end_date': params.get('end_date'),
+        'force_sync': params.get('force_sync', False),
+        'status': task.status,
+        'progress': progress,
+        'pages_done': pages_done,
+        'pages_total': pages_total,
+        'records_done': sum(unit.records_done for unit in units),
+        'units_total': len(units),
+        'units_done': sum(1 for unit in units if unit.status in TERMINAL_STATUSES),
+        'eta_seconds': eta_seconds,
+        'estimated_completion': estimated_completion,
+        'error_message': task.error_message,
+        'created_at': _fmt(task.created_at),
+        'started_at': _fmt(task.started_at),
+        'finished_at': _fmt(task.finished_at),
+        'updated_at': _fmt(task.updated_at)
+    }
+    if with_units:
+        result['units'] = [_unit_to_dict(unit) for unit in units]
+    return result
+
+
+class SyncJobEngine:
+    """同步任务引擎"""
+
+    def __init__(self, api: OpenApiBase, concurrency: int = 4, page_size: int = 1000,
+                 max_attempts: int = 3, retry_delay: float = 30, heartbeat_interval: float = 30,
+                 stale_after: float = 120):
+        """
+        初始化同步任务引擎
+
+        Args:
+            api: 领星OpenAPI客户端
+            concurrency: 同时执行的同步单元数
+            page_size: 每页拉取条数
+            max_attempts: 单元失败后的最大尝试次数
+            retry_delay: 单元失败后重新排队的等待时间（秒）
+            heartbeat_interval: 心跳及认领无人负责单元的间隔（秒）
+            stale_after: 负责进程超过该时间（秒）没有心跳时, 其单元可被其他进程认领, 应为心跳间隔的数倍
+        """
+        self.api = api
+        self.concurrency = max(1, concurrency)
+        self.page_size = page_size
+        self.max_attempts = max(1, max_attempts)
+        self.retry_delay = retry_delay
+        self.heartbeat_interval = heartbeat_interval
+        self.stale_after = stale_after
+
+        self._owner: Optional[str] = None
+        self._owner_pid: Optional[int] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._workers: List[asyncio.Task] = []
+        self._heartbeat: Optional[asyncio.Task] = None
+        # 本进程负责的单元(排队、执行中或等待重试)
+        self._owned: Set[int] = set()
+        # 本进程正在执行的单元: unit_id -> (task_id, 执行协程)
+        self._running: Dict[int, Tuple[str, asyncio.Future]] = {}
+        # 等待重试的单元: unit_id -> 定时器
+        self._retry_handles: Dict[int, asyncio.TimerHandle] = {}
+        self._stats = {'units_completed': 0, 'units_failed': 0, 'units_reclaimed': 0,
+                       'pages_synced': 0, 'records_synced': 0}
+
+    @property
+    def owner(self) -> str:
+        """本进程的负责人标识: 主机名:pid:随机标识, fork 出的子进程各自生成"""
+        pid = os.getpid()
+        if self._owner_pid != pid:
+            self._owner_pid = pid
+            self._owner = f"{socket.gethostname()}:{pid}:{uuid.uuid4().hex[:8]}"
+        return self._owner
+
+    def _bind_loop(self):
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            self._queue = asyncio.Queue()
+            self._owned = set()
+            self._running = {}
+            self._retry_handles = {}
+            self._workers = [loop.create_task(self._worker()) for _ in range(self.concurrency)]
+            self._heartbeat = loop.create_task(self._heartbeat_loop())
+
+    def _enqueue(self, unit_ids: List[int]):
+        """排队执行本进程负责的单元, 已在本进程排队、执行或等待重试的单元不重复排队"""
+        self._bind_loop()
+        for unit_id in unit_ids:
+            if unit_id not in self._owned:
+                self._owned.add(unit_id)
+                self._queue.put_nowait(unit_id)
+
+    # ---- 任务管理 ----
+
+    async def create_task(self, platforms: List[str], data_types: Optional[List[str]] = None,
+                          sync_type: str = 'full', start_date: Optional[str] = None,
+                          end_date: Optional[str] = None, sids: Optional[List[int]] = None,
+                          force_sync: bool = False) -> Dict[str, Any]:
+        """
+        创建同步任务并将其同步单元排队执行
+
+        Args:
+            platforms: 平台列表
+            data_types: 数据类型列表, 默认 orders/products/inventory
+            sync_type: 同步类型（full/incremental）
+            start_date: 开始日期（订单等按日期拉取的数据）, 默认结束日期前 30 天
+            end_date: 结束日期, 默认今天
+            sids: 店铺ID列表, 默认店铺注册表中的全部店铺
+            force_sync: 是否强制同步
+
+        Returns:
+            dict: 任务状态
+        """
+        data_types = list(data_types or DEFAULT_DATA_TYPES)
+        end_date = end_date or _now().strftime('%Y-%m-%d')
+        start_date = start_date or (datetime.strptime(end_date, '%Y-%m-%d') - timedelta(days=30)).strftime('%Y-%m-%d')
+        specs = [SYNC_UNIT_SPECS.get((platform, data_type)) for platform in platforms for data_type in data_types]
+        if sids is None and any(spec and spec.per_sid for spec in specs):
+            sids = await shop_registry.get_all_sids()
+
+        units = []
+        for platform in platforms:
+            for data_type in data_types:
+                spec = SYNC_UNIT_SPECS.get((platform, data_type))
+                if spec is None:
+                    units.append((platform, data_type, None, STATUS_SKIPPED, '暂不支持该平台/数据类型的同步'))
+                elif spec.per_sid and not sids:
+                    units.append((platform, data_type, None, STATUS_SKIPPED, '没有可同步的店铺'))
+                elif spec.per_sid:
+                    units.extend((platform, data_type, sid, STATUS_PENDING, None) for sid in sids)
+                else:
+                    units.append((platform, data_type, None, STATUS_PENDING, None))
+
+        task_id = str(uuid.uuid4())
+        params = {'start_date': start_date, 'end_date': end_date, 'sids': sids, 'force_sync': force_sync}
+        unit_ids = await run_in_session(self._insert_task, task_id, platforms, data_types, sync_type, params, units,
+                                        self.owner)
+        self._enqueue(unit_ids)
+        logger.info(f"同步任务 {task_id} 已创建，共 {len(units)} 个同步单元，{len(unit_ids)} 个待执行")
+        return await self.get_task(task_id)
+
+    def _insert_task(self, session, task_id, platforms, data_types, sync_type, params, units, owner) -> List[int]:
+        now = _now()
+        task = SyncTask(task_id=task_id, platforms=platforms, data_types=data_types, sync_type=sync_type,
+                        params=params, status=STATUS_PENDING, created_at=now)
+        for platform, data_type, sid, status, error_message in units:
+            pending = status == STATUS_PENDING
+            task.units.append(SyncTaskUnit(
+                platform=platform, data_type=data_type, sid=sid, status=status, page_size=self.page_size,
+                error_message=error_message, finished_at=now if status == STATUS_SKIPPED else None,
+                owner=owner if pending else None, heartbeat_at=now if pending else None
+            ))
+        if all(unit.status == STATUS_SKIPPED for unit in task.units):
+            task.status = STATUS_COMPLETED
+            task.finished_at = now
+        session.add(task)
+        session.flush()
+        return [unit.id for unit in task.units if unit.status == STATUS_PENDING]
+
+    async def get_task(self, task_id: str) -> Optional[Dict[str, Any]]:
+        """任务状态（含各同步单元进度）, 任务不存在时返回 None"""
+        def load(session):
+            task = session.get(SyncTask, task_id)
+            return _task_to_dict(task, list(task.units)) if task else None
+        return await run_in_session(load)
+
+    async def list_tasks(self, platform: Optional[str] = None, status: Optional[str] = None,
+                         page: int = 1, page_size: int = 20) -> Dict[str, Any]:
+        """按创建时间倒序分页查询任务"""
+        def load(session):
+            query = session.query(SyncTask)
+            if platform:
+                # 每个平台至少有一个同步单元, 按单元的平台列精确匹配
+                query = query.filter(SyncTask.units.any(SyncTaskUnit.platform == platform))
+            if status:
+                query = query.filter(SyncTask.status == status)
+            total = query.count()
+            # 一次查询加载本页全部任务的同步单元, 避免逐个任务懒加载
+            tasks = query.options(selectinload(SyncTask.units)).order_by(SyncTask.created_at.desc()) \
+                .offset((page - 1) * page_size).limit(page_size).all()
+            return {
+                'data': [_task_to_dict(task, list(task.units), with_units=False) for task in tasks],
+                'total': total,
+                'page': page,
+                'page_size': page_size
+            }
+        return await run_in_session(load)
+
+    async def find_active_task(self, platforms: List[str], data_types: Optional[List[str]] = None) -> Optional[str]:
+        """包含相同 平台/数据类型 且尚未结束的任务ID"""
+        data_types = data_types or DEFAULT_DATA_TYPES
+
+        def load(session):
+            return session.query(SyncTaskUnit.task_id).join(SyncTask).filter(
+                SyncTask.status.notin_(TERMINAL_STATUSES),
+                SyncTaskUnit.status.notin_(TERMINAL_STATUSES),
+                SyncTaskUnit.platform.in_(platforms),
+                SyncTaskUnit.data_type.in_(data_types)
+            ).limit(1).scalar()
+        return await run_in_session(load)
+
+    async def cancel_task(self, task_id: str) -> Optional[Dict[str, Any]]:
+        """取消任务: 未结束的单元标记为 cancelled, 本进程中正在执行的单元立即停止"""
+        def cancel(session):
+            task = session.get(SyncTask, task_id)
+            if task is None:
+                return False
+            if task.status not in TERMINAL_STATUSES:
+                now = _now()
+                task.status = STATUS_CANCELLED
+                task.finished_at = now
+                for unit in task.units:
+                    if unit.status not in TERMINAL_STATUSES:
+                        unit.status = STATUS_CANCELLED
+                        unit.finished_at = now
+            return True
+
+        if not await run_in_session(cancel):
+            return None
+        for unit_id, (unit_task_id, runner) in list(self._running.items()):
+            if unit_task_id == task_id:
+                runner.cancel()
+        logger.info(f"同步任务 {task_id} 已取消")
+        return await self.get_task(task_id)
+
+    async def resume(self) -> int:
+        """
+        认领无人负责的未完成同步单元并从断点继续: 负责进程已退出、心跳超时或尚未分配负责进程的
+        pending/running 单元重置为 pending 并由本进程排队执行。
+
+        服务启动时调用一次(多进程模式下每个工作进程都调用), 之后由心跳协程定期调用;
+        认领按原负责进程条件更新, 同一单元只会被一个进程认领
+
+        Returns:
+            int: 认领并重新排队的单元数
+        """
+        self._bind_loop()
+        unit_ids = await run_in_session(self._claim_units, self.owner)
+        if unit_ids:
+            self._stats['units_reclaimed'] += len(unit_ids)
+            self._enqueue(unit_ids)
+            logger.info(f"已认领 {len(unit_ids)} 个未完成的同步单元")
+        return len(unit_ids)
+
+    async def _heartbeat_loop(self):
+        while True:
+            await asyncio.sleep(self.heartbeat_interval)
+            try:
+                await self.resume()
+            except Exception as e:
+                logger.warning(f"同步单元心跳失败: {e}")
+
+    def _claim_units(self, session, owner: str) -> List[int]:
+        """刷新本进程负责单元的心跳, 认领无人负责的未完成单元, 返回认领到的单元ID"""
+        now = _now()
+        session.query(SyncTaskUnit).filter(
+            SyncTaskUnit.owner == owner,
+            SyncTaskUnit.status.in_(UNFINISHED_UNIT_STATUSES)
+        ).update({SyncTaskUnit.heartbeat_at: now}, synchronize_session=False)
+
+        stale_before = now - timedelta(seconds=self.stale_after)
+        candidates = session.query(SyncTaskUnit.id, SyncTaskUnit.owner, SyncTaskUnit.heartbeat_at).join(SyncTask).filter(
+            SyncTask.status.notin_(TERMINAL_STATUSES),
+            SyncTaskUnit.status.in_(UNFINISHED_UNIT_STATUSES),
+            or_(SyncTaskUnit.owner.is_(None), SyncTaskUnit.owner != owner)
+        ).all()
+        # 按原负责进程分组: 进程已退出的全部认领, 仍可能存活的只认领心跳超时的单元
+        orphaned: Dict[Optional[str], Tuple[bool, List[int]]] = {}
+        for unit_id, unit_owner, heartbeat_at in candidates:
+            dead = unit_owner is None or not _owner_alive(unit_owner)
+            if dead or heartbeat_at is None or heartbeat_at < stale_before:
+                orphaned.setdefault(unit_owner, (dead, []))[1].append(unit_id)
+
+        claimed = []
+        for unit_owner, (dead, unit_ids) in orphaned.items():
+            # 条件更新: 原负责进程在此期间恢复心跳或已被其他进程认领时不会更新
+            conditions = [
+                SyncTaskUnit.id.in_(unit_ids),
+                SyncTaskUnit.status.in_(UNFINISHED_UNIT_STATUSES),
+                SyncTaskUnit.owner.is_(None) if unit_owner is None else SyncTaskUnit.owner == unit_owner
+            ]
+            if not dead:
+                conditions.append(or_(SyncTaskUnit.heartbeat_at.is_(None), SyncTaskUnit.heartbeat_at < stale_before))
+            updated = session.query(SyncTaskUnit).filter(*conditions).update(
+                {SyncTaskUnit.owner: owner, SyncTaskUnit.heartbeat_at: now, SyncTaskUnit.status: STATUS_PENDING},
+                synchronize_session=False
+            )
+            if updated:
+                logger.info(f"认领 {updated} 个同步单元，原负责进程: {unit_owner or '无'}"
+                            f"（{'已退出' if dead else '心跳超时'}）")
+                claimed.extend(unit_ids)
+        if not claimed:
+            return []
+        return [unit_id for (unit_id,) in session.query(SyncTaskUnit.id).filter(
+            SyncTaskUnit.id.in_(claimed), SyncTaskUnit.owner == owner
+        ).order_by(SyncTaskUnit.id)]
+
+    # ---- 单元执行 ----
+
+    async def _worker(self):
+        while True:
+            unit_id = await self._queue.get()
+            try:
+                runner = asyncio.ensure_future(self._run_unit(unit_id))
+                # 等待而不直接 await runner: 取消任务时只取消单元协程, 工作协程继续处理队列
+                await asyncio.wait([runner])
+                if not runner.cancelled() and runner.exception() is not None:
+                    logger.error(f"同步单元 {unit_id} 执行异常: {runner.exception()}")
+            finally:
+                self._running.pop(unit_id, None)
+                if unit_id not in self._retry_handles:
+                    self._owned.discard(unit_id)
+                self._queue.task_done()
+
+    @bulk_priority
+    async def _run_unit(self, unit_id: int):
+        state = await run_in_session(self._start_unit, unit_id, self.owner)
+        if state is None:
+            return
+        task_id = state['task_id']
+        self._running[unit_id] = (task_id, asyncio.current_task())
+        spec = SYNC_UNIT_SPECS[(state['platform'], state['data_type'])]
+        body = spec.build_body(state['params'], state['sid'], state['window_start'], state['window_end'])
+        offset, page_size = state['checkpoint'], state['page_size']
+        try:
+            while True:
+                access_token = await token_provider.get_token()
+                resp = await self.api.request(
+                    access_token=access_token,
+                    route_name=spec.route_name,
+                    method='POST',
+                    req_body=dict(body, offset=offset, length=page_size)
+                )
+                if resp.code != 0:
+                    raise ValueError(f"code={resp.code}, msg={resp.message}")
+                records = page_records(resp)
+                total = page_total(resp)
+                next_offset = offset + page_size
+                done = not records or (next_offset >= total if total is not None else len(records) < page_size)
+                status = await run_in_session(self._commit_page, unit_id, spec, state, records,
+                                              next_offset, total, done, self.owner)
+                if status in (STATUS_RUNNING, STATUS_COMPLETED):
+                    self._stats['pages_synced'] += 1
+                    self._stats['records_synced'] += len(records)
+                if status != STATUS_RUNNING:
+                    if status == STATUS_COMPLETED:
+                        self._stats['units_completed'] += 1
+                    break
+                offset = next_offset
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning(f"同步单元 {unit_id} ({state['platform']}/{state['data_type']}/{state['sid']}) 失败: {e}")
+            retry = await run_in_session(self._fail_unit, unit_id, str(e), self.owner)
+            if retry:
+                self._schedule_retry(unit_id)
+            else:
+                self._stats['units_failed'] += 1
+        finally:
+            await run_in_session(self._finalize_task, task_id)
+
+    def _schedule_retry(self, unit_id: int):
+        def requeue():
+            self._retry_handles.pop(unit_id, None)
+            self._queue.put_nowait(unit_id)
+        self._retry_handles[unit_id] = self._loop.call_later(self.retry_delay, requeue)
+
+    def _start_unit(self, session, unit_id: int, owner: str) -> Optional[Dict[str, Any]]:
+        """
+        把单元标记为 running, 任务已结束、单元不是待执行状态或已由其他进程负责时返回 None。
+        首次执行时确定同步窗口并保存, 重试和重启恢复沿用同一窗口, 断点 offset 才有意义
+        """
+        unit = session.get(SyncTaskUnit, unit_id)
+        if unit is None or unit.status != STATUS_PENDING or unit.owner != owner:
+            return None
+        task = unit.task
+        if task.status in TERMINAL_STATUSES:
+            return None
+        now = _now()
+        if unit.window_end is None:
+            unit.window_end = now
+            spec = SYNC_UNIT_SPECS[(unit.platform, unit.data_type)]
+            if task.sync_type == 'incremental' and spec.incremental:
+                watermark = get_watermark(session, spec.route_name, unit.sid or 0)
+                if watermark is not None:
+                    unit.window_start = watermark - timedelta(seconds=settings.SYNC_WATERMARK_OVERLAP)
+                elif spec.date_range:
+                    # 尚无水位: 按更新时间拉取任务日期范围内的数据, 完成后建立水位
+                    unit.window_start = datetime.strptime(task.params['start_date'], '%Y-%m-%d')
+        unit.status = STATUS_RUNNING
+        unit.heartbeat_at = now
+        unit.started_at = unit.started_at or now
+        if task.status == STATUS_PENDING:
+            task.status = STATUS_RUNNING
+            task.started_at = now
+        return {
+            'task_id': task.task_id,
+            'platform': unit.platform,
+            'data_type': unit.data_type,
+            'sid': unit.sid,
+            'params': task.params or {},
+            'checkpoint': unit.checkpoint,
+            'page_size': unit.page_size,
+            'window_start': unit.window_start,
+            'window_end': unit.window_end
+        }
+
+    def _commit_page(self, session, unit_id: int, spec: SyncUnitSpec, state: Dict[str, Any],
+                     records: List[Dict[str, Any]], next_offset: int, total: Optional[int], done: bool,
+                     owner: str) -> Optional[str]:
+        """
+        写入一页记录并推进断点; 任务已被取消时丢弃该页并返回单元当前状态,
+        单元已被其他进程认领时丢弃该页并返回 None
+        """
+        # 锁定单元行, 与其他进程的认领互斥
+        unit = session.get(SyncTaskUnit, unit_id, with_for_update=True)
+        if unit.owner != owner:
+            return None
+        task_status = session.query(SyncTask.status).filter(SyncTask.task_id == state['task_id']).scalar()
+        if task_status == STATUS_CANCELLED or unit.status != STATUS_RUNNING:
+            return unit.status
+
+        now = _now()
+        rows = {}
+        for record in records:
+            if not isinstance(record, dict):
+                continue
+            key = spec.record_key(record)
+            rows[key] = {
+                'platform': unit.platform, 'data_type': unit.data_type, 'sid': unit.sid or 0,
+                'record_key': key, 'payload': record, 'task_id': state['task_id'], 'synced_at': now
+            }
+        if rows:
+            bulk_upsert(session, PlatformSyncRecord, list(rows.values()),
+                        conflict_columns=['platform', 'data_type', 'sid', 'record_key'],
+                        update_columns=['payload', 'task_id', 'synced_at'],
+                        chunk_size=settings.DB_BULK_CHUNK_SIZE)
+
+        unit.checkpoint = next_offset
+        unit.heartbeat_at = now
+        unit.pages_done += 1
+        unit.records_done += len(rows)
+        if total is not None:
+            unit.records_total = total
+            unit.pages_total = max(math.ceil(total / unit.page_size), 1)
+        if done:
+            unit.status = STATUS_COMPLETED
+            unit.finished_at = now
+            unit.pages_total = unit.pages_done
+            unit.error_message = None
+            # 增量窗口或不限日期的全量拉取都覆盖了窗口终点之前的全部变化, 可以推进水位
+            if spec.incremental and (unit.window_start is not None or not spec.date_range):
+                advance_watermark(session, spec.route_name, unit.sid or 0, unit.window_end)
+        return unit.status
+
+    def _fail_unit(self, session, unit_id: int, error: str, owner: str) -> bool:
+        """记录单元失败, 未超过最大尝试次数时重置为 pending 并返回 True(仍由本进程负责重试)"""
+        unit = session.get(SyncTaskUnit, unit_id, with_for_update=True)
+        if unit is None or unit.status != STATUS_RUNNING or unit.owner != owner:
+            return False
+        unit.attempts += 1
+        unit.error_message = error[:2000]
+        if unit.attempts < self.max_attempts:
+            unit.status = STATUS_PENDING
+            return True
+        unit.status = STATUS_FAILED
+        unit.finished_at = _now()
+        return False
+
+    def _finalize_task(self, session, task_id: str):
+        """全部单元结束后汇总任务状态"""
+        task = session.get(SyncTask, task_id)
+        if task is None or task.status in TERMINAL_STATUSES:
+            return
+        statuses = [unit.status for unit in task.units]
+        if any(status not in TERMINAL_STATUSES for status in statuses):
+            return
+        failed = statuses.count(STATUS_FAILED)
+        task.status = STATUS_FAILED if failed else STATUS_COMPLETED
+        task.error_message = f"{failed} 个同步单元失败" if failed else None
+        task.finished_at = _now()
+        logger.info(f"同步任务 {task_id} 已结束: {task.status}")
+
+    # ---- 生命周期 ----
+
+    def close(self):
+        """
+        停止工作协程、心跳和重试定时器; 本进程负责的单元保持原状态, 进程退出后由其他进程
+        或下次启动时的 resume 认领并从断点继续
+        """
+        for handle in self._retry_handles.values():
+            handle.cancel()
+        for worker in self._workers:
+            worker.cancel()
+        if self._heartbeat is not None:
+            self._heartbeat.cancel()
+        for _, runner in self._running.values():
+            runner.cancel()
+        self._workers, self._retry_handles, self._running, self._owned = [], {}, {}, set()
+        self._heartbeat = None
+        self._loop = None
+
+    def get_stats(self) -> Dict[str, Any]:
+        """引擎状态"""
+        return {
+            'owner': self.owner,
+            'concurrency': self.concurrency,
+            'queued': self._queue.qsize() if self._queue is not None else 0,
+            'running': len(self._running),
+            'owned': len(self._owned),
+            **self._stats
+        }
+
+
+# 全局同步任务引擎
+sync_job_engine = SyncJobEngine(
+    OpenApiBase(settings.LLX_API_HOST, settings.LLX_APP_ID, settings.LLX_APP_SECRET),
+    concurrency=settings.SYNC_JOB_CONCURRENCY,
+    page_size=settings.SYNC_JOB_PAGE_SIZE,
+    max_attempts=settings.SYNC_JOB_MAX_ATTEMPTS,
+    retry_delay=settings.SYNC_JOB_RETRY_DELAY,
+    heartbeat_interval=settings.SYNC_JOB_HEARTBEAT_INTERVAL,
+    stale_after=settings.SYNC_JOB_STALE_AFTER
+)
@@ -0,0 +1,173 @@
+# -*- coding: utf-8 -*-
+"""
+领星 access_token 统一提供者
+所有服务共享同一个 access_token, 在过期前通过 refresh_token 后台续约,
+并发请求同时遇到令牌失效时只发起一次获取（single-flight）
+"""
+
+import asyncio
+import logging
+import time
+from typing import Any, Dict, Optional
+
+from app.auth.openapi import OpenApiBase
+from app.auth.resp_schema import AccessTokenDto
+from app.config import settings
+from app.core.metrics import LLX_TOKEN_REFRESH_DURATION
+
+# 配置日志记录器
+logger = logging.getLogger(__name__)
+
+
+class AccessTokenProvider:
+    """access_token 提供者"""
+
+    def __init__(
+        self,
+        api: OpenApiBase,
+        refresh_ahead: int = 300,
+        expire_margin: int = 60,
+        retry_interval: int = 30
+    ):
+        """
+        初始化令牌提供者
+
+        Args:
+            api: 领星OpenAPI客户端
+            refresh_ahead: 距离过期多少秒时触发后台续约
+            expire_margin: 判断令牌失效时预留的安全时间（秒）
+            retry_interval: 后台续约失败后的重试间隔（秒）
+        """
+        self.api = api
+        self.refresh_ahead = refresh_ahead
+        self.expire_margin = expire_margin
+        self.retry_interval = retry_interval
+
+        self._token: Optional[AccessTokenDto] = None
+        self._expire_at = 0.0
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._inflight: Optional[asyncio.Future] = None
+        self._refresh_handle: Optional[asyncio.TimerHandle] = None
+
+        # 令牌获取耗时统计
+        self._stats = {
+            'refresh_count': 0,
+            'failure_count': 0,
+            'total_latency_ms': 0.0,
+            'last_latency_ms': None,
+            'last_refresh_at': None
+        }
+
+    async def get_token(self) -> str:
+        """获取有效的 access_token"""
+        self._bind_loop()
+        if self._token and time.monotonic() < self._expire_at:
+            return self._token.access_token
+        token = await self._refresh()
+        return token.access_token
+
+    async def force_refresh(self) -> str:
+        """强制重新获取令牌（例如接口返回令牌失效时）"""
+        self._bind_loop()
+        self._expire_at = 0.0
+        token = await self._refresh()
+        return token.access_token
+
+    def _bind_loop(self):
+        """令牌刷新的 future/定时器与事件循环绑定, 事件循环变化时重置"""
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            self._inflight = None
+            self._refresh_handle = None
+
+    async def _refresh(self) -> AccessTokenDto:
+        """合并并发的令牌获取请求, 同一时刻只有一个实际的远程调用"""
+        if self._inflight is None:
+            self._inflight = asyncio.ensure_future(self._do_refresh())
+            self._inflight.add_done_callback(self._clear_inflight)
+        return await asyncio.shield(self._inflight)
+
+    def _clear_inflight(self, future: asyncio.Future):
+        if self._inflight is future:
+            self._inflight = None
+
+    async def _do_refresh(self) -> AccessTokenDto:
+        """调用领星接口获取令牌, 优先使用 refresh_token 续约"""
+        start = time.perf_counter()
+        outcome = 'error'
+        try:
+            token = None
+            # 令牌仍在有效期内时才能用 refresh_token 续约, 否则重新生成
+            if self._token and self._token.refresh_token and time.monotonic() < self._expire_at + self.expire_margin:
+                try:
+                    token = await self.api.refresh_token(self._token.refresh_token)
+                except Exception as e:
+                    logger.warning(f"refresh_token 续约失败，改为重新获取令牌: {e}")
+            if token is None:
+                token = await self.api.generate_access_token()
+            outcome = 'ok'
+        except Exception:
+            self._stats['failure_count'] += 1
+            raise
+        finally:
+            latency_ms = (time.perf_counter() - start) * 1000
+            LLX_TOKEN_REFRESH_DURATION.observe(latency_ms / 1000, (outcome,))
+            self._stats['last_latency_ms'] = round(latency_ms, 3)
+            self._stats['total_latency_ms'] += latency_ms
+
+        self._stats['refresh_count'] += 1
+        self._stats['last_refresh_at'] = time.time()
+        self._token = token
+        self._expire_at = time.monotonic() + token.expires_in - self.expire_margin
+        self._schedule_refresh(max(token.expires_in - self.refresh_ahead, self.retry_interval))
+        logger.info(f"access_token 已更新，有效期 {token.expires_in} 秒，耗时 {self._stats['last_latency_ms']} ms")
+        return token
+
+    def _schedule_refresh(self, delay: float):
+        """安排后台续约, 保证请求路径上不会阻塞在令牌获取"""
+        if self._refresh_handle is not None:
+            self._refresh_handle.cancel()
+        loop = asyncio.get_running_loop()
+        self._refresh_handle = loop.call_later(delay, self._background_refresh)
+
+    def _background_refresh(self):
+        self._refresh_handle = None
+        task = asyncio.ensure_future(self._refresh())
+        task.add_done_callback(self._on_background_refresh_done)
+
+    def _on_background_refresh_done(self, task: asyncio.Future):
+        if task.cancelled():
+            return
+        exc = task.exception()
+        if exc is not None:
+            logger.error(f"后台续约 access_token 失败，{self.retry_interval} 秒后重试: {exc}")
+            self._schedule_refresh(self.retry_interval)
+
+    def close(self):
+        """取消后台续约定时器"""
+        if self._refresh_handle is not None:
+            self._refresh_handle.cancel()
+            self._refresh_handle = None
+
+    def get_stats(self) -> Dict[str, Any]:
+        """令牌刷新指标"""
+        refresh_count = self._stats['refresh_count']
+        attempts = refresh_count + self._stats['failure_count']
+        expires_in = None
+        if self._token:
+            expires_in = max(int(self._expire_at - time.monotonic()), 0)
+        return {
+            'refresh_count': refresh_count,
+            'failure_count': self._stats['failure_count'],
+            'last_latency_ms': self._stats['last_latency_ms'],
+            'avg_latency_ms': round(self._stats['total_latency_ms'] / attempts, 3) if attempts else None,
+            'last_refresh_at': self._stats['last_refresh_at'],
+            'expires_in': expires_in
+        }
+
+
+# 全局令牌提供者实例
+token_provider = AccessTokenProvider(
+    OpenApiBase(settings.LLX_API_HOST, settings.LLX_APP_ID, settings.LLX_APP_SECRET)
+)
@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+"""
+增量同步水位
+按 领星接口/店铺 记录已同步到的更新时间, 增量同步以 水位 - 重叠时间 作为更新时间过滤的起点,
+同步成功后把水位推进到本次窗口的终点。函数在数据库线程中调用, 由调用方的会话负责提交
+"""
+
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import case
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.core.bulk_upsert import dialect_insert
+from app.models.sync_models import SyncWatermark
+
+
+def get_watermark(session: Session, route_name: str, sid: int = 0) -> Optional[datetime]:
+    """接口/店铺 的水位, 尚未同步过时返回 None"""
+    return session.query(SyncWatermark.watermark).filter(
+        SyncWatermark.route_name == route_name,
+        SyncWatermark.sid == sid
+    ).scalar()
+
+
+def advance_watermark(session: Session, route_name: str, sid: int, watermark: datetime):
+    """
+    推进水位, 只会前进不会回退（并发或重试的旧窗口不会覆盖较新的水位）
+    用一条 upsert 语句完成: 多个单元/任务首次推进同一水位时不会因唯一键冲突而回滚调用方的事务
+    """
+    table = SyncWatermark.__table__
+    dialect_name = session.get_bind().dialect.name
+    insert = dialect_insert(dialect_name)
+    if insert is None:
+        _advance_watermark_fallback(session, route_name, sid, watermark)
+        return
+
+    stmt = insert(table).values(route_name=route_name, sid=sid, watermark=watermark, updated_at=datetime.now())
+    if dialect_name in ('mysql', 'mariadb'):
+        newer = stmt.inserted.watermark > table.c.watermark
+        # MySQL 按顺序赋值, updated_at 需在 watermark 之前计算（之后引用的 watermark 已是新值）
+        stmt = stmt.on_duplicate_key_update([
+            ('updated_at', case((newer, stmt.inserted.updated_at), else_=table.c.updated_at)),
+            ('watermark', case((newer, stmt.inserted.watermark), else_=table.c.watermark)),
+        ])
+    else:
+        stmt = stmt.on_conflict_do_update(
+            index_elements=['route_name', 'sid'],
+            set_={'watermark': stmt.excluded.watermark, 'updated_at': stmt.excluded.updated_at},
+            where=table.c.watermark < stmt.excluded.watermark
+        )
+    session.execute(stmt)
+
+
+def _advance_watermark_fallback(session: Session, route_name: str, sid: int, watermark: datetime):
+    """不支持冲突子句的数据库: 在保存点中插入, 并发插入冲突时重新读取后推进"""
+    query = session.query(SyncWatermark).filter(
+        SyncWatermark.route_name == route_name,
+        SyncWatermark.sid == sid
+    ).with_for_update()
+    row = query.first()
+    if row is None:
+        try:
+            with session.begin_nested():
+                session.add(SyncWatermark(route_name=route_name, sid=sid, watermark=watermark))
+            return
+        except IntegrityError:
+            row = query.one()
+    if row.watermark < watermark:
+        row.watermark = watermark
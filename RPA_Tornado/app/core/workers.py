@@ -0,0 +1,151 @@
+# -*- coding: utf-8 -*-
+"""
+多进程工作模式
+主进程预先绑定监听套接字后 fork 出 N 个工作进程, 每个工作进程拥有独立的事件循环、连接池和数据库引擎,
+彼此不共享状态(shared-nothing); 主进程只负责监督: 工作进程异常退出时重新拉起, 收到 SIGTERM/SIGINT/SIGHUP
+时转发给全部工作进程, 由各工作进程自行优雅关闭, 超时未退出的工作进程被强制结束
+
+与 tornado.process.fork_processes 的行为一致(按编号重启异常退出的进程、重新播种随机数), 区别在于主进程
+记录了工作进程 pid, 可以转发关闭信号; fork_processes 的主进程被 SIGTERM 结束后工作进程会成为孤儿进程
+"""
+
+import os
+import sys
+import time
+import errno
+import random
+import signal
+import logging
+from typing import Any, Dict, Optional
+
+# 配置日志记录器
+logger = logging.getLogger(__name__)
+
+# 当前进程的工作进程编号, 单进程模式下为 None
+_worker_id: Optional[int] = None
+_num_workers = 1
+_started_at = time.time()
+
+
+def worker_id() -> Optional[int]:
+    """当前工作进程编号(0 ~ N-1), 单进程模式返回 None"""
+    return _worker_id
+
+
+def get_worker_info() -> Dict[str, Any]:
+    """当前进程信息, 用于健康检查"""
+    return {
+        'worker_id': _worker_id,
+        'workers': _num_workers,
+        'pid': os.getpid(),
+        'ppid': os.getppid(),
+        'uptime': round(time.time() - _started_at, 1)
+    }
+
+
+def fork_workers(num_workers: int, max_restarts: int = 100, shutdown_timeout: float = 30) -> int:
+    """
+    fork 出 num_workers 个工作进程
+
+    在工作进程中返回其编号; 主进程留在监督循环中, 全部工作进程退出后以 0 退出, 不会返回。
+    必须在创建事件循环、连接池和数据库引擎之前调用, 这些资源由工作进程在 fork 之后各自初始化
+
+    Args:
+        num_workers: 工作进程数, 小于等于 0 时取 CPU 核数
+        max_restarts: 异常退出后累计重启的最大次数, 超过后主进程报错退出
+        shutdown_timeout: 转发关闭信号后等待工作进程退出的最长时间（秒）, 超时发送 SIGKILL
+
+    Returns:
+        int: 工作进程编号
+    """
+    global _num_workers
+    if num_workers <= 0:
+        num_workers = os.cpu_count() or 1
+    _num_workers = num_workers
+    children: Dict[int, int] = {}
+    stopping = False
+    default_handlers = {signum: signal.getsignal(signum) for signum in _forwarded_signals() + [signal.SIGALRM]}
+
+    def start_child(i: int) -> Optional[int]:
+        pid = os.fork()
+        if pid == 0:
+            # 工作进程: 恢复 fork 之前的信号处理, 由应用重新注册自己的优雅关闭逻辑
+            global _worker_id, _started_at
+            for signum, handler in default_handlers.items():
+                signal.signal(signum, handler)
+            _worker_id = i
+            _started_at = time.time()
+            random.seed()
+            return i
+        children[pid] = i
+        return None
+
+    def forward(signum, frame):
+        nonlocal stopping
+        if not stopping:
+            logger.info(f"主进程收到信号 {signum}，通知 {len(children)} 个工作进程关闭")
+            signal.alarm(max(1, int(shutdown_timeout)))
+        stopping = True
+        for pid in list(children):
+            _kill(pid, signum)
+
+    def force_kill(signum, frame):
+        logger.warning(f"{len(children)} 个工作进程在 {shutdown_timeout} 秒内未退出，强制结束")
+        for pid in list(children):
+            _kill(pid, signal.SIGKILL)
+
+    logger.info(f"启动 {num_workers} 个工作进程")
+    for i in range(num_workers):
+        worker = start_child(i)
+        if worker is not None:
+            return worker
+
+    for signum in _forwarded_signals():
+        signal.signal(signum, forward)
+    signal.signal(signal.SIGALRM, force_kill)
+
+    restarts = 0
+    while children:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        except OSError as e:
+            if e.errno == errno.EINTR:
+                continue
+            raise
+        i = children.pop(pid, None)
+        if i is None:
+            continue
+        if os.WIFSIGNALED(status):
+            logger.warning(f"工作进程 {i} (pid {pid}) 被信号 {os.WTERMSIG(status)} 结束")
+        elif os.WEXITSTATUS(status) != 0:
+            logger.warning(f"工作进程 {i} (pid {pid}) 退出码 {os.WEXITSTATUS(status)}")
+        else:
+            logger.info(f"工作进程 {i} (pid {pid}) 已退出")
+            continue
+        if stopping:
+            continue
+        restarts += 1
+        if restarts > max_restarts:
+            raise RuntimeError("工作进程重启次数过多，主进程退出")
+        worker = start_child(i)
+        if worker is not None:
+            return worker
+
+    # 全部工作进程已退出, 主进程随之退出
+    sys.exit(0)
+
+
+def _forwarded_signals():
+    signals = [signal.SIGTERM, signal.SIGINT]
+    if hasattr(signal, 'SIGHUP'):
+        signals.append(signal.SIGHUP)
+    return signals
+
+
+def _kill(pid: int, signum: int):
+    try:
+        os.kill(pid, signum)
+    except ProcessLookupError:
+        pass
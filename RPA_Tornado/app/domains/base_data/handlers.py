@@ -46,7 +46,7 @@ class BaseDataHandler(RequestHandler):
     
     def write_response(self, data: Dict[str, Any]):
         """写入响应数据"""
-        self.write(ResponseFormatter.to_json(data))
+        self.write(ResponseFormatter.dumps(data))
     
     def handle_error(self, error: Exception):
         """处理错误"""
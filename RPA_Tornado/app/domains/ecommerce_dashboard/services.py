@@ -13,6 +13,7 @@ import logging
 from ...core.exceptions.base_exceptions import ValidationError, BusinessLogicError, NotFoundError
 from ...shared.constants.business_constants import DATE_FORMAT
 from ...models.dashboard_models import Shop, Sale, ExchangeRate
+from ...auth.governor import bulk_priority
 from ...auth.openapi import OpenApiBase
 from ...config import settings
 
@@ -27,6 +28,7 @@ class EcommerceDashboardService:
         """初始化服务"""
         self.api = OpenApiBase(settings.LLX_API_HOST, settings.LLX_APP_ID, settings.LLX_APP_SECRET)
     
+    @bulk_priority
     async def sync_shop_data(self, access_token: str) -> Dict[str, Any]:
         """同步店铺数据
         
@@ -86,6 +88,7 @@ class EcommerceDashboardService:
             logger.error(f"同步店铺数据失败: {str(e)}")
             raise BusinessLogicError(f"同步店铺数据失败: {str(e)}")
     
+    @bulk_priority
     async def sync_exchange_rate_data(self, access_token: str, target_date: Optional[str] = None) -> Dict[str, Any]:
         """同步汇率数据
         
@@ -161,6 +164,7 @@ class EcommerceDashboardService:
             logger.error(f"同步汇率数据失败: {str(e)}")
             raise BusinessLogicError(f"同步汇率数据失败: {str(e)}")
     
+    @bulk_priority
     async def sync_sales_data_with_period(
         self, 
         access_token: str,
@@ -2,11 +2,11 @@
 # 处理多平台相关的业务逻辑
 
 import asyncio
-import uuid
 from typing import Any, Dict, List, Optional
-from datetime import datetime, timedelta
+from datetime import datetime
 
 from ...core.exceptions.base_exceptions import ValidationError, BusinessLogicError, NotFoundError
+from ...core.sync_jobs import sync_job_engine
 from ...shared.enums.business_enums import Platform
 from ...shared.constants.business_constants import (
     DEFAULT_BATCH_SIZE,
@@ -28,8 +28,6 @@ class MultiPlatformService:
     def __init__(self):
         # 临时兼容原有服务
         self._original_service = OriginalMultiPlatformService() if OriginalMultiPlatformService else None
-        # 模拟任务存储
-        self._sync_tasks = {}
     
     async def start_platform_sync(
         self,
@@ -375,112 +373,41 @@ class MultiPlatformService:
         self, platforms: List[str], sync_type: str, data_types: Optional[List[str]],
         start_date: Optional[str], end_date: Optional[str], force_sync: bool
     ) -> Dict[str, Any]:
-        """新的启动平台同步实现"""
-        # TODO: 实现新的平台同步逻辑
-        
-        # 生成任务ID
-        task_id = str(uuid.uuid4())
-        
-        # 创建同步任务
-        sync_task = {
-            'task_id': task_id,
-            'platforms': platforms,
-            'sync_type': sync_type,
-            'data_types': data_types or ['orders', 'products', 'inventory'],
-            'start_date': start_date,
-            'end_date': end_date,
-            'force_sync': force_sync,
-            'status': 'running',
-            'progress': 0,
-            'created_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
-            'updated_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
-            'estimated_completion': (datetime.now() + timedelta(minutes=30)).strftime('%Y-%m-%d %H:%M:%S')
-        }
-        
-        # 存储任务（实际应该存储到数据库）
-        self._sync_tasks[task_id] = sync_task
-        
-        # 模拟异步执行同步任务
-        asyncio.create_task(self._simulate_sync_task(task_id))
-        
+        """创建同步任务, 由后台同步任务引擎执行, 任务状态保存在数据库"""
+        task = await sync_job_engine.create_task(
+            platforms, data_types, sync_type=sync_type, start_date=start_date,
+            end_date=end_date, force_sync=force_sync
+        )
         return {
-            'task_id': task_id,
+            'task_id': task['task_id'],
             'status': 'started',
             'message': '同步任务已启动',
             'platforms': platforms,
-            'estimated_completion': sync_task['estimated_completion']
+            'estimated_completion': task['estimated_completion']
         }
     
-    async def _simulate_sync_task(self, task_id: str):
-        """模拟同步任务执行"""
-        try:
-            task = self._sync_tasks.get(task_id)
-            if not task:
-                return
-            
-            # 模拟进度更新
-            for progress in range(0, 101, 10):
-                await asyncio.sleep(1)  # 模拟处理时间
-                task['progress'] = progress
-                task['updated_at'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-                
-                if progress == 100:
-                    task['status'] = 'completed'
-                    task['completed_at'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-                
-        except Exception as e:
-            task['status'] = 'failed'
-            task['error'] = str(e)
-            task['updated_at'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-    
     async def _get_sync_status_new(self, task_id: Optional[str], platform: Optional[str]) -> Dict[str, Any]:
-        """新的获取同步状态实现"""
-        # TODO: 实现新的同步状态逻辑
-        
+        """从任务表查询同步状态"""
         if task_id:
-            # 获取特定任务状态
-            task = self._sync_tasks.get(task_id)
+            task = await sync_job_engine.get_task(task_id)
             if not task:
                 raise NotFoundError(f"任务 {task_id} 不存在")
-            
             return {'task': task}
         
-        # 获取平台的所有任务状态
-        tasks = []
-        for task in self._sync_tasks.values():
-            if not platform or platform in task['platforms']:
-                tasks.append(task)
-        
+        result = await sync_job_engine.list_tasks(platform, None, 1, MAX_BATCH_SIZE)
         return {
-            'tasks': tasks,
-            'total': len(tasks)
+            'tasks': result['data'],
+            'total': result['total']
         }
     
     async def _get_sync_tasks_new(
         self, platform: Optional[str], status: Optional[str], page: int, page_size: int
     ) -> Dict[str, Any]:
-        """新的获取同步任务列表实现"""
-        # TODO: 实现新的同步任务列表逻辑
-        
-        # 模拟数据
-        all_tasks = list(self._sync_tasks.values())
-        
-        # 筛选逻辑
-        if platform:
-            all_tasks = [task for task in all_tasks if platform in task['platforms']]
-        
-        if status:
-            all_tasks = [task for task in all_tasks if task['status'] == status]
-        
-        # 分页处理
-        total = len(all_tasks)
-        start_idx = (page - 1) * page_size
-        end_idx = start_idx + page_size
-        paginated_tasks = all_tasks[start_idx:end_idx]
-        
+        """从任务表分页查询同步任务"""
+        result = await sync_job_engine.list_tasks(platform, status, page, page_size)
         return {
-            'data': paginated_tasks,
-            'total': total
+            'data': result['data'],
+            'total': result['total']
         }
     
     async def _get_platform_data_new(
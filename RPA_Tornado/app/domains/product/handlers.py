@@ -9,6 +9,7 @@ from tornado.web import RequestHandler
 from tornado.httpclient import HTTPError
 
 from ...core.exceptions.base_exceptions import ValidationError, BusinessLogicError, NotFoundError
+from ...shared.response_formatter import ResponseFormatter
 from ...schemas.product_schemas import (
     ProductListRequest,
     ProductListResponse,
@@ -54,7 +55,7 @@ class BaseProductHandler(RequestHandler):
         """写入响应数据"""
         self.set_status(status_code)
         if data is not None:
-            self.write(json.dumps(data, ensure_ascii=False, default=str))
+            self.write(ResponseFormatter.dumps(data))
     
     def write_error_response(self, error_message: str, status_code: int = 400, error_code: str = None):
         """写入错误响应"""
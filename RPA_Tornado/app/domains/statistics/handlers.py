@@ -41,7 +41,7 @@ class BaseStatisticsHandler(RequestHandler):
     def write_response(self, response_data: Dict[str, Any], status_code: int = 200):
         """写入响应数据"""
         self.set_status(status_code)
-        self.write(ResponseFormatter.to_json(response_data))
+        self.write(ResponseFormatter.dumps(response_data))
         self.finish()
     
     def handle_error(self, error: Exception):
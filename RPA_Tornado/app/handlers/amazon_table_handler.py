@@ -3,8 +3,15 @@
 # 负责处理亚马逊原始表数据相关的HTTP请求
 
 import json
+from urllib.parse import quote
+from tornado.iostream import StreamClosedError
 from tornado.web import RequestHandler
+from app.auth.pager import OffsetPager
+from app.auth.resp_schema import RawResponse
+from app.config import settings
 from app.services.amazon_table_service import AmazonTableService
+from app.utils.concurrency_utils import bounded_gather, lingxing_error
+from app.utils.export_utils import CHUNK_SIZE
 from .base import BaseHandler
 
 class RemovalShipmentListHandler(BaseHandler):
@@ -37,7 +44,7 @@ class RemovalShipmentListHandler(BaseHandler):
             for field in required_fields:
                 if field not in data or data[field] is None:
                     self.set_status(400)
-                    self.write({
+                    self.write_json({
                         'code': 400,
                         'message': f'缺少必填参数: {field}',
                         'data': None
@@ -48,7 +55,7 @@ class RemovalShipmentListHandler(BaseHandler):
             seller_id = data.get('seller_id')
             if not data.get('sid') and not seller_id:
                 self.set_status(400)
-                self.write({
+                self.write_json({
                     'code': 400,
                     'message': 'sid和seller_id至少需要传递一个',
                     'data': None
@@ -59,37 +66,49 @@ class RemovalShipmentListHandler(BaseHandler):
             if seller_id and isinstance(seller_id, list):
                 if len(seller_id) == 0:
                     self.set_status(400)
-                    self.write({
+                    self.write_json({
                         'code': 400,
                         'message': 'seller_id数组不能为空',
                         'data': None
                     })
                     return
-                # 对于多个seller_id，我们需要分别查询然后合并结果
-                all_results = []
+                # 对于多个seller_id，并发查询后按seller_id顺序合并结果
                 service = AmazonTableService()
                 
-                for single_seller_id in seller_id:
+                async def query_seller(single_seller_id):
                     # 为每个seller_id创建单独的查询参数
                     single_data = data.copy()
                     single_data['seller_id'] = single_seller_id
-                    if 'sid' in single_data:
-                        del single_data['sid']  # 移除sid，使用seller_id
-                    
-                    result = await service.get_removal_shipment_list(single_data)
-                    if result.get('code') == 200 and result.get('data'):
-                        if isinstance(result['data'], list):
-                            all_results.extend(result['data'])
-                        elif isinstance(result['data'], dict) and 'list' in result['data']:
-                            all_results.extend(result['data']['list'])
+                    single_data.pop('sid', None)  # 移除sid，使用seller_id
+                    return await service.get_removal_shipment_list(single_data)
+                
+                fan_out = await bounded_gather(
+                    seller_id, query_seller,
+                    limit=settings.LLX_FAN_OUT_CONCURRENCY,
+                    is_error=lingxing_error
+                )
+                
+                if not fan_out.succeeded:
+                    response = {'code': 500, 'message': '所有seller_id查询均失败', 'data': None}
+                else:
+                    response = {
+                        'code': 200,
+                        'message': '查询成功',
+                        'data': fan_out.merged_records()
+                    }
+                failed_sids = []
+                for result in fan_out.results:
+                    if result:
+                        failed_sids.extend(result.get('failed_sids', []))
+                if failed_sids:
+                    response['failed_sids'] = failed_sids
+                if fan_out.failed:
+                    response['failed_seller_ids'] = [
+                        {'seller_id': f['key'], 'message': f['message']} for f in fan_out.failed
+                    ]
                 
                 # 返回合并后的结果
-                self.set_header('Content-Type', 'application/json')
-                self.write(json.dumps({
-                    'code': 200,
-                    'message': '查询成功',
-                    'data': all_results
-                }, ensure_ascii=False))
+                self.write_json(response)
                 return
             
             # 调用亚马逊源表数据服务
@@ -97,12 +116,11 @@ class RemovalShipmentListHandler(BaseHandler):
             result = await service.get_removal_shipment_list(data)
             
             # 返回结果
-            self.set_header('Content-Type', 'application/json')
-            self.write(json.dumps(result, ensure_ascii=False))
+            self.write_json(result)
             
         except json.JSONDecodeError:
             self.set_status(400)
-            self.write({
+            self.write_json({
                 'code': 400,
                 'message': '请求体格式错误，请使用有效的JSON格式',
                 'data': None
@@ -110,7 +128,7 @@ class RemovalShipmentListHandler(BaseHandler):
         except Exception as e:
             print(f"[ERROR] RemovalShipmentListHandler: {str(e)}")
             self.set_status(500)
-            self.write({
+            self.write_json({
                 'code': 500,
                 'message': f'服务器内部错误: {str(e)}',
                 'data': None
@@ -138,10 +156,12 @@ class RemovalOrderListNewHandler(BaseHandler):
                 'offset': request_data.get('offset', 0),
                 'length': request_data.get('length', 1000)
             }
+            # fetch_all=true 时自动翻页, 以分块 JSON 流式返回全部数据; export=csv/xlsx 时导出为文件
+            fetch_all = bool(request_data.get('fetch_all') or request_data.get('export'))
             
             # 参数校验
             if not params.get('sid'):
-                self.write({
+                self.write_json({
                     'code': 400,
                     'message': '缺少必填参数: sid',
                     'data': None
@@ -149,7 +169,7 @@ class RemovalOrderListNewHandler(BaseHandler):
                 return
             
             if not params.get('start_date') or not params.get('end_date'):
-                self.write({
+                self.write_json({
                     'code': 400,
                     'message': '缺少必填参数: start_date 或 end_date',
                     'data': None
@@ -158,19 +178,22 @@ class RemovalOrderListNewHandler(BaseHandler):
             
             # 调用服务层获取数据
             service = AmazonTableService()
-            result = await service.get_removal_order_list_new(params)
+            result = await service.get_removal_order_list_new(params, fetch_all=fetch_all)
+            if isinstance(result, OffsetPager):
+                await self.write_paged(result, request_data)
+                return
             
             # 返回结果
             self.write(result)
             
         except json.JSONDecodeError:
-            self.write({
+            self.write_json({
                 'code': 400,
                 'message': '请求体格式错误，请使用有效的JSON格式',
                 'data': None
             })
         except Exception as e:
-            self.write({
+            self.write_json({
                 'code': 500,
                 'message': f'服务器内部错误: {str(e)}',
                 'data': None
@@ -190,25 +213,33 @@ class AllOrdersHandler(BaseHandler):
             required_fields = ['sid', 'start_date', 'end_date']
             for field in required_fields:
                 if field not in params or params[field] is None:
-                    self.write(json.dumps({
+                    self.write_json({
                         'code': 400,
                         'message': f'缺少必填参数: {field}',
                         'data': None
-                    }, ensure_ascii=False))
+                    })
                     return
             
             # 调用服务层获取数据
             service = AmazonTableService()
-            result = await service.get_all_orders(params)
+            result = await service.get_all_orders(
+                params, fetch_all=bool(params.get('fetch_all') or params.get('export')), raw=bool(params.get('raw'))
+            )
+            if isinstance(result, OffsetPager):
+                await self.write_paged(result, params)
+                return
+            if isinstance(result, RawResponse):
+                self.write_raw(result)
+                return
             
             # 返回响应
-            self.write(json.dumps(result, ensure_ascii=False))
+            self.write_json(result)
         except Exception as e:
-            self.write(json.dumps({
+            self.write_json({
                 'code': 500,
                 'message': f'服务器内部错误: {str(e)}',
                 'data': None
-            }, ensure_ascii=False))
+            })
 
 
 class FbaOrdersHandler(BaseHandler):
@@ -224,11 +255,11 @@ class FbaOrdersHandler(BaseHandler):
             required_fields = ['sid', 'start_date', 'end_date']
             for field in required_fields:
                 if field not in params or params[field] is None:
-                    self.write(json.dumps({
+                    self.write_json({
                         'code': 400,
                         'message': f'缺少必填参数: {field}',
                         'data': None
-                    }, ensure_ascii=False))
+                    })
                     return
             
             # 调用服务层获取数据
@@ -236,13 +267,13 @@ class FbaOrdersHandler(BaseHandler):
             result = await service.get_fba_orders(params)
             
             # 返回响应
-            self.write(json.dumps(result, ensure_ascii=False))
+            self.write_json(result)
         except Exception as e:
-            self.write(json.dumps({
+            self.write_json({
                 'code': 500,
                 'message': f'服务器内部错误: {str(e)}',
                 'data': None
-            }, ensure_ascii=False))
+            })
 
 
 class FbaExchangeOrdersHandler(BaseHandler):
@@ -258,11 +289,11 @@ class FbaExchangeOrdersHandler(BaseHandler):
             required_fields = ['sid', 'start_date', 'end_date']
             for field in required_fields:
                 if field not in params or params[field] is None:
-                    self.write(json.dumps({
+                    self.write_json({
                         'code': 400,
                         'message': f'缺少必填参数: {field}',
                         'data': None
-                    }, ensure_ascii=False))
+                    })
                     return
             
             # 调用服务层获取数据
@@ -270,13 +301,13 @@ class FbaExchangeOrdersHandler(BaseHandler):
             result = await service.get_fba_exchange_orders(params)
             
             # 返回响应
-            self.write(json.dumps(result, ensure_ascii=False))
+            self.write_json(result)
         except Exception as e:
-            self.write(json.dumps({
+            self.write_json({
                 'code': 500,
                 'message': f'服务器内部错误: {str(e)}',
                 'data': None
-            }, ensure_ascii=False))
+            })
 
 
 class FbaRefundOrdersHandler(BaseHandler):
@@ -292,11 +323,11 @@ class FbaRefundOrdersHandler(BaseHandler):
             required_fields = ['sid', 'start_date', 'end_date']
             for field in required_fields:
                 if field not in params or params[field] is None:
-                    self.write(json.dumps({
+                    self.write_json({
                         'code': 400,
                         'message': f'缺少必填参数: {field}',
                         'data': None
-                    }, ensure_ascii=False))
+                    })
                     return
             
             # 调用服务层获取数据
@@ -304,13 +335,13 @@ class FbaRefundOrdersHandler(BaseHandler):
             result = await service.get_fba_refund_orders(params)
             
             # 返回响应
-            self.write(json.dumps(result, ensure_ascii=False))
+            self.write_json(result)
         except Exception as e:
-            self.write(json.dumps({
+            self.write_json({
                 'code': 500,
                 'message': f'服务器内部错误: {str(e)}',
                 'data': None
-            }, ensure_ascii=False))
+            })
 
 
 class FbmReturnOrdersHandler(BaseHandler):
@@ -455,7 +486,10 @@ class FbaAgeListHandler(BaseHandler):
             
             # 调用服务层获取数据
             service = AmazonTableService()
-            result = await service.get_fba_age_list(params)
+            result = await service.get_fba_age_list(params, fetch_all=bool(params.get('fetch_all') or params.get('export')))
+            if isinstance(result, OffsetPager):
+                await self.write_paged(result, params)
+                return
             
             self.write_json(result)
             
@@ -589,4 +623,48 @@ class AmazonReportExportTaskHandler(BaseHandler):
             self.write_json(result)
             
         except Exception as e:
-            self.write_error(500, f'报告下载链接续期失败: {str(e)}')
\ No newline at end of file
+            self.write_error(500, f'报告下载链接续期失败: {str(e)}')
+
+
+class ReportExportDownloadHandler(BaseHandler):
+    """报告文件下载处理器（分块转发报告文件, 不在内存中缓存整个文件）"""
+    
+    async def post(self):
+        try:
+            # 解析请求参数
+            params = self.get_request_params()
+            
+            # 必填参数校验
+            required_fields = ['seller_id', 'task_id', 'region']
+            for field in required_fields:
+                if field not in params or params[field] is None:
+                    self.write_error(400, f'缺少必填参数: {field}')
+                    return
+            
+            # 调用服务层获取下载链接
+            service = AmazonTableService()
+            url, result = await service.get_report_document_url(params)
+            if not url:
+                if result.get('code') == 0:
+                    result = {'code': 409, 'message': '报告尚未生成，请稍后再试', 'data': result.get('data')}
+                self.write_json(result)
+                return
+            
+            filename = params.get('filename') or f"report_{params['task_id']}"
+            async with service.open_report_document(url) as resp:
+                self.set_header('Content-Type', resp.headers.get('Content-Type', 'application/octet-stream'))
+                self.set_header('Content-Disposition', "attachment; filename*=UTF-8''%s" % quote(filename))
+                if resp.headers.get('Content-Length'):
+                    self.set_header('Content-Length', resp.headers['Content-Length'])
+                try:
+                    async for chunk in resp.content.iter_chunked(CHUNK_SIZE):
+                        self.write(chunk)
+                        await self.flush()
+                except StreamClosedError:
+                    # 客户端已断开, 停止下载
+                    return
+            
+        except Exception as e:
+            if self._headers_written:
+                raise
+            self.write_error(500, f'下载报告文件失败: {str(e)}')
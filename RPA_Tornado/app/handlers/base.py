@@ -1,7 +1,178 @@
+import json
+import logging
+from datetime import datetime
+from urllib.parse import quote
+from tornado.ioloop import IOLoop
+from tornado.iostream import StreamClosedError
 from tornado.web import RequestHandler
-from app.middleware.auth import AccessTokenManager
+from app.auth.pager import OffsetPager
+from app.auth.resp_schema import RawResponse
+from app.core.token_provider import token_provider
+from app.shared.response_formatter import ResponseFormatter
+from app.utils.export_utils import EXPORT_CONTENT_TYPES, CsvPageWriter, XlsxSpoolWriter, collect_columns
+
+logger = logging.getLogger(__name__)
 
 # 获取access_token
 class BaseHandler(RequestHandler):
     async def prepare(self):
-        self.access_token = await AccessTokenManager.get_token() 
\ No newline at end of file
+        self.access_token = await token_provider.get_token()
+
+    def get_request_params(self) -> dict:
+        """解析 JSON 请求体, 空请求体返回空字典"""
+        body = self.request.body.decode('utf-8').strip()
+        return json.loads(body) if body else {}
+
+    def write_json(self, data):
+        """以 JSON 格式输出响应(orjson 序列化, Decimal/datetime 等按 str 输出)"""
+        self.set_header('Content-Type', 'application/json; charset=UTF-8')
+        self.write(ResponseFormatter.dumps(data))
+
+    def write_raw(self, resp: RawResponse):
+        """
+        原样写出领星响应字节, 不再解析和重新序列化
+        gzip 由应用的 compress_response 按客户端 Accept-Encoding 统一处理
+        """
+        self.set_header('Content-Type', 'application/json; charset=UTF-8')
+        self.write(resp.body)
+
+    def write_error(self, status_code: int, message: str = None, **kwargs):
+        """输出统一格式的错误响应, 兼容 tornado 内部 send_error 的调用"""
+        self.set_status(status_code)
+        self.write_json({
+            'code': status_code,
+            'message': message or self._reason,
+            'data': None
+        })
+
+    async def write_paged_records(self, pager: OffsetPager):
+        """
+        流式输出分页接口的全部记录(分块传输)
+        首页在写出响应头之前获取, 首页失败时由调用方按普通错误处理;
+        之后每取到一页即写出并 flush, 内存中只保留预取窗口内的页
+        """
+        pages = pager.iter_pages()
+        try:
+            records = await pages.__anext__()
+            self.set_header('Content-Type', 'application/json; charset=UTF-8')
+            self.write(b'{"code":0,"message":"success","total":%s,"data":[' % ResponseFormatter.dumps(pager.total))
+            first = True
+            try:
+                while True:
+                    if records:
+                        # 整页一次序列化, 去掉数组的方括号后拼接到输出流
+                        chunk = ResponseFormatter.dumps(records)[1:-1]
+                        self.write(chunk if first else b',' + chunk)
+                        first = False
+                        await self.flush()
+                    records = await pages.__anext__()
+            except StopAsyncIteration:
+                self.write(b']}')
+            except StreamClosedError:
+                # 客户端已断开, 停止翻页
+                return
+            except Exception as e:
+                # 响应头已发出, 只能在 JSON 尾部标记数据不完整
+                self.write(b'],"incomplete":true,"error":%s}' % ResponseFormatter.dumps(str(e)))
+        finally:
+            await pages.aclose()
+
+    async def write_paged(self, pager: OffsetPager, params: dict):
+        """按请求参数 export(csv/xlsx) 导出文件, 未指定时以分块 JSON 输出"""
+        export = params.get('export')
+        if export:
+            await self.write_paged_export(pager, str(export).lower(), params.get('filename'))
+        else:
+            await self.write_paged_records(pager)
+
+    def _set_attachment_headers(self, fmt: str, filename: str, total):
+        self.set_header('Content-Type', EXPORT_CONTENT_TYPES[fmt])
+        self.set_header('Content-Disposition', "attachment; filename*=UTF-8''%s" % quote(filename))
+        if total is not None:
+            self.set_header('X-Total-Count', str(total))
+
+    async def write_paged_export(self, pager: OffsetPager, fmt: str, filename: str = None):
+        """
+        以 CSV / XLSX 文件导出分页接口的全部记录, 内存占用与总行数无关
+        - csv:  写出表头后每取到一页即转换、写出并 flush(分块传输); 中途失败时不结束分块传输而是直接断开连接,
+                客户端会收到传输错误而不是一个看似完整的文件
+        - xlsx: 逐页在线程池中追加到只写模式的工作簿(临时文件), 全部写完后再分块输出;
+                响应头在文件生成之后才发出, 失败时按普通错误处理
+        """
+        if fmt not in EXPORT_CONTENT_TYPES:
+            self.write_error(400, f"export 必须为: {', '.join(EXPORT_CONTENT_TYPES)}")
+            return
+        if not filename:
+            filename = f"{pager.route_name.rstrip('/').rsplit('/', 1)[-1]}_{datetime.now():%Y%m%d%H%M%S}"
+        if not filename.endswith('.' + fmt):
+            filename = f"{filename}.{fmt}"
+
+        pages = pager.iter_pages()
+        try:
+            # 表头取第一个非空页的字段; 全部为空时只输出空文件
+            records = await pages.__anext__()
+            while not records:
+                try:
+                    records = await pages.__anext__()
+                except StopAsyncIteration:
+                    break
+            columns = collect_columns(records)
+            if fmt == 'csv':
+                await self._write_csv_pages(pages, records, columns, filename, pager.total)
+            else:
+                await self._write_xlsx_pages(pages, records, columns, filename, pager.total)
+        finally:
+            await pages.aclose()
+
+    async def _write_csv_pages(self, pages, records, columns, filename, total):
+        writer = CsvPageWriter(columns)
+        self._set_attachment_headers('csv', filename, total)
+        self.write(writer.header())
+        try:
+            while True:
+                if records:
+                    self.write(writer.page(records))
+                    await self.flush()
+                records = await pages.__anext__()
+        except StopAsyncIteration:
+            # 响应头已发出, 表头之外的字段只记录日志
+            self._log_dropped_columns(filename, writer.dropped_columns)
+        except StreamClosedError:
+            # 客户端已断开, 停止翻页
+            return
+        except Exception as e:
+            # 响应头已发出, 不能再改为错误响应: 不发送分块结束标记, 直接断开连接
+            logger.error(f"导出 {filename} 中断(已写出 {writer.rows_written} 行): {e}")
+            self.request.connection.close()
+
+    async def _write_xlsx_pages(self, pages, records, columns, filename, total):
+        writer = XlsxSpoolWriter(columns)
+        loop = IOLoop.current()
+        try:
+            while True:
+                if records:
+                    # openpyxl 逐行生成 XML, 放到线程池执行, 不阻塞事件循环
+                    await loop.run_in_executor(None, writer.append_page, records)
+                try:
+                    records = await pages.__anext__()
+                except StopAsyncIteration:
+                    break
+            size = await loop.run_in_executor(None, writer.save)
+            self._set_attachment_headers('xlsx', filename, total)
+            self.set_header('Content-Length', str(size))
+            if writer.dropped_columns:
+                self._log_dropped_columns(filename, writer.dropped_columns)
+                self.set_header('X-Export-Dropped-Columns', quote(','.join(writer.dropped_columns)))
+            for chunk in writer.iter_chunks():
+                self.write(chunk)
+                await self.flush()
+        except StreamClosedError:
+            return
+        finally:
+            await loop.run_in_executor(None, writer.close)
+
+    @staticmethod
+    def _log_dropped_columns(filename: str, dropped: list):
+        """表头确定后才出现的字段无法写入已输出的表头, 记录日志"""
+        if dropped:
+            logger.warning(f"导出 {filename} 时以下字段不在表头中, 未写入文件: {', '.join(dropped)}")
@@ -13,11 +13,10 @@ class CurrencyExchangeRateHandler(BaseHandler):
             date = self.get_argument('date', None)
             service = BaseDataService()
             result = await service.get_currency_exchange_rate(self.access_token, date=date)
-            self.set_header('Content-Type', 'application/json')
-            self.write(json.dumps(result, ensure_ascii=False))
+            self.write_json(result)
         except Exception as e:
             self.set_status(500)
-            self.write({'error': str(e)})
+            self.write_json({'error': str(e)})
 
     async def post(self):
         """
@@ -34,11 +33,10 @@ class CurrencyExchangeRateHandler(BaseHandler):
             
             service = BaseDataService()
             result = await service.get_currency_exchange_rate(self.access_token, date=date)
-            self.set_header('Content-Type', 'application/json')
-            self.write(json.dumps(result, ensure_ascii=False))
+            self.write_json(result)
         except Exception as e:
             self.set_status(500)
-            self.write({'error': str(e)})
+            self.write_json({'error': str(e)})
 
 # 查询亚马逊店铺列表
 class AmazonSellerListHandler(BaseHandler):
@@ -52,12 +50,11 @@ class AmazonSellerListHandler(BaseHandler):
             print("[DEBUG] AmazonSellerListHandler: 创建 service 实例成功")
             result = await service.get_amazon_seller_list(self.access_token)
             print("[DEBUG] AmazonSellerListHandler: service 调用完成")
-            self.set_header('Content-Type', 'application/json')
-            self.write(json.dumps(result, ensure_ascii=False))
+            self.write_json(result)
         except Exception as e:
             print(f"[DEBUG] AmazonSellerListHandler: 发生异常: {str(e)}")
             self.set_status(500)
-            self.write({'error': str(e)})
+            self.write_json({'error': str(e)})
 
 # 查询亚马逊市场列表
 class AmazonMarketplaceListHandler(BaseHandler):
@@ -68,11 +65,10 @@ class AmazonMarketplaceListHandler(BaseHandler):
         try:
             service = BaseDataService()
             result = await service.get_amazon_marketplace_list(self.access_token)
-            self.set_header('Content-Type', 'application/json')
-            self.write(json.dumps(result, ensure_ascii=False))
+            self.write_json(result)
         except Exception as e:
             self.set_status(500)
-            self.write({'error': str(e)})
+            self.write_json({'error': str(e)})
 
 # 查询世界州/省列表
 class WorldStateListHandler(BaseHandler):
@@ -85,7 +81,7 @@ class WorldStateListHandler(BaseHandler):
             body = self.request.body.decode('utf-8').strip()
             if not body:
                 self.set_status(400)
-                self.write({'error': '请求体不能为空，需要提供 country_code 参数'})
+                self.write_json({'error': '请求体不能为空，需要提供 country_code 参数'})
                 return
             
             data = json.loads(body)
@@ -93,19 +89,18 @@ class WorldStateListHandler(BaseHandler):
             
             if not country_code:
                 self.set_status(400)
-                self.write({'error': 'country_code 参数不能为空'})
+                self.write_json({'error': 'country_code 参数不能为空'})
                 return
             
             service = BaseDataService()
             result = await service.get_world_state_list(self.access_token, country_code=country_code)
-            self.set_header('Content-Type', 'application/json')
-            self.write(json.dumps(result, ensure_ascii=False))
+            self.write_json(result)
         except json.JSONDecodeError as e:
             self.set_status(400)
-            self.write({'error': f'JSON 格式错误: {str(e)}'})
+            self.write_json({'error': f'JSON 格式错误: {str(e)}'})
         except Exception as e:
             self.set_status(500)
-            self.write({'error': str(e)})
+            self.write_json({'error': str(e)})
 
 # 下载产品附件
 class FileAttachmentDownloadHandler(BaseHandler):
@@ -118,11 +113,10 @@ class FileAttachmentDownloadHandler(BaseHandler):
             file_id = data.get('file_id')
             service = BaseDataService()
             result = await service.download_file_attachment(self.access_token, file_id=file_id)
-            self.set_header('Content-Type', 'application/json')
-            self.write(json.dumps(result, ensure_ascii=False))
+            self.write_json(result)
         except Exception as e:
             self.set_status(500)
-            self.write({'error': str(e)})
+            self.write_json({'error': str(e)})
 
 # 定制化附件下载
 class CustomizedFileDownloadHandler(BaseHandler):
@@ -135,11 +129,10 @@ class CustomizedFileDownloadHandler(BaseHandler):
             file_id = data.get('file_id')
             service = BaseDataService()
             result = await service.download_customized_file(self.access_token, file_id=file_id)
-            self.set_header('Content-Type', 'application/json')
-            self.write(json.dumps(result, ensure_ascii=False))
+            self.write_json(result)
         except Exception as e:
             self.set_status(500)
-            self.write({'error': str(e)})
+            self.write_json({'error': str(e)})
 
 # 查询ERP用户信息列表
 class ErpUserListHandler(BaseHandler):
@@ -149,12 +142,11 @@ class ErpUserListHandler(BaseHandler):
         """
         try:
             service = BaseDataService()
-            result = await service.get_erp_user_list()
-            self.set_header('Content-Type', 'application/json')
-            self.write(json.dumps(result, ensure_ascii=False))
+            result = await service.get_erp_user_list(self.access_token)
+            self.write_json(result)
         except Exception as e:
             self.set_status(500)
-            self.write({'error': str(e)})
+            self.write_json({'error': str(e)})
 
 # 批量修改店铺名称
 class BatchEditSellerNameHandler(BaseHandler):
@@ -167,8 +159,7 @@ class BatchEditSellerNameHandler(BaseHandler):
             sid_name_list = data.get('sid_name_list')
             service = BaseDataService()
             result = await service.batch_edit_seller_name(self.access_token, sid_name_list=sid_name_list)
-            self.set_header('Content-Type', 'application/json')
-            self.write(json.dumps(result, ensure_ascii=False))
+            self.write_json(result)
         except Exception as e:
             self.set_status(500)
-            self.write({'error': str(e)})
\ No newline at end of file
+            self.write_json({'error': str(e)})
\ No newline at end of file
@@ -30,6 +30,7 @@ from app.core.exceptions import (
     DatabaseException
 )
 from app.core.response import ResponseHandler
+from app.shared.response_formatter import ResponseFormatter
 
 # 配置日志记录器
 logger = logging.getLogger(__name__)
@@ -86,7 +87,7 @@ class BaseDashboardHandler(RequestHandler):
         )
         
         self.set_status(status_code)
-        self.write(error_response.dict())
+        self.write(ResponseFormatter.dumps(error_response.dict()))
         self.finish()
     
     def parse_request_body(self, schema_class):
@@ -121,7 +122,7 @@ class BaseDashboardHandler(RequestHandler):
             data=data,
             timestamp=datetime.now().isoformat()
         )
-        self.write(response.dict())
+        self.write(ResponseFormatter.dumps(response.dict()))
         self.finish()
 
 
@@ -134,7 +135,7 @@ class SyncShopDataHandler(BaseDashboardHandler):
             # 解析请求参数
             request_data = self.parse_request_body(SyncShopDataRequest)
             
-            logger.info(f"开始同步店铺数据，访问令牌: {request_data.access_token[:10]}...")
+            logger.info(f"开始同步店铺数据，访问令牌: {(request_data.access_token or '共享令牌')[:10]}...")
             
             # 调用服务层同步数据
             result = await self.dashboard_service.sync_shop_data(request_data.access_token)
@@ -341,23 +342,23 @@ class HealthCheckHandler(BaseDashboardHandler):
                 )
             else:
                 self.set_status(503)
-                self.write({
+                self.write(ResponseFormatter.dumps({
                     'code': 503,
                     'message': '服务不可用',
                     'data': health_status,
                     'timestamp': datetime.now().isoformat()
-                })
+                }))
                 self.finish()
                 
         except Exception as e:
             logger.error(f"健康检查失败: {str(e)}")
             self.set_status(503)
-            self.write({
+            self.write(ResponseFormatter.dumps({
                 'code': 503,
                 'message': '服务不可用',
                 'data': {'status': 'unhealthy', 'error': str(e)},
                 'timestamp': datetime.now().isoformat()
-            })
+            }))
             self.finish()
 
 
@@ -40,11 +40,10 @@ class MultiPlatformSellerListHandler(BaseHandler):
                 is_sync=int(is_sync) if is_sync is not None else None,
                 status=int(status) if status is not None else None
             )
-            self.set_header('Content-Type', 'application/json')
-            self.write(json.dumps(result, ensure_ascii=False))
+            self.write_json(result)
         except Exception as e:
             self.set_status(500)
-            self.write({'error': str(e)})
+            self.write_json({'error': str(e)})
 
 # 销量统计列表v2查询接口
 class SaleStatisticsV2Handler(BaseHandler):
@@ -67,7 +66,7 @@ class SaleStatisticsV2Handler(BaseHandler):
             body = self.request.body.decode('utf-8').strip()
             if not body:
                 self.set_status(400)
-                self.write({'error': '请求体不能为空'})
+                self.write_json({'error': '请求体不能为空'})
                 return
             
             data = json.loads(body)
@@ -77,7 +76,7 @@ class SaleStatisticsV2Handler(BaseHandler):
             for param in required_params:
                 if param not in data or not data[param]:
                     self.set_status(400)
-                    self.write({'error': f'{param} 参数不能为空'})
+                    self.write_json({'error': f'{param} 参数不能为空'})
                     return
             
             service = MultiPlatformService()
@@ -92,14 +91,13 @@ class SaleStatisticsV2Handler(BaseHandler):
                 length=data.get('length'),
                 sids=data.get('sids')
             )
-            self.set_header('Content-Type', 'application/json')
-            self.write(json.dumps(result, ensure_ascii=False))
+            self.write_json(result)
         except json.JSONDecodeError as e:
             self.set_status(400)
-            self.write({'error': f'JSON 格式错误: {str(e)}'})
+            self.write_json({'error': f'JSON 格式错误: {str(e)}'})
         except Exception as e:
             self.set_status(500)
-            self.write({'error': str(e)}) 
+            self.write_json({'error': str(e)}) 
 
 # 查询结算利润（利润报表）-店铺接口
 class ProfitReportSellerHandler(BaseHandler):
@@ -121,7 +119,7 @@ class ProfitReportSellerHandler(BaseHandler):
             body = self.request.body.decode('utf-8').strip()
             if not body:
                 self.set_status(400)
-                self.write({'error': '请求体不能为空'})
+                self.write_json({'error': '请求体不能为空'})
                 return
             data = json.loads(body)
             # 校验必填参数
@@ -129,18 +127,17 @@ class ProfitReportSellerHandler(BaseHandler):
             for param in required_params:
                 if param not in data or data[param] is None:
                     self.set_status(400)
-                    self.write({'error': f'{param} 参数不能为空'})
+                    self.write_json({'error': f'{param} 参数不能为空'})
                     return
             service = MultiPlatformService()
             result = await service.get_profit_report_seller(self.access_token, data)
-            self.set_header('Content-Type', 'application/json')
-            self.write(json.dumps(result, ensure_ascii=False))
+            self.write_json(result)
         except json.JSONDecodeError as e:
             self.set_status(400)
-            self.write({'error': f'JSON 格式错误: {str(e)}'})
+            self.write_json({'error': f'JSON 格式错误: {str(e)}'})
         except Exception as e:
             self.set_status(500)
-            self.write({'error': str(e)}) 
+            self.write_json({'error': str(e)}) 
 
 # 销量报表ASIN日列表查询接口
 class SalesReportAsinDailyListsHandler(BaseHandler):
@@ -163,7 +160,7 @@ class SalesReportAsinDailyListsHandler(BaseHandler):
             body = self.request.body.decode('utf-8').strip()
             if not body:
                 self.set_status(400)
-                self.write({'error': '请求体不能为空'})
+                self.write_json({'error': '请求体不能为空'})
                 return
             
             data = json.loads(body)
@@ -173,21 +170,20 @@ class SalesReportAsinDailyListsHandler(BaseHandler):
             for param in required_params:
                 if param not in data or data[param] is None:
                     self.set_status(400)
-                    self.write({'error': f'{param} 参数不能为空'})
+                    self.write_json({'error': f'{param} 参数不能为空'})
                     return
             
             service = StatisticsService()
             result = await service.get_sales_report_asin_daily_lists(self.access_token, data)
             
-            self.set_header('Content-Type', 'application/json')
-            self.write(json.dumps(result, ensure_ascii=False))
+            self.write_json(result)
             
         except json.JSONDecodeError as e:
             self.set_status(400)
-            self.write({'error': f'JSON 格式错误: {str(e)}'})
+            self.write_json({'error': f'JSON 格式错误: {str(e)}'})
         except Exception as e:
             self.set_status(500)
-            self.write({'error': str(e)}) 
+            self.write_json({'error': str(e)}) 
 
 # 订单利润-MSKU 查询接口
 class OrderProfitMSKUHandler(BaseHandler):
@@ -200,19 +196,18 @@ class OrderProfitMSKUHandler(BaseHandler):
             body = self.request.body.decode('utf-8').strip()
             if not body:
                 self.set_status(400)
-                self.write({'error': '请求体不能为空'})
+                self.write_json({'error': '请求体不能为空'})
                 return
             data = json.loads(body)
             service = StatisticsService()
             result = await service.get_order_profit_msku(self.access_token, data)
-            self.set_header('Content-Type', 'application/json')
-            self.write(json.dumps(result, ensure_ascii=False))
+            self.write_json(result)
         except json.JSONDecodeError as e:
             self.set_status(400)
-            self.write({'error': f'JSON 格式错误: {str(e)}'})
+            self.write_json({'error': f'JSON 格式错误: {str(e)}'})
         except Exception as e:
             self.set_status(500)
-            self.write({'error': str(e)}) 
+            self.write_json({'error': str(e)}) 
 
 # 多平台结算利润（利润报表）-msku 查询接口
 class ProfitReportMSKUHandler(BaseHandler):
@@ -238,7 +233,7 @@ class ProfitReportMSKUHandler(BaseHandler):
             body = self.request.body.decode('utf-8').strip()
             if not body:
                 self.set_status(400)
-                self.write({'error': '请求体不能为空'})
+                self.write_json({'error': '请求体不能为空'})
                 return
             data = json.loads(body)
             # 校验必填参数
@@ -246,18 +241,17 @@ class ProfitReportMSKUHandler(BaseHandler):
             for param in required_params:
                 if param not in data or data[param] is None:
                     self.set_status(400)
-                    self.write({'error': f'{param} 参数不能为空'})
+                    self.write_json({'error': f'{param} 参数不能为空'})
                     return
             service = MultiPlatformService()
             result = await service.get_profit_report_msku(self.access_token, data)
-            self.set_header('Content-Type', 'application/json')
-            self.write(json.dumps(result, ensure_ascii=False))
+            self.write_json(result)
         except json.JSONDecodeError as e:
             self.set_status(400)
-            self.write({'error': f'JSON 格式错误: {str(e)}'})
+            self.write_json({'error': f'JSON 格式错误: {str(e)}'})
         except Exception as e:
             self.set_status(500)
-            self.write({'error': str(e)}) 
+            self.write_json({'error': str(e)}) 
 
 # 多平台结算利润（利润报表）-sku 查询接口
 class ProfitReportSKUHandler(BaseHandler):
@@ -283,7 +277,7 @@ class ProfitReportSKUHandler(BaseHandler):
             body = self.request.body.decode('utf-8').strip()
             if not body:
                 self.set_status(400)
-                self.write({'error': '请求体不能为空'})
+                self.write_json({'error': '请求体不能为空'})
                 return
             data = json.loads(body)
             # 校验必填参数
@@ -291,15 +285,89 @@ class ProfitReportSKUHandler(BaseHandler):
             for param in required_params:
                 if param not in data or data[param] is None:
                     self.set_status(400)
-                    self.write({'error': f'{param} 参数不能为空'})
+                    self.write_json({'error': f'{param} 参数不能为空'})
                     return
             service = MultiPlatformService()
             result = await service.get_profit_report_sku(self.access_token, data)
-            self.set_header('Content-Type', 'application/json')
-            self.write(json.dumps(result, ensure_ascii=False))
+            self.write_json(result)
         except json.JSONDecodeError as e:
             self.set_status(400)
-            self.write({'error': f'JSON 格式错误: {str(e)}'})
+            self.write_json({'error': f'JSON 格式错误: {str(e)}'})
         except Exception as e:
             self.set_status(500)
-            self.write({'error': str(e)}) 
\ No newline at end of file
+            self.write_json({'error': str(e)}) 
+
+# 多平台同步任务: 创建 / 列表
+class SyncTaskListHandler(BaseHandler):
+    async def post(self):
+        """
+        创建多平台同步任务，任务在后台执行，通过任务ID查询进度。
+        参数：
+            platforms: 平台数组，必填
+            data_types: 数据类型数组（orders/products/inventory），可选
+            sync_type: full-全量，incremental-增量，默认full
+            start_date / end_date: 日期范围（YYYY-MM-DD），可选
+            sids: 店铺id数组，可选，默认全部店铺
+            force_sync: 已有相同任务在执行时是否仍然创建，默认false
+        """
+        try:
+            data = json.loads(self.request.body.decode('utf-8') or '{}')
+            result = await MultiPlatformService().start_sync_task(data)
+            self.set_status(result['code'] if result['code'] >= 400 else 201)
+            self.write_json(result)
+        except json.JSONDecodeError as e:
+            self.set_status(400)
+            self.write_json({'error': f'JSON 格式错误: {str(e)}'})
+        except Exception as e:
+            self.set_status(500)
+            self.write_json({'error': str(e)})
+
+    async def get(self):
+        """
+        分页查询同步任务。
+        参数：platform、status、page（默认1）、page_size（默认20）
+        """
+        try:
+            result = await MultiPlatformService().list_sync_tasks(
+                platform=self.get_argument('platform', None),
+                status=self.get_argument('status', None),
+                page=int(self.get_argument('page', 1)),
+                page_size=int(self.get_argument('page_size', 20))
+            )
+            if result['code'] >= 400:
+                self.set_status(result['code'])
+            self.write_json(result)
+        except ValueError as e:
+            self.set_status(400)
+            self.write_json({'error': f'分页参数错误: {str(e)}'})
+        except Exception as e:
+            self.set_status(500)
+            self.write_json({'error': str(e)})
+
+
+# 多平台同步任务: 状态查询
+class SyncTaskDetailHandler(BaseHandler):
+    async def get(self, task_id):
+        """查询同步任务状态，返回进度（按实际页数）、预计剩余时间及各同步单元明细"""
+        try:
+            result = await MultiPlatformService().get_sync_task(task_id)
+            if result['code'] >= 400:
+                self.set_status(result['code'])
+            self.write_json(result)
+        except Exception as e:
+            self.set_status(500)
+            self.write_json({'error': str(e)})
+
+
+# 多平台同步任务: 取消
+class SyncTaskCancelHandler(BaseHandler):
+    async def post(self, task_id):
+        """取消同步任务，已写入的数据保留"""
+        try:
+            result = await MultiPlatformService().cancel_sync_task(task_id)
+            if result['code'] >= 400:
+                self.set_status(result['code'])
+            self.write_json(result)
+        except Exception as e:
+            self.set_status(500)
+            self.write_json({'error': str(e)})
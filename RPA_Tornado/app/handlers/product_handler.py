@@ -1,5 +1,7 @@
 import json
 from tornado.web import RequestHandler
+from app.auth.pager import OffsetPager
+from app.auth.resp_schema import RawResponse
 from app.services.product_service import ProductService
 from .base import BaseHandler
 
@@ -21,6 +23,9 @@ class LocalProductListHandler(BaseHandler):
         - create_time_end: 创建时间结束，格式：YYYY-MM-DD HH:mm:ss
         - sku_list: SKU列表，数组格式
         - sku_identifier_list: SKU标识符列表，数组格式
+        - fetch_all: 为true时从offset开始自动翻页，以分块JSON流式返回全部数据，length作为每页条数
+        - raw: 为true时原样透传领星响应（字段名与领星一致，如 msg），跳过解析和重新序列化
+        - export: csv/xlsx 时自动翻页并导出为文件（filename 指定文件名），内存占用与总行数无关
         """
         try:
             # 处理空请求体的情况
@@ -51,18 +56,25 @@ class LocalProductListHandler(BaseHandler):
                 create_time_start=create_time_start,
                 create_time_end=create_time_end,
                 sku_list=sku_list,
-                sku_identifier_list=sku_identifier_list
+                sku_identifier_list=sku_identifier_list,
+                fetch_all=bool(data.get('fetch_all') or data.get('export')),
+                raw=bool(data.get('raw'))
             )
+            if isinstance(result, OffsetPager):
+                await self.write_paged(result, data)
+                return
+            if isinstance(result, RawResponse):
+                self.write_raw(result)
+                return
             
-            self.set_header('Content-Type', 'application/json')
-            self.write(json.dumps(result, ensure_ascii=False))
+            self.write_json(result)
             
         except json.JSONDecodeError as e:
             self.set_status(400)
-            self.write({'error': f'JSON 格式错误: {str(e)}'})
+            self.write_json({'error': f'JSON 格式错误: {str(e)}'})
         except Exception as e:
             self.set_status(500)
-            self.write({'error': str(e)})
+            self.write_json({'error': str(e)})
 
 
 # 查询捆绑产品关系列表
@@ -78,6 +90,9 @@ class BundledProductListHandler(BaseHandler):
         请求参数:
         - offset: 分页偏移量，默认0
         - length: 分页长度，默认1000，上限1000
+        - fetch_all: 为true时从offset开始自动翻页，以分块JSON流式返回全部数据，length作为每页条数
+        - raw: 为true时原样透传领星响应（字段名与领星一致，如 msg），跳过解析和重新序列化
+        - export: csv/xlsx 时自动翻页并导出为文件（filename 指定文件名），内存占用与总行数无关
         """
         try:
             body = self.request.body.decode('utf-8').strip()
@@ -95,18 +110,25 @@ class BundledProductListHandler(BaseHandler):
             result = await service.get_bundled_product_list(
                 self.access_token,
                 offset=offset,
-                length=length
+                length=length,
+                fetch_all=bool(data.get('fetch_all') or data.get('export')),
+                raw=bool(data.get('raw'))
             )
+            if isinstance(result, OffsetPager):
+                await self.write_paged(result, data)
+                return
+            if isinstance(result, RawResponse):
+                self.write_raw(result)
+                return
             
-            self.set_header('Content-Type', 'application/json')
-            self.write(json.dumps(result, ensure_ascii=False))
+            self.write_json(result)
             
         except json.JSONDecodeError as e:
             self.set_status(400)
-            self.write({'error': f'JSON 格式错误: {str(e)}'})
+            self.write_json({'error': f'JSON 格式错误: {str(e)}'})
         except Exception as e:
             self.set_status(500)
-            self.write({'error': str(e)})
+            self.write_json({'error': str(e)})
 
 
 # 添加/编辑捆绑产品
@@ -142,7 +164,7 @@ class SetBundledProductHandler(BaseHandler):
             body = self.request.body.decode('utf-8').strip()
             if not body:
                 self.set_status(400)
-                self.write({'error': '请求体不能为空'})
+                self.write_json({'error': '请求体不能为空'})
                 return
                 
             data = json.loads(body)
@@ -153,27 +175,26 @@ class SetBundledProductHandler(BaseHandler):
             
             if not sku:
                 self.set_status(400)
-                self.write({'error': 'sku 参数不能为空'})
+                self.write_json({'error': 'sku 参数不能为空'})
                 return
                 
             if not product_name:
                 self.set_status(400)
-                self.write({'error': 'product_name 参数不能为空'})
+                self.write_json({'error': 'product_name 参数不能为空'})
                 return
             
             # 调用产品服务
             service = ProductService()
             result = await service.set_bundled_product(self.access_token, data)
             
-            self.set_header('Content-Type', 'application/json')
-            self.write(json.dumps(result, ensure_ascii=False))
+            self.write_json(result)
             
         except json.JSONDecodeError as e:
             self.set_status(400)
-            self.write({'error': f'JSON 格式错误: {str(e)}'})
+            self.write_json({'error': f'JSON 格式错误: {str(e)}'})
         except Exception as e:
             self.set_status(500)
-            self.write({'error': str(e)})
+            self.write_json({'error': str(e)})
 
 
 # 查询产品辅料列表
@@ -209,15 +230,14 @@ class ProductAuxListHandler(BaseHandler):
                 length=length
             )
             
-            self.set_header('Content-Type', 'application/json')
-            self.write(json.dumps(result, ensure_ascii=False))
+            self.write_json(result)
             
         except json.JSONDecodeError as e:
             self.set_status(400)
-            self.write({'error': f'JSON 格式错误: {str(e)}'})
+            self.write_json({'error': f'JSON 格式错误: {str(e)}'})
         except Exception as e:
             self.set_status(500)
-            self.write({'error': str(e)})
+            self.write_json({'error': str(e)})
 
 
 # 添加/编辑辅料
@@ -245,7 +265,7 @@ class SetAuxProductHandler(BaseHandler):
             body = self.request.body.decode('utf-8').strip()
             if not body:
                 self.set_status(400)
-                self.write({'error': '请求体不能为空'})
+                self.write_json({'error': '请求体不能为空'})
                 return
                 
             data = json.loads(body)
@@ -257,32 +277,31 @@ class SetAuxProductHandler(BaseHandler):
             
             if not sku:
                 self.set_status(400)
-                self.write({'error': 'sku 参数不能为空'})
+                self.write_json({'error': 'sku 参数不能为空'})
                 return
                 
             if not product_name:
                 self.set_status(400)
-                self.write({'error': 'product_name 参数不能为空'})
+                self.write_json({'error': 'product_name 参数不能为空'})
                 return
                 
             if not remark:
                 self.set_status(400)
-                self.write({'error': 'remark 参数不能为空'})
+                self.write_json({'error': 'remark 参数不能为空'})
                 return
             
             # 调用产品服务
             service = ProductService()
             result = await service.set_aux_product(self.access_token, data)
             
-            self.set_header('Content-Type', 'application/json')
-            self.write(json.dumps(result, ensure_ascii=False))
+            self.write_json(result)
             
         except json.JSONDecodeError as e:
             self.set_status(400)
-            self.write({'error': f'JSON 格式错误: {str(e)}'})
+            self.write_json({'error': f'JSON 格式错误: {str(e)}'})
         except Exception as e:
             self.set_status(500)
-            self.write({'error': str(e)})
+            self.write_json({'error': str(e)})
 
 
 # 查询产品品牌列表
@@ -319,15 +338,14 @@ class BrandListHandler(BaseHandler):
                 length=length
             )
             
-            self.set_header('Content-Type', 'application/json')
-            self.write(json.dumps(result, ensure_ascii=False))
+            self.write_json(result)
             
         except json.JSONDecodeError as e:
             self.set_status(400)
-            self.write({'error': f'JSON 格式错误: {str(e)}'})
+            self.write_json({'error': f'JSON 格式错误: {str(e)}'})
         except Exception as e:
             self.set_status(500)
-            self.write({'error': str(e)})
+            self.write_json({'error': str(e)})
 
 
 # 添加/编辑产品品牌
@@ -351,7 +369,7 @@ class SetBrandHandler(BaseHandler):
             body = self.request.body.decode('utf-8').strip()
             if not body:
                 self.set_status(400)
-                self.write({'error': '请求体不能为空'})
+                self.write_json({'error': '请求体不能为空'})
                 return
                 
             data = json.loads(body)
@@ -361,7 +379,7 @@ class SetBrandHandler(BaseHandler):
             
             if not brand_data:
                 self.set_status(400)
-                self.write({'error': 'data 参数不能为空'})
+                self.write_json({'error': 'data 参数不能为空'})
                 return
                 
             # 验证数组中每个元素的必填字段
@@ -369,26 +387,25 @@ class SetBrandHandler(BaseHandler):
                 for item in brand_data:
                     if not item.get('title'):
                         self.set_status(400)
-                        self.write({'error': '品牌名称 title 不能为空'})
+                        self.write_json({'error': '品牌名称 title 不能为空'})
                         return
             else:
                 self.set_status(400)
-                self.write({'error': 'data 参数必须是数组格式'})
+                self.write_json({'error': 'data 参数必须是数组格式'})
                 return
             
             # 调用产品服务
             service = ProductService()
             result = await service.set_brand(self.access_token, data)
             
-            self.set_header('Content-Type', 'application/json')
-            self.write(json.dumps(result, ensure_ascii=False))
+            self.write_json(result)
             
         except json.JSONDecodeError as e:
             self.set_status(400)
-            self.write({'error': f'JSON 格式错误: {str(e)}'})
+            self.write_json({'error': f'JSON 格式错误: {str(e)}'})
         except Exception as e:
             self.set_status(500)
-            self.write({'error': str(e)})
+            self.write_json({'error': str(e)})
 
 
 # 查询产品分类列表
@@ -433,15 +450,14 @@ class CategoryListHandler(BaseHandler):
                 ids=ids
             )
             
-            self.set_header('Content-Type', 'application/json')
-            self.write(json.dumps(result, ensure_ascii=False))
+            self.write_json(result)
             
         except json.JSONDecodeError as e:
             self.set_status(400)
-            self.write({'error': f'JSON 格式错误: {str(e)}'})
+            self.write_json({'error': f'JSON 格式错误: {str(e)}'})
         except Exception as e:
             self.set_status(500)
-            self.write({'error': str(e)})
+            self.write_json({'error': str(e)})
 
 
 # 添加/编辑产品分类
@@ -466,7 +482,7 @@ class SetCategoryHandler(BaseHandler):
             body = self.request.body.decode('utf-8').strip()
             if not body:
                 self.set_status(400)
-                self.write({'error': '请求体不能为空'})
+                self.write_json({'error': '请求体不能为空'})
                 return
                 
             data = json.loads(body)
@@ -476,7 +492,7 @@ class SetCategoryHandler(BaseHandler):
             
             if not category_data:
                 self.set_status(400)
-                self.write({'error': 'data 参数不能为空'})
+                self.write_json({'error': 'data 参数不能为空'})
                 return
                 
             # 验证数组中每个元素的必填字段
@@ -484,30 +500,29 @@ class SetCategoryHandler(BaseHandler):
                 for item in category_data:
                     if not item.get('title'):
                         self.set_status(400)
-                        self.write({'error': '分类名称 title 不能为空'})
+                        self.write_json({'error': '分类名称 title 不能为空'})
                         return
                     if not item.get('category_code'):
                         self.set_status(400)
-                        self.write({'error': '分类简码 category_code 不能为空'})
+                        self.write_json({'error': '分类简码 category_code 不能为空'})
                         return
             else:
                 self.set_status(400)
-                self.write({'error': 'data 参数必须是数组格式'})
+                self.write_json({'error': 'data 参数必须是数组格式'})
                 return
             
             # 调用产品服务
             service = ProductService()
             result = await service.set_category(self.access_token, data)
             
-            self.set_header('Content-Type', 'application/json')
-            self.write(json.dumps(result, ensure_ascii=False))
+            self.write_json(result)
             
         except json.JSONDecodeError as e:
             self.set_status(400)
-            self.write({'error': f'JSON 格式错误: {str(e)}'})
+            self.write_json({'error': f'JSON 格式错误: {str(e)}'})
         except Exception as e:
             self.set_status(500)
-            self.write({'error': str(e)})
+            self.write_json({'error': str(e)})
 
 
 # 上传本地产品图片
@@ -531,7 +546,7 @@ class UploadProductPicturesHandler(BaseHandler):
             body = self.request.body.decode('utf-8').strip()
             if not body:
                 self.set_status(400)
-                self.write({'error': '请求体不能为空'})
+                self.write_json({'error': '请求体不能为空'})
                 return
                 
             data = json.loads(body)
@@ -542,12 +557,12 @@ class UploadProductPicturesHandler(BaseHandler):
             
             if not sku:
                 self.set_status(400)
-                self.write({'error': 'sku 参数不能为空'})
+                self.write_json({'error': 'sku 参数不能为空'})
                 return
                 
             if not picture_list:
                 self.set_status(400)
-                self.write({'error': 'picture_list 参数不能为空'})
+                self.write_json({'error': 'picture_list 参数不能为空'})
                 return
                 
             # 验证图片列表格式
@@ -555,30 +570,29 @@ class UploadProductPicturesHandler(BaseHandler):
                 for pic in picture_list:
                     if not pic.get('pic_url'):
                         self.set_status(400)
-                        self.write({'error': '图片链接 pic_url 不能为空'})
+                        self.write_json({'error': '图片链接 pic_url 不能为空'})
                         return
                     if pic.get('is_primary') is None:
                         self.set_status(400)
-                        self.write({'error': '是否主图 is_primary 不能为空'})
+                        self.write_json({'error': '是否主图 is_primary 不能为空'})
                         return
             else:
                 self.set_status(400)
-                self.write({'error': 'picture_list 参数必须是数组格式'})
+                self.write_json({'error': 'picture_list 参数必须是数组格式'})
                 return
             
             # 调用产品服务
             service = ProductService()
             result = await service.upload_product_pictures(self.access_token, data)
             
-            self.set_header('Content-Type', 'application/json')
-            self.write(json.dumps(result, ensure_ascii=False))
+            self.write_json(result)
             
         except json.JSONDecodeError as e:
             self.set_status(400)
-            self.write({'error': f'JSON 格式错误: {str(e)}'})
+            self.write_json({'error': f'JSON 格式错误: {str(e)}'})
         except Exception as e:
             self.set_status(500)
-            self.write({'error': str(e)})
+            self.write_json({'error': str(e)})
 
 
 # 查询产品标签
@@ -608,12 +622,11 @@ class ProductLabelListHandler(BaseHandler):
             service = ProductService()
             result = await service.get_product_label_list(self.access_token)
             
-            self.set_header('Content-Type', 'application/json')
-            self.write(json.dumps(result, ensure_ascii=False))
+            self.write_json(result)
             
         except Exception as e:
             self.set_status(500)
-            self.write({'error': str(e)})
+            self.write_json({'error': str(e)})
 
 
 # 创建UPC编码
@@ -634,7 +647,7 @@ class UpcAddCommodityCodeHandler(BaseHandler):
             body = self.request.body.decode('utf-8').strip()
             if not body:
                 self.set_status(400)
-                self.write({'error': '请求体不能为空'})
+                self.write_json({'error': '请求体不能为空'})
                 return
                 
             data = json.loads(body)
@@ -645,12 +658,12 @@ class UpcAddCommodityCodeHandler(BaseHandler):
             
             if not commodity_codes:
                 self.set_status(400)
-                self.write({'error': 'commodity_codes 参数不能为空'})
+                self.write_json({'error': 'commodity_codes 参数不能为空'})
                 return
                 
             if not code_type:
                 self.set_status(400)
-                self.write({'error': 'code_type 参数不能为空'})
+                self.write_json({'error': 'code_type 参数不能为空'})
                 return
             
             # 调用产品服务
@@ -661,15 +674,14 @@ class UpcAddCommodityCodeHandler(BaseHandler):
                 code_type=code_type
             )
             
-            self.set_header('Content-Type', 'application/json')
-            self.write(json.dumps(result, ensure_ascii=False))
+            self.write_json(result)
             
         except json.JSONDecodeError as e:
             self.set_status(400)
-            self.write({'error': f'JSON 格式错误: {str(e)}'})
+            self.write_json({'error': f'JSON 格式错误: {str(e)}'})
         except Exception as e:
             self.set_status(500)
-            self.write({'error': str(e)})
+            self.write_json({'error': str(e)})
 
 
 # 获取UPC编码列表
@@ -705,15 +717,14 @@ class UpcListHandler(BaseHandler):
                 length=length
             )
             
-            self.set_header('Content-Type', 'application/json')
-            self.write(json.dumps(result, ensure_ascii=False))
+            self.write_json(result)
             
         except json.JSONDecodeError as e:
             self.set_status(400)
-            self.write({'error': f'JSON 格式错误: {str(e)}'})
+            self.write_json({'error': f'JSON 格式错误: {str(e)}'})
         except Exception as e:
             self.set_status(500)
-            self.write({'error': str(e)})
+            self.write_json({'error': str(e)})
 
 
 # 查询本地产品详情
@@ -736,7 +747,7 @@ class LocalProductInfoHandler(BaseHandler):
             body = self.request.body.decode('utf-8').strip()
             if not body:
                 self.set_status(400)
-                self.write({'error': '请求体不能为空'})
+                self.write_json({'error': '请求体不能为空'})
                 return
                 
             data = json.loads(body)
@@ -749,7 +760,7 @@ class LocalProductInfoHandler(BaseHandler):
             # 验证至少有一个参数
             if not any([product_id, sku, sku_identifier]):
                 self.set_status(400)
-                self.write({'error': '产品id、产品SKU、SKU识别码 三选一必填'})
+                self.write_json({'error': '产品id、产品SKU、SKU识别码 三选一必填'})
                 return
             
             # 调用产品服务
@@ -761,15 +772,14 @@ class LocalProductInfoHandler(BaseHandler):
                 sku_identifier=sku_identifier
             )
             
-            self.set_header('Content-Type', 'application/json')
-            self.write(json.dumps(result, ensure_ascii=False))
+            self.write_json(result)
             
         except json.JSONDecodeError as e:
             self.set_status(400)
-            self.write({'error': f'JSON 格式错误: {str(e)}'})
+            self.write_json({'error': f'JSON 格式错误: {str(e)}'})
         except Exception as e:
             self.set_status(500)
-            self.write({'error': str(e)})
+            self.write_json({'error': str(e)})
 
 
 # 批量查询本地产品详情
@@ -791,7 +801,7 @@ class BatchGetProductInfoHandler(BaseHandler):
             body = self.request.body.decode('utf-8').strip()
             if not body:
                 self.set_status(400)
-                self.write({'error': '请求体不能为空'})
+                self.write_json({'error': '请求体不能为空'})
                 return
                 
             data = json.loads(body)
@@ -804,7 +814,7 @@ class BatchGetProductInfoHandler(BaseHandler):
             # 验证至少有一个参数
             if not any([product_ids, skus, sku_identifiers]):
                 self.set_status(400)
-                self.write({'error': '产品id、产品sku、SKU识别码 三选一必填'})
+                self.write_json({'error': '产品id、产品sku、SKU识别码 三选一必填'})
                 return
             
             # 调用产品服务
@@ -816,15 +826,14 @@ class BatchGetProductInfoHandler(BaseHandler):
                 sku_identifiers=sku_identifiers
             )
             
-            self.set_header('Content-Type', 'application/json')
-            self.write(json.dumps(result, ensure_ascii=False))
+            self.write_json(result)
             
         except json.JSONDecodeError as e:
             self.set_status(400)
-            self.write({'error': f'JSON 格式错误: {str(e)}'})
+            self.write_json({'error': f'JSON 格式错误: {str(e)}'})
         except Exception as e:
             self.set_status(500)
-            self.write({'error': str(e)})
+            self.write_json({'error': str(e)})
 
 
 # 产品启用、禁用
@@ -845,7 +854,7 @@ class ProductOperateBatchHandler(BaseHandler):
             body = self.request.body.decode('utf-8').strip()
             if not body:
                 self.set_status(400)
-                self.write({'error': '请求体不能为空'})
+                self.write_json({'error': '请求体不能为空'})
                 return
                 
             data = json.loads(body)
@@ -856,12 +865,12 @@ class ProductOperateBatchHandler(BaseHandler):
             
             if not product_ids:
                 self.set_status(400)
-                self.write({'error': 'product_ids 参数不能为空'})
+                self.write_json({'error': 'product_ids 参数不能为空'})
                 return
                 
             if not batch_status:
                 self.set_status(400)
-                self.write({'error': 'batch_status 参数不能为空'})
+                self.write_json({'error': 'batch_status 参数不能为空'})
                 return
             
             # 调用产品服务
@@ -872,15 +881,14 @@ class ProductOperateBatchHandler(BaseHandler):
                 batch_status=batch_status
             )
             
-            self.set_header('Content-Type', 'application/json')
-            self.write(json.dumps(result, ensure_ascii=False))
+            self.write_json(result)
             
         except json.JSONDecodeError as e:
             self.set_status(400)
-            self.write({'error': f'JSON 格式错误: {str(e)}'})
+            self.write_json({'error': f'JSON 格式错误: {str(e)}'})
         except Exception as e:
             self.set_status(500)
-            self.write({'error': str(e)})
+            self.write_json({'error': str(e)})
 
 
 # 添加/编辑本地产品
@@ -898,7 +906,7 @@ class ProductSetHandler(BaseHandler):
             body = self.request.body.decode('utf-8').strip()
             if not body:
                 self.set_status(400)
-                self.write({'error': '请求体不能为空'})
+                self.write_json({'error': '请求体不能为空'})
                 return
                 
             data = json.loads(body)
@@ -907,15 +915,14 @@ class ProductSetHandler(BaseHandler):
             service = ProductService()
             result = await service.set_product(self.access_token, data)
             
-            self.set_header('Content-Type', 'application/json')
-            self.write(json.dumps(result, ensure_ascii=False))
+            self.write_json(result)
             
         except json.JSONDecodeError as e:
             self.set_status(400)
-            self.write({'error': f'JSON 格式错误: {str(e)}'})
+            self.write_json({'error': f'JSON 格式错误: {str(e)}'})
         except Exception as e:
             self.set_status(500)
-            self.write({'error': str(e)})
+            self.write_json({'error': str(e)})
 
 
 # 查询产品属性列表
@@ -936,7 +943,7 @@ class AttributeListHandler(BaseHandler):
             body = self.request.body.decode('utf-8').strip()
             if not body:
                 self.set_status(400)
-                self.write({'error': '请求体不能为空'})
+                self.write_json({'error': '请求体不能为空'})
                 return
                 
             data = json.loads(body)
@@ -947,12 +954,12 @@ class AttributeListHandler(BaseHandler):
             
             if offset is None:
                 self.set_status(400)
-                self.write({'error': 'offset 参数不能为空'})
+                self.write_json({'error': 'offset 参数不能为空'})
                 return
                 
             if length is None:
                 self.set_status(400)
-                self.write({'error': 'length 参数不能为空'})
+                self.write_json({'error': 'length 参数不能为空'})
                 return
             
             # 调用产品服务
@@ -963,15 +970,14 @@ class AttributeListHandler(BaseHandler):
                 length=length
             )
             
-            self.set_header('Content-Type', 'application/json')
-            self.write(json.dumps(result, ensure_ascii=False))
+            self.write_json(result)
             
         except json.JSONDecodeError as e:
             self.set_status(400)
-            self.write({'error': f'JSON 格式错误: {str(e)}'})
+            self.write_json({'error': f'JSON 格式错误: {str(e)}'})
         except Exception as e:
             self.set_status(500)
-            self.write({'error': str(e)})
+            self.write_json({'error': str(e)})
 
 
 # 添加/编辑产品属性
@@ -995,7 +1001,7 @@ class AttributeSetHandler(BaseHandler):
             body = self.request.body.decode('utf-8').strip()
             if not body:
                 self.set_status(400)
-                self.write({'error': '请求体不能为空'})
+                self.write_json({'error': '请求体不能为空'})
                 return
                 
             data = json.loads(body)
@@ -1006,27 +1012,26 @@ class AttributeSetHandler(BaseHandler):
             
             if not attr_name:
                 self.set_status(400)
-                self.write({'error': 'attr_name 参数不能为空'})
+                self.write_json({'error': 'attr_name 参数不能为空'})
                 return
                 
             if not attr_values:
                 self.set_status(400)
-                self.write({'error': 'attr_values 参数不能为空'})
+                self.write_json({'error': 'attr_values 参数不能为空'})
                 return
             
             # 调用产品服务
             service = ProductService()
             result = await service.set_attribute(self.access_token, data)
             
-            self.set_header('Content-Type', 'application/json')
-            self.write(json.dumps(result, ensure_ascii=False))
+            self.write_json(result)
             
         except json.JSONDecodeError as e:
             self.set_status(400)
-            self.write({'error': f'JSON 格式错误: {str(e)}'})
+            self.write_json({'error': f'JSON 格式错误: {str(e)}'})
         except Exception as e:
             self.set_status(500)
-            self.write({'error': str(e)})
+            self.write_json({'error': str(e)})
 
 
 # 查询多属性产品列表
@@ -1047,7 +1052,7 @@ class SpuListHandler(BaseHandler):
             body = self.request.body.decode('utf-8').strip()
             if not body:
                 self.set_status(400)
-                self.write({'error': '请求体不能为空'})
+                self.write_json({'error': '请求体不能为空'})
                 return
                 
             data = json.loads(body)
@@ -1058,12 +1063,12 @@ class SpuListHandler(BaseHandler):
             
             if offset is None:
                 self.set_status(400)
-                self.write({'error': 'offset 参数不能为空'})
+                self.write_json({'error': 'offset 参数不能为空'})
                 return
                 
             if length is None:
                 self.set_status(400)
-                self.write({'error': 'length 参数不能为空'})
+                self.write_json({'error': 'length 参数不能为空'})
                 return
             
             # 调用产品服务
@@ -1074,15 +1079,14 @@ class SpuListHandler(BaseHandler):
                 length=length
             )
             
-            self.set_header('Content-Type', 'application/json')
-            self.write(json.dumps(result, ensure_ascii=False))
+            self.write_json(result)
             
         except json.JSONDecodeError as e:
             self.set_status(400)
-            self.write({'error': f'JSON 格式错误: {str(e)}'})
+            self.write_json({'error': f'JSON 格式错误: {str(e)}'})
         except Exception as e:
             self.set_status(500)
-            self.write({'error': str(e)})
+            self.write_json({'error': str(e)})
 
 
 # 查询多属性产品详情
@@ -1103,7 +1107,7 @@ class SpuInfoHandler(BaseHandler):
             body = self.request.body.decode('utf-8').strip()
             if not body:
                 self.set_status(400)
-                self.write({'error': '请求体不能为空'})
+                self.write_json({'error': '请求体不能为空'})
                 return
                 
             data = json.loads(body)
@@ -1115,7 +1119,7 @@ class SpuInfoHandler(BaseHandler):
             # 验证至少有一个参数
             if not any([ps_id, spu]):
                 self.set_status(400)
-                self.write({'error': 'ps_id 与 spu 二选一必填'})
+                self.write_json({'error': 'ps_id 与 spu 二选一必填'})
                 return
             
             # 调用产品服务
@@ -1126,15 +1130,14 @@ class SpuInfoHandler(BaseHandler):
                 spu=spu
             )
             
-            self.set_header('Content-Type', 'application/json')
-            self.write(json.dumps(result, ensure_ascii=False))
+            self.write_json(result)
             
         except json.JSONDecodeError as e:
             self.set_status(400)
-            self.write({'error': f'JSON 格式错误: {str(e)}'})
+            self.write_json({'error': f'JSON 格式错误: {str(e)}'})
         except Exception as e:
             self.set_status(500)
-            self.write({'error': str(e)})
+            self.write_json({'error': str(e)})
 
 
 # 创建产品标签
@@ -1154,7 +1157,7 @@ class CreateProductLabelHandler(BaseHandler):
             body = self.request.body.decode('utf-8').strip()
             if not body:
                 self.set_status(400)
-                self.write({'error': '请求体不能为空'})
+                self.write_json({'error': '请求体不能为空'})
                 return
                 
             data = json.loads(body)
@@ -1164,33 +1167,32 @@ class CreateProductLabelHandler(BaseHandler):
             
             if not label:
                 self.set_status(400)
-                self.write({'error': 'label 参数不能为空'})
+                self.write_json({'error': 'label 参数不能为空'})
                 return
             
             # 验证标签名称长度和格式
             if len(label) > 15:
                 self.set_status(400)
-                self.write({'error': '标签名称最长15个字符'})
+                self.write_json({'error': '标签名称最长15个字符'})
                 return
                 
             if ' ' in label:
                 self.set_status(400)
-                self.write({'error': '标签名称中间不能有空格'})
+                self.write_json({'error': '标签名称中间不能有空格'})
                 return
             
             # 调用产品服务
             service = ProductService()
             result = await service.create_product_label(self.access_token, label)
             
-            self.set_header('Content-Type', 'application/json')
-            self.write(json.dumps(result, ensure_ascii=False))
+            self.write_json(result)
             
         except json.JSONDecodeError as e:
             self.set_status(400)
-            self.write({'error': f'JSON 格式错误: {str(e)}'})
+            self.write_json({'error': f'JSON 格式错误: {str(e)}'})
         except Exception as e:
             self.set_status(500)
-            self.write({'error': str(e)})
+            self.write_json({'error': str(e)})
 
 
 # 标记产品标签
@@ -1213,7 +1215,7 @@ class MarkProductLabelHandler(BaseHandler):
             body = self.request.body.decode('utf-8').strip()
             if not body:
                 self.set_status(400)
-                self.write({'error': '请求体不能为空'})
+                self.write_json({'error': '请求体不能为空'})
                 return
                 
             data = json.loads(body)
@@ -1224,37 +1226,37 @@ class MarkProductLabelHandler(BaseHandler):
             
             if operation_type is None:
                 self.set_status(400)
-                self.write({'error': 'type 参数不能为空'})
+                self.write_json({'error': 'type 参数不能为空'})
                 return
                 
             if not detail_list:
                 self.set_status(400)
-                self.write({'error': 'detail_list 参数不能为空'})
+                self.write_json({'error': 'detail_list 参数不能为空'})
                 return
             
             # 验证操作类型
             if operation_type not in [1, 2]:
                 self.set_status(400)
-                self.write({'error': 'type 参数必须为 1（追加）或 2（覆盖）'})
+                self.write_json({'error': 'type 参数必须为 1（追加）或 2（覆盖）'})
                 return
             
             # 验证detail_list长度
             if len(detail_list) > 200:
                 self.set_status(400)
-                self.write({'error': 'detail_list 上限200个'})
+                self.write_json({'error': 'detail_list 上限200个'})
                 return
             
             # 验证detail_list中的每个项目
             for item in detail_list:
                 if not item.get('sku'):
                     self.set_status(400)
-                    self.write({'error': 'detail_list中每个项目的sku不能为空'})
+                    self.write_json({'error': 'detail_list中每个项目的sku不能为空'})
                     return
                     
                 label_list = item.get('label_list', [])
                 if len(label_list) > 10:
                     self.set_status(400)
-                    self.write({'error': 'label_list 上限10个'})
+                    self.write_json({'error': 'label_list 上限10个'})
                     return
             
             # 调用产品服务
@@ -1265,15 +1267,14 @@ class MarkProductLabelHandler(BaseHandler):
                 detail_list
             )
             
-            self.set_header('Content-Type', 'application/json')
-            self.write(json.dumps(result, ensure_ascii=False))
+            self.write_json(result)
             
         except json.JSONDecodeError as e:
             self.set_status(400)
-            self.write({'error': f'JSON 格式错误: {str(e)}'})
+            self.write_json({'error': f'JSON 格式错误: {str(e)}'})
         except Exception as e:
             self.set_status(500)
-            self.write({'error': str(e)})
+            self.write_json({'error': str(e)})
 
 
 # 删除产品标签
@@ -1298,7 +1299,7 @@ class UnmarkProductLabelHandler(BaseHandler):
             body = self.request.body.decode('utf-8').strip()
             if not body:
                 self.set_status(400)
-                self.write({'error': '请求体不能为空'})
+                self.write_json({'error': '请求体不能为空'})
                 return
                 
             data = json.loads(body)
@@ -1309,37 +1310,37 @@ class UnmarkProductLabelHandler(BaseHandler):
             
             if operation_type is None:
                 self.set_status(400)
-                self.write({'error': 'type 参数不能为空'})
+                self.write_json({'error': 'type 参数不能为空'})
                 return
                 
             if not detail_list:
                 self.set_status(400)
-                self.write({'error': 'detail_list 参数不能为空'})
+                self.write_json({'error': 'detail_list 参数不能为空'})
                 return
             
             # 验证操作类型
             if operation_type not in [1, 2]:
                 self.set_status(400)
-                self.write({'error': 'type 参数必须为 1（删除指定标签）或 2（删除全部标签）'})
+                self.write_json({'error': 'type 参数必须为 1（删除指定标签）或 2（删除全部标签）'})
                 return
             
             # 验证detail_list长度
             if len(detail_list) > 200:
                 self.set_status(400)
-                self.write({'error': 'detail_list 上限200个'})
+                self.write_json({'error': 'detail_list 上限200个'})
                 return
             
             # 验证detail_list中的每个项目
             for item in detail_list:
                 if not item.get('sku'):
                     self.set_status(400)
-                    self.write({'error': 'detail_list中每个项目的sku不能为空'})
+                    self.write_json({'error': 'detail_list中每个项目的sku不能为空'})
                     return
                     
                 label_list = item.get('label_list', [])
                 if len(label_list) > 10:
                     self.set_status(400)
-                    self.write({'error': 'label_list 上限10个'})
+                    self.write_json({'error': 'label_list 上限10个'})
                     return
             
             # 调用产品服务
@@ -1350,12 +1351,11 @@ class UnmarkProductLabelHandler(BaseHandler):
                 detail_list
             )
             
-            self.set_header('Content-Type', 'application/json')
-            self.write(json.dumps(result, ensure_ascii=False))
+            self.write_json(result)
             
         except json.JSONDecodeError as e:
             self.set_status(400)
-            self.write({'error': f'JSON 格式错误: {str(e)}'})
+            self.write_json({'error': f'JSON 格式错误: {str(e)}'})
         except Exception as e:
             self.set_status(500)
-            self.write({'error': str(e)})
+            self.write_json({'error': str(e)})
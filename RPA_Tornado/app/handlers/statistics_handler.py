@@ -1,6 +1,7 @@
 import json
 from tornado.web import RequestHandler
 from app.services.statistics_service import StatisticsService
+from app.shared.response_formatter import ResponseFormatter
 from .base import BaseHandler
 
 class SalesReportAsinDailyListsHandler(BaseHandler):
@@ -9,19 +10,18 @@ class SalesReportAsinDailyListsHandler(BaseHandler):
             body = self.request.body.decode('utf-8').strip()
             if not body:
                 self.set_status(400)
-                self.write({'error': '请求体不能为空'})
+                self.write_json({'error': '请求体不能为空'})
                 return
             data = json.loads(body)
             service = StatisticsService()
             result = await service.get_sales_report_asin_daily_lists(self.access_token, data)
-            self.set_header('Content-Type', 'application/json')
-            self.write(json.dumps(result, ensure_ascii=False))
+            self.write_json(result)
         except json.JSONDecodeError as e:
             self.set_status(400)
-            self.write({'error': f'JSON 格式错误: {str(e)}'})
+            self.write_json({'error': f'JSON 格式错误: {str(e)}'})
         except Exception as e:
             self.set_status(500)
-            self.write({'error': str(e)})
+            self.write_json({'error': str(e)})
 
 class OrderProfitMSKUHandler(BaseHandler):
     async def post(self):
@@ -29,19 +29,18 @@ class OrderProfitMSKUHandler(BaseHandler):
             body = self.request.body.decode('utf-8').strip()
             if not body:
                 self.set_status(400)
-                self.write({'error': '请求体不能为空'})
+                self.write_json({'error': '请求体不能为空'})
                 return
             data = json.loads(body)
             service = StatisticsService()
             result = await service.get_order_profit_msku(self.access_token, data)
-            self.set_header('Content-Type', 'application/json')
-            self.write(json.dumps(result, ensure_ascii=False))
+            self.write_json(result)
         except json.JSONDecodeError as e:
             self.set_status(400)
-            self.write({'error': f'JSON 格式错误: {str(e)}'})
+            self.write_json({'error': f'JSON 格式错误: {str(e)}'})
         except Exception as e:
             self.set_status(500)
-            self.write({'error': str(e)})
+            self.write_json({'error': str(e)})
 
 class SalesReportShopSummaryHandler(BaseHandler):
     async def post(self):
@@ -59,14 +58,14 @@ class SalesReportShopSummaryHandler(BaseHandler):
             body = self.request.body.decode('utf-8').strip()
             if not body:
                 self.set_status(400)
-                self.write({'error': '请求体不能为空'})
+                self.write_json({'error': '请求体不能为空'})
                 return
             data = json.loads(body)
             required_params = ['sid', 'start_date', 'end_date']
             for param in required_params:
                 if param not in data or data[param] is None:
                     self.set_status(400)
-                    self.write({'error': f'{param} 参数不能为空'})
+                    self.write_json({'error': f'{param} 参数不能为空'})
                     return
             offset = data.get('offset', 0)
             length = data.get('length', 1000)
@@ -79,14 +78,13 @@ class SalesReportShopSummaryHandler(BaseHandler):
                 'offset': offset,
                 'length': length
             })
-            self.set_header('Content-Type', 'application/json')
-            self.write(json.dumps(result, ensure_ascii=False))
+            self.write_json(result)
         except json.JSONDecodeError as e:
             self.set_status(400)
-            self.write({'error': f'JSON 格式错误: {str(e)}'})
+            self.write_json({'error': f'JSON 格式错误: {str(e)}'})
         except Exception as e:
             self.set_status(500)
-            self.write({'error': str(e)})
+            self.write_json({'error': str(e)})
 
 class ProductPerformanceHandler(BaseHandler):
     """
@@ -99,7 +97,7 @@ class ProductPerformanceHandler(BaseHandler):
             body = self.request.body.decode('utf-8').strip()
             if not body:
                 self.set_status(400)
-                self.write({'error': '请求体不能为空'})
+                self.write_json({'error': '请求体不能为空'})
                 return
             data = json.loads(body)
             # 参数校验（只校验必填，详细校验交给 service）
@@ -107,19 +105,18 @@ class ProductPerformanceHandler(BaseHandler):
             for param in required_params:
                 if param not in data or data[param] is None:
                     self.set_status(400)
-                    self.write({'error': f'{param} 参数不能为空'})
+                    self.write_json({'error': f'{param} 参数不能为空'})
                     return
             from app.services.statistics_service import StatisticsService
             service = StatisticsService()
             result = await service.get_product_performance(self.access_token, data)
-            self.set_header('Content-Type', 'application/json')
-            self.write(json.dumps(result, ensure_ascii=False))
+            self.write_json(result)
         except json.JSONDecodeError as e:
             self.set_status(400)
-            self.write({'error': f'JSON 格式错误: {str(e)}'})
+            self.write_json({'error': f'JSON 格式错误: {str(e)}'})
         except Exception as e:
             self.set_status(500)
-            self.write({'error': str(e)})
+            self.write_json({'error': str(e)})
 
 class ProductPerformanceTrendByHourHandler(RequestHandler):
     """
@@ -144,8 +141,8 @@ class ProductPerformanceTrendByHourHandler(RequestHandler):
             from app.services.statistics_service import StatisticsService
             service = StatisticsService()
             result = await service.get_product_performance_trend_by_hour(data)
-            self.set_header('Content-Type', 'application/json')
-            self.write(json.dumps(result, ensure_ascii=False))
+            self.set_header('Content-Type', 'application/json; charset=UTF-8')
+            self.write(ResponseFormatter.dumps(result))
         except json.JSONDecodeError as e:
             self.set_status(400)
             self.write({'error': f'JSON 格式错误: {str(e)}'})
@@ -176,8 +173,8 @@ class ProfitStatisticsAsinListHandler(RequestHandler):
             from app.services.statistics_service import StatisticsService
             service = StatisticsService()
             result = await service.get_profit_statistics_asin_list(data)
-            self.set_header('Content-Type', 'application/json')
-            self.write(json.dumps(result, ensure_ascii=False))
+            self.set_header('Content-Type', 'application/json; charset=UTF-8')
+            self.write(ResponseFormatter.dumps(result))
         except json.JSONDecodeError as e:
             self.set_status(400)
             self.write({'error': f'JSON 格式错误: {str(e)}'})
@@ -111,7 +111,7 @@ class ErrorHandlerMixin:
     def write_json_response(self, response: Dict[str, Any]):
         """写入JSON响应"""
         self.set_header('Content-Type', 'application/json; charset=UTF-8')
-        self.write(json.dumps(response, ensure_ascii=False, indent=2))
+        self.write(ResponseFormatter.dumps(response, indent=True))
     
     def log_error(self, error: Optional[Exception], status_code: int):
         """记录错误日志"""
@@ -9,7 +9,7 @@ import tornado.web
 from typing import Dict, Any, Optional, Callable
 from functools import wraps
 
-from app.core.security.rate_limiter import rate_limiter
+from app.core.security.rate_limiter import async_rate_limiter, rate_limiter
 from app.core.exceptions import BaseAPIException
 from app.shared import ResponseFormatter
 
@@ -23,18 +23,20 @@ class RateLimitExceeded(BaseAPIException):
 
 
 class RateLimitMixin:
-    """限流混入类"""
+    """限流混入类（使用 async_rate_limiter, RATE_LIMIT_BACKEND=redis 时多进程共享限流）"""
     
-    def prepare(self):
+    async def prepare(self):
         """请求预处理，检查限流"""
-        # 调用父类的prepare方法
+        # 调用父类的prepare方法（可能是协程）
         if hasattr(super(), 'prepare'):
-            super().prepare()
+            result = super().prepare()
+            if result is not None:
+                await result
         
         # 检查限流
-        self.check_rate_limit()
+        await self.check_rate_limit()
     
-    def check_rate_limit(self):
+    async def check_rate_limit(self):
         """检查请求限流"""
         # 获取限流配置
         rate_limit_config = self.get_rate_limit_config()
@@ -45,28 +47,25 @@ class RateLimitMixin:
         # 生成限流键
         rate_limit_key = self.generate_rate_limit_key()
         
-        # 检查是否允许请求
-        allowed = rate_limiter.is_allowed(
-            key=rate_limit_key,
-            capacity=rate_limit_config.get('capacity', 10),
-            refill_rate=rate_limit_config.get('refill_rate', 1.0),
-            tokens=rate_limit_config.get('tokens', 1)
+        # 检查并消费令牌, 结果中带有剩余令牌数和重试时间, 不需要再查询桶状态
+        result = await async_rate_limiter.check(
+            rate_limit_key,
+            rate_limit_config.get('capacity', 10),
+            rate_limit_config.get('refill_rate', 1.0),
+            rate_limit_config.get('tokens', 1)
         )
         
-        if not allowed:
-            # 获取桶状态用于计算重试时间
-            bucket_status = rate_limiter.get_bucket_status(rate_limit_key)
-            retry_after = self.calculate_retry_after(bucket_status, rate_limit_config)
+        if not result.allowed:
+            retry_after = max(1, int(result.retry_after)) if result.retry_after != float('inf') else 60
             
             # 设置响应头
-            if retry_after:
-                self.set_header('Retry-After', str(retry_after))
+            self.set_header('Retry-After', str(retry_after))
             
             # 抛出限流异常
             raise RateLimitExceeded(retry_after=retry_after)
         
         # 设置限流相关的响应头
-        self.set_rate_limit_headers(rate_limit_key, rate_limit_config)
+        self.set_rate_limit_headers(result.remaining, rate_limit_config)
     
     def get_rate_limit_config(self) -> Optional[Dict[str, Any]]:
         """获取限流配置"""
@@ -142,23 +141,19 @@ class RateLimitMixin:
         
         return max(1, int(wait_time))
     
-    def set_rate_limit_headers(self, rate_limit_key: str, config: Dict[str, Any]):
+    def set_rate_limit_headers(self, remaining: float, config: Dict[str, Any]):
         """设置限流相关的响应头"""
-        bucket_status = rate_limiter.get_bucket_status(rate_limit_key)
+        # 设置剩余请求数
+        self.set_header('X-RateLimit-Remaining', str(int(remaining)))
         
-        if bucket_status:
-            # 设置剩余请求数
-            remaining = int(bucket_status.get('tokens', 0))
-            self.set_header('X-RateLimit-Remaining', str(remaining))
-            
-            # 设置限流容量
-            capacity = config.get('capacity', 10)
-            self.set_header('X-RateLimit-Limit', str(capacity))
-            
-            # 设置重置时间（下次令牌补充时间）
-            refill_rate = config.get('refill_rate', 1.0)
-            reset_time = int(1 / refill_rate) if refill_rate > 0 else 60
-            self.set_header('X-RateLimit-Reset', str(reset_time))
+        # 设置限流容量
+        capacity = config.get('capacity', 10)
+        self.set_header('X-RateLimit-Limit', str(capacity))
+        
+        # 设置重置时间（下次令牌补充时间）
+        refill_rate = config.get('refill_rate', 1.0)
+        reset_time = int(1 / refill_rate) if refill_rate > 0 else 60
+        self.set_header('X-RateLimit-Reset', str(reset_time))
 
 
 class RateLimitMiddleware:
@@ -239,18 +234,11 @@ def rate_limit_method(capacity: int = 10, refill_rate: float = 1.0, tokens: int
             key = f"rate_limit:ip:{client_ip}:{endpoint}"
             
             # 检查限流
-            allowed = rate_limiter.is_allowed(key, capacity, refill_rate, tokens)
+            result = rate_limiter.check(key, capacity, refill_rate, tokens)
             
-            if not allowed:
+            if not result.allowed:
                 # 计算重试时间
-                bucket_status = rate_limiter.get_bucket_status(key)
-                retry_after = None
-                if bucket_status:
-                    tokens_needed = tokens
-                    current_tokens = bucket_status.get('tokens', 0)
-                    if current_tokens < tokens_needed:
-                        tokens_to_wait = tokens_needed - current_tokens
-                        retry_after = max(1, int(tokens_to_wait / refill_rate))
+                retry_after = max(1, int(result.retry_after)) if result.retry_after != float('inf') else None
                 
                 # 设置响应头
                 if retry_after:
@@ -259,11 +247,8 @@ def rate_limit_method(capacity: int = 10, refill_rate: float = 1.0, tokens: int
                 raise RateLimitExceeded(retry_after=retry_after)
             
             # 设置限流响应头
-            bucket_status = rate_limiter.get_bucket_status(key)
-            if bucket_status:
-                remaining = int(bucket_status.get('tokens', 0))
-                self.set_header('X-RateLimit-Remaining', str(remaining))
-                self.set_header('X-RateLimit-Limit', str(capacity))
+            self.set_header('X-RateLimit-Remaining', str(int(result.remaining)))
+            self.set_header('X-RateLimit-Limit', str(capacity))
             
             return method(self, *args, **kwargs)
         
@@ -4,7 +4,7 @@
 定义电商数据看板相关的数据库模型
 """
 
-from sqlalchemy import Column, Integer, String, DateTime, Numeric, Text, Index, UniqueConstraint, ForeignKey, Date
+from sqlalchemy import Column, Integer, String, DateTime, Numeric, Text, Index, UniqueConstraint, ForeignKey, Date, and_, cast, func, inspect, literal, select
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
 from datetime import datetime
@@ -133,14 +133,14 @@ class Sale(Base):
     
     # 索引定义
     __table_args__ = (
-        Index('idx_shop_id', 'shop_id'),
+        Index('idx_sales_shop_id', 'shop_id'),
         Index('idx_sale_date', 'sale_date'),
         Index('idx_order_id', 'order_id'),
         Index('idx_product_id', 'product_id'),
         Index('idx_original_currency', 'original_currency'),
         Index('idx_category', 'category'),
         Index('idx_region', 'region'),
-        Index('idx_created_at', 'created_at'),
+        Index('idx_sales_created_at', 'created_at'),
         Index('idx_shop_date', 'shop_id', 'sale_date'),
         UniqueConstraint('shop_id', 'order_id', 'product_id', 'sale_date', name='uk_sale_record'),
         {'comment': '销售记录表'}
@@ -224,9 +224,9 @@ class ExchangeRate(Base):
         Index('idx_base_currency', 'base_currency'),
         Index('idx_rate_date', 'rate_date'),
         Index('idx_effective_date', 'effective_date'),
-        Index('idx_status', 'status'),
+        Index('idx_exchange_rates_status', 'status'),
         Index('idx_source', 'source'),
-        Index('idx_created_at', 'created_at'),
+        Index('idx_exchange_rates_created_at', 'created_at'),
         Index('idx_currency_date', 'currency_code', 'rate_date'),
         UniqueConstraint('currency_code', 'base_currency', 'rate_date', name='uk_exchange_rate'),
         {'comment': '汇率信息表'}
@@ -294,7 +294,186 @@ class ExchangeRate(Base):
             cls.rate_date <= rate_date,
             cls.status == 'active'
         ).order_by(cls.rate_date.desc()).first()
+    
+    @classmethod
+    def load_rate_window(cls, session, start_date: datetime, end_date: datetime, base_currency: str = 'CNY'):
+        """加载时间窗口内的全部汇率, 以及窗口开始前每种货币最近的一条汇率
+        
+        两条查询即可覆盖窗口内任意日期的 get_rate_by_date 结果
+        
+        Args:
+            session: 数据库会话
+            start_date: 窗口开始日期
+            end_date: 窗口结束日期
+            base_currency: 基准货币
+            
+        Returns:
+            [(货币代码, 汇率日期, 汇率), ...]
+        """
+        active = and_(cls.base_currency == base_currency, cls.status == 'active')
+        in_window = session.query(cls.currency_code, cls.rate_date, cls.rate).filter(
+            active,
+            cls.rate_date >= start_date,
+            cls.rate_date <= end_date
+        ).all()
+        latest_before = session.query(
+            cls.currency_code.label('currency_code'),
+            func.max(cls.rate_date).label('rate_date')
+        ).filter(active, cls.rate_date < start_date).group_by(cls.currency_code).subquery()
+        carried = session.query(cls.currency_code, cls.rate_date, cls.rate).join(
+            latest_before,
+            and_(
+                cls.currency_code == latest_before.c.currency_code,
+                cls.rate_date == latest_before.c.rate_date
+            )
+        ).filter(active).all()
+        return [tuple(row) for row in carried + in_window]
+
+
+class DailySalesRollup(Base):
+    """每日销售汇总模型
+    
+    按 店铺 × 日期 × 原始货币 预聚合的销售额和订单数, 由销售同步增量维护,
+    看板摘要和销售统计直接读取, 不再逐次扫描 sales 表
+    """
+    __tablename__ = 'daily_sales_rollups'
+    
+    # 主键
+    id = Column(Integer, primary_key=True, autoincrement=True, comment='主键ID')
+    
+    # 汇总维度
+    shop_id = Column(Integer, ForeignKey('shops.id'), nullable=False, comment='店铺ID')
+    sale_day = Column(Date, nullable=False, comment='销售日期')
+    currency = Column(String(10), nullable=False, comment='原始货币')
+    
+    # 汇总指标
+    cny_amount = Column(Numeric(18, 4), nullable=False, default=0, comment='人民币金额合计')
+    usd_amount = Column(Numeric(18, 4), nullable=False, default=0, comment='美元金额合计')
+    order_count = Column(Integer, nullable=False, default=0, comment='销售记录数')
+    usd_order_count = Column(Integer, nullable=False, default=0, comment='有美元金额的销售记录数（缺汇率时 usd_amount 为空）')
+    
+    # 时间戳
+    updated_at = Column(DateTime, default=datetime.now, onupdate=datetime.now, comment='更新时间')
+    
+    # 索引定义
+    __table_args__ = (
+        Index('idx_rollup_sale_day', 'sale_day'),
+        UniqueConstraint('shop_id', 'sale_day', 'currency', name='uk_daily_sales_rollup'),
+        {'comment': '每日销售汇总表'}
+    )
+    
+    def __repr__(self):
+        return f"<DailySalesRollup(shop_id={self.shop_id}, sale_day='{self.sale_day}', currency='{self.currency}', cny_amount={self.cny_amount})>"
+    
+    @staticmethod
+    def _day_expression(dialect_name: str):
+        """sale_date 截取到日期的表达式（SQLite 的 CAST AS DATE 会得到数值, 需用 date()）"""
+        if dialect_name == 'sqlite':
+            return func.date(Sale.sale_date)
+        return cast(Sale.sale_date, Date)
+    
+    @classmethod
+    def refresh(cls, session, start_day=None, end_day=None, shop_ids=None) -> int:
+        """按 sales 表重新计算指定范围内的汇总
+        
+        先删除范围内的汇总行, 再用一条 INSERT ... SELECT 写入聚合结果; 不指定范围时重建全表
+        
+        Args:
+            session: 数据库会话
+            start_day: 开始日期（含）
+            end_day: 结束日期（含）
+            shop_ids: 店铺主键列表
+            
+        Returns:
+            写入的汇总行数
+        """
+        rollup_filters, sale_filters = [], []
+        if start_day is not None:
+            rollup_filters.append(cls.sale_day >= start_day)
+            sale_filters.append(Sale.sale_date >= datetime.combine(start_day, datetime.min.time()))
+        if end_day is not None:
+            rollup_filters.append(cls.sale_day <= end_day)
+            sale_filters.append(Sale.sale_date <= datetime.combine(end_day, datetime.max.time()))
+        if shop_ids is not None:
+            shop_ids = list(shop_ids)
+            if not shop_ids:
+                return 0
+            rollup_filters.append(cls.shop_id.in_(shop_ids))
+            sale_filters.append(Sale.shop_id.in_(shop_ids))
+        
+        session.query(cls).filter(*rollup_filters).delete(synchronize_session=False)
+        
+        day = cls._day_expression(session.get_bind().dialect.name)
+        aggregated = select(
+            Sale.shop_id,
+            day,
+            Sale.original_currency,
+            func.coalesce(func.sum(Sale.cny_amount), 0),
+            func.coalesce(func.sum(Sale.usd_amount), 0),
+            func.count(Sale.id),
+            func.count(Sale.usd_amount),
+            literal(datetime.now(), DateTime())
+        ).where(*sale_filters).group_by(Sale.shop_id, day, Sale.original_currency)
+        
+        result = session.execute(cls.__table__.insert().from_select(
+            ['shop_id', 'sale_day', 'currency', 'cny_amount', 'usd_amount', 'order_count', 'usd_order_count',
+             'updated_at'],
+            aggregated
+        ))
+        return max(result.rowcount or 0, 0)
+    
+    @classmethod
+    def ensure_built(cls, session) -> int:
+        """建表后检查汇总表: 表结构落后于模型时重建该表, 汇总为空而 sales 有数据时全量回填
+        
+        汇总表完全由 sales 派生, 删除重建不会丢失数据
+        
+        Args:
+            session: 数据库会话
+            
+        Returns:
+            回填的汇总行数（无需回填时为 0）
+        """
+        connection = session.connection()
+        columns = {column['name'] for column in inspect(connection).get_columns(cls.__tablename__)}
+        if not set(cls.__table__.columns.keys()) <= columns:
+            logger.warning(f"{cls.__tablename__} 表结构已过期，删除后按 sales 重建")
+            cls.__table__.drop(bind=connection)
+            cls.__table__.create(bind=connection)
+        elif session.query(cls.id).first() is not None:
+            return 0
+        if session.query(Sale.id).first() is None:
+            return 0
+        rows = cls.refresh(session)
+        logger.info(f"每日销售汇总为空，已按 sales 回填 {rows} 行")
+        return rows
+    
+    @classmethod
+    def refresh_days(cls, session, shop_days) -> int:
+        """增量刷新: 只重新计算新增销售记录涉及的 (店铺, 日期)
+        
+        Args:
+            session: 数据库会话
+            shop_days: {(店铺主键, 日期), ...}
+            
+        Returns:
+            写入的汇总行数
+        """
+        shop_days = set(shop_days)
+        if not shop_days:
+            return 0
+        # 按店铺合并为一个日期区间, 区间相同的店铺一起刷新（同步通常只覆盖连续的几天）
+        days_by_shop = {}
+        for shop_id, day in shop_days:
+            days_by_shop.setdefault(shop_id, []).append(day)
+        shops_by_range = {}
+        for shop_id, days in days_by_shop.items():
+            shops_by_range.setdefault((min(days), max(days)), []).append(shop_id)
+        return sum(
+            cls.refresh(session, start_day, end_day, shop_ids)
+            for (start_day, end_day), shop_ids in shops_by_range.items()
+        )
 
 
 # 导出所有模型
-__all__ = ['Base', 'Shop', 'Sale', 'ExchangeRate']
\ No newline at end of file
+__all__ = ['Base', 'Shop', 'Sale', 'ExchangeRate', 'DailySalesRollup']
\ No newline at end of file
@@ -0,0 +1,185 @@
+# -*- coding: utf-8 -*-
+"""
+多平台同步任务数据模型
+同步任务拆分为按 平台/数据类型/店铺 的同步单元, 单元逐页拉取领星数据并记录断点(offset),
+服务重启后从断点继续; 拉取到的记录按唯一键写入 platform_sync_records
+"""
+
+import logging
+from datetime import datetime
+from typing import List
+
+from sqlalchemy import JSON, Column, DateTime, ForeignKey, Index, Integer, String, Text, UniqueConstraint, inspect, text
+from sqlalchemy.orm import relationship
+
+from .dashboard_models import Base
+
+# 配置日志记录器
+logger = logging.getLogger(__name__)
+
+# 任务/单元状态
+STATUS_PENDING = 'pending'
+STATUS_RUNNING = 'running'
+STATUS_COMPLETED = 'completed'
+STATUS_FAILED = 'failed'
+STATUS_CANCELLED = 'cancelled'
+STATUS_SKIPPED = 'skipped'
+
+# 不会再变化的状态
+TERMINAL_STATUSES = (STATUS_COMPLETED, STATUS_FAILED, STATUS_CANCELLED, STATUS_SKIPPED)
+
+
+class SyncTask(Base):
+    """同步任务
+
+    一次同步请求(若干平台 x 若干数据类型), 状态由其下全部同步单元汇总得出
+    """
+    __tablename__ = 'sync_tasks'
+
+    task_id = Column(String(36), primary_key=True, comment='任务ID(uuid)')
+    platforms = Column(JSON, nullable=False, comment='平台列表')
+    data_types = Column(JSON, nullable=False, comment='数据类型列表')
+    sync_type = Column(String(20), nullable=False, default='full', comment='同步类型：full-全量，incremental-增量')
+    params = Column(JSON, comment='同步参数（日期范围、店铺等）')
+    status = Column(String(20), nullable=False, default=STATUS_PENDING, comment='任务状态')
+    error_message = Column(Text, comment='错误信息')
+
+    created_at = Column(DateTime, default=datetime.now, comment='创建时间')
+    started_at = Column(DateTime, comment='开始执行时间')
+    finished_at = Column(DateTime, comment='结束时间')
+    updated_at = Column(DateTime, default=datetime.now, onupdate=datetime.now, comment='更新时间')
+
+    units = relationship('SyncTaskUnit', back_populates='task', cascade='all, delete-orphan',
+                         order_by='SyncTaskUnit.id')
+
+    __table_args__ = (
+        Index('idx_sync_task_status', 'status'),
+        Index('idx_sync_task_created_at', 'created_at'),
+        {'comment': '同步任务表'}
+    )
+
+    def __repr__(self):
+        return f"<SyncTask(task_id='{self.task_id}', status='{self.status}')>"
+
+
+class SyncTaskUnit(Base):
+    """同步单元
+
+    一个 平台/数据类型/店铺 的逐页拉取, checkpoint 为下一页的 offset, 与写入的记录在同一事务中提交
+    """
+    __tablename__ = 'sync_task_units'
+
+    id = Column(Integer, primary_key=True, autoincrement=True, comment='主键ID')
+    task_id = Column(String(36), ForeignKey('sync_tasks.task_id'), nullable=False, comment='任务ID')
+    platform = Column(String(50), nullable=False, comment='平台')
+    data_type = Column(String(50), nullable=False, comment='数据类型')
+    sid = Column(Integer, comment='店铺ID（不区分店铺的数据为空）')
+
+    status = Column(String(20), nullable=False, default=STATUS_PENDING, comment='单元状态')
+    checkpoint = Column(Integer, nullable=False, default=0, comment='断点：下一页的 offset')
+    page_size = Column(Integer, nullable=False, default=1000, comment='每页条数')
+    pages_done = Column(Integer, nullable=False, default=0, comment='已完成页数')
+    pages_total = Column(Integer, comment='总页数（首页返回 total 后得出）')
+    records_done = Column(Integer, nullable=False, default=0, comment='已写入记录数')
+    records_total = Column(Integer, comment='总记录数')
+    attempts = Column(Integer, nullable=False, default=0, comment='失败重试次数')
+    window_start = Column(DateTime, comment='增量同步窗口起点（为空表示全量）')
+    window_end = Column(DateTime, comment='同步窗口终点（首次执行时确定，完成后作为新的水位）')
+    error_message = Column(Text, comment='错误信息')
+    owner = Column(String(100), comment='负责执行的进程（主机名:pid:随机标识），排队、执行和等待重试期间持有')
+    heartbeat_at = Column(DateTime, comment='负责进程最近一次心跳时间')
+
+    started_at = Column(DateTime, comment='开始时间')
+    finished_at = Column(DateTime, comment='结束时间')
+    updated_at = Column(DateTime, default=datetime.now, onupdate=datetime.now, comment='更新时间')
+
+    task = relationship('SyncTask', back_populates='units')
+
+    __table_args__ = (
+        Index('idx_sync_unit_task', 'task_id'),
+        Index('idx_sync_unit_status', 'status'),
+        {'comment': '同步单元表'}
+    )
+
+    @classmethod
+    def ensure_columns(cls, session) -> List[str]:
+        """建表后补齐旧表缺少的列（create_all 不会修改已存在的表）, 后加的列都允许为空
+        
+        Args:
+            session: 数据库会话
+            
+        Returns:
+            新增的列名
+        """
+        connection = session.connection()
+        existing = {column['name'] for column in inspect(connection).get_columns(cls.__tablename__)}
+        added = []
+        for column in cls.__table__.columns:
+            if column.name in existing:
+                continue
+            column_type = column.type.compile(dialect=connection.dialect)
+            connection.execute(text(f'ALTER TABLE {cls.__tablename__} ADD COLUMN {column.name} {column_type}'))
+            added.append(column.name)
+        if added:
+            logger.info(f"{cls.__tablename__} 表已补齐列: {', '.join(added)}")
+        return added
+
+    def __repr__(self):
+        return (f"<SyncTaskUnit(id={self.id}, platform='{self.platform}', data_type='{self.data_type}', "
+                f"sid={self.sid}, status='{self.status}')>")
+
+
+class PlatformSyncRecord(Base):
+    """同步得到的平台数据
+
+    按 平台/数据类型/店铺/记录唯一键 upsert, payload 为领星返回的原始记录
+    """
+    __tablename__ = 'platform_sync_records'
+
+    id = Column(Integer, primary_key=True, autoincrement=True, comment='主键ID')
+    platform = Column(String(50), nullable=False, comment='平台')
+    data_type = Column(String(50), nullable=False, comment='数据类型')
+    sid = Column(Integer, nullable=False, default=0, comment='店铺ID（不区分店铺的数据为 0）')
+    record_key = Column(String(255), nullable=False, comment='记录唯一键')
+    payload = Column(JSON, nullable=False, comment='原始记录')
+    task_id = Column(String(36), comment='最后写入的同步任务ID')
+    synced_at = Column(DateTime, default=datetime.now, comment='同步时间')
+
+    __table_args__ = (
+        UniqueConstraint('platform', 'data_type', 'sid', 'record_key', name='uk_platform_sync_record'),
+        Index('idx_platform_sync_record_synced_at', 'synced_at'),
+        {'comment': '平台同步数据表'}
+    )
+
+    def __repr__(self):
+        return (f"<PlatformSyncRecord(platform='{self.platform}', data_type='{self.data_type}', "
+                f"sid={self.sid}, record_key='{self.record_key}')>")
+
+
+class SyncWatermark(Base):
+    """增量同步水位
+
+    每个 接口/店铺 已同步到的更新时间, 增量同步只拉取水位之后有变化的数据
+    """
+    __tablename__ = 'sync_watermarks'
+
+    id = Column(Integer, primary_key=True, autoincrement=True, comment='主键ID')
+    route_name = Column(String(255), nullable=False, comment='领星接口路由')
+    sid = Column(Integer, nullable=False, default=0, comment='店铺ID（不区分店铺的接口为 0）')
+    watermark = Column(DateTime, nullable=False, comment='已同步到的更新时间')
+    updated_at = Column(DateTime, default=datetime.now, onupdate=datetime.now, comment='更新时间')
+
+    __table_args__ = (
+        UniqueConstraint('route_name', 'sid', name='uk_sync_watermark'),
+        {'comment': '增量同步水位表'}
+    )
+
+    def __repr__(self):
+        return f"<SyncWatermark(route_name='{self.route_name}', sid={self.sid}, watermark='{self.watermark}')>"
+
+
+__all__ = [
+    'SyncTask', 'SyncTaskUnit', 'PlatformSyncRecord', 'SyncWatermark',
+    'STATUS_PENDING', 'STATUS_RUNNING', 'STATUS_COMPLETED', 'STATUS_FAILED',
+    'STATUS_CANCELLED', 'STATUS_SKIPPED', 'TERMINAL_STATUSES'
+]
@@ -20,7 +20,8 @@ from app.handlers.amazon_table_handler import (
     AdjustmentListHandler,
     CreateReportExportTaskHandler,
     QueryReportExportTaskHandler,
-    AmazonReportExportTaskHandler
+    AmazonReportExportTaskHandler,
+    ReportExportDownloadHandler
 )
 
 amazon_table_routes = [
@@ -71,4 +72,7 @@ amazon_table_routes = [
     
     # 报告下载链接续期
     (r"/api/basicOpen/report/amazonReportExportTask", AmazonReportExportTaskHandler),
+    
+    # 下载报告文件（分块转发）
+    (r"/api/basicOpen/report/download/reportExportTask", ReportExportDownloadHandler),
 ]
\ No newline at end of file
@@ -9,6 +9,9 @@ from app.handlers.multi_platform_handler import (
     OrderProfitMSKUHandler as MultiPlatformOrderProfitMSKUHandler,                     # 多平台订单利润MSKU
     ProfitReportMSKUHandler,                    # 多平台结算利润-msku
     ProfitReportSKUHandler,                     # 多平台结算利润-sku
+    SyncTaskListHandler,                        # 多平台同步任务创建/列表
+    SyncTaskDetailHandler,                      # 多平台同步任务状态
+    SyncTaskCancelHandler,                      # 多平台同步任务取消
 )
 
 multi_platform_routes = [
@@ -24,4 +27,7 @@ multi_platform_routes = [
     ("/api/multi-platform/profit-report-sku", ProfitReportSKUHandler),  # 多平台结算利润-sku
     ("/api/multi-platform/seller-list", MultiPlatformSellerListHandler),  # 多平台店铺信息查询
     ("/api/multi-platform/profit-report-seller", ProfitReportSellerHandler),  # 多平台结算利润-店铺
+    ("/api/multi-platform/sync-tasks", SyncTaskListHandler),  # 多平台同步任务创建/列表
+    (r"/api/multi-platform/sync-tasks/([0-9a-f-]{36})", SyncTaskDetailHandler),  # 多平台同步任务状态
+    (r"/api/multi-platform/sync-tasks/([0-9a-f-]{36})/cancel", SyncTaskCancelHandler),  # 多平台同步任务取消
 ] 
\ No newline at end of file
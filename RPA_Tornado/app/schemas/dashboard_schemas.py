@@ -13,25 +13,25 @@ import re
 
 class SyncShopDataRequest(BaseModel):
     """同步店铺数据请求模式"""
-    access_token: str = Field(..., description="访问令牌")
+    access_token: Optional[str] = Field(None, description="访问令牌，不传时使用服务端共享令牌")
     
     @validator('access_token')
     def validate_access_token(cls, v):
-        if not v or not v.strip():
+        if v is not None and not v.strip():
             raise ValueError('访问令牌不能为空')
-        return v.strip()
+        return v.strip() if v else v
 
 
 class SyncExchangeRateRequest(BaseModel):
     """同步汇率数据请求模式"""
-    access_token: str = Field(..., description="访问令牌")
+    access_token: Optional[str] = Field(None, description="访问令牌，不传时使用服务端共享令牌")
     target_date: Optional[str] = Field(None, description="目标日期，格式为 YYYY-MM")
     
     @validator('access_token')
     def validate_access_token(cls, v):
-        if not v or not v.strip():
+        if v is not None and not v.strip():
             raise ValueError('访问令牌不能为空')
-        return v.strip()
+        return v.strip() if v else v
     
     @validator('target_date')
     def validate_target_date(cls, v):
@@ -43,15 +43,15 @@ class SyncExchangeRateRequest(BaseModel):
 
 class SyncSalesDataRequest(BaseModel):
     """同步销售数据请求模式"""
-    access_token: str = Field(..., description="访问令牌")
+    access_token: Optional[str] = Field(None, description="访问令牌，不传时使用服务端共享令牌")
     start_date: Optional[str] = Field(None, description="开始日期，格式为 YYYY-MM-DD")
     end_date: Optional[str] = Field(None, description="结束日期，格式为 YYYY-MM-DD")
     
     @validator('access_token')
     def validate_access_token(cls, v):
-        if not v or not v.strip():
+        if v is not None and not v.strip():
             raise ValueError('访问令牌不能为空')
-        return v.strip()
+        return v.strip() if v else v
     
     @validator('start_date', 'end_date')
     def validate_date_format(cls, v):
@@ -2,10 +2,22 @@
 # 亚马逊源表数据服务
 # 负责处理亚马逊原始表数据、数据同步等业务逻辑
 
+import aiohttp
+import logging
+from contextlib import asynccontextmanager
+
+from app.auth.http_util import session_pool
 from app.auth.openapi import OpenApiBase
+from app.auth.pager import OffsetPager
 from app.config import settings
+from app.core.shop_registry import shop_registry
+from app.core.token_provider import token_provider
+from app.utils.concurrency_utils import bounded_gather, fan_out_response, lingxing_error
 from typing import Optional, Dict, Any
 
+# 配置日志记录器
+logger = logging.getLogger(__name__)
+
 class AmazonTableService:
     """亚马逊源表数据服务类"""
     
@@ -18,9 +30,13 @@ class AmazonTableService:
         )
     
     async def get_access_token(self):
-        """获取访问令牌"""
-        token_dto = await self.api.generate_access_token()
-        return token_dto.access_token
+        """获取访问令牌（全局共享，不再每次请求都重新生成）"""
+        return await token_provider.get_token()
+    
+    def _pager(self, access_token, route_name, query_data):
+        """为 offset/length 分页接口创建自动翻页迭代器"""
+        return OffsetPager(self.api, access_token, route_name, req_body=query_data,
+                           prefetch=settings.LLX_PAGE_PREFETCH)
     
     async def get_amazon_table(self, params):
         """获取亚马逊源表数据"""
@@ -117,37 +133,29 @@ class AmazonTableService:
                         'data': None
                     }
                 
-                # 分别查询每个sid的数据并合并
-                all_results = []
+                # 并发查询每个sid的数据，按sid顺序合并，单个sid失败不影响其他sid
                 access_token = await self.get_access_token()
                 
-                for sid in sid_list:
+                async def query_sid(sid):
                     single_query_data = query_data.copy()
                     single_query_data['sid'] = sid
-                    
-                    try:
-                        resp = await self.api.request(
-                            access_token=access_token,
-                            route_name="/erp/sc/routing/data/order/removalOrderListNew",
-                            method="POST",
-                            req_body=single_query_data
-                        )
-                        
-                        result = resp.model_dump()
-                        if result.get('code') == 0 and result.get('data'):
-                            if isinstance(result['data'], list):
-                                all_results.extend(result['data'])
-                            elif isinstance(result['data'], dict) and 'list' in result['data']:
-                                all_results.extend(result['data']['list'])
-                    except Exception as e:
-                        print(f"[WARNING] 查询sid {sid} 的移除货件数据失败: {str(e)}")
-                        continue
+                    resp = await self.api.request(
+                        access_token=access_token,
+                        route_name="/erp/sc/routing/data/order/removalOrderListNew",
+                        method="POST",
+                        req_body=single_query_data
+                    )
+                    return resp.model_dump()
                 
-                return {
-                    'code': 0,
-                    'message': 'success',
-                    'data': all_results
-                }
+                fan_out = await bounded_gather(
+                    sid_list, query_sid,
+                    limit=settings.LLX_FAN_OUT_CONCURRENCY,
+                    is_error=lingxing_error
+                )
+                for failure in fan_out.failed:
+                    logger.warning(f"查询sid {failure['key']} 的移除货件数据失败: {failure['message']}")
+                
+                return fan_out_response(fan_out, all_failed_message=f'seller_id {seller_id} 下所有店铺的移除货件查询均失败')
 
             
         except Exception as e:
@@ -157,12 +165,14 @@ class AmazonTableService:
                 'data': None
             }
     
-    async def get_removal_order_list_new(self, params):
+    async def get_removal_order_list_new(self, params, fetch_all: bool = False):
         """
         查询亚马逊源报表-移除订单（新）
         查询 Reports-Fulfillment-Removal Order Detail 报表
         Args:
             params: 请求参数，包含sid、start_date、end_date、offset、length、search_field_time
+            fetch_all: 为True时自动翻页, 返回 OffsetPager
+            raw: 为True时返回 RawResponse(领星原始响应字节), 由调用方直接透传
         Returns:
             dict: 标准响应
         """
@@ -231,6 +241,9 @@ class AmazonTableService:
             
             # 4. 调用外部API获取移除订单报表数据
             access_token = await self.get_access_token()
+            if fetch_all:
+                # 全量模式: 返回分页迭代器, 由调用方流式读取
+                return self._pager(access_token, "/erp/sc/routing/data/order/removalOrderListNew", query_data)
             resp = await self.api.request(
                 access_token=access_token,
                 route_name="/erp/sc/routing/data/order/removalOrderListNew",
@@ -247,12 +260,13 @@ class AmazonTableService:
                 'data': None
             }
     
-    async def get_all_orders(self, params):
+    async def get_all_orders(self, params, fetch_all: bool = False, raw: bool = False):
         """
         查询亚马逊源报表-所有订单
         查询 All Orders Report By last update 报表
         Args:
             params: 请求参数，包含sid、start_date、end_date、date_type、offset、length
+            fetch_all: 为True时自动翻页, 返回 OffsetPager
         Returns:
             dict: 标准响应
         """
@@ -320,12 +334,18 @@ class AmazonTableService:
             
             # 4. 调用外部API获取所有订单报表数据
             access_token = await self.get_access_token()
+            if fetch_all:
+                # 全量模式: 返回分页迭代器, 由调用方流式读取
+                return self._pager(access_token, "/erp/sc/data/mws_report/allOrders", query_data)
             resp = await self.api.request(
                 access_token=access_token,
                 route_name="/erp/sc/data/mws_report/allOrders",
                 method="POST",
-                req_body=query_data
+                req_body=query_data,
+                raw=raw
             )
+            if raw:
+                return resp
             
             return resp.model_dump()
             
@@ -956,12 +976,13 @@ class AmazonTableService:
                 'data': None
             }
     
-    async def get_fba_age_list(self, params):
+    async def get_fba_age_list(self, params, fetch_all: bool = False):
         """
         查询亚马逊源报表-库龄表
         查询 Manage Inventory Health 报表
         Args:
             params: 请求参数，包含sid、offset、length
+            fetch_all: 为True时自动翻页, 返回 OffsetPager
         Returns:
             dict: 标准响应
         """
@@ -1005,6 +1026,9 @@ class AmazonTableService:
             
             # 4. 调用外部API获取库龄表数据
             access_token = await self.get_access_token()
+            if fetch_all:
+                # 全量模式: 返回分页迭代器, 由调用方流式读取
+                return self._pager(access_token, "/erp/sc/routing/fba/fbaStock/getFbaAgeList", query_data)
             resp = await self.api.request(
                 access_token=access_token,
                 route_name="/erp/sc/routing/fba/fbaStock/getFbaAgeList",
@@ -1299,6 +1323,47 @@ class AmazonTableService:
                 'data': None
             }
     
+    async def get_report_document_url(self, params):
+        """
+        报告导出-获取报告文件下载链接
+        查询导出任务结果, 结果中没有下载链接(链接已过期)且带有 report_document_id 时调用续期接口重新获取
+        Args:
+            params: 请求参数，包含seller_id、task_id、region
+        Returns:
+            tuple: (下载链接, 标准响应), 任务未完成或失败时下载链接为 None
+        """
+        result = await self.query_report_export_task(params)
+        if result.get('code') != 0:
+            return None, result
+        data = result.get('data') or {}
+        if isinstance(data, list):
+            data = data[0] if data else {}
+        url = data.get('url')
+        if not url and data.get('report_document_id'):
+            renewed = await self.amazon_report_export_task({
+                'region': params['region'],
+                'seller_id': params['seller_id'],
+                'report_document_id': data['report_document_id']
+            })
+            if renewed.get('code') != 0:
+                return None, renewed
+            url = (renewed.get('data') or {}).get('url')
+        return url, result
+
+    @asynccontextmanager
+    async def open_report_document(self, url: str):
+        """
+        打开报告文件下载流(复用全局连接池), 调用方通过 resp.content.iter_chunked 分块读取, 不把整个文件读入内存
+        Args:
+            url: 报告下载链接
+        """
+        session = session_pool.get_session()
+        # 大文件下载不限总时长, 只限制单次读取的等待时间
+        timeout = aiohttp.ClientTimeout(total=None, sock_connect=30, sock_read=120)
+        async with session.get(url, timeout=timeout) as resp:
+            resp.raise_for_status()
+            yield resp
+    
     async def _get_sid_list_by_seller_id(self, seller_id: str) -> list:
         """
         根据seller_id获取对应的所有sid列表
@@ -1307,13 +1372,5 @@ class AmazonTableService:
         Returns:
             list: sid列表
         """
-        # 硬编码的seller_id到sid的映射关系
-        # 这些数据来自于unprocessed_data目录下的amazon_seller_list.json文件
-        seller_id_to_sid_mapping = {
-            "A364119SDJA4QG": [505818, 505819, 505820, 505821],  # GL.iNet_NA
-            "A3N83818QYC6JY": [516498, 516499, 516500, 516501, 516502, 516503, 516504, 516505, 516506, 516507],  # MIC-DE
-            "A2EW9KKDYQK64I": [516508, 516509, 516510, 516511, 516512, 516513, 516514, 516515, 516516],  # GL.iNet_EU&UK
-            "A3M67G05FKDBD7": [505881]  # GL.iNet_AU
-        }
-        
-        return seller_id_to_sid_mapping.get(seller_id, [])
\ No newline at end of file
+        # 由店铺注册表按领星店铺列表解析，新授权的店铺在下次刷新后即可查询
+        return await shop_registry.get_sids_by_seller_id(seller_id)
\ No newline at end of file
@@ -2,6 +2,7 @@
 # 用于基础数据相关的业务逻辑
 from app.auth.openapi import OpenApiBase
 from app.config import settings
+from app.core.cache import cached, invalidates
 from typing import Optional, Dict, Any
 from datetime import datetime, timedelta
 import json as _json
@@ -61,6 +62,7 @@ class BaseDataService:
         except Exception as e:
             raise e
 
+    @cached('llx:seller_list')
     async def get_amazon_seller_list(self, access_token: str) -> Dict[str, Any]:
         """
         查询亚马逊店铺列表 - 查询企业已授权到领星ERP的全部亚马逊店铺信息
@@ -90,6 +92,7 @@ class BaseDataService:
         except Exception as e:
             raise e
 
+    @cached('llx:marketplace_list')
     async def get_amazon_marketplace_list(self, access_token: str) -> Dict[str, Any]:
         """
         查询亚马逊市场列表 - 查询亚马逊所有市场列表数据
@@ -119,6 +122,7 @@ class BaseDataService:
         except Exception as e:
             raise e
 
+    @cached('llx:world_state_list')
     async def get_world_state_list(self, access_token: str, country_code: str) -> Dict[str, Any]:
         """
         查询世界州/省列表 - 根据国家代码查询对应的州/省列表
@@ -242,6 +246,7 @@ class BaseDataService:
         except Exception as e:
             raise e
 
+    @cached('llx:erp_user_list')
     async def get_erp_user_list(self, access_token: str) -> Dict[str, Any]:
         """
         查询ERP用户信息列表 - 查询企业开启的全部ERP账号数据
@@ -276,6 +281,7 @@ class BaseDataService:
             raise e
 
 
+    @invalidates('llx:seller_list')
     async def batch_edit_seller_name(self, access_token: str, sid_name_list: list) -> Dict[str, Any]:
         """
         批量修改店铺名称 - 最多可批量修改10个店铺名称
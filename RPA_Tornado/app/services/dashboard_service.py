@@ -5,24 +5,38 @@
 """
 
 import asyncio
+from types import SimpleNamespace
 from typing import Any, Dict, List, Optional, Tuple
 from datetime import datetime, date, timedelta
 from decimal import Decimal, InvalidOperation
 import logging
 import json
 from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_, func, desc
+from sqlalchemy import and_, or_, func, desc, type_coerce
+from sqlalchemy.types import NullType
 
 from ..core.exceptions.base_exceptions import ValidationError, BusinessLogicError, NotFoundError
 from ..shared.constants.business_constants import DATE_FORMAT
-from ..models.dashboard_models import Shop, Sale, ExchangeRate
+from ..models.dashboard_models import Shop, Sale, ExchangeRate, DailySalesRollup
+from ..auth.governor import bulk_priority
 from ..auth.openapi import OpenApiBase
 from ..config import settings
-from ..core.database import get_db_session
+from ..core.bulk_upsert import bulk_upsert
+from ..core.database import run_in_session
+from ..core.shop_registry import ShopInfo, shop_registry
+from ..core.token_provider import token_provider
+from ..core.watermarks import advance_watermark, get_watermark
+from ..utils.currency_utils import ExchangeRateMatrix
 
 # 配置日志记录器
 logger = logging.getLogger(__name__)
 
+# 销售统计接口, 同时作为销售数据同步水位的键
+SALES_STATS_ROUTE = "/erp/sc/routing/finance/sales/statistics"
+
+# 每日汇总表中没有记录的日期
+_EMPTY_DAY = SimpleNamespace(total_cny=None, total_usd=None, order_count=None)
+
 
 class DashboardService:
     """电商数据看板服务类"""
@@ -31,16 +45,18 @@ class DashboardService:
         """初始化服务"""
         self.api = OpenApiBase(settings.LLX_API_HOST, settings.LLX_APP_ID, settings.LLX_APP_SECRET)
     
-    async def sync_shop_data(self, access_token: str) -> Dict[str, Any]:
+    @bulk_priority
+    async def sync_shop_data(self, access_token: Optional[str] = None) -> Dict[str, Any]:
         """同步店铺数据
         
         Args:
-            access_token: 访问令牌
+            access_token: 访问令牌，未提供时使用全局共享令牌
             
         Returns:
             同步结果
         """
         try:
+            access_token = access_token or await token_provider.get_token()
             logger.info("开始同步店铺数据")
             
             # 调用API获取店铺列表
@@ -59,54 +75,37 @@ class DashboardService:
             
             # 提取店铺数据
             shops_data = resp_data.get("data", [])
-            synced_count = 0
-            updated_count = 0
-            
-            # 获取数据库会话
-            with get_db_session() as session:
-                for shop_info in shops_data:
-                    try:
-                        shop_id = shop_info.get("sid")
-                        shop_name = shop_info.get("seller_name")
-                        platform_id = shop_info.get("platform_id")
-                        platform = shop_info.get("platform")
-                        
-                        if not all([shop_id, shop_name, platform_id, platform]):
-                            logger.warning(f"店铺信息不完整，跳过: {shop_info}")
-                            continue
-                        
-                        # 检查店铺是否已存在
-                        existing_shop = session.query(Shop).filter(
-                            and_(
-                                Shop.shop_id == shop_id,
-                                Shop.platform_id == platform_id
-                            )
-                        ).first()
-                        
-                        if existing_shop:
-                            # 更新现有店铺信息
-                            existing_shop.shop_name = shop_name
-                            existing_shop.platform = platform
-                            existing_shop.updated_at = datetime.now()
-                            updated_count += 1
-                        else:
-                            # 创建新店铺记录
-                            new_shop = Shop(
-                                shop_id=shop_id,
-                                shop_name=shop_name,
-                                platform_id=platform_id,
-                                platform=platform,
-                                status='active'
-                            )
-                            session.add(new_shop)
-                            synced_count += 1
-                        
-                    except Exception as e:
-                        logger.error(f"处理店铺数据时出错: {str(e)}")
-                        continue
+            # 顺便更新共享的店铺注册表
+            shop_registry.load([ShopInfo.from_api(item) for item in shops_data if item.get("sid")])
+            now = datetime.now()
+            rows = []
+            for shop_info in shops_data:
+                shop_id = shop_info.get("sid")
+                shop_name = shop_info.get("seller_name")
+                platform_id = shop_info.get("platform_id")
+                platform = shop_info.get("platform")
+                
+                if not all([shop_id, shop_name, platform_id, platform]):
+                    logger.warning(f"店铺信息不完整，跳过: {shop_info}")
+                    continue
                 
-                # 提交事务
-                session.commit()
+                rows.append({
+                    "shop_id": str(shop_id),
+                    "shop_name": shop_name,
+                    "platform_id": str(platform_id),
+                    "platform": platform,
+                    "status": "active",
+                    "updated_at": now
+                })
+            
+            # 按 uk_shop_platform 批量 upsert，已存在的店铺只更新名称和平台
+            result = await run_in_session(
+                bulk_upsert, Shop, rows,
+                conflict_columns=["shop_id", "platform_id"],
+                update_columns=["shop_name", "platform", "updated_at"],
+                chunk_size=settings.DB_BULK_CHUNK_SIZE
+            )
+            synced_count, updated_count = result.inserted, result.updated
             
             logger.info(f"店铺数据同步完成，新增 {synced_count} 个店铺，更新 {updated_count} 个店铺")
             return {
@@ -120,17 +119,19 @@ class DashboardService:
             logger.error(f"同步店铺数据失败: {str(e)}")
             raise BusinessLogicError(f"同步店铺数据失败: {str(e)}")
     
-    async def sync_exchange_rate_data(self, access_token: str, target_date: Optional[str] = None) -> Dict[str, Any]:
+    @bulk_priority
+    async def sync_exchange_rate_data(self, access_token: Optional[str] = None, target_date: Optional[str] = None) -> Dict[str, Any]:
         """同步汇率数据
         
         Args:
-            access_token: 访问令牌
+            access_token: 访问令牌，未提供时使用全局共享令牌
             target_date: 目标日期，格式为 YYYY-MM，默认为昨天所在月份
             
         Returns:
             同步结果
         """
         try:
+            access_token = access_token or await token_provider.get_token()
             # 如果没有提供日期，默认使用昨天所在月份
             if target_date is None:
                 yesterday = datetime.now() - timedelta(days=1)
@@ -159,66 +160,45 @@ class DashboardService:
             
             # 提取汇率数据
             currency_data = resp_data.get("data", [])
-            synced_count = 0
-            updated_count = 0
-            
-            # 获取数据库会话
-            with get_db_session() as session:
-                for rate_info in currency_data:
-                    try:
-                        currency_code = rate_info.get('code')
-                        rate_str = rate_info.get('rate')
-                        currency_name = rate_info.get('name', currency_code)
-                        
-                        if not currency_code or not rate_str:
-                            continue
-                        
-                        # 验证汇率值
-                        try:
-                            rate_value = Decimal(rate_str)
-                        except (ValueError, TypeError) as e:
-                            logger.error(f"汇率值转换失败 {currency_code}: {rate_str}, 错误: {str(e)}")
-                            continue
-                        
-                        # 解析目标日期
-                        rate_date = datetime.strptime(f"{target_date}-01", "%Y-%m-%d")
-                        
-                        # 检查汇率是否已存在
-                        existing_rate = session.query(ExchangeRate).filter(
-                            and_(
-                                ExchangeRate.currency_code == currency_code,
-                                ExchangeRate.rate_date == rate_date,
-                                ExchangeRate.base_currency == 'CNY'
-                            )
-                        ).first()
-                        
-                        if existing_rate:
-                            # 更新现有汇率
-                            existing_rate.rate = rate_value
-                            existing_rate.currency_name = currency_name
-                            existing_rate.updated_at = datetime.now()
-                            updated_count += 1
-                        else:
-                            # 创建新汇率记录
-                            new_rate = ExchangeRate(
-                                currency_code=currency_code,
-                                currency_name=currency_name,
-                                base_currency='CNY',
-                                rate=rate_value,
-                                rate_date=rate_date,
-                                effective_date=rate_date,
-                                source='api',
-                                status='active'
-                            )
-                            session.add(new_rate)
-                            synced_count += 1
-                        
-                    except Exception as e:
-                        logger.error(f"处理汇率数据时出错: {str(e)}")
-                        continue
+            # 解析目标日期
+            rate_date = datetime.strptime(f"{target_date}-01", "%Y-%m-%d")
+            now = datetime.now()
+            rows = []
+            for rate_info in currency_data:
+                currency_code = rate_info.get('code')
+                rate_str = rate_info.get('rate')
+                currency_name = rate_info.get('name', currency_code)
+                
+                if not currency_code or not rate_str:
+                    continue
                 
-                # 提交事务
-                session.commit()
+                # 验证汇率值
+                try:
+                    rate_value = Decimal(rate_str)
+                except (ValueError, TypeError, InvalidOperation) as e:
+                    logger.error(f"汇率值转换失败 {currency_code}: {rate_str}, 错误: {str(e)}")
+                    continue
+                
+                rows.append({
+                    "currency_code": currency_code,
+                    "currency_name": currency_name,
+                    "base_currency": "CNY",
+                    "rate": rate_value,
+                    "rate_date": rate_date,
+                    "effective_date": rate_date,
+                    "source": "api",
+                    "status": "active",
+                    "updated_at": now
+                })
+            
+            # 按 uk_exchange_rate 批量 upsert，已存在的汇率只更新汇率值和名称
+            result = await run_in_session(
+                bulk_upsert, ExchangeRate, rows,
+                conflict_columns=["currency_code", "base_currency", "rate_date"],
+                update_columns=["rate", "currency_name", "updated_at"],
+                chunk_size=settings.DB_BULK_CHUNK_SIZE
+            )
+            synced_count, updated_count = result.inserted, result.updated
             
             logger.info(f"汇率数据同步完成，新增 {synced_count} 条汇率记录，更新 {updated_count} 条记录")
             return {
@@ -233,28 +213,38 @@ class DashboardService:
             logger.error(f"同步汇率数据失败: {str(e)}")
             raise BusinessLogicError(f"同步汇率数据失败: {str(e)}")
     
+    @bulk_priority
     async def sync_sales_data_with_period(
         self, 
-        access_token: str,
+        access_token: Optional[str] = None,
         start_date: Optional[str] = None, 
         end_date: Optional[str] = None
     ) -> Dict[str, Any]:
         """同步指定时间区间的销售数据
         
         Args:
-            access_token: 访问令牌
-            start_date: 开始日期，格式为 YYYY-MM-DD，默认为昨天
-            end_date: 结束日期，格式为 YYYY-MM-DD，默认为昨天
+            access_token: 访问令牌，未提供时使用全局共享令牌
+            start_date: 开始日期，格式为 YYYY-MM-DD，默认从上次同步到的日期（水位）开始，没有水位时为昨天
+            end_date: 结束日期，格式为 YYYY-MM-DD，默认为昨天；按水位补数时最多同步 SALES_SYNC_MAX_DAYS 天
             
         Returns:
             同步结果
         """
         try:
-            # 如果没有指定日期，使用昨天的日期
+            access_token = access_token or await token_provider.get_token()
+            # 如果没有指定日期，增量同步: 从水位当天（可能只同步了部分数据）补到昨天，漏跑的日期一并补齐
             if start_date is None or end_date is None:
                 yesterday = (datetime.now() - timedelta(days=1)).strftime("%Y-%m-%d")
-                start_date = start_date or yesterday
                 end_date = end_date or yesterday
+                if start_date is None:
+                    watermark = await run_in_session(get_watermark, SALES_STATS_ROUTE)
+                    start_date = min(watermark.strftime("%Y-%m-%d"), end_date) if watermark else end_date
+                    # 水位落后太多时单次只向前补 SALES_SYNC_MAX_DAYS 天, 水位推进后下次继续补
+                    max_days = max(1, settings.SALES_SYNC_MAX_DAYS)
+                    window_end = (datetime.strptime(start_date, "%Y-%m-%d") + timedelta(days=max_days - 1)).strftime("%Y-%m-%d")
+                    if window_end < end_date:
+                        logger.warning(f"销售数据水位落后，本次只同步 {start_date} 到 {window_end}，其余日期在后续同步中补齐")
+                        end_date = window_end
             
             logger.info(f"开始同步销售数据，时间区间: {start_date} 到 {end_date}")
             
@@ -277,6 +267,11 @@ class DashboardService:
             # 3. 处理和转换数据
             synced_count = await self._process_sales_data(sales_data, start_date_obj, end_date_obj)
             
+            # 4. 推进水位（只会前进, 回补历史区间不影响）
+            await run_in_session(
+                advance_watermark, SALES_STATS_ROUTE, 0, datetime.combine(end_date_obj, datetime.min.time())
+            )
+            
             logger.info(f"销售数据同步完成，共处理 {synced_count} 条记录")
             return {
                 "success": True,
@@ -305,21 +300,26 @@ class DashboardService:
             while current_date <= end_month:
                 target_month = current_date.strftime("%Y-%m")
                 
-                # 检查该月份是否已有汇率数据
-                with get_db_session() as session:
-                    existing_rates = session.query(ExchangeRate).filter(
-                        func.date_format(ExchangeRate.rate_date, '%Y-%m') == target_month
+                # 下一个月
+                if current_date.month == 12:
+                    next_month = current_date.replace(year=current_date.year + 1, month=1)
+                else:
+                    next_month = current_date.replace(month=current_date.month + 1)
+                
+                # 检查该月份是否已有汇率数据（按日期区间过滤，不依赖数据库方言的日期格式化函数）
+                existing_rates = await run_in_session(
+                    lambda session, start=current_date, end=next_month: session.query(ExchangeRate).filter(
+                        ExchangeRate.rate_date >= start,
+                        ExchangeRate.rate_date < end
                     ).count()
-                    
-                    if existing_rates == 0:
-                        logger.info(f"同步缺失的汇率数据: {target_month}")
-                        await self.sync_exchange_rate_data(access_token, target_month)
+                )
+                
+                if existing_rates == 0:
+                    logger.info(f"同步缺失的汇率数据: {target_month}")
+                    await self.sync_exchange_rate_data(access_token, target_month)
                 
                 # 移动到下一个月
-                if current_date.month == 12:
-                    current_date = current_date.replace(year=current_date.year + 1, month=1)
-                else:
-                    current_date = current_date.replace(month=current_date.month + 1)
+                current_date = next_month
                     
         except Exception as e:
             logger.error(f"确保汇率数据完整性失败: {str(e)}")
@@ -346,7 +346,7 @@ class DashboardService:
             # 调用API获取销售统计数据
             resp = await self.api.request(
                 access_token=access_token,
-                route_name="/erp/sc/routing/finance/sales/statistics",
+                route_name=SALES_STATS_ROUTE,
                 method="POST",
                 req_body=query_data
             )
@@ -366,6 +366,8 @@ class DashboardService:
     async def _process_sales_data(self, sales_data: List[Dict[str, Any]], start_date: date, end_date: date) -> int:
         """处理销售数据
         
+        店铺和汇率在处理前一次性加载, 金额按批换算, 不再逐条查询店铺和汇率
+        
         Args:
             sales_data: 销售数据列表
             start_date: 开始日期
@@ -375,133 +377,109 @@ class DashboardService:
             处理的记录数
         """
         try:
-            synced_count = 0
-            
-            with get_db_session() as session:
-                for sale_info in sales_data:
-                    try:
-                        # 提取销售数据字段
-                        shop_id = sale_info.get('shop_id')
-                        sale_date_str = sale_info.get('sale_date')
-                        original_amount = sale_info.get('amount')
-                        original_currency = sale_info.get('currency', 'CNY')
-                        order_id = sale_info.get('order_id')
-                        product_id = sale_info.get('product_id')
-                        
-                        if not all([shop_id, sale_date_str, original_amount]):
-                            continue
-                        
-                        # 解析销售日期
-                        sale_date = datetime.strptime(sale_date_str, "%Y-%m-%d")
-                        
-                        # 获取店铺信息
-                        shop = session.query(Shop).filter(Shop.shop_id == shop_id).first()
-                        if not shop:
-                            logger.warning(f"未找到店铺: {shop_id}")
-                            continue
-                        
-                        # 货币转换
-                        cny_amount, usd_amount, exchange_rate = await self._convert_currency(
-                            session, original_amount, original_currency, sale_date
-                        )
-                        
-                        # 检查销售记录是否已存在
-                        existing_sale = session.query(Sale).filter(
-                            and_(
-                                Sale.shop_id == shop.id,
-                                Sale.sale_date == sale_date,
-                                Sale.order_id == order_id,
-                                Sale.product_id == product_id
-                            )
-                        ).first()
-                        
-                        if not existing_sale:
-                            # 创建新销售记录
-                            new_sale = Sale(
-                                shop_id=shop.id,
-                                sale_date=sale_date,
-                                order_id=order_id,
-                                product_id=product_id,
-                                product_name=sale_info.get('product_name'),
-                                original_amount=Decimal(str(original_amount)),
-                                original_currency=original_currency,
-                                cny_amount=cny_amount,
-                                usd_amount=usd_amount,
-                                exchange_rate=exchange_rate,
-                                exchange_rate_date=sale_date,
-                                quantity=sale_info.get('quantity', 1),
-                                raw_data=json.dumps(sale_info)
-                            )
-                            session.add(new_sale)
-                            synced_count += 1
-                        
-                    except Exception as e:
-                        logger.error(f"处理销售记录时出错: {str(e)}")
-                        continue
-                
-                # 提交事务
-                session.commit()
-            
-            return synced_count
+            return await run_in_session(self._write_sales_records, sales_data, start_date, end_date)
             
         except Exception as e:
             logger.error(f"处理销售数据失败: {str(e)}")
             raise
     
-    async def _convert_currency(
-        self, 
-        session: Session, 
-        amount: str, 
-        from_currency: str, 
-        sale_date: datetime
-    ) -> Tuple[Decimal, Optional[Decimal], Optional[Decimal]]:
-        """货币转换
+    def _write_sales_records(self, session: Session, sales_data: List[Dict[str, Any]],
+                             start_date: date, end_date: date) -> int:
+        """在数据库线程中换算并写入销售记录，同时更新每日销售汇总，返回新增的记录数"""
+        synced_count = 0
+        touched_days = set()
         
-        Args:
-            session: 数据库会话
-            amount: 金额
-            from_currency: 源货币
-            sale_date: 销售日期
-            
-        Returns:
-            (人民币金额, 美元金额, 使用的汇率)
-        """
-        try:
-            amount_decimal = Decimal(str(amount))
-            
-            if from_currency == 'CNY':
-                cny_amount = amount_decimal
-                exchange_rate = Decimal('1.0')
-            else:
-                # 获取汇率
-                rate_record = ExchangeRate.get_rate_by_date(
-                    session, from_currency, sale_date, 'CNY'
-                )
+        # 预加载店铺映射（领星店铺ID -> 本地主键）和同步窗口内的汇率
+        shop_map = {str(shop_id): pk for shop_id, pk in session.query(Shop.shop_id, Shop.id)}
+        rate_matrix = ExchangeRateMatrix(ExchangeRate.load_rate_window(
+            session,
+            datetime.combine(start_date, datetime.min.time()),
+            datetime.combine(end_date, datetime.max.time())
+        ))
+        
+        # 第一遍: 校验并解析字段
+        records = []
+        for sale_info in sales_data:
+            try:
+                shop_id = sale_info.get('shop_id')
+                sale_date_str = sale_info.get('sale_date')
+                original_amount = sale_info.get('amount')
                 
-                if not rate_record:
-                    logger.warning(f"未找到汇率: {from_currency} -> CNY, 日期: {sale_date}")
-                    return amount_decimal, None, None
+                if not all([shop_id, sale_date_str, original_amount]):
+                    continue
                 
-                exchange_rate = rate_record.rate
-                cny_amount = amount_decimal * exchange_rate
-            
-            # 转换为美元
-            usd_rate_record = ExchangeRate.get_rate_by_date(
-                session, 'USD', sale_date, 'CNY'
-            )
-            
-            if usd_rate_record:
-                usd_amount = cny_amount / usd_rate_record.rate
-            else:
-                usd_amount = None
-            
-            return cny_amount, usd_amount, exchange_rate
-            
-        except Exception as e:
-            logger.error(f"货币转换失败: {str(e)}")
-            raise
+                shop_pk = shop_map.get(str(shop_id))
+                if shop_pk is None:
+                    logger.warning(f"未找到店铺: {shop_id}")
+                    continue
+                
+                records.append((
+                    sale_info,
+                    shop_pk,
+                    datetime.strptime(sale_date_str, "%Y-%m-%d"),
+                    Decimal(str(original_amount)),
+                    sale_info.get('currency', 'CNY')
+                ))
+            except Exception as e:
+                logger.error(f"处理销售记录时出错: {str(e)}")
+                continue
+        
+        for currency in rate_matrix.missing_currencies(r[4] for r in records):
+            logger.warning(f"未找到汇率: {currency} -> CNY")
+        
+        # 整批货币转换
+        converted = rate_matrix.convert_batch(
+            [r[3] for r in records], [r[4] for r in records], [r[2] for r in records]
+        )
+        
+        for (sale_info, shop_pk, sale_date, amount, currency), (cny_amount, usd_amount, exchange_rate) \
+                in zip(records, converted):
+            try:
+                order_id = sale_info.get('order_id')
+                product_id = sale_info.get('product_id')
+                
+                # 检查销售记录是否已存在
+                existing_sale = session.query(Sale).filter(
+                    and_(
+                        Sale.shop_id == shop_pk,
+                        Sale.sale_date == sale_date,
+                        Sale.order_id == order_id,
+                        Sale.product_id == product_id
+                    )
+                ).first()
+                
+                if not existing_sale:
+                    # 创建新销售记录
+                    new_sale = Sale(
+                        shop_id=shop_pk,
+                        sale_date=sale_date,
+                        order_id=order_id,
+                        product_id=product_id,
+                        product_name=sale_info.get('product_name'),
+                        original_amount=amount,
+                        original_currency=currency,
+                        cny_amount=cny_amount,
+                        usd_amount=usd_amount,
+                        exchange_rate=exchange_rate,
+                        exchange_rate_date=sale_date,
+                        quantity=sale_info.get('quantity', 1),
+                        raw_data=json.dumps(sale_info)
+                    )
+                    session.add(new_sale)
+                    touched_days.add((shop_pk, sale_date.date()))
+                    synced_count += 1
+                
+            except Exception as e:
+                logger.error(f"处理销售记录时出错: {str(e)}")
+                continue
+        
+        # 同一事务内刷新新增记录涉及的每日汇总
+        session.flush()
+        DailySalesRollup.refresh_days(session, touched_days)
+        
+        return synced_count
     
-    async def get_dashboard_summary(self, access_token: str) -> Dict[str, Any]:
+    async def get_dashboard_summary(self, access_token: Optional[str] = None) -> Dict[str, Any]:
         """获取数据看板摘要信息
         
         Args:
@@ -512,60 +490,59 @@ class DashboardService:
         """
         try:
             logger.info("获取数据看板摘要信息")
-            
-            with get_db_session() as session:
-                # 获取店铺总数
-                total_shops = session.query(Shop).filter(Shop.status == 'active').count()
-                
-                # 获取今天和昨天的日期
-                today = datetime.now().date()
-                yesterday = today - timedelta(days=1)
-                
-                # 获取今天的销售数据
-                today_sales = session.query(
-                    func.sum(Sale.cny_amount).label('total_cny'),
-                    func.sum(Sale.usd_amount).label('total_usd'),
-                    func.count(Sale.id).label('order_count')
-                ).filter(
-                    func.date(Sale.sale_date) == today
-                ).first()
-                
-                # 获取昨天的销售数据
-                yesterday_sales = session.query(
-                    func.sum(Sale.cny_amount).label('total_cny'),
-                    func.sum(Sale.usd_amount).label('total_usd'),
-                    func.count(Sale.id).label('order_count')
-                ).filter(
-                    func.date(Sale.sale_date) == yesterday
-                ).first()
-                
-                # 获取最新汇率更新时间
-                latest_rate = session.query(ExchangeRate).filter(
-                    ExchangeRate.status == 'active'
-                ).order_by(desc(ExchangeRate.updated_at)).first()
-                
-                summary_data = {
-                    "total_shops": total_shops,
-                    "total_sales_today": {
-                        "cny": str(today_sales.total_cny or 0),
-                        "usd": str(today_sales.total_usd or 0),
-                        "order_count": today_sales.order_count or 0
-                    },
-                    "total_sales_yesterday": {
-                        "cny": str(yesterday_sales.total_cny or 0),
-                        "usd": str(yesterday_sales.total_usd or 0),
-                        "order_count": yesterday_sales.order_count or 0
-                    },
-                    "exchange_rate_updated": latest_rate.updated_at.isoformat() if latest_rate else None,
-                    "last_sync_time": datetime.now().isoformat()
-                }
-            
-            return summary_data
+            return await run_in_session(self._query_dashboard_summary)
             
         except Exception as e:
             logger.error(f"获取数据看板摘要失败: {str(e)}")
             raise BusinessLogicError(f"获取数据看板摘要失败: {str(e)}")
     
+    def _query_dashboard_summary(self, session: Session) -> Dict[str, Any]:
+        """在数据库线程中查询看板摘要"""
+        # 获取店铺总数
+        total_shops = session.query(Shop).filter(Shop.status == 'active').count()
+        
+        # 获取今天和昨天的日期
+        today = datetime.now().date()
+        yesterday = today - timedelta(days=1)
+        
+        # 从每日汇总表读取今天和昨天的销售数据
+        daily_sales = {
+            row.sale_day: row
+            for row in session.query(
+                DailySalesRollup.sale_day,
+                func.sum(DailySalesRollup.cny_amount).label('total_cny'),
+                func.sum(DailySalesRollup.usd_amount).label('total_usd'),
+                func.sum(DailySalesRollup.order_count).label('order_count')
+            ).filter(
+                DailySalesRollup.sale_day.in_([today, yesterday])
+            ).group_by(DailySalesRollup.sale_day)
+        }
+        today_sales = daily_sales.get(today, _EMPTY_DAY)
+        yesterday_sales = daily_sales.get(yesterday, _EMPTY_DAY)
+        
+        # 获取最新汇率更新时间
+        latest_rate = session.query(ExchangeRate).filter(
+            ExchangeRate.status == 'active'
+        ).order_by(desc(ExchangeRate.updated_at)).first()
+        
+        summary_data = {
+            "total_shops": total_shops,
+            "total_sales_today": {
+                "cny": str(today_sales.total_cny or 0),
+                "usd": str(today_sales.total_usd or 0),
+                "order_count": int(today_sales.order_count or 0)
+            },
+            "total_sales_yesterday": {
+                "cny": str(yesterday_sales.total_cny or 0),
+                "usd": str(yesterday_sales.total_usd or 0),
+                "order_count": int(yesterday_sales.order_count or 0)
+            },
+            "exchange_rate_updated": latest_rate.updated_at.isoformat() if latest_rate else None,
+            "last_sync_time": datetime.now().isoformat()
+        }
+        
+        return summary_data
+    
     async def get_shop_list(self, page: int = 1, page_size: int = 20, platform: Optional[str] = None) -> Dict[str, Any]:
         """获取店铺列表
         
@@ -578,36 +555,39 @@ class DashboardService:
             店铺列表数据
         """
         try:
-            with get_db_session() as session:
-                # 构建查询条件
-                query = session.query(Shop).filter(Shop.status == 'active')
-                
-                if platform:
-                    query = query.filter(Shop.platform == platform)
-                
-                # 获取总数
-                total = query.count()
-                
-                # 分页查询
-                shops = query.order_by(desc(Shop.created_at)).offset(
-                    (page - 1) * page_size
-                ).limit(page_size).all()
-                
-                # 转换为字典格式
-                shop_list = [shop.to_dict() for shop in shops]
-                
-                return {
-                    "shops": shop_list,
-                    "total": total,
-                    "page": page,
-                    "page_size": page_size,
-                    "total_pages": (total + page_size - 1) // page_size
-                }
-                
+            return await run_in_session(self._query_shop_list, page, page_size, platform)
+            
         except Exception as e:
             logger.error(f"获取店铺列表失败: {str(e)}")
             raise BusinessLogicError(f"获取店铺列表失败: {str(e)}")
     
+    def _query_shop_list(self, session: Session, page: int, page_size: int, platform: Optional[str]) -> Dict[str, Any]:
+        """在数据库线程中分页查询店铺"""
+        # 构建查询条件
+        query = session.query(Shop).filter(Shop.status == 'active')
+        
+        if platform:
+            query = query.filter(Shop.platform == platform)
+        
+        # 获取总数
+        total = query.count()
+        
+        # 分页查询
+        shops = query.order_by(desc(Shop.created_at)).offset(
+            (page - 1) * page_size
+        ).limit(page_size).all()
+        
+        # 转换为字典格式
+        shop_list = [shop.to_dict() for shop in shops]
+        
+        return {
+            "shops": shop_list,
+            "total": total,
+            "page": page,
+            "page_size": page_size,
+            "total_pages": (total + page_size - 1) // page_size
+        }
+    
     async def get_sales_statistics(
         self, 
         start_date: Optional[str] = None,
@@ -627,59 +607,78 @@ class DashboardService:
             销售统计数据
         """
         try:
-            with get_db_session() as session:
-                # 构建查询条件
-                query = session.query(Sale)
-                
-                if start_date:
-                    query = query.filter(Sale.sale_date >= datetime.strptime(start_date, "%Y-%m-%d"))
-                
-                if end_date:
-                    query = query.filter(Sale.sale_date <= datetime.strptime(end_date, "%Y-%m-%d"))
-                
-                if shop_id:
-                    shop = session.query(Shop).filter(Shop.shop_id == shop_id).first()
-                    if shop:
-                        query = query.filter(Sale.shop_id == shop.id)
-                
-                # 根据货币类型选择金额字段
-                amount_field = Sale.cny_amount if currency == 'CNY' else Sale.usd_amount
-                
-                # 计算统计数据
-                stats = query.with_entities(
-                    func.sum(amount_field).label('total_sales'),
-                    func.count(Sale.id).label('total_orders'),
-                    func.avg(amount_field).label('avg_order_value')
-                ).first()
-                
-                # 按店铺分组统计
-                shop_stats = query.join(Shop).with_entities(
-                    Shop.shop_name,
-                    Shop.platform,
-                    func.sum(amount_field).label('shop_sales'),
-                    func.count(Sale.id).label('shop_orders')
-                ).group_by(Shop.id, Shop.shop_name, Shop.platform).all()
-                
-                return {
-                    "total_sales": str(stats.total_sales or 0),
-                    "total_orders": stats.total_orders or 0,
-                    "average_order_value": str(stats.avg_order_value or 0),
-                    "currency": currency,
-                    "period": {
-                        "start_date": start_date,
-                        "end_date": end_date
-                    },
-                    "shop_breakdown": [
-                        {
-                            "shop_name": stat.shop_name,
-                            "platform": stat.platform,
-                            "sales": str(stat.shop_sales or 0),
-                            "orders": stat.shop_orders or 0
-                        }
-                        for stat in shop_stats
-                    ]
-                }
-                
+            return await run_in_session(self._query_sales_statistics, start_date, end_date, shop_id, currency)
+            
         except Exception as e:
             logger.error(f"获取销售统计失败: {str(e)}")
-            raise BusinessLogicError(f"获取销售统计失败: {str(e)}")
\ No newline at end of file
+            raise BusinessLogicError(f"获取销售统计失败: {str(e)}")
+    
+    def _query_sales_statistics(
+        self,
+        session: Session,
+        start_date: Optional[str],
+        end_date: Optional[str],
+        shop_id: Optional[str],
+        currency: str
+    ) -> Dict[str, Any]:
+        """在数据库线程中汇总销售统计"""
+        # 从每日汇总表构建查询条件
+        query = session.query(DailySalesRollup)
+        
+        if start_date:
+            query = query.filter(DailySalesRollup.sale_day >= datetime.strptime(start_date, "%Y-%m-%d").date())
+        
+        if end_date:
+            query = query.filter(DailySalesRollup.sale_day <= datetime.strptime(end_date, "%Y-%m-%d").date())
+        
+        if shop_id:
+            shop = session.query(Shop).filter(Shop.shop_id == shop_id).first()
+            if shop:
+                query = query.filter(DailySalesRollup.shop_id == shop.id)
+        
+        # 根据货币类型选择金额字段
+        amount_field = DailySalesRollup.cny_amount if currency == 'CNY' else DailySalesRollup.usd_amount
+        
+        # 平均订单金额与原 AVG(金额) 一致：分母只计金额非空的记录（缺汇率时 usd_amount 为空）
+        amount_count_field = DailySalesRollup.order_count if currency == 'CNY' else DailySalesRollup.usd_order_count
+        # 不指定结果类型，返回值与 AVG 一样保持数据库驱动的原始类型和精度
+        avg_order_value = type_coerce(
+            func.sum(amount_field) / func.nullif(func.sum(amount_count_field), 0),
+            NullType()
+        )
+        
+        # 计算统计数据
+        stats = query.with_entities(
+            func.sum(amount_field).label('total_sales'),
+            func.sum(DailySalesRollup.order_count).label('total_orders'),
+            avg_order_value.label('avg_order_value')
+        ).first()
+        total_orders = int(stats.total_orders or 0)
+        
+        # 按店铺分组统计
+        shop_stats = query.join(Shop, Shop.id == DailySalesRollup.shop_id).with_entities(
+            Shop.shop_name,
+            Shop.platform,
+            func.sum(amount_field).label('shop_sales'),
+            func.sum(DailySalesRollup.order_count).label('shop_orders')
+        ).group_by(Shop.id, Shop.shop_name, Shop.platform).all()
+        
+        return {
+            "total_sales": str(stats.total_sales or 0),
+            "total_orders": total_orders,
+            "average_order_value": str(stats.avg_order_value or 0),
+            "currency": currency,
+            "period": {
+                "start_date": start_date,
+                "end_date": end_date
+            },
+            "shop_breakdown": [
+                {
+                    "shop_name": stat.shop_name,
+                    "platform": stat.platform,
+                    "sales": str(stat.shop_sales or 0),
+                    "orders": int(stat.shop_orders or 0)
+                }
+                for stat in shop_stats
+            ]
+        }
\ No newline at end of file
@@ -2,6 +2,9 @@
 # 用于多平台相关的业务逻辑
 from app.auth.openapi import OpenApiBase
 from app.config import settings
+from app.core.sync_jobs import SYNC_UNIT_SPECS, sync_job_engine
+from app.models.sync_models import STATUS_PENDING, STATUS_RUNNING, TERMINAL_STATUSES
+from app.shared.constants.business_constants import SUPPORTED_PLATFORMS
 from typing import Optional, Dict, Any, List
 from datetime import datetime
 import json as _json
@@ -233,4 +236,73 @@ class MultiPlatformService:
                 raise Exception(f"API Error: code={resp_data.get('code')}, msg={resp_data.get('message')}")
             return resp_data
         except Exception as e:
-            raise e 
\ No newline at end of file
+            raise e 
+
+    async def start_sync_task(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        创建多平台同步任务, 由后台同步任务引擎执行
+        Args:
+            params: platforms(必填)、data_types、sync_type(full/incremental)、start_date、end_date(YYYY-MM-DD)、
+                    sids、force_sync(为 false 时若已有相同平台/数据类型的任务在执行则不重复创建)
+        Returns:
+            dict: 任务状态
+        """
+        platforms = params.get('platforms')
+        data_types = params.get('data_types')
+        sync_type = params.get('sync_type', 'full')
+        sids = params.get('sids')
+        if not platforms or not isinstance(platforms, list):
+            return {'code': 400, 'message': 'platforms 必须为非空数组', 'data': None}
+        unsupported = [p for p in platforms if p not in SUPPORTED_PLATFORMS]
+        if unsupported:
+            return {'code': 400, 'message': f'不支持的平台: {unsupported}', 'data': None}
+        if data_types is not None and not isinstance(data_types, list):
+            return {'code': 400, 'message': 'data_types 必须为数组', 'data': None}
+        if sync_type not in ('full', 'incremental'):
+            return {'code': 400, 'message': 'sync_type 只能是 full 或 incremental', 'data': None}
+        for field in ('start_date', 'end_date'):
+            if params.get(field):
+                try:
+                    datetime.strptime(params[field], '%Y-%m-%d')
+                except (TypeError, ValueError):
+                    return {'code': 400, 'message': f'{field} 格式不正确，应为YYYY-MM-DD', 'data': None}
+        if sids is not None:
+            try:
+                sids = [int(sid) for sid in (sids.split(',') if isinstance(sids, str) else sids)]
+            except (TypeError, ValueError):
+                return {'code': 400, 'message': 'sids 必须为店铺ID数组或逗号分隔的字符串', 'data': None}
+
+        if not params.get('force_sync'):
+            active = await sync_job_engine.find_active_task(platforms, data_types)
+            if active:
+                return {'code': 409, 'message': f'已有相同平台/数据类型的同步任务在执行: {active}',
+                        'data': {'task_id': active}}
+        task = await sync_job_engine.create_task(
+            platforms, data_types, sync_type=sync_type, start_date=params.get('start_date'),
+            end_date=params.get('end_date'), sids=sids, force_sync=bool(params.get('force_sync'))
+        )
+        return {'code': 200, 'message': '同步任务已创建', 'data': task}
+
+    async def get_sync_task(self, task_id: str) -> Dict[str, Any]:
+        """查询同步任务状态、进度及预计剩余时间"""
+        task = await sync_job_engine.get_task(task_id)
+        if task is None:
+            return {'code': 404, 'message': f'任务 {task_id} 不存在', 'data': None}
+        return {'code': 200, 'message': 'success', 'data': task}
+
+    async def list_sync_tasks(self, platform: Optional[str] = None, status: Optional[str] = None,
+                              page: int = 1, page_size: int = 20) -> Dict[str, Any]:
+        """分页查询同步任务"""
+        if page < 1 or not 1 <= page_size <= 200:
+            return {'code': 400, 'message': 'page 必须大于0，page_size 必须在1-200之间', 'data': None}
+        if status and status not in (STATUS_PENDING, STATUS_RUNNING) + TERMINAL_STATUSES:
+            return {'code': 400, 'message': f'不支持的任务状态: {status}', 'data': None}
+        result = await sync_job_engine.list_tasks(platform, status, page, page_size)
+        return {'code': 200, 'message': 'success', 'data': result}
+
+    async def cancel_sync_task(self, task_id: str) -> Dict[str, Any]:
+        """取消同步任务"""
+        task = await sync_job_engine.cancel_task(task_id)
+        if task is None:
+            return {'code': 404, 'message': f'任务 {task_id} 不存在', 'data': None}
+        return {'code': 200, 'message': '同步任务已取消', 'data': task}
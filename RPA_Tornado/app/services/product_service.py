@@ -1,7 +1,10 @@
 # product_service.py
 # 产品相关的业务逻辑服务
 from app.auth.openapi import OpenApiBase
+from app.auth.pager import OffsetPager
+from app.auth.resp_schema import RawResponse
 from app.config import settings
+from app.core.cache import cached, invalidates
 from typing import Optional, Dict, Any, List
 from datetime import datetime
 import json as _json
@@ -12,10 +15,18 @@ class ProductService:
     def __init__(self):
         self.api = OpenApiBase(settings.LLX_API_HOST, settings.LLX_APP_ID, settings.LLX_APP_SECRET)
 
+    @staticmethod
+    def _check_raw(resp: RawResponse) -> RawResponse:
+        """透传模式下只校验预读的 code, 出错时才完整解析以取得错误信息"""
+        if resp.code != 0:
+            message = resp.parse().message if resp.code is not None else resp.body[:200]
+            raise Exception(f"API Error: code={resp.code}, msg={message}")
+        return resp
+
     async def get_local_product_list(self, access_token: str, offset=0, length=1000, 
                                    update_time_start=None, update_time_end=None,
                                    create_time_start=None, create_time_end=None,
-                                   sku_list=None, sku_identifier_list=None) -> Dict[str, Any]:
+                                   sku_list=None, sku_identifier_list=None, fetch_all=False, raw=False):
         """
         查询本地产品列表
         支持查询产品列表，对应系统【产品】>【产品管理】数据
@@ -30,6 +41,8 @@ class ProductService:
             create_time_end: 创建时间结束，格式：YYYY-MM-DD HH:mm:ss
             sku_list: SKU列表，数组格式
             sku_identifier_list: SKU标识符列表，数组格式
+            fetch_all: 为True时自动翻页，返回 OffsetPager（offset 为起始偏移，length 为每页条数）
+            raw: 为True时返回 RawResponse（领星原始响应字节），由调用方直接透传
         Returns:
             dict: 产品列表数据
         """
@@ -55,14 +68,21 @@ class ProductService:
 
         print(f"[RPA_Tornado] 查询本地产品列表 - 请求参数: {query_data}")
 
+        if fetch_all:
+            return OffsetPager(self.api, access_token, "/erp/sc/routing/data/local_inventory/productList",
+                               req_body=query_data, prefetch=settings.LLX_PAGE_PREFETCH)
+
         try:
             # 调用API获取本地产品列表
             resp = await self.api.request(
                 access_token=access_token,
                 route_name="/erp/sc/routing/data/local_inventory/productList",
                 method="POST",
-                req_body=query_data
+                req_body=query_data,
+                raw=raw
             )
+            if raw:
+                return self._check_raw(resp)
             resp_data = resp.model_dump()
 
             # 保存请求和响应信息用于调试
@@ -383,7 +403,7 @@ class ProductService:
         except Exception as e:
             raise e
 
-    async def get_bundled_product_list(self, access_token: str, offset=0, length=1000) -> Dict[str, Any]:
+    async def get_bundled_product_list(self, access_token: str, offset=0, length=1000, fetch_all=False, raw=False):
         """
         查询捆绑产品关系列表
         
@@ -391,6 +411,8 @@ class ProductService:
             access_token: 访问令牌
             offset: 分页偏移量，默认0
             length: 分页长度，默认1000，上限1000
+            fetch_all: 为True时自动翻页，返回 OffsetPager
+            raw: 为True时返回 RawResponse（领星原始响应字节），由调用方直接透传
         Returns:
             dict: 捆绑产品关系列表数据
         """
@@ -401,13 +423,20 @@ class ProductService:
         
         print(f"[RPA_Tornado] 查询捆绑产品关系列表 - 请求参数: {query_data}")
 
+        if fetch_all:
+            return OffsetPager(self.api, access_token, "/erp/sc/routing/data/local_inventory/bundledProductList",
+                               req_body=query_data, prefetch=settings.LLX_PAGE_PREFETCH)
+
         try:
             resp = await self.api.request(
                 access_token=access_token,
                 route_name="/erp/sc/routing/data/local_inventory/bundledProductList",
                 method="POST",
-                req_body=query_data
+                req_body=query_data,
+                raw=raw
             )
+            if raw:
+                return self._check_raw(resp)
             resp_data = resp.model_dump()
 
             if resp_data.get("code") != 0:
@@ -515,6 +544,7 @@ class ProductService:
         except Exception as e:
             raise e
 
+    @cached('llx:brand_list')
     async def get_brand_list(self, access_token: str, offset=0, length=1000) -> Dict[str, Any]:
         """
         查询产品品牌列表
@@ -552,6 +582,7 @@ class ProductService:
         except Exception as e:
             raise e
 
+    @invalidates('llx:brand_list')
     async def set_brand(self, access_token: str, request_data: Dict[str, Any]) -> Dict[str, Any]:
         """
         添加/编辑产品品牌
@@ -583,6 +614,7 @@ class ProductService:
         except Exception as e:
             raise e
 
+    @cached('llx:category_list')
     async def get_category_list(self, access_token: str, offset=0, length=1000, ids=None) -> Dict[str, Any]:
         """
         查询产品分类列表
@@ -624,6 +656,7 @@ class ProductService:
         except Exception as e:
             raise e
 
+    @invalidates('llx:category_list')
     async def set_category(self, access_token: str, request_data: Dict[str, Any]) -> Dict[str, Any]:
         """
         添加/编辑产品分类
@@ -686,6 +719,7 @@ class ProductService:
         except Exception as e:
             raise e
 
+    @cached('llx:product_label_list')
     async def get_product_label_list(self, access_token: str) -> Dict[str, Any]:
         """
         查询产品标签
@@ -715,6 +749,7 @@ class ProductService:
         except Exception as e:
             raise e
 
+    @invalidates('llx:product_label_list')
     async def create_product_label(self, access_token: str, label: str) -> Dict[str, Any]:
         """
         创建产品标签
@@ -4,18 +4,33 @@ from datetime import datetime
 from typing import Dict, Any, Optional
 from app.config import settings
 from app.auth.openapi import OpenApiBase
+from app.core.token_provider import token_provider
+from app.utils.concurrency_utils import bounded_gather, fan_out_response, lingxing_error
 class StatisticsService:
 
     def __init__(self):
         self.api = OpenApiBase(settings.LLX_API_HOST, settings.LLX_APP_ID, settings.LLX_APP_SECRET)
 
+    async def get_access_token(self) -> str:
+        """获取访问令牌（全局共享）"""
+        return await token_provider.get_token()
+
+    async def _fan_out_by_sid(self, sid_list: list, query_sid) -> Dict[str, Any]:
+        """按店铺并发查询并按sid顺序合并结果，部分店铺失败时在 failed_sids 中返回"""
+        fan_out = await bounded_gather(
+            sid_list, query_sid,
+            limit=settings.LLX_FAN_OUT_CONCURRENCY,
+            is_error=lingxing_error
+        )
+        return fan_out_response(fan_out)
+
     async def get_sales_report_asin_daily_lists(self, access_token: str, params: Dict[str, Any]) -> Dict[str, Any]:
         """
         查询销量、订单量、销售额
         支持按Asin或MSKU查询销量、订单量、销售额
         Args:
             params: 请求参数
-                - sid: 店铺id，必填
+                - sid: 店铺id，必填；传数组时按店铺并发查询后合并
                 - event_date: 报表时间，格式Y-m-d，必填
                 - asin_type: 查询维度，1-asin, 2-msku，默认1
                 - type: 类型，1-销售额, 2-销量, 3-订单量，默认1
@@ -40,7 +55,10 @@ class StatisticsService:
             report_type = params.get('type', 1)
             offset = params.get('offset', 0)
             length = params.get('length', 1000)
-            if not isinstance(sid, int):
+            if isinstance(sid, list):
+                if not sid or not all(isinstance(x, int) for x in sid):
+                    return {'code': 400, 'message': 'sid数组不能为空且必须为整数', 'data': None}
+            elif not isinstance(sid, int):
                 return {'code': 400, 'message': 'sid必须是整数类型', 'data': None}
             if not isinstance(event_date, str):
                 return {'code': 400, 'message': 'event_date必须是字符串类型', 'data': None}
@@ -57,20 +75,25 @@ class StatisticsService:
             if not isinstance(length, int) or length <= 0:
                 return {'code': 400, 'message': 'length必须是正整数', 'data': None}
             query_data = {
-                'sid': sid,
                 'event_date': event_date,
                 'asin_type': asin_type,
                 'type': report_type,
                 'offset': offset,
                 'length': length
             }
-            resp = await self.api.request(
-                access_token=access_token,
-                route_name="/erp/sc/data/sales_report/asinDailyLists",
-                method="POST",
-                req_body=query_data
-            )
-            return resp.model_dump()
+
+            async def query_sid(single_sid):
+                resp = await self.api.request(
+                    access_token=access_token,
+                    route_name="/erp/sc/data/sales_report/asinDailyLists",
+                    method="POST",
+                    req_body={'sid': single_sid, **query_data}
+                )
+                return resp.model_dump()
+
+            if not isinstance(sid, list):
+                return await query_sid(sid)
+            return await self._fan_out_by_sid(sid, query_sid)
         except Exception as e:
             return {'code': 500, 'message': f'查询失败: {str(e)}', 'data': None}
 
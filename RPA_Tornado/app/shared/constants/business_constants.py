@@ -25,6 +25,7 @@ PLATFORM_AMAZON = 'amazon'
 PLATFORM_EBAY = 'ebay'
 PLATFORM_WALMART = 'walmart'
 PLATFORM_SHOPIFY = 'shopify'
+SUPPORTED_PLATFORMS = [PLATFORM_AMAZON, PLATFORM_EBAY, PLATFORM_WALMART, PLATFORM_SHOPIFY]
 
 # 货币类型常量
 CURRENCY_USD = 'USD'
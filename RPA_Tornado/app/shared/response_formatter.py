@@ -6,14 +6,43 @@ import traceback
 from datetime import datetime
 from typing import Any, Dict, List, Optional, Union
 
+import orjson
+
 from ..core.exceptions.base_exceptions import BaseAPIException
 from .constants.error_codes import ErrorCode, get_error_message
 from .enums.api_enums import ResponseStatus
 
 
+# 与 json.dumps(default=str) 输出一致: datetime/date/time 和 dataclass 交给 default 转为 str(如
+# "2024-01-01 12:00:00" 而不是 ISO 格式), 非字符串键转为字符串
+_ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_PASSTHROUGH_DATACLASS
+
+
 class ResponseFormatter:
     """API响应格式化器"""
     
+    @staticmethod
+    def dumps(data: Any, indent: bool = False) -> bytes:
+        """将响应数据序列化为 UTF-8 JSON 字节（所有处理器共用的序列化入口）
+        
+        使用 orjson, Decimal、datetime 等类型按 str() 输出, 与 json.dumps(default=str, ensure_ascii=False) 一致;
+        orjson 不支持的数据(如超过 64 位的整数)退回标准库
+        
+        Args:
+            data: 响应数据
+            indent: 是否缩进两格输出
+            
+        Returns:
+            JSON 字节串
+        """
+        option = _ORJSON_OPTIONS | orjson.OPT_INDENT_2 if indent else _ORJSON_OPTIONS
+        try:
+            return orjson.dumps(data, default=str, option=option)
+        except orjson.JSONEncodeError:
+            return json.dumps(
+                data, ensure_ascii=False, default=str, indent=2 if indent else None
+            ).encode('utf-8')
+    
     @staticmethod
     def success(
         data: Any = None,
@@ -254,12 +283,14 @@ class ResponseFormatter:
         Returns:
             JSON字符串
         """
-        return json.dumps(
-            response,
-            ensure_ascii=ensure_ascii,
-            separators=(',', ':'),
-            default=str
-        )
+        if ensure_ascii:
+            return json.dumps(
+                response,
+                ensure_ascii=True,
+                separators=(',', ':'),
+                default=str
+            )
+        return ResponseFormatter.dumps(response).decode('utf-8')
     
     @staticmethod
     def get_http_status(code: int) -> int:
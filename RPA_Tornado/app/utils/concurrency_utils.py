@@ -0,0 +1,98 @@
+import asyncio
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, Hashable, Iterable, List, Optional
+
+
+@dataclass
+class FanOutResult:
+    """并发扇出结果，results 与传入 keys 顺序一致，失败的位置为 None"""
+    keys: List[Hashable]
+    results: List[Any] = field(default_factory=list)
+    errors: Dict[Hashable, str] = field(default_factory=dict)
+
+    @property
+    def succeeded(self) -> List[Hashable]:
+        return [k for k in self.keys if k not in self.errors]
+
+    @property
+    def failed(self) -> List[Dict[str, Any]]:
+        """失败明细，便于在响应中上报部分失败"""
+        return [{'key': k, 'message': self.errors[k]} for k in self.keys if k in self.errors]
+
+    def merged_records(self) -> List[Any]:
+        """按 keys 顺序合并每个成功结果中的记录列表"""
+        merged = []
+        for key, result in zip(self.keys, self.results):
+            if key not in self.errors:
+                merged.extend(extract_records(result))
+        return merged
+
+
+def extract_records(result: Any) -> List[Any]:
+    """从领星接口响应中提取记录列表，兼容 data 为数组或 {'list': [...]} 两种结构"""
+    if not isinstance(result, dict):
+        return []
+    data = result.get('data')
+    if isinstance(data, list):
+        return data
+    if isinstance(data, dict) and isinstance(data.get('list'), list):
+        return data['list']
+    return []
+
+
+async def bounded_gather(
+    keys: Iterable[Hashable],
+    worker: Callable[[Hashable], Awaitable[Any]],
+    limit: int = 5,
+    is_error: Optional[Callable[[Any], Optional[str]]] = None
+) -> FanOutResult:
+    """
+    对每个 key 并发执行 worker，最多 limit 个同时进行。
+    单个 key 的异常不会影响其他 key，异常信息记录在 FanOutResult.errors 中。
+    :param keys: 扇出的维度（如 sid 列表）
+    :param worker: 接收单个 key 的协程函数
+    :param limit: 最大并发数
+    :param is_error: 可选，检查 worker 返回值，返回错误信息则视为该 key 失败
+    """
+    keys = list(keys)
+    outcome = FanOutResult(keys=keys, results=[None] * len(keys))
+    semaphore = asyncio.Semaphore(max(1, limit))
+
+    async def run(index: int, key: Hashable):
+        async with semaphore:
+            try:
+                result = await worker(key)
+            except Exception as e:
+                outcome.errors[key] = str(e)
+                return
+        error = is_error(result) if is_error else None
+        if error:
+            outcome.errors[key] = error
+        outcome.results[index] = result
+
+    await asyncio.gather(*(run(i, k) for i, k in enumerate(keys)))
+    return outcome
+
+
+def lingxing_error(result: Any) -> Optional[str]:
+    """领星接口响应 code 非 0 时返回错误信息，配合 bounded_gather(is_error=...) 使用"""
+    if not isinstance(result, dict):
+        return '响应格式错误'
+    if result.get('code') != 0:
+        return f"code={result.get('code')}, msg={result.get('message')}"
+    return None
+
+
+def fan_out_response(fan_out: FanOutResult, all_failed_message: str = '所有店铺查询均失败') -> Dict[str, Any]:
+    """
+    把按 sid 扇出的结果转换为接口响应：
+    全部失败时返回 code 500（不能当作空结果的成功），部分失败时 code 0 并在 failed_sids 中列出失败的店铺
+    """
+    failed_sids = [{'sid': f['key'], 'message': f['message']} for f in fan_out.failed]
+    if not fan_out.succeeded:
+        return {'code': 500, 'message': all_failed_message, 'data': None, 'failed_sids': failed_sids}
+    records = fan_out.merged_records()
+    result = {'code': 0, 'message': 'success', 'data': records, 'total': len(records)}
+    if failed_sids:
+        result['failed_sids'] = failed_sids
+    return result
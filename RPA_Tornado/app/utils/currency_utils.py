@@ -1,5 +1,9 @@
 import requests
-from typing import Dict, Any
+from bisect import bisect_right
+from collections import defaultdict
+from datetime import datetime
+from decimal import Decimal
+from typing import Dict, Any, Iterable, List, Optional, Sequence, Tuple
 from .retry_utils import sync_retry
 
 @sync_retry
@@ -19,4 +23,73 @@ def get_exchange_rate(from_currency: str, to_currency: str, start_date: str, end
     print("[DEBUG] API KEY:", api_key)
     response = requests.get(url, headers=headers)
     response.raise_for_status()
-    return response.json() 
+    return response.json()
+
+
+class ExchangeRateMatrix(object):
+    """
+    预加载的汇率表, 按货币索引有序的 (汇率日期, 汇率) 序列
+    查询语义与 ExchangeRate.get_rate_by_date 一致: 取汇率日期 <= 指定日期的最近一条汇率;
+    同一 (货币, 日期) 只查找一次, 整批金额换算时不再逐条查询数据库
+    """
+
+    def __init__(self, records: Iterable[Tuple[str, datetime, Any]], base_currency: str = 'CNY'):
+        """
+        :param records: (货币代码, 汇率日期, 汇率) 序列, 汇率为 1 单位该货币折合基准货币的金额
+        :param base_currency: 基准货币
+        """
+        self.base_currency = base_currency
+        grouped = defaultdict(dict)
+        for currency_code, rate_date, rate in records:
+            grouped[currency_code][rate_date] = Decimal(str(rate))
+        self._dates: Dict[str, List[datetime]] = {}
+        self._rates: Dict[str, List[Decimal]] = {}
+        for currency_code, items in grouped.items():
+            ordered = sorted(items.items())
+            self._dates[currency_code] = [d for d, _ in ordered]
+            self._rates[currency_code] = [r for _, r in ordered]
+        self._lookups: Dict[Tuple[str, datetime], Optional[Decimal]] = {}
+
+    def rate_on(self, currency_code: str, when: datetime) -> Optional[Decimal]:
+        """指定日期生效的汇率（折合基准货币）, 没有汇率时返回 None"""
+        key = (currency_code, when)
+        if key in self._lookups:
+            return self._lookups[key]
+        rate = None
+        dates = self._dates.get(currency_code)
+        if dates:
+            index = bisect_right(dates, when)
+            if index:
+                rate = self._rates[currency_code][index - 1]
+        self._lookups[key] = rate
+        return rate
+
+    def convert_batch(
+        self,
+        amounts: Sequence[Decimal],
+        currencies: Sequence[str],
+        dates: Sequence[datetime],
+        quote_currency: str = 'USD'
+    ) -> List[Tuple[Decimal, Optional[Decimal], Optional[Decimal]]]:
+        """
+        批量换算为基准货币和报价货币（默认美元）
+        :return: 与输入顺序一致的 (基准货币金额, 报价货币金额, 使用的汇率), 缺少源货币汇率时为 (原金额, None, None)
+        """
+        one = Decimal('1.0')
+        results = []
+        for amount, currency_code, when in zip(amounts, currencies, dates):
+            if currency_code == self.base_currency:
+                rate = one
+            else:
+                rate = self.rate_on(currency_code, when)
+                if rate is None:
+                    results.append((amount, None, None))
+                    continue
+            base_amount = amount if rate is one else amount * rate
+            quote_rate = self.rate_on(quote_currency, when)
+            results.append((base_amount, base_amount / quote_rate if quote_rate else None, rate))
+        return results
+
+    def missing_currencies(self, currencies: Iterable[str]) -> List[str]:
+        """没有任何汇率记录的货币"""
+        return sorted({c for c in currencies if c != self.base_currency and c not in self._dates})
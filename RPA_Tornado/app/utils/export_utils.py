@@ -0,0 +1,170 @@
+# -*- coding: utf-8 -*-
+"""
+分页数据导出
+把领星分页接口的记录逐页转换为 CSV / XLSX:
+  - CSV:  每页转换为一段 UTF-8 字节, 由处理器写出并 flush, 内存中只有当前页
+  - XLSX: openpyxl 只写模式(write_only), 行数据写入临时文件, 完成后再分块读出;
+          xlsx 是 zip 格式, 只有写完才能得到完整文件, 因此先落盘再输出
+列以第一个非空页记录的字段(按出现顺序)为准, 之后页中新出现的字段无法再加入已写出的表头,
+由写入器记录在 dropped_columns 中供调用方上报; 嵌套的 dict/list 以 JSON 字符串写入单元格
+"""
+
+import csv
+import io
+import os
+import tempfile
+from typing import Any, Dict, Iterator, List, Optional, Sequence
+
+from app.shared.response_formatter import ResponseFormatter
+
+try:
+    from openpyxl import Workbook
+    from openpyxl.cell.cell import ILLEGAL_CHARACTERS_RE
+except ImportError:
+    Workbook = None
+    ILLEGAL_CHARACTERS_RE = None
+
+# 支持的导出格式及其 Content-Type
+EXPORT_CONTENT_TYPES = {
+    'csv': 'text/csv; charset=utf-8',
+    'xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+}
+
+# 从临时文件读出 XLSX 时每块的字节数
+CHUNK_SIZE = 64 * 1024
+
+
+def collect_columns(records: Sequence[Any]) -> List[str]:
+    """按出现顺序收集一页记录的全部字段"""
+    columns: Dict[str, None] = {}
+    for record in records:
+        if isinstance(record, dict):
+            for key in record:
+                columns.setdefault(key, None)
+    return list(columns)
+
+
+def _note_dropped(record: Dict[str, Any], column_set: set, dropped: Dict[str, None]):
+    """记录不在表头中的字段"""
+    if not column_set.issuperset(record):
+        for key in record:
+            if key not in column_set:
+                dropped.setdefault(key, None)
+
+
+def _cell(value: Any) -> Any:
+    """单元格取值: 嵌套结构转为 JSON 字符串"""
+    if isinstance(value, (dict, list)):
+        return ResponseFormatter.dumps(value).decode('utf-8')
+    return value
+
+
+class CsvPageWriter(object):
+    """逐页生成 CSV 字节, 首块带 UTF-8 BOM 与表头(Excel 直接打开中文不乱码)"""
+
+    def __init__(self, columns: Sequence[str]):
+        self.columns = list(columns)
+        self.rows_written = 0
+        self._column_set = set(self.columns)
+        self._dropped: Dict[str, None] = {}
+        self._buffer = io.StringIO()
+        self._writer = csv.writer(self._buffer)
+
+    def header(self) -> bytes:
+        self._writer.writerow(self.columns)
+        return b'\xef\xbb\xbf' + self._drain()
+
+    def page(self, records: Sequence[Any]) -> bytes:
+        columns = self.columns
+        writerow = self._writer.writerow
+        for record in records:
+            if isinstance(record, dict):
+                writerow([_cell(record.get(column)) for column in columns])
+                _note_dropped(record, self._column_set, self._dropped)
+        self.rows_written += len(records)
+        return self._drain()
+
+    @property
+    def dropped_columns(self) -> List[str]:
+        """表头之外、未写入文件的字段"""
+        return list(self._dropped)
+
+    def _drain(self) -> bytes:
+        data = self._buffer.getvalue().encode('utf-8')
+        self._buffer.seek(0)
+        self._buffer.truncate()
+        return data
+
+
+class XlsxSpoolWriter(object):
+    """
+    XLSX 写入器(openpyxl 只写模式)
+    append_page 为 CPU 密集操作, 调用方应放到线程池执行; save 之后用 iter_chunks 分块读出, close 删除临时文件。
+    openpyxl 只在保存工作簿时删除工作表的行数据临时文件, 因此未保存就中止时 close 也会保存一次(到自己的临时文件)再删除
+    """
+
+    def __init__(self, columns: Sequence[str], title: str = 'data'):
+        if Workbook is None:
+            raise ImportError("导出 xlsx 需要安装 openpyxl: pip install openpyxl")
+        self.columns = list(columns)
+        self.rows_written = 0
+        self._column_set = set(self.columns)
+        self._dropped: Dict[str, None] = {}
+        self._workbook = Workbook(write_only=True)
+        self._sheet = self._workbook.create_sheet(title=title[:31])
+        self._sheet.append(self.columns)
+        self._path: Optional[str] = None
+        self._saved = False
+
+    @staticmethod
+    def _xlsx_cell(value: Any) -> Any:
+        value = _cell(value)
+        if isinstance(value, str):
+            # openpyxl 拒绝写入控制字符
+            return ILLEGAL_CHARACTERS_RE.sub('', value)
+        return value
+
+    def append_page(self, records: Sequence[Any]):
+        columns = self.columns
+        append = self._sheet.append
+        cell = self._xlsx_cell
+        for record in records:
+            if isinstance(record, dict):
+                append([cell(record.get(column)) for column in columns])
+                _note_dropped(record, self._column_set, self._dropped)
+        self.rows_written += len(records)
+
+    @property
+    def dropped_columns(self) -> List[str]:
+        """表头之外、未写入文件的字段"""
+        return list(self._dropped)
+
+    def save(self) -> int:
+        """写出 xlsx 到临时文件, 返回文件大小"""
+        with tempfile.NamedTemporaryFile(suffix='.xlsx', delete=False) as f:
+            self._path = f.name
+            self._saved = True
+            self._workbook.save(f)
+        return os.path.getsize(self._path)
+
+    def iter_chunks(self) -> Iterator[bytes]:
+        with open(self._path, 'rb') as f:
+            while True:
+                chunk = f.read(CHUNK_SIZE)
+                if not chunk:
+                    return
+                yield chunk
+
+    def close(self):
+        if not self._saved:
+            # 未保存就中止: 保存一次以便 openpyxl 清理行数据临时文件, 结果随即删除
+            try:
+                self.save()
+            except (OSError, ValueError):
+                pass
+        if self._path is not None:
+            try:
+                os.remove(self._path)
+            except OSError:
+                pass
+            self._path = None
@@ -18,14 +18,27 @@ project_root = Path(__file__).parent
 sys.path.insert(0, str(project_root))
 
 try:
+    import tornado.gen
     import tornado.ioloop
     import tornado.web
     import tornado.options
+    import tornado.netutil
+    import tornado.httpserver
     from tornado.options import define, options
     
     # 导入应用配置和路由
     from app.config import settings
     from app.routes import routes
+    from app.auth.governor import rate_governor
+    from app.auth.http_util import session_pool
+    from app.core.cache import response_cache
+    from app.core.database import close_database, get_db_stats
+    from app.core.security.rate_limiter import async_rate_limiter
+    from app.core import metrics
+    from app.core.shop_registry import shop_registry
+    from app.core.sync_jobs import sync_job_engine
+    from app.core.token_provider import token_provider
+    from app.core.workers import fork_workers, get_worker_info, worker_id
     
     print(f"✅ 成功导入所有依赖模块")
     
@@ -45,6 +58,7 @@ define("port", default=settings.APP_PORT, help="运行端口", type=int)
 define("host", default=settings.APP_HOST, help="监听地址", type=str)
 define("debug", default=settings.APP_DEBUG, help="调试模式", type=bool)
 define("environment", default=os.getenv('ENVIRONMENT', 'development'), help="运行环境", type=str)
+define("workers", default=settings.APP_WORKERS, help="工作进程数, 0 表示按 CPU 核数", type=int)
 define("kill_port", default=False, help="启动前自动杀掉占用端口的进程", type=bool)
 
 
@@ -78,6 +92,15 @@ class Application(tornado.web.Application):
         print(f"   - 调试模式: {options.debug}")
         print(f"   - 自动重载: {app_settings.get('autoreload', False)}")
     
+    def find_handler(self, request, **kwargs):
+        """每个请求开始时调用, 包装 delegate 以统计正在处理的请求数（连接提前关闭时同样减少计数）"""
+        return metrics.track_request(request, super().find_handler(request, **kwargs))
+    
+    def log_request(self, handler):
+        """每个请求结束时调用, 记录请求耗时直方图后照常输出访问日志"""
+        metrics.request_finished(handler)
+        super().log_request(handler)
+    
     def _setup_logging(self):
         """设置日志配置"""
         log_level = getattr(logging, settings.LOG_LEVEL.upper(), logging.INFO)
@@ -120,6 +143,10 @@ class Application(tornado.web.Application):
     
     def _shutdown(self):
         """优雅关闭服务器"""
+        # 多进程模式下终端 Ctrl+C 和主进程转发的信号可能先后到达, 只处理一次
+        if getattr(self, '_shutting_down', False):
+            return
+        self._shutting_down = True
         self.logger.info("开始优雅关闭服务器...")
         
         # 停止接受新连接
@@ -140,10 +167,41 @@ class Application(tornado.web.Application):
             if now < deadline and has_connections:
                 tornado.ioloop.IOLoop.current().call_later(0.1, stop_loop)
             else:
-                tornado.ioloop.IOLoop.current().stop()
-                self.logger.info("服务器已关闭")
+                # 释放共享资源后再停止事件循环
+                tornado.ioloop.IOLoop.current().add_future(
+                    tornado.gen.convert_yielded(self._close_resources()),
+                    lambda future: self._stop_loop()
+                )
         
         stop_loop()
+    
+    async def _close_resources(self):
+        """关闭应用级共享资源（领星API连接池、令牌续约定时器、缓存连接等）"""
+        token_provider.close()
+        shop_registry.close()
+        sync_job_engine.close()
+        try:
+            await session_pool.close()
+            self.logger.info("领星API连接池已关闭")
+        except Exception as e:
+            self.logger.error(f"关闭领星API连接池失败: {e}")
+        try:
+            await response_cache.close()
+        except Exception as e:
+            self.logger.error(f"关闭缓存失败: {e}")
+        try:
+            await async_rate_limiter.close()
+        except Exception as e:
+            self.logger.error(f"关闭限流器失败: {e}")
+        try:
+            close_database()
+        except Exception as e:
+            self.logger.error(f"关闭数据库连接失败: {e}")
+    
+    def _stop_loop(self):
+        """停止事件循环"""
+        tornado.ioloop.IOLoop.current().stop()
+        self.logger.info("服务器已关闭")
 
 
 def get_local_ip():
@@ -221,6 +279,28 @@ def check_and_kill_port(port: int) -> bool:
         return False
 
 
+async def warm_up_access_token():
+    """启动时预先获取 access_token 并加载店铺注册表，之后由后台定时续约/刷新"""
+    try:
+        await token_provider.get_token()
+        print("🔑 access_token 预热完成")
+    except Exception as e:
+        print(f"⚠️  access_token 预热失败，将在首次请求时重试: {e}")
+        return
+    await shop_registry.ensure_loaded()
+    print(f"🏪 店铺注册表加载完成，共 {shop_registry.get_stats()['shops']} 个店铺")
+
+
+async def resume_sync_jobs():
+    """认领负责进程已退出的未完成同步单元并从断点继续（每个工作进程都执行, 同一单元只会被一个进程认领）"""
+    try:
+        resumed = await sync_job_engine.resume()
+        if resumed:
+            print(f"🔄 已恢复 {resumed} 个未完成的同步单元")
+    except Exception as e:
+        print(f"⚠️  恢复同步任务失败: {e}")
+
+
 def make_app(**kwargs) -> Application:
     """创建应用实例"""
     return Application(routes, **kwargs)
@@ -244,6 +324,8 @@ def print_startup_info():
     # 显示可用的API端点
     print(f"\n📋 可用的API端点:")
     print(f"   - 健康检查: http://{options.host}:{options.port}{settings.HEALTH_CHECK_ENDPOINT}")
+    if settings.MONITORING_ENABLED:
+        print(f"   - 指标接口: http://{options.host}:{settings.METRICS_PORT}/metrics")
     print(f"   - API文档: 查看 docs/ 目录下的swagger文件")
     
     print("\n💡 提示:")
@@ -260,7 +342,16 @@ def add_health_check_route():
                 'status': 'healthy',
                 'app': settings.APP_NAME,
                 'version': settings.APP_VERSION,
-                'environment': options.environment
+                'environment': options.environment,
+                'http_pool': session_pool.get_stats(),
+                'access_token': token_provider.get_stats(),
+                'rate_governor': rate_governor.get_stats(),
+                'cache': response_cache.get_stats(),
+                'rate_limiter': async_rate_limiter.get_stats(),
+                'shop_registry': shop_registry.get_stats(),
+                'sync_jobs': sync_job_engine.get_stats(),
+                'database': get_db_stats(),
+                'worker': get_worker_info()
             })
     
     # 将健康检查路由添加到路由列表
@@ -269,6 +360,32 @@ def add_health_check_route():
         routes.insert(0, health_route)
 
 
+def setup_database(create: bool = True, dispose: bool = False):
+    """初始化数据库连接
+    
+    Args:
+        create: 是否建表（并回填派生数据）
+        dispose: 完成后是否关闭连接（多进程模式主进程 fork 前使用）
+    """
+    from app.core.database import init_database, create_tables, close_database
+    try:
+        print("🗄️  正在初始化数据库连接...")
+        init_database(
+            pool_size=settings.DB_POOL_SIZE,
+            max_overflow=settings.DB_MAX_OVERFLOW,
+            executor_workers=settings.DB_EXECUTOR_WORKERS
+        )
+        if create:
+            create_tables()
+        print("✅ 数据库初始化成功")
+    except Exception as e:
+        print(f"⚠️  数据库初始化失败: {e}")
+        print("📝 应用将继续启动，但电商数据看板功能可能不可用")
+    finally:
+        if dispose:
+            close_database()
+
+
 def main():
     """主函数"""
     try:
@@ -281,16 +398,44 @@ def main():
             if not check_and_kill_port(options.port):
                 print(f"⚠️  端口 {options.port} 处理失败，但继续尝试启动服务器")
         
-        # 初始化数据库连接
-        try:
-            from app.core.database import init_database, create_tables
-            print("🗄️  正在初始化数据库连接...")
-            init_database()
-            create_tables()
-            print("✅ 数据库初始化成功")
-        except Exception as e:
-            print(f"⚠️  数据库初始化失败: {e}")
-            print("📝 应用将继续启动，但电商数据看板功能可能不可用")
+        # 多进程模式: 主进程绑定端口后 fork, 以下连接池、数据库引擎等资源在每个工作进程中各自初始化
+        sockets = None
+        workers = options.workers
+        if workers != 1:
+            if not hasattr(os, 'fork'):
+                print("⚠️  当前平台不支持 fork，以单进程模式运行")
+                workers = 1
+            elif options.debug and settings.DEV_RELOAD:
+                print("⚠️  自动重载与多进程模式不兼容，以单进程模式运行")
+                workers = 1
+            else:
+                workers = workers if workers > 0 else os.cpu_count() or 1
+                sockets = tornado.netutil.bind_sockets(options.port, address=options.host)
+                print(f"👷 以多进程模式运行，工作进程数: {workers}")
+                # 主进程在 fork 之前建表一次, 工作进程开始接受请求时表已存在;
+                # 建表后释放引擎, 数据库连接不跨进程共享
+                setup_database(create=True, dispose=True)
+                fork_workers(workers)
+                print(f"👷 工作进程 {worker_id()} 已启动 (pid {os.getpid()})")
+        
+        # 初始化数据库连接（多进程模式下表已由主进程创建）
+        setup_database(create=sockets is None)
+        
+        # 配置领星API共享连接池
+        session_pool.configure(
+            limit=settings.LLX_HTTP_POOL_LIMIT,
+            limit_per_host=settings.LLX_HTTP_POOL_LIMIT_PER_HOST,
+            keepalive_timeout=settings.LLX_HTTP_KEEPALIVE_TIMEOUT,
+            ttl_dns_cache=settings.LLX_HTTP_DNS_CACHE_TTL
+        )
+        # 配置领星API出站限流
+        rate_governor.configure(
+            capacity=settings.LLX_RATE_CAPACITY,
+            refill_rate=settings.LLX_RATE_REFILL_RATE,
+            max_retries=settings.LLX_RATE_MAX_RETRIES,
+            route_limits=settings.llx_rate_route_limits,
+            processes=workers
+        )
         
         # 添加健康检查路由
         add_health_check_route()
@@ -299,10 +444,26 @@ def main():
         app = make_app()
         
         # 启动服务器
-        app.server = app.listen(options.port, address=options.host)
+        if sockets:
+            app.server = tornado.httpserver.HTTPServer(app)
+            app.server.add_sockets(sockets)
+        else:
+            app.server = app.listen(options.port, address=options.host)
+        
+        # 启动指标接口(多进程模式下端口为 METRICS_PORT + 工作进程编号)
+        if settings.MONITORING_ENABLED:
+            try:
+                metrics.start_metrics_server(settings.METRICS_PORT + (worker_id() or 0), options.host)
+            except OSError as e:
+                print(f"⚠️  指标接口启动失败: {e}")
+        
+        # 打印启动信息(多进程模式只由 0 号工作进程打印)
+        if worker_id() in (None, 0):
+            print_startup_info()
         
-        # 打印启动信息
-        print_startup_info()
+        # 预热 access_token
+        tornado.ioloop.IOLoop.current().add_callback(warm_up_access_token)
+        tornado.ioloop.IOLoop.current().add_callback(resume_sync_jobs)
         
         # 启动事件循环
         tornado.ioloop.IOLoop.current().start()
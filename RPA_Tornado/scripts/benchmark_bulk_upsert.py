@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+批量 upsert 性能对比
+在 SQLite 上比较逐行 SELECT + INSERT/UPDATE 与 app.core.bulk_upsert 的耗时,
+分别测试首次写入(全部新增)和再次同步(全部更新)两种场景
+
+用法: python scripts/benchmark_bulk_upsert.py --rows 5000 --chunk-size 500
+"""
+
+import sys
+import time
+import argparse
+import tempfile
+from datetime import datetime
+from decimal import Decimal
+from pathlib import Path
+
+# 添加项目根目录到Python路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from sqlalchemy import and_, create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.core.bulk_upsert import bulk_upsert
+from app.models.dashboard_models import Base, Shop, ExchangeRate
+
+
+def make_shop_rows(count, suffix=''):
+    now = datetime.now()
+    return [{
+        'shop_id': str(100000 + i),
+        'shop_name': f'shop-{i}{suffix}',
+        'platform_id': '1',
+        'platform': 'amazon',
+        'status': 'active',
+        'updated_at': now
+    } for i in range(count)]
+
+
+def make_rate_rows(count, rate='7.1'):
+    now = datetime.now()
+    months = [datetime(2000 + i // 12, i % 12 + 1, 1) for i in range(count // 20 + 1)]
+    return [{
+        'currency_code': f'C{i % 20:02d}',
+        'currency_name': f'currency-{i % 20}',
+        'base_currency': 'CNY',
+        'rate': Decimal(rate),
+        'rate_date': months[i // 20],
+        'effective_date': months[i // 20],
+        'source': 'api',
+        'status': 'active',
+        'updated_at': now
+    } for i in range(count)]
+
+
+def row_by_row_shops(session, rows):
+    """原实现: 每条记录一次 SELECT, 再逐条 INSERT/UPDATE"""
+    for row in rows:
+        shop = session.query(Shop).filter(
+            and_(Shop.shop_id == row['shop_id'], Shop.platform_id == row['platform_id'])
+        ).first()
+        if shop:
+            shop.shop_name = row['shop_name']
+            shop.platform = row['platform']
+            shop.updated_at = row['updated_at']
+        else:
+            session.add(Shop(**row))
+        session.flush()
+
+
+def row_by_row_rates(session, rows):
+    for row in rows:
+        rate = session.query(ExchangeRate).filter(
+            and_(
+                ExchangeRate.currency_code == row['currency_code'],
+                ExchangeRate.rate_date == row['rate_date'],
+                ExchangeRate.base_currency == row['base_currency']
+            )
+        ).first()
+        if rate:
+            rate.rate = row['rate']
+            rate.currency_name = row['currency_name']
+            rate.updated_at = row['updated_at']
+        else:
+            session.add(ExchangeRate(**row))
+        session.flush()
+
+
+def timed(session_factory, func):
+    session = session_factory()
+    start = time.perf_counter()
+    func(session)
+    session.commit()
+    elapsed = time.perf_counter() - start
+    session.close()
+    return elapsed
+
+
+def run(rows, chunk_size):
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for mode in ('row_by_row', 'bulk'):
+            engine = create_engine(f'sqlite:///{tmp}/{mode}.db')
+            Base.metadata.create_all(engine)
+            session_factory = sessionmaker(bind=engine)
+
+            for table, make_rows, slow, conflict, update in (
+                ('shops', make_shop_rows, row_by_row_shops,
+                 ['shop_id', 'platform_id'], ['shop_name', 'platform', 'updated_at']),
+                ('exchange_rates', make_rate_rows, row_by_row_rates,
+                 ['currency_code', 'base_currency', 'rate_date'], ['rate', 'currency_name', 'updated_at']),
+            ):
+                first = make_rows(rows)
+                second = make_rows(rows, '-v2') if table == 'shops' else make_rows(rows, '7.2')
+                for phase, data in (('insert', first), ('update', second)):
+                    if mode == 'row_by_row':
+                        elapsed = timed(session_factory, lambda s: slow(s, data))
+                    else:
+                        elapsed = timed(session_factory, lambda s: bulk_upsert(
+                            s, Shop if table == 'shops' else ExchangeRate, data,
+                            conflict_columns=conflict, update_columns=update, chunk_size=chunk_size))
+                    results.append((table, phase, mode, elapsed))
+            engine.dispose()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description='批量 upsert 与逐行写入的性能对比(SQLite)')
+    parser.add_argument('--rows', type=int, default=5000, help='每张表写入的记录数')
+    parser.add_argument('--chunk-size', type=int, default=500, help='批量 upsert 每条语句的记录数')
+    args = parser.parse_args()
+
+    results = run(args.rows, args.chunk_size)
+    timings = {(t, p, m): e for t, p, m, e in results}
+
+    print(f"\n📊 {args.rows} 行 / chunk_size={args.chunk_size}")
+    print(f"{'表':<16}{'场景':<8}{'逐行(s)':>10}{'批量(s)':>10}{'加速比':>8}")
+    for table in ('shops', 'exchange_rates'):
+        for phase in ('insert', 'update'):
+            slow = timings[(table, phase, 'row_by_row')]
+            fast = timings[(table, phase, 'bulk')]
+            print(f"{table:<16}{phase:<8}{slow:>10.3f}{fast:>10.3f}{slow / fast:>7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
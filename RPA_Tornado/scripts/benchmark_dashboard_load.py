@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+看板查询接口负载测试
+在进程内启动 Tornado 服务(SQLite 文件数据库), 并发请求 /api/dashboard/summary、
+/api/dashboard/shops、/api/dashboard/statistics/sales, 同时按固定间隔请求一个不访问数据库的 /ping,
+分别统计两种模式下的 p50/p95/p99 延迟:
+  - inline: 在事件循环线程中直接执行同步查询(迁移前的行为)
+  - offload: 通过 app.core.database.run_in_session 在数据库线程池中执行
+
+用法: python scripts/benchmark_dashboard_load.py --sales 100000 --requests 150 --concurrency 16
+"""
+
+import os
+import sys
+import time
+import logging
+import random
+import asyncio
+import argparse
+import tempfile
+from datetime import datetime, timedelta
+from decimal import Decimal
+from pathlib import Path
+
+# 添加项目根目录到Python路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+import tornado.web
+from tornado.httpclient import AsyncHTTPClient
+from tornado.netutil import bind_sockets
+from tornado.httpserver import HTTPServer
+
+from app.core import database
+from app.models.dashboard_models import Shop, Sale, ExchangeRate, DailySalesRollup
+from app.routes.dashboard_routes import dashboard_routes
+from app.services import dashboard_service
+
+
+class PingHandler(tornado.web.RequestHandler):
+    """不访问数据库的接口, 用于观察事件循环是否被阻塞"""
+
+    def get(self):
+        self.write({'code': 0})
+
+
+def seed(shops, sales):
+    now = datetime.now()
+    with database.get_db_session() as session:
+        session.execute(Shop.__table__.insert(), [{
+            'shop_id': str(1000 + i), 'shop_name': f'shop-{i}', 'platform_id': '1',
+            'platform': 'amazon', 'status': 'active', 'created_at': now, 'updated_at': now
+        } for i in range(shops)])
+        session.execute(ExchangeRate.__table__.insert(), [{
+            'currency_code': 'USD', 'currency_name': 'US Dollar', 'base_currency': 'CNY',
+            'rate': Decimal('7.1'), 'rate_date': now, 'effective_date': now,
+            'source': 'api', 'status': 'active', 'created_at': now, 'updated_at': now
+        }])
+        rnd = random.Random(42)
+        batch = []
+        for i in range(sales):
+            amount = Decimal(rnd.randint(100, 100000)) / 100
+            batch.append({
+                'shop_id': rnd.randint(1, shops),
+                'sale_date': now - timedelta(days=rnd.randint(0, 60)),
+                'order_id': f'O{i}', 'product_id': f'P{i % 500}',
+                'original_amount': amount, 'original_currency': 'CNY',
+                'cny_amount': amount, 'usd_amount': amount / 7, 'exchange_rate': Decimal('1'),
+                'quantity': 1, 'created_at': now, 'updated_at': now
+            })
+            if len(batch) == 5000:
+                session.execute(Sale.__table__.insert(), batch)
+                batch = []
+        if batch:
+            session.execute(Sale.__table__.insert(), batch)
+        DailySalesRollup.refresh(session)
+
+
+async def run_inline(func, *args, **kwargs):
+    """迁移前的行为: 在事件循环线程中打开会话并执行查询"""
+    with database.get_db_session() as session:
+        return func(session, *args, **kwargs)
+
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(p / 100 * (len(values) - 1))))] * 1000
+
+
+async def load(port, requests, concurrency, ping_interval):
+    client = AsyncHTTPClient(force_instance=True, max_clients=concurrency)
+    probe = AsyncHTTPClient(force_instance=True, max_clients=1000)
+    start_date = (datetime.now() - timedelta(days=30)).strftime('%Y-%m-%d')
+    paths = [
+        '/api/dashboard/summary',
+        '/api/dashboard/shops?page=1&page_size=20',
+        f'/api/dashboard/statistics/sales?start_date={start_date}',
+    ]
+    latencies = {'db': [], 'ping': []}
+    errors = 0
+    queue = asyncio.Queue()
+    for i in range(requests):
+        queue.put_nowait(paths[i % len(paths)])
+
+    async def fetch(http, path, kind):
+        nonlocal errors
+        started = time.perf_counter()
+        resp = await http.fetch(f'http://127.0.0.1:{port}{path}', raise_error=False)
+        if resp.code != 200:
+            errors += 1
+        latencies[kind].append(time.perf_counter() - started)
+
+    async def worker():
+        while not queue.empty():
+            await fetch(client, queue.get_nowait(), 'db')
+
+    async def pinger(done):
+        # 固定间隔发出 /ping, 不等待上一个返回(开环), 延迟反映事件循环被阻塞的时间
+        tasks = []
+        while not done.is_set():
+            tasks.append(asyncio.ensure_future(fetch(probe, '/ping', 'ping')))
+            await asyncio.sleep(ping_interval)
+        await asyncio.gather(*tasks)
+
+    done = asyncio.Event()
+    ping_task = asyncio.ensure_future(pinger(done))
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    wall = time.perf_counter() - started
+    done.set()
+    await ping_task
+    client.close()
+    probe.close()
+    return latencies, errors, wall
+
+
+async def run_mode(mode, requests, concurrency, ping_interval):
+    dashboard_service.run_in_session = run_inline if mode == 'inline' else database.run_in_session
+    app = tornado.web.Application(dashboard_routes + [(r'/ping', PingHandler)])
+    sockets = bind_sockets(0, '127.0.0.1')
+    port = sockets[0].getsockname()[1]
+    server = HTTPServer(app)
+    server.add_sockets(sockets)
+    try:
+        return await load(port, requests, concurrency, ping_interval)
+    finally:
+        server.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='看板查询接口并发负载测试(inline 与线程池对比)')
+    parser.add_argument('--shops', type=int, default=50, help='店铺数')
+    parser.add_argument('--sales', type=int, default=100000, help='销售记录数')
+    parser.add_argument('--requests', type=int, default=150, help='每种模式的看板请求数')
+    parser.add_argument('--concurrency', type=int, default=16, help='看板请求并发数')
+    parser.add_argument('--ping-interval', type=float, default=0.02, help='/ping 探测间隔(秒)')
+    args = parser.parse_args()
+    # 每个请求都会打印 INFO 日志, 压测时关闭
+    logging.disable(logging.INFO)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        database.init_database(f'sqlite:///{tmp}/dashboard.db')
+        database.create_tables()
+        print(f"🗄️  写入 {args.shops} 个店铺、{args.sales} 条销售记录...")
+        seed(args.shops, args.sales)
+
+        print(f"\n📊 {args.requests} 个看板请求(并发 {args.concurrency}), 每 {args.ping_interval * 1000:.0f}ms 一个 /ping, "
+              f"数据库线程 {database.get_db_stats()['executor_workers']}, CPU {os.cpu_count()}")
+        print(f"{'模式':<10}{'接口':<8}{'请求数':>8}{'p50(ms)':>10}{'p95(ms)':>10}{'p99(ms)':>10}{'看板吞吐(req/s)':>16}{'错误':>6}")
+        for mode in ('inline', 'offload'):
+            latencies, errors, wall = asyncio.run(run_mode(mode, args.requests, args.concurrency, args.ping_interval))
+            for kind in ('db', 'ping'):
+                values = latencies[kind]
+                print(f"{mode:<10}{kind:<8}{len(values):>8}{percentile(values, 50):>10.1f}{percentile(values, 95):>10.1f}"
+                      f"{percentile(values, 99):>10.1f}{len(latencies['db']) / wall:>16.1f}{errors:>6}")
+        database.close_database()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+响应序列化性能对比
+比较处理器原来的 json.dumps(ensure_ascii=False, default=str).encode('utf-8') 与
+ResponseFormatter.dumps(orjson) 在典型响应上的耗时, 并校验两者解析后的结果一致:
+  - summary:    看板汇总(Decimal 金额、datetime)
+  - statistics: 看板销售统计(按天明细)
+  - products:   10k 条产品列表(中文字段、嵌套数组)
+
+用法: python scripts/benchmark_json_writer.py --items 10000 --rounds 50
+"""
+
+import sys
+import json
+import time
+import argparse
+import statistics
+from datetime import datetime, timedelta
+from decimal import Decimal
+from pathlib import Path
+
+# 添加项目根目录到Python路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from app.shared.response_formatter import ResponseFormatter
+
+
+def make_summary():
+    now = datetime.now()
+    return {
+        'code': 200,
+        'message': '获取看板汇总数据成功',
+        'data': {
+            'total_shops': 50,
+            'active_shops': 48,
+            'today': {'cny_amount': Decimal('123456.7800'), 'usd_amount': Decimal('17387.1500'), 'order_count': 1024},
+            'this_month': {'cny_amount': Decimal('3456789.1200'), 'usd_amount': Decimal('486871.7100'), 'order_count': 28765},
+            'latest_exchange_rates': [
+                {'currency_code': code, 'rate': Decimal('7.1000'), 'rate_date': now}
+                for code in ('USD', 'EUR', 'GBP', 'JPY', 'CAD', 'AUD')
+            ],
+            'updated_at': now
+        },
+        'timestamp': now.isoformat()
+    }
+
+
+def make_statistics(days=90):
+    start = datetime(2024, 1, 1)
+    daily = [{
+        'date': (start + timedelta(days=i)).date(),
+        'cny_amount': Decimal(f'{10000 + i * 37}.{i % 100:02d}'),
+        'usd_amount': Decimal(f'{1400 + i * 5}.{i % 100:02d}'),
+        'order_count': 100 + i,
+        'avg_order_value': Decimal(f'{98 + i % 7}.1234')
+    } for i in range(days)]
+    return {
+        'code': 200,
+        'message': '获取销售统计数据成功',
+        'data': {
+            'period': {'start_date': start, 'end_date': start + timedelta(days=days - 1)},
+            'total_cny_amount': sum(d['cny_amount'] for d in daily),
+            'total_usd_amount': sum(d['usd_amount'] for d in daily),
+            'total_orders': sum(d['order_count'] for d in daily),
+            'daily_statistics': daily
+        }
+    }
+
+
+def make_products(items):
+    return {
+        'code': 0,
+        'message': 'success',
+        'total': items,
+        'data': [{
+            'id': i,
+            'sku': f'SKU-{i:06d}',
+            'product_name': f'测试产品 {i} 不锈钢保温杯 500ml 户外运动水杯',
+            'pic_url': f'https://image.example.com/product/{i}.jpg',
+            'cg_price': f'{10 + i % 100}.99',
+            'status': 1,
+            'create_time': 1700000000 + i,
+            'product_developer': '张三',
+            'attribute': [{'attr_id': 1, 'attr_name': '颜色', 'attr_value': '黑色'}],
+            'supplier_quote': [{'supplier_id': i % 30, 'supplier_name': f'供应商{i % 30}', 'price': '9.90'}],
+        } for i in range(items)]
+    }
+
+
+def stdlib_dumps(data):
+    """原写法"""
+    return json.dumps(data, ensure_ascii=False, default=str).encode('utf-8')
+
+
+def bench(func, data, rounds):
+    timings = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        func(data)
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='json.dumps 与 ResponseFormatter.dumps(orjson) 的序列化性能对比')
+    parser.add_argument('--items', type=int, default=10000, help='产品列表条数')
+    parser.add_argument('--rounds', type=int, default=50, help='每项重复次数(取中位数)')
+    args = parser.parse_args()
+
+    payloads = (
+        ('summary', make_summary()),
+        ('statistics', make_statistics()),
+        ('products', make_products(args.items)),
+    )
+
+    print(f"\n📊 每项 {args.rounds} 次取中位数")
+    print(f"{'响应':<12}{'大小(KB)':>10}{'json(ms)':>12}{'orjson(ms)':>12}{'加速比':>8}")
+    for name, data in payloads:
+        old, new = stdlib_dumps(data), ResponseFormatter.dumps(data)
+        assert json.loads(old) == json.loads(new), f'{name} 序列化结果不一致'
+        slow = bench(stdlib_dumps, data, args.rounds)
+        fast = bench(ResponseFormatter.dumps, data, args.rounds)
+        print(f"{name:<12}{len(new) / 1024:>10.1f}{slow * 1000:>12.3f}{fast * 1000:>12.3f}{slow / fast:>7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
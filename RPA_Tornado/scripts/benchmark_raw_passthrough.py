@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+代理接口透传模式性能对比
+构造 10k 条产品的领星 productList 响应, 比较两条处理路径:
+  - parsed: resp.json() -> ResponseResult(**json) -> model_dump() -> json.dumps(ensure_ascii=False)
+  - raw:    resp.read() -> peek_code(body), 原始字节直接写给客户端
+分别测试纯 CPU 处理(不含网络)和经过 HttpBase 请求本地模拟上游的端到端耗时, 以及峰值内存
+
+用法: python scripts/benchmark_raw_passthrough.py --items 10000 --rounds 20
+"""
+
+import sys
+import json
+import time
+import asyncio
+import argparse
+import statistics
+import tracemalloc
+from pathlib import Path
+
+# 添加项目根目录到Python路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+import orjson
+from aiohttp import web
+
+from app.auth.http_util import ClientSessionPool, HttpBase, peek_code
+from app.auth.resp_schema import ResponseResult
+
+
+def make_body(items):
+    """模拟领星本地产品列表响应"""
+    data = [{
+        'id': i,
+        'cid': 100 + i % 50,
+        'bid': 200 + i % 20,
+        'sku': f'SKU-{i:06d}',
+        'product_name': f'测试产品 {i} 不锈钢保温杯 500ml 户外运动水杯',
+        'pic_url': f'https://image.example.com/product/{i}.jpg',
+        'cg_delivery': 7,
+        'cg_transport_costs': '12.50',
+        'cg_price': f'{10 + i % 100}.99',
+        'status': 1,
+        'open_status': 1,
+        'is_combo': 0,
+        'create_time': 1700000000 + i,
+        'update_time': 1710000000 + i,
+        'product_developer': '张三',
+        'cg_opt_username': '李四',
+        'spu': f'SPU-{i // 10:05d}',
+        'ps_id': 0,
+        'attribute': [{'attr_id': 1, 'attr_name': '颜色', 'attr_value': '黑色'}],
+        'brand_name': '示例品牌',
+        'category_name': '家居用品',
+        'supplier_quote': [{'supplier_id': i % 30, 'supplier_name': f'供应商{i % 30}', 'price': '9.90'}],
+    } for i in range(items)]
+    return orjson.dumps({
+        'code': 0, 'msg': 'success', 'error_details': [], 'request_id': 'bench',
+        'response_time': '2024-01-01 00:00:00', 'data': data, 'total': items
+    })
+
+
+def parsed_path(body):
+    """原路径: 解析 -> pydantic -> model_dump -> json.dumps -> 编码"""
+    resp = ResponseResult(**json.loads(body))
+    return json.dumps(resp.model_dump(), ensure_ascii=False).encode('utf-8')
+
+
+def raw_path(body):
+    """透传路径: 只预读 code"""
+    assert peek_code(body) == 0
+    return body
+
+
+def bench_cpu(body, rounds):
+    results = {}
+    for name, func in (('parsed', parsed_path), ('raw', raw_path)):
+        timings = []
+        for _ in range(rounds):
+            start = time.perf_counter()
+            func(body)
+            timings.append(time.perf_counter() - start)
+        tracemalloc.start()
+        func(body)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        results[name] = (statistics.median(timings), peak)
+    return results
+
+
+async def bench_http(body, rounds):
+    async def handler(request):
+        return web.Response(body=body, content_type='application/json')
+
+    app = web.Application()
+    app.router.add_post('/erp/sc/routing/data/local_inventory/productList', handler)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, '127.0.0.1', 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    url = f'http://127.0.0.1:{port}/erp/sc/routing/data/local_inventory/productList'
+
+    pool = ClientSessionPool()
+    http = HttpBase(pool=pool)
+    results = {}
+    try:
+        for name in ('parsed', 'raw'):
+            timings = []
+            for _ in range(rounds):
+                start = time.perf_counter()
+                if name == 'parsed':
+                    resp = await http.request('POST', url, json={'offset': 0})
+                    json.dumps(resp.model_dump(), ensure_ascii=False).encode('utf-8')
+                else:
+                    resp = await http.request('POST', url, json={'offset': 0}, raw=True)
+                    assert resp.code == 0
+                timings.append(time.perf_counter() - start)
+            results[name] = statistics.median(timings)
+    finally:
+        await pool.close()
+        await runner.cleanup()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description='代理接口透传模式与解析/重新序列化的性能对比')
+    parser.add_argument('--items', type=int, default=10000, help='产品条数')
+    parser.add_argument('--rounds', type=int, default=20, help='每种路径的重复次数(取中位数)')
+    args = parser.parse_args()
+
+    body = make_body(args.items)
+    print(f"\n📊 {args.items} 条产品, 响应体 {len(body) / 1024 / 1024:.2f} MB, 每项 {args.rounds} 次取中位数")
+
+    cpu = bench_cpu(body, args.rounds)
+    http = asyncio.run(bench_http(body, args.rounds))
+
+    print(f"{'路径':<10}{'CPU处理(ms)':>14}{'峰值内存(MB)':>14}{'端到端(ms)':>14}")
+    for name in ('parsed', 'raw'):
+        elapsed, peak = cpu[name]
+        print(f"{name:<10}{elapsed * 1000:>14.3f}{peak / 1024 / 1024:>14.2f}{http[name] * 1000:>14.2f}")
+    print(f"端到端加速比: {http['parsed'] / http['raw']:.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+请求签名性能对比
+模拟 batch_operate_product / mark_product_label 这类带大 detail_list 的批量写接口, 比较一次请求
+在发送前的 CPU 耗时:
+  - legacy:   copy.deepcopy(req_body) -> format_params(逐字段 orjson + decode) -> md5 -> AES.new 加密,
+              发送时再 orjson.dumps 整个请求体
+  - prepared: PreparedBody 每个字段只序列化一次, 签名串直接以字节拼接, 请求体复用同一份字节,
+              AES 加密器按 app_id 缓存
+并校验两条路径的签名和请求体完全一致
+
+用法: python scripts/benchmark_signing.py --items 200 1000 5000 --rounds 50
+"""
+
+import sys
+import copy
+import time
+import base64
+import hashlib
+import argparse
+import statistics
+from pathlib import Path
+
+# 添加项目根目录到Python路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+import orjson
+from Crypto.Cipher import AES
+
+from app.auth.aes import do_pad
+from app.auth.openapi import OpenApiBase
+from app.auth.sign import PreparedBody, SignBase
+
+APP_ID = 'ak_LmR8frklEqfe2'
+ACCESS_TOKEN = 'bench-access-token'
+
+
+def make_body(items):
+    """模拟产品批量打标签请求"""
+    return {
+        'operation_type': 1,
+        'detail_list': [{
+            'sku': f'SKU-{i:06d}',
+            'label_list': [f'标签{i % 7}', f'促销-{i % 3}'],
+            'remark': f'批量操作 {i} 不锈钢保温杯',
+            'attribute': {'color': '黑色', 'size': 'L', 'weight': 0.5 + i % 10 / 10},
+        } for i in range(items)]
+    }
+
+
+def legacy_aes_encrypt(key, data):
+    """每次调用都新建 AES 加密器(原实现)"""
+    cipher = AES.new(key.encode('utf-8'), AES.MODE_ECB)
+    return base64.b64encode(cipher.encrypt(do_pad(data).encode())).decode('utf-8')
+
+
+def legacy_request(body, timestamp):
+    """原路径: 返回 (签名, 请求体字节)"""
+    params = copy.deepcopy(body)
+    params.update({'app_key': APP_ID, 'access_token': ACCESS_TOKEN, 'timestamp': timestamp})
+    md5_str = hashlib.md5(SignBase.format_params(params).encode('utf-8')).hexdigest().upper()
+    sign = legacy_aes_encrypt(APP_ID, md5_str)
+    return sign, orjson.dumps(body, option=orjson.OPT_SORT_KEYS)
+
+
+def prepared_request(api, body, timestamp):
+    """新路径: 与 OpenApiBase.request 相同, 先 PreparedBody 再签名"""
+    prepared = PreparedBody.from_dict(body)
+    params = dict(prepared.body)
+    params.update({'app_key': APP_ID, 'access_token': ACCESS_TOKEN, 'timestamp': timestamp})
+    sign = SignBase.generate_sign(api.app_id, params, prepared.fields)
+    return sign, prepared.data
+
+
+def bench(func, rounds):
+    timings = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='请求签名(deepcopy + 重复序列化)与 PreparedBody 的性能对比')
+    parser.add_argument('--items', type=int, nargs='+', default=[200, 1000, 5000], help='detail_list 条数')
+    parser.add_argument('--rounds', type=int, default=50, help='每项重复次数(取中位数)')
+    args = parser.parse_args()
+
+    api = OpenApiBase('https://openapi.lingxing.com', APP_ID, 'secret')
+    timestamp = f'{int(time.time())}'
+
+    print(f"\n📊 每项 {args.rounds} 次取中位数")
+    print(f"{'条数':>8}{'请求体(KB)':>12}{'legacy(ms)':>12}{'prepared(ms)':>14}{'加速比':>8}")
+    for items in args.items:
+        body = make_body(items)
+        assert legacy_request(body, timestamp) == prepared_request(api, body, timestamp), '签名或请求体不一致'
+        slow = bench(lambda: legacy_request(body, timestamp), args.rounds)
+        fast = bench(lambda: prepared_request(api, body, timestamp), args.rounds)
+        size = len(orjson.dumps(body)) / 1024
+        print(f"{items:>8}{size:>12.1f}{slow * 1000:>12.3f}{fast * 1000:>14.3f}{slow / fast:>7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
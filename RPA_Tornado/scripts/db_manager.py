@@ -323,6 +323,38 @@ class DatabaseManager:
         except Exception as e:
             print(f"❌ 数据导出失败: {e}")
             return False
+    
+    def rebuild_sales_rollup(self, start_date=None, end_date=None, database_url=None):
+        """根据 sales 表重建每日销售汇总（daily_sales_rollups）"""
+        from app.core.database import init_database, create_tables, get_db_session, close_database
+        from app.models.dashboard_models import DailySalesRollup
+        
+        try:
+            start_day = datetime.strptime(start_date, '%Y-%m-%d').date() if start_date else None
+            end_day = datetime.strptime(end_date, '%Y-%m-%d').date() if end_date else None
+        except ValueError as e:
+            print(f"❌ 日期格式错误: {e}")
+            return False
+        
+        scope = f"{start_date or '最早'} ~ {end_date or '最新'}"
+        print(f"🔄 重建每日销售汇总: {scope}")
+        
+        try:
+            init_database(database_url)
+            # 旧库升级后首次重建时汇总表可能尚不存在
+            create_tables()
+            started = datetime.now()
+            with get_db_session() as session:
+                rows = DailySalesRollup.refresh(session, start_day, end_day)
+            elapsed = (datetime.now() - started).total_seconds()
+            print(f"✅ 每日销售汇总重建完成: {rows} 行, 耗时 {elapsed:.2f} 秒")
+            return True
+            
+        except Exception as e:
+            print(f"❌ 重建每日销售汇总失败: {e}")
+            return False
+        finally:
+            close_database()
 
 
 def main():
@@ -353,6 +385,12 @@ def main():
     export_parser.add_argument('db_file', help='数据库文件路径')
     export_parser.add_argument('--output', help='输出文件路径')
     
+    # 重建每日销售汇总命令
+    rollup_parser = subparsers.add_parser('rebuild-rollup', help='根据销售记录重建每日销售汇总')
+    rollup_parser.add_argument('--start', help='开始日期 YYYY-MM-DD（默认全部）')
+    rollup_parser.add_argument('--end', help='结束日期 YYYY-MM-DD（默认全部）')
+    rollup_parser.add_argument('--database-url', help='数据库连接URL（默认读取 DATABASE_URL）')
+    
     args = parser.parse_args()
     
     if not args.command:
@@ -380,6 +418,10 @@ def main():
         elif args.command == 'export':
             db_manager.export_data(args.db_file, args.output)
         
+        elif args.command == 'rebuild-rollup':
+            if not db_manager.rebuild_sales_rollup(args.start, args.end, args.database_url):
+                sys.exit(1)
+        
     except KeyboardInterrupt:
         print("\n👋 操作已取消")
     except Exception as e:
@@ -34,7 +34,7 @@ def setup_environment(env_name):
         os.environ.setdefault('LOG_LEVEL', 'DEBUG')
 
 
-def start_server(env, port=None, host=None, debug=None):
+def start_server(env, port=None, host=None, debug=None, workers=None):
     """启动服务器"""
     setup_environment(env)
     
@@ -47,6 +47,8 @@ def start_server(env, port=None, host=None, debug=None):
         cmd_args.extend(['--host', host])
     if debug is not None:
         cmd_args.extend(['--debug', str(debug).lower()])
+    if workers is not None:
+        cmd_args.extend(['--workers', str(workers)])
     
     # 设置命令行参数
     sys.argv.extend(cmd_args)
@@ -86,6 +88,11 @@ def main():
         action='store_true',
         help='禁用调试模式'
     )
+    parser.add_argument(
+        '--workers', 
+        type=int,
+        help='工作进程数, 0 表示按 CPU 核数 (默认: 1)'
+    )
     
     args = parser.parse_args()
     
@@ -101,7 +108,8 @@ def main():
             env=args.env,
             port=args.port,
             host=args.host,
-            debug=debug
+            debug=debug,
+            workers=args.workers
         )
     except KeyboardInterrupt:
         print("\n👋 服务器已停止")
@@ -5,6 +5,7 @@ pytest 配置文件
 提供测试夹具和全局配置
 """
 
+import os
 import pytest
 import asyncio
 import json
@@ -14,6 +15,10 @@ from typing import Dict, Any
 # 项目根目录
 PROJECT_ROOT = Path(__file__).parent.parent
 
+# 导入 app 之前设置测试环境, 配置校验要求 SECRET_KEY 不是示例值
+os.environ.setdefault('ENVIRONMENT', 'testing')
+os.environ.setdefault('SECRET_KEY', 'test-secret-key')
+
 
 @pytest.fixture(scope="session")
 def event_loop():
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+CSV 分页导出测试
+导出中途失败时连接被断开(没有分块结束标记), 表头之外的字段只记录日志, 文件中只有 CSV 数据行
+"""
+
+import asyncio
+import logging
+
+import tornado.httpserver
+import tornado.netutil
+import tornado.web
+
+from app.handlers.base import BaseHandler
+
+
+class FakePager(object):
+    """按给定页产出记录, 页为异常实例时在该处抛出"""
+
+    route_name = '/erp/sc/data/fake/list'
+
+    def __init__(self, pages):
+        self.pages = pages
+        self.total = sum(len(page) for page in pages if isinstance(page, list))
+
+    async def iter_pages(self):
+        for page in self.pages:
+            if isinstance(page, Exception):
+                raise page
+            yield page
+
+
+class ExportHandler(BaseHandler):
+    pages = []
+
+    async def prepare(self):
+        # 不获取领星令牌
+        pass
+
+    async def get(self):
+        await self.write_paged_export(FakePager(self.pages), 'csv', 'fake')
+
+
+def fetch_raw(pages):
+    """以原始 HTTP/1.1 请求导出, 返回服务端关闭连接前收到的全部字节"""
+    async def scenario():
+        ExportHandler.pages = pages
+        sockets = tornado.netutil.bind_sockets(0, '127.0.0.1')
+        port = sockets[0].getsockname()[1]
+        server = tornado.httpserver.HTTPServer(tornado.web.Application([('/export', ExportHandler)]))
+        server.add_sockets(sockets)
+        reader, writer = await asyncio.open_connection('127.0.0.1', port)
+        # 保持连接: 只有服务端主动断开时才会在读完之前收到 EOF
+        writer.write(b'GET /export HTTP/1.1\r\nHost: x\r\n\r\n')
+        await writer.drain()
+        data = b''
+        while not data.endswith(b'0\r\n\r\n'):
+            chunk = await asyncio.wait_for(reader.read(65536), 5)
+            if not chunk:
+                break
+            data += chunk
+        writer.close()
+        server.stop()
+        return data
+
+    return asyncio.run(scenario())
+
+
+def dechunk(body):
+    data = b''
+    while True:
+        size, _, body = body.partition(b'\r\n')
+        size = int(size, 16)
+        if size == 0:
+            return data
+        data, body = data + body[:size], body[size + 2:]
+
+
+def test_failure_mid_stream_aborts_connection(caplog):
+    with caplog.at_level(logging.ERROR):
+        raw = fetch_raw([[{'sku': 'A'}], [{'sku': 'B'}], RuntimeError('upstream timeout')])
+    head, _, body = raw.partition(b'\r\n\r\n')
+    assert b'Transfer-Encoding: chunked' in head
+    assert not body.endswith(b'0\r\n\r\n')
+    assert b'incomplete' not in body
+    assert b'sku' in body
+    assert 'upstream timeout' in caplog.text
+
+
+def test_dropped_columns_are_logged_not_written(caplog):
+    with caplog.at_level(logging.WARNING):
+        raw = fetch_raw([[{'sku': 'A'}], [{'sku': 'B', 'extra': 1}]])
+    head, _, body = raw.partition(b'\r\n\r\n')
+    assert head.startswith(b'HTTP/1.1 200')
+    lines = dechunk(body).decode('utf-8-sig').splitlines()
+    assert lines == ['sku', 'A', 'B']
+    assert 'extra' in caplog.text
@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+共享 aiohttp 连接池测试
+事件循环变化时旧 session 被关闭、连接器被释放, 不会遗留未关闭的连接
+"""
+
+import asyncio
+import threading
+
+from app.auth.http_util import ClientSessionPool
+
+
+def test_new_loop_releases_session_of_closed_loop():
+    pool = ClientSessionPool()
+
+    async def get_session():
+        return pool.get_session()
+
+    first = asyncio.run(get_session())
+    connector = first.connector
+    second = asyncio.run(get_session())
+    assert second is not first
+    assert first.closed
+    assert connector.closed
+    assert pool.get_stats()['sessions_created'] == 2
+    asyncio.run(pool.close())
+    assert second.closed
+
+
+def test_new_loop_closes_session_in_loop_still_running():
+    pool = ClientSessionPool()
+    other = asyncio.new_event_loop()
+    thread = threading.Thread(target=other.run_forever)
+    thread.start()
+    try:
+        async def get_session():
+            return pool.get_session()
+
+        first = asyncio.run_coroutine_threadsafe(get_session(), other).result(5)
+        connector = first.connector
+        second = asyncio.run(get_session())
+
+        async def closed():
+            return first.closed and connector.closed
+        # 旧 session 在它自己的事件循环中关闭
+        assert asyncio.run_coroutine_threadsafe(closed(), other).result(5)
+        assert not second.closed
+        asyncio.run(pool.close())
+    finally:
+        other.call_soon_threadsafe(other.stop)
+        thread.join(5)
+        other.close()
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+在途请求仪表测试
+与 main.Application 一样在 find_handler/log_request 中记录, 确认正常结束、客户端中途断开
+以及请求格式错误之后 http_requests_in_flight 都回到 0
+"""
+
+import asyncio
+
+import tornado.httpserver
+import tornado.netutil
+import tornado.web
+
+from app.core import metrics
+
+
+class EchoHandler(tornado.web.RequestHandler):
+    def get(self):
+        self.write('ok')
+
+    def post(self):
+        self.write(str(len(self.request.body)))
+
+
+class TrackedApplication(tornado.web.Application):
+    def find_handler(self, request, **kwargs):
+        return metrics.track_request(request, super().find_handler(request, **kwargs))
+
+    def log_request(self, handler):
+        metrics.request_finished(handler)
+
+
+def in_flight():
+    return metrics.HTTP_REQUESTS_IN_FLIGHT._values.get((), 0)
+
+
+async def send(port, payload, read=True):
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    writer.write(payload)
+    await writer.drain()
+    response = await reader.read(1024) if read else b''
+    writer.close()
+    await writer.wait_closed()
+    return response
+
+
+async def wait_for_zero(timeout=2):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while in_flight() and asyncio.get_running_loop().time() < deadline:
+        await asyncio.sleep(0.01)
+    return in_flight()
+
+
+def test_in_flight_returns_to_zero():
+    async def scenario():
+        sockets = tornado.netutil.bind_sockets(0, '127.0.0.1')
+        port = sockets[0].getsockname()[1]
+        server = tornado.httpserver.HTTPServer(TrackedApplication([('/echo', EchoHandler)]))
+        server.add_sockets(sockets)
+        start = in_flight()
+        results = {}
+
+        ok = await send(port, b'GET /echo HTTP/1.1\r\nHost: x\r\nConnection: close\r\n\r\n')
+        results['ok'] = (ok.split(b'\r\n')[0], await wait_for_zero() - start)
+
+        # 请求体只发送一部分就断开, 处理器不会执行
+        for _ in range(3):
+            await send(port, b'POST /echo HTTP/1.1\r\nHost: x\r\nContent-Length: 1000\r\n\r\nabc', read=False)
+        results['aborted'] = await wait_for_zero() - start
+
+        # Content-Length 不合法, 连接以 400 关闭
+        bad = await send(port, b'POST /echo HTTP/1.1\r\nHost: x\r\nContent-Length: zz\r\n\r\n')
+        results['malformed'] = (bad.split(b'\r\n')[0], await wait_for_zero() - start)
+
+        server.stop()
+        return results
+
+    results = asyncio.run(scenario())
+    assert results['ok'] == (b'HTTP/1.1 200 OK', 0)
+    assert results['aborted'] == 0
+    assert results['malformed'] == (b'HTTP/1.1 400 Bad Request', 0)
+
+
+def test_release_is_idempotent():
+    class Request(object):
+        pass
+
+    request = Request()
+    start = in_flight()
+    delegate = metrics.track_request(request, None)
+    assert in_flight() == start + 1
+    delegate.release()
+    delegate.release()
+    assert in_flight() == start
@@ -0,0 +1,293 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+分片令牌桶限流器测试
+覆盖 _Shard 的放行/拒绝与 retry_after、回收后空闲槽位的复用、_compact 之后索引与槽位一致、
+回收不改变限流结果, 以及 Redis 令牌桶 Lua 脚本(用 lupa 以 Redis 相同的 Lua 5.1 执行, 未安装时跳过)
+"""
+
+import asyncio
+import random
+
+import pytest
+
+from app.core.security import rate_limiter as rate_limiter_module
+from app.core.security.rate_limiter import (
+    RateLimiter, RedisRateLimiter, _result, _Shard
+)
+
+
+def take(shard, key, now, capacity=2, refill_rate=1.0, requested=1):
+    allowed, remaining = shard.take(key, capacity, refill_rate, requested, now)
+    return _result(allowed, remaining, requested, refill_rate)
+
+
+def slot_state(shard, key):
+    slot = shard.index[key]
+    return shard.tokens[slot], shard.stamp[slot], shard.capacity[slot], shard.rate[slot]
+
+
+class FakeClock(object):
+    """替换限流模块中的 time, 只提供 monotonic"""
+
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def monotonic(self):
+        return self.now
+
+
+def test_take_allows_until_empty_then_reports_retry_after():
+    shard = _Shard(None)
+    assert take(shard, 'ip', 0.0) == (True, 1.0, 0.0)
+    assert take(shard, 'ip', 0.0) == (True, 0.0, 0.0)
+    assert take(shard, 'ip', 0.0) == (False, 0.0, 1.0)
+    # 0.25 秒补充 0.25 个令牌, 还差 0.75 个
+    assert take(shard, 'ip', 0.25) == (False, 0.25, 0.75)
+    assert take(shard, 'ip', 1.0) == (True, 0.0, 0.0)
+    # 补充不超过容量
+    assert take(shard, 'ip', 100.0) == (True, 1.0, 0.0)
+    # 一次请求多个令牌
+    assert take(shard, 'ip', 100.0, requested=3) == (False, 1.0, 2.0)
+    # 不补充的桶永远等不到令牌
+    assert take(shard, 'fixed', 0.0, capacity=1, refill_rate=0) == (True, 0.0, 0.0)
+    assert take(shard, 'fixed', 50.0, capacity=1, refill_rate=0) == (False, 0.0, float('inf'))
+
+
+def test_take_updates_changed_config():
+    shard = _Shard(None)
+    take(shard, 'user', 0.0, capacity=2, refill_rate=1.0)
+    take(shard, 'user', 0.0, capacity=5, refill_rate=2.0)
+    assert slot_state(shard, 'user')[2:] == (5.0, 2.0)
+
+
+def test_evicted_slot_is_reused_as_a_fresh_bucket():
+    shard = _Shard(None)
+    for key in ('a', 'b', 'c'):
+        take(shard, key, 0.0, capacity=2, refill_rate=1.0)
+        take(shard, key, 0.0, capacity=2, refill_rate=1.0)
+    # b 在 5 秒时再次取令牌, 到 10 秒时闲置不足 idle_ttl
+    take(shard, 'b', 5.0)
+    assert shard.evict(10.0, idle_ttl=8) == 2
+    assert sorted(shard.index) == ['b']
+    assert len(shard.tokens) == 3
+    freed = sorted(shard.free)
+
+    # 新键复用空闲槽位, 不继承原来的令牌数和配置
+    assert take(shard, 'd', 10.0, capacity=4, refill_rate=0.5) == (True, 3.0, 0.0)
+    assert shard.index['d'] in freed
+    assert slot_state(shard, 'd') == (3.0, 10.0, 4.0, 0.5)
+    take(shard, 'e', 10.0)
+    assert sorted([shard.index['d'], shard.index['e']]) == freed
+    assert shard.free == []
+    assert len(shard.tokens) == 3
+    # 空闲槽位用完后追加新槽位
+    take(shard, 'f', 10.0)
+    assert shard.index['f'] == 3
+    assert len(set(shard.index.values())) == len(shard.index) == 4
+
+
+def test_evict_keeps_buckets_that_are_not_full():
+    shard = _Shard(None)
+    take(shard, 'refilling', 0.0, capacity=10, refill_rate=1.0)
+    take(shard, 'fixed', 0.0, capacity=1, refill_rate=0)
+    take(shard, 'full_fixed', 0.0, capacity=1, refill_rate=0, requested=0)
+    # refilling 还差 1 个令牌, 0.5 秒后仍未补满; 不补充的桶只有满的才回收
+    assert shard.evict(0.5, idle_ttl=0) == 1
+    assert sorted(shard.index) == ['fixed', 'refilling']
+    assert shard.evict(1.0, idle_ttl=0) == 1
+    assert sorted(shard.index) == ['fixed']
+
+
+def test_compact_keeps_index_and_slots_consistent():
+    shard = _Shard(None)
+    keys = [f'key-{i}' for i in range(3000)]
+    for i, key in enumerate(keys):
+        take(shard, key, 0.0, capacity=10, refill_rate=(i % 7 + 1), requested=i % 3)
+    # 每 5 个键保留一个: 令牌未补满且最近刚取过; 其余键在 100 秒时早已补满
+    kept = keys[::5]
+    for key in kept:
+        take(shard, key, 99.0, capacity=10, refill_rate=0.001, requested=9)
+    before = {key: slot_state(shard, key) for key in kept}
+
+    assert shard.evict(100.0, idle_ttl=10) == len(keys) - len(kept)
+    # 超过 1024 个且过半槽位空闲时收缩
+    assert shard.free == []
+    assert len(shard.tokens) == len(shard.stamp) == len(shard.capacity) == len(shard.rate) == len(kept)
+    assert sorted(shard.index.values()) == list(range(len(kept)))
+    assert {key: slot_state(shard, key) for key in kept} == before
+
+    # 收缩后新键追加在末尾, 原有键的结果不变
+    take(shard, 'new', 100.0, capacity=10, refill_rate=0.001)
+    assert shard.index['new'] == len(kept)
+    assert take(shard, kept[0], 100.0, capacity=10, refill_rate=0.001, requested=2)[0] is False
+
+
+def test_eviction_never_changes_a_decision():
+    rng = random.Random(20240601)
+    keys = [f'client-{i}' for i in range(40)]
+    # 同一个键的配置不变, 其中一部分不补充令牌
+    config = {key: (rng.choice([1, 2, 5, 10]), rng.choice([0, 0.1, 0.5, 1.0, 4.0])) for key in keys}
+    plain, evicting = _Shard(None), _Shard(None)
+    now, evicted = 0.0, 0
+    for step in range(20000):
+        now += rng.expovariate(20)
+        key = rng.choice(keys)
+        capacity, rate = config[key]
+        requested = rng.choice([1, 1, 1, 2])
+        expected = plain.take(key, capacity, rate, requested, now)
+        assert evicting.take(key, capacity, rate, requested, now) == expected, (step, key)
+        if step % 50 == 0:
+            evicted += evicting.evict(now, idle_ttl=rng.choice([0, 0.5, 2]))
+    assert evicted > 0
+    assert len(evicting.index) < len(plain.index)
+
+
+def test_rate_limiter_sweeps_idle_buckets(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(rate_limiter_module, 'time', clock)
+    limiter = RateLimiter(shards=4, idle_ttl=60, sweep_interval=8)
+    for i in range(20):
+        assert limiter.check(f'ip-{i}', capacity=2, refill_rate=1.0).allowed
+    assert limiter.check('ip-0', capacity=2, refill_rate=1.0) == (True, 0.0, 0.0)
+    assert limiter.check('ip-0', capacity=2, refill_rate=1.0) == (False, 0.0, 1.0)
+    assert limiter.size() == 20
+
+    clock.now += 120
+    assert limiter.evict_idle() == 20
+    assert limiter.get_stats()['evicted'] == 20
+    assert limiter.get_bucket_status('ip-0') is None
+    # 回收后的键与新建的桶一致
+    assert limiter.check('ip-0', capacity=2, refill_rate=1.0) == (True, 1.0, 0.0)
+
+    # 请求路径上按分片轮流回收: 每过 sweep_interval / 分片数 秒扫描一个分片
+    for i in range(20):
+        limiter.check(f'ip-{i}', capacity=2, refill_rate=1.0)
+    clock.now += 120
+    for _ in range(4):
+        clock.now += 2
+        limiter.check('other', capacity=2, refill_rate=1.0)
+    assert limiter.size() == 1
+
+
+class FakeRedis(object):
+    """在 Lua 5.1 中执行 register_script 注册的脚本, redis.call 由内存中的哈希表实现"""
+
+    def __init__(self, lua):
+        self.lua = lua
+        self.hashes = {}
+        self.ttl_ms = {}
+        self.now_us = 1700000000 * 1000000
+        self.calls = []
+        redis = lua.table()
+        redis.call = self._call
+        self._redis = redis
+
+    def _call(self, command, *args):
+        command = command.upper()
+        self.calls.append(command)
+        if command == 'TIME':
+            return self.lua.table(str(self.now_us // 1000000), str(self.now_us % 1000000))
+        if command == 'HMGET':
+            values = self.hashes.get(args[0], {})
+            # 不存在的字段在 Lua 中为 false
+            return self.lua.table(*[values.get(field, False) for field in args[1:]])
+        if command == 'HSET':
+            values = self.hashes.setdefault(args[0], {})
+            for i in range(1, len(args), 2):
+                values[args[i]] = args[i + 1]
+            return (len(args) - 1) // 2
+        if command == 'PEXPIRE':
+            self.ttl_ms[args[0]] = int(args[1])
+            return 1
+        raise AssertionError(f'unexpected command {command}')
+
+    def advance(self, seconds):
+        self.now_us += int(seconds * 1000000)
+
+    def register_script(self, script):
+        function = self.lua.eval(f'function(KEYS, ARGV, redis) {script} end')
+
+        async def run(keys, args):
+            # redis-py 把参数编码为字符串, Redis 把 Lua 数字返回为整数
+            allowed, remaining = function(self.lua.table(*keys), self.lua.table(*[str(a) for a in args]),
+                                          self._redis).values()
+            return int(allowed), remaining.encode('utf-8')
+        return run
+
+    async def hget(self, key, field):
+        return self.hashes.get(key, {}).get(field)
+
+    async def delete(self, key):
+        self.hashes.pop(key, None)
+
+    async def close(self):
+        pass
+
+
+@pytest.fixture
+def fake_redis():
+    lua51 = pytest.importorskip('lupa.lua51')
+    return FakeRedis(lua51.LuaRuntime())
+
+
+def test_redis_script_allows_denies_and_refills_by_server_time(fake_redis):
+    limiter = RedisRateLimiter(client=fake_redis, prefix='test:')
+
+    async def scenario():
+        results = [await limiter.check('ip', capacity=2, refill_rate=1.0) for _ in range(3)]
+        fake_redis.advance(0.25)
+        results.append(await limiter.check('ip', capacity=2, refill_rate=1.0))
+        fake_redis.advance(0.75)
+        results.append(await limiter.check('ip', capacity=2, refill_rate=1.0))
+        fake_redis.advance(100)
+        results.append(await limiter.check('ip', capacity=2, refill_rate=1.0, tokens=2))
+        results.append(await limiter.check('ip', capacity=2, refill_rate=1.0, tokens=3))
+        return results, await limiter.get_bucket_status('ip')
+
+    results, status = asyncio.run(scenario())
+    assert results == [
+        (True, 1.0, 0.0), (True, 0.0, 0.0), (False, 0.0, 1.0),
+        (False, 0.25, 0.75), (True, 0.0, 0.0), (True, 0.0, 0.0), (False, 0.0, 3.0)
+    ]
+    assert status == {'tokens': 0.0}
+    assert set(fake_redis.hashes) == {'test:ip'}
+    assert limiter.get_stats() == {'backend': 'redis', 'allowed': 4, 'rejected': 3, 'errors': 0}
+
+
+def test_redis_script_expires_bucket_once_full(fake_redis):
+    limiter = RedisRateLimiter(client=fake_redis, prefix='test:')
+
+    async def scenario():
+        await limiter.check('slow', capacity=10, refill_rate=0.5, tokens=4)
+        await limiter.check('fixed', capacity=3, refill_rate=0)
+        await limiter.clear_bucket('slow')
+        return await limiter.get_bucket_status('slow')
+
+    assert asyncio.run(scenario()) is None
+    # 还差 4 个令牌, 按 0.5/秒补满需 8 秒, 再加 1 秒余量; 不补充的桶保留一天
+    assert fake_redis.ttl_ms == {'test:slow': 9000, 'test:fixed': 86400000}
+    assert fake_redis.calls == ['TIME', 'HMGET', 'HSET', 'PEXPIRE'] * 2
+
+
+def test_redis_script_ignores_clock_going_backwards(fake_redis):
+    limiter = RedisRateLimiter(client=fake_redis, prefix='test:')
+
+    async def scenario():
+        await limiter.check('ip', capacity=2, refill_rate=1.0, tokens=2)
+        fake_redis.advance(-5)
+        return await limiter.check('ip', capacity=2, refill_rate=1.0)
+
+    assert asyncio.run(scenario()) == (False, 0.0, 1.0)
+
+
+def test_redis_errors_fail_open():
+    class BrokenRedis(object):
+        def register_script(self, script):
+            async def run(keys, args):
+                raise ConnectionError('redis down')
+            return run
+
+    limiter = RedisRateLimiter(client=BrokenRedis())
+    assert asyncio.run(limiter.check('ip', capacity=5)) == (True, 5.0, 0.0)
+    assert limiter.get_stats()['errors'] == 1
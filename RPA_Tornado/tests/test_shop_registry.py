@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+店铺注册表降级测试
+接口失败时沿用上次加载成功的店铺列表, 从未成功时退回 shops 表, 两种情况都在 get_stats() 中标记为降级
+"""
+
+import asyncio
+
+import pytest
+
+from app.auth.openapi import OpenApiBase
+from app.auth.resp_schema import ResponseResult
+from app.core import database
+from app.core import shop_registry as shop_registry_module
+from app.core.shop_registry import ShopRegistry
+from app.models.dashboard_models import Shop
+
+SELLERS = [
+    {'sid': 101, 'name': 'NA', 'seller_id': 'SELLER-A', 'country': 'US', 'region': 'na'},
+    {'sid': 102, 'name': 'CA', 'seller_id': 'SELLER-A', 'country': 'CA', 'region': 'na'},
+]
+
+
+class FakeOpenApi(OpenApiBase):
+    """店铺列表接口, fail 为真时返回错误码"""
+
+    def __init__(self):
+        super().__init__('http://fake', 'app_id', 'app_secret')
+        self.fail = False
+
+    async def request(self, access_token, route_name, method, req_params=None, req_body=None, **kwargs):
+        if self.fail:
+            return ResponseResult(code=500, message='server busy', data=None)
+        return ResponseResult(code=0, message='', data=SELLERS, total=len(SELLERS))
+
+
+@pytest.fixture(autouse=True)
+def registry_db(tmp_path, monkeypatch):
+    database.init_database(f"sqlite:///{tmp_path / 'shops.db'}", pool_size=2, max_overflow=2, executor_workers=1)
+    database.create_tables()
+
+    async def get_token():
+        return 'token'
+    monkeypatch.setattr(shop_registry_module.token_provider, 'get_token', get_token)
+    yield
+    database.close_database()
+
+
+def test_refresh_failure_keeps_last_loaded_registry():
+    async def scenario():
+        api = FakeOpenApi()
+        registry = ShopRegistry(api, retry_interval=0)
+        await registry.ensure_loaded()
+        loaded = registry.get_stats()
+        api.fail = True
+        await registry.refresh()
+        failed = registry.get_stats()
+        sids = await registry.get_sids_by_seller_id('SELLER-A')
+        api.fail = False
+        await registry.refresh()
+        recovered = registry.get_stats()
+        registry.close()
+        return loaded, failed, sids, recovered
+
+    loaded, failed, sids, recovered = asyncio.run(scenario())
+    assert loaded['degraded'] is False
+    assert failed['degraded'] is True
+    assert failed['source'] == 'api'
+    assert failed['shops'] == 2
+    assert 'code=500' in failed['last_error']
+    assert sids == [101, 102]
+    assert recovered['degraded'] is False
+    assert recovered['failed_at'] is None
+
+
+def test_first_load_failure_falls_back_to_shops_table():
+    with database.get_db_session() as session:
+        session.add(Shop(shop_id='201', shop_name='local shop', platform_id='1', platform='amazon'))
+
+    async def scenario():
+        api = FakeOpenApi()
+        api.fail = True
+        registry = ShopRegistry(api, retry_interval=3600)
+        await registry.ensure_loaded()
+        stats = registry.get_stats()
+        sids = await registry.get_all_sids()
+        by_seller = await registry.get_sids_by_seller_id('SELLER-A')
+        registry.close()
+        return stats, sids, by_seller
+
+    stats, sids, by_seller = asyncio.run(scenario())
+    assert stats['degraded'] is True
+    assert stats['source'] == 'shops_table'
+    assert stats['loaded_at'] is None
+    assert sids == [201]
+    assert by_seller == []
@@ -0,0 +1,328 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+同步任务引擎的状态流转测试
+使用伪造的领星客户端(按 offset 返回固定数据, 可以让某一页挂起或失败)和临时 SQLite 数据库,
+覆盖逐页提交断点、失败重试、执行中取消、任务汇总以及按负责进程认领未完成单元
+"""
+
+import asyncio
+import os
+import socket
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.auth.openapi import OpenApiBase
+from app.auth.resp_schema import ResponseResult
+from app.core import database
+from app.core import sync_jobs
+from app.core.sync_jobs import SyncJobEngine
+from app.models.sync_models import (
+    STATUS_CANCELLED, STATUS_COMPLETED, STATUS_FAILED, STATUS_PENDING, STATUS_RUNNING,
+    PlatformSyncRecord, SyncTaskUnit
+)
+
+# 产品接口不按店铺拆分, 一个任务只有一个同步单元
+PLATFORMS = ['amazon']
+DATA_TYPES = ['products']
+
+
+class FakeOpenApi(OpenApiBase):
+    """按 offset 分页返回 total 条产品记录的领星客户端"""
+
+    def __init__(self, total=5):
+        super().__init__('http://fake', 'app_id', 'app_secret')
+        self.total = total
+        self.offsets = []
+        # offset -> 第一次请求该页时等待的事件
+        self.gates = {}
+        # offset -> 前几次请求该页时返回的错误码
+        self.failures = {}
+
+    async def request(self, access_token, route_name, method, req_params=None, req_body=None, **kwargs):
+        offset, length = req_body['offset'], req_body['length']
+        first_time = offset not in self.offsets
+        self.offsets.append(offset)
+        if first_time and offset in self.gates:
+            await self.gates[offset].wait()
+        if self.failures.get(offset):
+            self.failures[offset] -= 1
+            return ResponseResult(code=500, message='server busy', data=None)
+        records = [{'sku': f'SKU-{i}'} for i in range(offset, min(offset + length, self.total))]
+        return ResponseResult(code=0, message='', data=records, total=self.total)
+
+
+@pytest.fixture(autouse=True)
+def sync_db(tmp_path, monkeypatch):
+    """每个测试使用独立的 SQLite 文件, 并跳过领星令牌获取"""
+    database.init_database(f"sqlite:///{tmp_path / 'sync.db'}", pool_size=2, max_overflow=2, executor_workers=1)
+    database.create_tables()
+
+    async def get_token():
+        return 'token'
+    monkeypatch.setattr(sync_jobs.token_provider, 'get_token', get_token)
+    yield
+    database.close_database()
+
+
+def make_engine(api, **kwargs):
+    options = dict(concurrency=1, page_size=2, max_attempts=2, retry_delay=0, heartbeat_interval=3600, stale_after=60)
+    options.update(kwargs)
+    return SyncJobEngine(api, **options)
+
+
+async def wait_for(predicate, timeout=5):
+    """轮询直到 predicate() 为真"""
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not await predicate():
+        if asyncio.get_running_loop().time() > deadline:
+            raise AssertionError('等待超时')
+        await asyncio.sleep(0.01)
+
+
+async def wait_task(engine, task_id, status):
+    async def done():
+        return (await engine.get_task(task_id))['status'] == status
+    await wait_for(done)
+    return await engine.get_task(task_id)
+
+
+def load_unit(task_id):
+    with database.get_db_session() as session:
+        unit = session.query(SyncTaskUnit).filter(SyncTaskUnit.task_id == task_id).one()
+        session.expunge(unit)
+        return unit
+
+
+def update_unit(task_id, **values):
+    with database.get_db_session() as session:
+        session.query(SyncTaskUnit).filter(SyncTaskUnit.task_id == task_id).update(values)
+
+
+def record_count():
+    with database.get_db_session() as session:
+        return session.query(PlatformSyncRecord).count()
+
+
+def test_unit_completes_page_by_page():
+    async def scenario():
+        api = FakeOpenApi(total=5)
+        engine = make_engine(api)
+        task = await engine.create_task(PLATFORMS, DATA_TYPES)
+        task = await wait_task(engine, task['task_id'], STATUS_COMPLETED)
+        engine.close()
+        return api, task
+
+    api, task = asyncio.run(scenario())
+    assert api.offsets == [0, 2, 4]
+    assert task['progress'] == 100.0
+    assert task['pages_done'] == task['pages_total'] == 3
+    assert task['records_done'] == 5
+    unit = task['units'][0]
+    assert unit['status'] == STATUS_COMPLETED
+    assert unit['records_total'] == 5
+    assert unit['owner'] is None
+    assert load_unit(task['task_id']).checkpoint == 6
+    assert record_count() == 5
+
+
+def test_failed_page_retries_from_checkpoint():
+    async def scenario():
+        api = FakeOpenApi(total=5)
+        api.failures[2] = 1
+        engine = make_engine(api)
+        task = await engine.create_task(PLATFORMS, DATA_TYPES)
+        task = await wait_task(engine, task['task_id'], STATUS_COMPLETED)
+        engine.close()
+        return api, task
+
+    api, task = asyncio.run(scenario())
+    # 第二页失败后重试从断点(offset=2)继续, 已提交的第一页不再拉取
+    assert api.offsets == [0, 2, 2, 4]
+    unit = task['units'][0]
+    assert unit['attempts'] == 1
+    assert unit['error_message'] is None
+    assert record_count() == 5
+
+
+def test_retry_exhaustion_fails_unit_and_task():
+    async def scenario():
+        api = FakeOpenApi(total=5)
+        api.failures[0] = 10
+        engine = make_engine(api, max_attempts=2)
+        task = await engine.create_task(PLATFORMS, DATA_TYPES)
+        task = await wait_task(engine, task['task_id'], STATUS_FAILED)
+        stats = engine.get_stats()
+        engine.close()
+        return api, task, stats
+
+    api, task, stats = asyncio.run(scenario())
+    assert api.offsets == [0, 0]
+    unit = task['units'][0]
+    assert unit['status'] == STATUS_FAILED
+    assert unit['attempts'] == 2
+    assert 'code=500' in unit['error_message']
+    assert task['error_message'] == '1 个同步单元失败'
+    assert stats['units_failed'] == 1
+    assert stats['owned'] == 0
+
+
+def test_cancel_during_page_discards_page():
+    async def scenario():
+        api = FakeOpenApi(total=5)
+        api.gates[2] = asyncio.Event()
+        engine = make_engine(api)
+        task = await engine.create_task(PLATFORMS, DATA_TYPES)
+        task_id = task['task_id']
+
+        async def second_page_requested():
+            return 2 in api.offsets
+        await wait_for(second_page_requested)
+        # 从另一个进程取消: 本进程的执行协程不会被直接取消, 提交第二页时才发现任务已取消
+        other_process = make_engine(FakeOpenApi())
+        await other_process.cancel_task(task_id)
+        api.gates[2].set()
+
+        async def unit_released():
+            return not engine.get_stats()['owned']
+        await wait_for(unit_released)
+        task = await engine.get_task(task_id)
+        engine.close()
+        return api, task
+
+    api, task = asyncio.run(scenario())
+    assert api.offsets == [0, 2]
+    assert task['status'] == STATUS_CANCELLED
+    unit = task['units'][0]
+    assert unit['status'] == STATUS_CANCELLED
+    assert unit['pages_done'] == 1
+    assert load_unit(task['task_id']).checkpoint == 2
+    assert record_count() == 2
+
+
+def test_cancel_in_same_process_stops_runner():
+    async def scenario():
+        api = FakeOpenApi(total=5)
+        api.gates[2] = asyncio.Event()
+        engine = make_engine(api)
+        task = await engine.create_task(PLATFORMS, DATA_TYPES)
+
+        async def second_page_requested():
+            return 2 in api.offsets
+        await wait_for(second_page_requested)
+        task = await engine.cancel_task(task['task_id'])
+
+        async def unit_released():
+            return not engine.get_stats()['owned']
+        await wait_for(unit_released)
+        stats = engine.get_stats()
+        engine.close()
+        return task, stats
+
+    task, stats = asyncio.run(scenario())
+    assert task['status'] == STATUS_CANCELLED
+    assert task['units'][0]['status'] == STATUS_CANCELLED
+    assert stats['running'] == 0
+    assert record_count() == 2
+
+
+def test_resume_continues_from_checkpoint_after_crash():
+    async def scenario():
+        api = FakeOpenApi(total=5)
+        api.gates[2] = asyncio.Event()
+        crashed = make_engine(api)
+        task = await crashed.create_task(PLATFORMS, DATA_TYPES)
+        task_id = task['task_id']
+
+        async def second_page_requested():
+            return 2 in api.offsets
+        await wait_for(second_page_requested)
+        # 进程退出: 单元停留在 running, 负责进程仍是已退出的进程
+        crashed.close()
+        stuck = load_unit(task_id)
+
+        # 重启后的进程(同一 pid, 不同的随机标识)认领并从断点继续
+        restarted = make_engine(api)
+        resumed = await restarted.resume()
+        task = await wait_task(restarted, task_id, STATUS_COMPLETED)
+        unit = load_unit(task_id)
+        restarted.close()
+        return api, stuck, resumed, unit, restarted.owner
+
+    api, stuck, resumed, unit, owner = asyncio.run(scenario())
+    assert stuck.status == STATUS_RUNNING
+    assert stuck.checkpoint == 2
+    assert resumed == 1
+    assert api.offsets == [0, 2, 2, 4]
+    assert unit.owner == owner
+    assert unit.pages_done == 3
+    assert record_count() == 5
+
+
+def test_resume_leaves_units_of_live_owners():
+    async def scenario():
+        api = FakeOpenApi(total=5)
+        api.gates[0] = asyncio.Event()
+        creator = make_engine(api)
+        task = await creator.create_task(PLATFORMS, DATA_TYPES)
+        creator.close()
+        task_id = task['task_id']
+        engine = make_engine(api, stale_after=60)
+        now = datetime.now()
+        results = []
+
+        # 其他主机上心跳正常的进程
+        update_unit(task_id, owner='other-host:1234:abcd', heartbeat_at=now, status=STATUS_RUNNING)
+        results.append(await engine.resume())
+        # 本机仍在运行的其他进程
+        update_unit(task_id, owner=f'{socket.gethostname()}:{os.getppid()}:abcd', heartbeat_at=now)
+        results.append(await engine.resume())
+        # 其他主机上心跳超时的进程
+        update_unit(task_id, owner='other-host:1234:abcd', heartbeat_at=now - timedelta(seconds=120))
+        results.append(await engine.resume())
+        unit = load_unit(task_id)
+        # 认领后的单元不会被再次认领
+        results.append(await engine.resume())
+        api.gates[0].set()
+        await wait_task(engine, task_id, STATUS_COMPLETED)
+        engine.close()
+        return results, unit, engine.owner
+
+    results, unit, owner = asyncio.run(scenario())
+    assert results == [0, 0, 1, 0]
+    assert unit.owner == owner
+    assert unit.status in (STATUS_PENDING, STATUS_RUNNING)
+
+
+def test_commit_from_previous_owner_is_discarded():
+    async def scenario():
+        api = FakeOpenApi(total=5)
+        api.gates[2] = asyncio.Event()
+        stalled = make_engine(api)
+        task = await stalled.create_task(PLATFORMS, DATA_TYPES)
+        task_id = task['task_id']
+
+        async def second_page_requested():
+            return 2 in api.offsets
+        await wait_for(second_page_requested)
+        # 负责进程停顿期间被判定为心跳超时, 单元由另一个进程认领并完成
+        update_unit(task_id, owner='other-host:1234:abcd', heartbeat_at=datetime.now() - timedelta(seconds=120))
+        successor = make_engine(api)
+        await successor.resume()
+        await wait_task(successor, task_id, STATUS_COMPLETED)
+        # 原进程恢复后提交的页被丢弃
+        api.gates[2].set()
+
+        async def stalled_released():
+            return not stalled.get_stats()['owned']
+        await wait_for(stalled_released)
+        unit = load_unit(task_id)
+        stalled.close()
+        successor.close()
+        return unit
+
+    unit = asyncio.run(scenario())
+    assert unit.status == STATUS_COMPLETED
+    assert unit.pages_done == 3
+    assert record_count() == 5
@@ -1,13 +1,161 @@
+import hashlib
+import json
+import os
+import random
+import tempfile
+import time
 import requests
 import logging
 from typing import Optional, Dict, Any
+from requests.adapters import HTTPAdapter
 
 logger = logging.getLogger(__name__)
 
+# HTTP 客户端配置
+HTTP_TIMEOUT = (5, 60)              # (连接超时, 读取超时) 秒
+HTTP_POOL_MAXSIZE = 16              # 每个主机保持的连接数（不小于并发回填的线程数）
+HTTP_MAX_RETRIES = 3                # 连接失败、超时、429/5xx 时的最大重试次数
+HTTP_BACKOFF_BASE = 0.5             # 重试退避基数（秒），第 n 次重试最多等待 base * 2^n
+HTTP_BACKOFF_MAX = 10               # 单次退避上限（秒）
+HTTP_RETRY_STATUS = frozenset({429, 500, 502, 503, 504})
+HTTP_CACHE_DIR = os.getenv('RPA_HTTP_CACHE_DIR')  # 报表响应磁盘缓存目录，为空则不缓存
+
+
+class HttpClient:
+    """共享的 HTTP 客户端
+
+    - 连接复用：同一个 requests.Session，按主机保持连接池
+    - 超时：每个请求都带 (连接, 读取) 超时
+    - 重试：连接失败、超时以及 429/5xx 时按带抖动的指数退避重试，429/503 优先使用 Retry-After
+    - 缓存：post_json 传入 cache_ttl 时把响应写入磁盘缓存，只用于结果不再变化的查询（如历史报表）
+
+    本系统调用的接口都是查询接口，因此 POST 也按可重试处理
+    """
+
+    def __init__(self, timeout=HTTP_TIMEOUT, max_retries: int = HTTP_MAX_RETRIES,
+                 pool_maxsize: int = HTTP_POOL_MAXSIZE, cache_dir: Optional[str] = HTTP_CACHE_DIR):
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.cache_dir = cache_dir
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_maxsize)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+
+    def request(self, method: str, url: str, **kwargs) -> requests.Response:
+        """发送请求，失败时重试
+
+        Returns:
+            requests.Response: 最后一次的响应（已检查 HTTP 状态）
+
+        Raises:
+            requests.RequestException: 重试用尽后仍然失败
+        """
+        kwargs.setdefault('timeout', self.timeout)
+        attempt = 0
+        while True:
+            try:
+                response = self.session.request(method, url, **kwargs)
+                if response.status_code not in HTTP_RETRY_STATUS or attempt >= self.max_retries:
+                    response.raise_for_status()
+                    return response
+                delay = self._retry_after(response)
+                reason = f"HTTP {response.status_code}"
+                response.close()
+            except (requests.ConnectionError, requests.Timeout) as e:
+                if attempt >= self.max_retries:
+                    raise
+                delay = None
+                reason = type(e).__name__
+
+            if delay is None:
+                delay = self._backoff(attempt)
+            attempt += 1
+            logger.warning(f"请求失败（{reason}），{delay:.2f} 秒后第 {attempt} 次重试: {method} {url}")
+            time.sleep(delay)
+
+    def post(self, url: str, **kwargs) -> requests.Response:
+        return self.request('POST', url, **kwargs)
+
+    def post_json(self, url: str, payload: Dict[str, Any], headers: Optional[Dict[str, str]] = None,
+                  cache_ttl: Optional[float] = None) -> Any:
+        """POST JSON 并返回解析后的响应体
+
+        Args:
+            url: 请求地址
+            payload: 请求体
+            headers: 请求头（可选）
+            cache_ttl: 磁盘缓存有效期（秒），为 None 或未配置缓存目录时不缓存；只缓存 code 为 0 的响应
+
+        Returns:
+            Any: 解析后的 JSON
+        """
+        cache_path = None
+        if cache_ttl and self.cache_dir:
+            key = json.dumps([url, payload], sort_keys=True, ensure_ascii=False)
+            cache_path = os.path.join(self.cache_dir, hashlib.sha256(key.encode('utf-8')).hexdigest() + '.json')
+            cached = self._read_cache(cache_path, cache_ttl)
+            if cached is not None:
+                logger.info(f"命中响应缓存: {url}")
+                return cached
+
+        data = self.post(url, json=payload, headers=headers).json()
+        # 只缓存成功的响应（code == 0），错误响应下次仍然重新请求
+        if cache_path is not None and isinstance(data, dict) and data.get('code') == 0:
+            self._write_cache(cache_path, data)
+        return data
+
+    def close(self):
+        self.session.close()
+
+    @staticmethod
+    def _backoff(attempt: int) -> float:
+        # 带抖动的指数退避：在 [0.5, 1] 倍的退避时间内随机，避免并发请求同时重试
+        return min(HTTP_BACKOFF_MAX, HTTP_BACKOFF_BASE * (2 ** attempt)) * random.uniform(0.5, 1.0)
+
+    @staticmethod
+    def _retry_after(response: requests.Response) -> Optional[float]:
+        value = response.headers.get('Retry-After')
+        if value and value.isdigit():
+            return min(HTTP_BACKOFF_MAX, float(value))
+        return None
+
+    @staticmethod
+    def _read_cache(path: str, ttl: float) -> Any:
+        try:
+            if time.time() - os.path.getmtime(path) > ttl:
+                return None
+            with open(path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _write_cache(self, path: str, data: Any):
+        # 先写临时文件再替换，并发写同一个键时不会读到半个文件
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False)
+            os.replace(tmp_path, path)
+        except (OSError, TypeError, ValueError) as e:
+            logger.warning(f"写入响应缓存失败: {str(e)}")
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+
+
+# 全局 HTTP 客户端，所有脚本共用连接池
+http_client = HttpClient()
+
+
 class ApiClient:
-    def __init__(self, base_url: str = "http://192.168.17.123"):
+    def __init__(self, base_url: str = "http://192.168.17.123", client: Optional[HttpClient] = None):
         self.base_url = base_url
-        
+        self.client = client or http_client
+
     def get_seller_list(self, offset: int = 0, length: int = 200) -> Optional[Dict[str, Any]]:
         """获取销售商列表"""
         try:
@@ -21,11 +169,9 @@ class ApiClient:
                 "is_sync": 1,
                 "status": 1
             }
-            
-            response = requests.post(url, headers=headers, json=payload)
-            response.raise_for_status()  # 检查HTTP错误
-            return response.json()
-            
+
+            return self.client.post_json(url, payload, headers=headers)
+
         except requests.RequestException as e:
             logger.error(f"API请求失败: {str(e)}")
             return None
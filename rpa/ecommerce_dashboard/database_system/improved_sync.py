@@ -6,11 +6,17 @@
 实现月份范围检测、汇率数据自动更新和按月份处理销售数据
 """
 
+import json
 import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import date, datetime, timedelta
-from typing import List, Optional, Set, Tuple
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
 from dateutil.relativedelta import relativedelta
-from manage_data import DatabaseManager, DataSyncManager, ExchangeRate
+from api_client import HttpClient, http_client, HTTP_POOL_MAXSIZE
+from manage_data import DatabaseManager, GetData, ExchangeRate, Shop
 
 # 配置日志
 logging.basicConfig(
@@ -23,20 +29,206 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# 回填断点文件：记录每个回填任务已完成的月份
+CHECKPOINT_FILE = 'improved_sync_checkpoint.json'
+
+
+def month_range(month_str: str, start_date: Optional[date] = None, end_date: Optional[date] = None) -> Tuple[date, date]:
+    """计算月份的起止日期，并限制在 [start_date, end_date] 内
+    
+    Args:
+        month_str: 月份，格式为 YYYY-MM
+        start_date: 整体开始日期（可选）
+        end_date: 整体结束日期（可选）
+        
+    Returns:
+        Tuple[date, date]: 该月份实际处理的开始和结束日期
+    """
+    year, month = map(int, month_str.split('-'))
+    month_start = date(year, month, 1)
+    month_end = month_start + relativedelta(months=1) - timedelta(days=1)
+    if start_date is not None:
+        month_start = max(month_start, start_date)
+    if end_date is not None:
+        month_end = min(month_end, end_date)
+    return month_start, month_end
+
+
+class BackfillCheckpoint:
+    """回填断点
+    
+    以 JSON 文件保存每个任务已完成的月份，进程中断后重新运行同一任务时跳过这些月份；
+    任务全部完成后清除，下次运行重新同步
+    """
+    
+    def __init__(self, path: str = CHECKPOINT_FILE):
+        self.path = path
+        self._data: Dict[str, Dict[str, Any]] = {}
+        if os.path.exists(path):
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    self._data = json.load(f)
+            except (OSError, ValueError) as e:
+                logger.warning(f"读取回填断点失败，将重新开始: {str(e)}")
+                self._data = {}
+    
+    def completed(self, job_key: str) -> Dict[str, Any]:
+        """获取任务已完成的月份 {月份: 记录数}"""
+        return dict(self._data.get(job_key, {}))
+    
+    def mark_done(self, job_key: str, month_str: str, records: int):
+        """记录月份完成并立即落盘"""
+        self._data.setdefault(job_key, {})[month_str] = records
+        self._save()
+    
+    def clear(self, job_key: str):
+        """任务全部完成后清除断点"""
+        if self._data.pop(job_key, None) is not None:
+            self._save()
+    
+    def _save(self):
+        # 先写临时文件再替换，中途崩溃不会留下损坏的断点文件
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self._data, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.path)
+
+
+class MonthlyBackfillRunner:
+    """按月份并发回填
+    
+    - 拉取：有界线程池中并发请求各月份数据，共用 HttpClient 的连接池（连接保持、超时、重试）
+    - 写入：只在调用线程中按完成顺序逐月写入数据库（单写入者），避免多个连接争用同一批行
+    - 断点：每写完一个月份即记录，中断后重新运行同一任务只处理未完成的月份
+    """
+    
+    def __init__(self, job_name: str,
+                 fetch: Callable[[str, date, date, HttpClient], Any],
+                 write: Callable[[str, date, date, Any], int],
+                 max_workers: int = 4,
+                 checkpoint: Optional[BackfillCheckpoint] = None,
+                 client: Optional[HttpClient] = None):
+        """初始化回填器
+        
+        Args:
+            job_name: 任务名称（与日期范围一起组成断点键）
+            fetch: 拉取函数 (月份, 开始日期, 结束日期, HTTP客户端) -> 数据，在线程池中执行
+            write: 写入函数 (月份, 开始日期, 结束日期, 数据) -> 记录数，在调用线程中执行，失败时抛出异常
+            max_workers: 并发拉取的月份数（超过 HTTP_POOL_MAXSIZE 时多出的连接不会被复用）
+            checkpoint: 断点存储，默认使用 CHECKPOINT_FILE
+            client: HTTP 客户端，默认使用共享的 http_client
+        """
+        self.job_name = job_name
+        self.fetch = fetch
+        self.write = write
+        self.max_workers = max(1, max_workers)
+        self.checkpoint = checkpoint or BackfillCheckpoint()
+        self.client = client or http_client
+        if self.max_workers > HTTP_POOL_MAXSIZE:
+            logger.warning(f"并发数 {self.max_workers} 超过 HTTP 连接池大小 {HTTP_POOL_MAXSIZE}，部分连接将无法复用")
+    
+    def _fetch(self, month_str: str, month_start: date, month_end: date) -> Tuple[Any, float]:
+        started = time.perf_counter()
+        data = self.fetch(month_str, month_start, month_end, self.client)
+        return data, time.perf_counter() - started
+    
+    def run(self, months: List[str], start_date: Optional[date] = None,
+            end_date: Optional[date] = None) -> Dict[str, Any]:
+        """执行回填
+        
+        Args:
+            months: 月份列表，格式为 YYYY-MM
+            start_date: 整体开始日期（可选，用于限制首尾月份）
+            end_date: 整体结束日期（可选）
+            
+        Returns:
+            Dict[str, Any]: 回填汇总（完成/跳过/失败的月份、记录数、耗时、吞吐量）
+        """
+        if not months:
+            return {'job': self.job_name, 'months': 0, 'skipped': 0, 'completed': 0, 'failed': [], 'records': 0}
+        job_key = f"{self.job_name}:{start_date or months[0]}:{end_date or months[-1]}"
+        done = self.checkpoint.completed(job_key)
+        pending = [m for m in months if m not in done]
+        if done:
+            logger.info(f"♻️ {self.job_name}: 从断点继续，跳过已完成的 {len(done)} 个月份: {sorted(done)}")
+        
+        summary = {
+            'job': self.job_name,
+            'months': len(months),
+            'skipped': len(months) - len(pending),
+            'completed': 0,
+            'failed': [],
+            'records': 0,
+            'fetch_seconds': 0.0,
+            'write_seconds': 0.0,
+        }
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix=f"backfill-{self.job_name}") as pool:
+            futures = {}
+            for month_str in pending:
+                month_start, month_end = month_range(month_str, start_date, end_date)
+                future = pool.submit(self._fetch, month_str, month_start, month_end)
+                futures[future] = (month_str, month_start, month_end)
+            
+            # 单写入者：按拉取完成的顺序逐月写入
+            for future in as_completed(futures):
+                month_str, month_start, month_end = futures[future]
+                try:
+                    data, fetch_seconds = future.result()
+                    summary['fetch_seconds'] += fetch_seconds
+                    write_started = time.perf_counter()
+                    records = self.write(month_str, month_start, month_end, data)
+                    summary['write_seconds'] += time.perf_counter() - write_started
+                except Exception as e:
+                    logger.error(f"❌ {self.job_name}: {month_str} 月份回填失败: {str(e)}")
+                    summary['failed'].append(month_str)
+                    continue
+                self.checkpoint.mark_done(job_key, month_str, records)
+                summary['completed'] += 1
+                summary['records'] += records
+                logger.info(f"✅ {self.job_name}: {month_str} 月份完成，{records} 条记录，拉取耗时 {fetch_seconds:.2f} 秒")
+        
+        summary['elapsed_seconds'] = time.perf_counter() - started
+        summary['failed'].sort()
+        if not summary['failed']:
+            self.checkpoint.clear(job_key)
+        self._print_summary(summary)
+        return summary
+    
+    @staticmethod
+    def _print_summary(summary: Dict[str, Any]):
+        elapsed = summary['elapsed_seconds']
+        months_done = summary['completed']
+        print(f"📈 回填汇总 [{summary['job']}]: "
+              f"完成 {months_done}/{summary['months']} 个月份（断点跳过 {summary['skipped']}，失败 {len(summary['failed'])}），"
+              f"{summary['records']} 条记录，总耗时 {elapsed:.2f} 秒")
+        if elapsed > 0:
+            print(f"   吞吐量: {months_done / elapsed:.2f} 月/秒，{summary['records'] / elapsed:.1f} 条/秒；"
+                  f"拉取累计 {summary['fetch_seconds']:.2f} 秒（并发后节省 {max(0.0, summary['fetch_seconds'] + summary['write_seconds'] - elapsed):.2f} 秒），"
+                  f"写入累计 {summary['write_seconds']:.2f} 秒")
+        if summary['failed']:
+            print(f"   失败月份: {summary['failed']}（重新运行将从断点继续）")
+
+
 class ImprovedDataSyncManager:
     """改进的数据同步管理器
     
     支持跨月份数据同步，包含智能汇率数据检查和更新
     """
     
-    def __init__(self, db_manager: DatabaseManager):
+    def __init__(self, db_manager: DatabaseManager, max_workers: int = 4,
+                 checkpoint: Optional[BackfillCheckpoint] = None):
         """初始化改进的数据同步管理器
         
         Args:
             db_manager: 数据库管理器实例
+            max_workers: 按月份并发拉取的线程数
+            checkpoint: 回填断点存储，默认使用 CHECKPOINT_FILE
         """
         self.db_manager = db_manager
-        self.data_sync_manager = DataSyncManager()
+        self.data_sync_manager = GetData
+        self.max_workers = max_workers
+        self.checkpoint = checkpoint or BackfillCheckpoint()
     
     def get_required_months(self, start_date: date, end_date: date) -> List[str]:
         """获取指定日期范围内需要的月份列表
@@ -115,31 +307,23 @@ class ImprovedDataSyncManager:
         
         logger.info(f"🔄 开始更新缺失的汇率数据: {missing_months}")
         
-        success_count = 0
-        for month_str in missing_months:
-            try:
-                # 获取该月份的汇率数据
-                logger.info(f"📡 正在获取 {month_str} 月份的汇率数据...")
-                currency_data = self.data_sync_manager.get_currency_rates(month_str)
-                
-                if not currency_data:
-                    logger.error(f"❌ 无法获取 {month_str} 月份的汇率数据")
-                    continue
-                
-                # 使用该月份第一天作为汇率日期
-                year, month = map(int, month_str.split('-'))
-                target_date = date(year, month, 1)
-                
-                # 同步汇率数据到数据库
-                if self.data_sync_manager.sync_currency_data(self.db_manager, currency_data, target_date):
-                    logger.info(f"✅ {month_str} 月份汇率数据更新成功")
-                    success_count += 1
-                else:
-                    logger.error(f"❌ {month_str} 月份汇率数据更新失败")
-                    
-            except Exception as e:
-                logger.error(f"更新 {month_str} 月份汇率数据时出错: {str(e)}")
+        def fetch(month_str, month_start, month_end, client):
+            logger.info(f"📡 正在获取 {month_str} 月份的汇率数据...")
+            currency_data = self.data_sync_manager.get_currency_rates(month_str, client=client)
+            if not currency_data:
+                raise ValueError(f"无法获取 {month_str} 月份的汇率数据")
+            return currency_data
+        
+        def write(month_str, month_start, month_end, currency_data):
+            # 使用该月份第一天作为汇率日期
+            if not self.data_sync_manager.sync_currency_data(self.db_manager, currency_data, month_start):
+                raise ValueError(f"{month_str} 月份汇率数据写入失败")
+            return len(currency_data)
+        
+        runner = MonthlyBackfillRunner('exchange_rates', fetch, write, self.max_workers, self.checkpoint)
+        summary = runner.run(missing_months)
         
+        success_count = summary['completed'] + summary['skipped']
         if success_count == len(missing_months):
             logger.info(f"🎉 所有缺失的汇率数据更新完成 ({success_count}/{len(missing_months)})")
             return True
@@ -162,53 +346,53 @@ class ImprovedDataSyncManager:
         # 获取需要的月份
         required_months = self.get_required_months(start_date, end_date)
         
-        success_count = 0
-        total_records = 0
+        # 店铺列表只查询一次，各月份的请求共用
+        session = self.db_manager.Session()
+        try:
+            shop_ids = [row.shop_id for row in session.query(Shop.shop_id)]
+        finally:
+            session.close()
+        if not shop_ids:
+            logger.warning("没有找到有效的店铺ID")
+            return False
+        
+        def fetch(month_str, month_start, month_end, client):
+            logger.info(f"📊 正在获取 {month_str} 月份数据: {month_start} 到 {month_end}")
+            sales_data = self.data_sync_manager.get_sales_stats(
+                self.db_manager,
+                start_date=month_start.strftime('%Y-%m-%d'),
+                end_date=month_end.strftime('%Y-%m-%d'),
+                shop_ids=shop_ids,
+                client=client
+            )
+            if not sales_data:
+                raise ValueError(f"无法获取 {month_str} 月份的销售数据")
+            return sales_data
         
-        for month_str in required_months:
-            try:
-                year, month = map(int, month_str.split('-'))
-                
-                # 计算该月份的开始和结束日期
-                month_start = date(year, month, 1)
-                if month == 12:
-                    month_end = date(year + 1, 1, 1) - timedelta(days=1)
-                else:
-                    month_end = date(year, month + 1, 1) - timedelta(days=1)
-                
-                # 确保不超出用户指定的范围
-                actual_start = max(month_start, start_date)
-                actual_end = min(month_end, end_date)
-                
-                logger.info(f"📊 正在处理 {month_str} 月份数据: {actual_start} 到 {actual_end}")
-                
-                # 获取该月份的销售数据
-                sales_data = self.data_sync_manager.get_sales_stats(
-                    start_date=actual_start.strftime('%Y-%m-%d'),
-                    end_date=actual_end.strftime('%Y-%m-%d')
-                )
-                
-                if sales_data:
-                    # 处理销售数据
-                    processed_count = self.data_sync_manager.process_sales_data(
-                        self.db_manager, sales_data
-                    )
-                    
-                    if processed_count > 0:
-                        logger.info(f"✅ {month_str} 月份销售数据处理成功: {processed_count} 条记录")
-                        success_count += 1
-                        total_records += processed_count
-                    else:
-                        logger.warning(f"⚠️ {month_str} 月份没有销售数据")
-                else:
-                    logger.warning(f"⚠️ 无法获取 {month_str} 月份的销售数据")
-                    
-            except Exception as e:
-                logger.error(f"处理 {month_str} 月份销售数据时出错: {str(e)}")
+        def write(month_str, month_start, month_end, sales_data):
+            if not self.data_sync_manager.process_sales_data(self.db_manager, sales_data, month_start, month_end):
+                raise ValueError(f"{month_str} 月份销售数据处理失败")
+            return self._count_sales_records(sales_data, month_start, month_end)
         
-        logger.info(f"🎯 按月份销售数据同步完成: 成功处理 {success_count}/{len(required_months)} 个月份，共 {total_records} 条记录")
+        runner = MonthlyBackfillRunner('sales', fetch, write, self.max_workers, self.checkpoint)
+        summary = runner.run(required_months, start_date, end_date)
+        
+        success_count = summary['completed'] + summary['skipped']
+        logger.info(f"🎯 按月份销售数据同步完成: 成功处理 {success_count}/{len(required_months)} 个月份，共 {summary['records']} 条记录")
         return success_count == len(required_months)
     
+    @staticmethod
+    def _count_sales_records(sales_data: Dict[str, Any], start_date: date, end_date: date) -> int:
+        """统计销售数据中落在区间内的 店铺 x 日期 条数"""
+        data_content = sales_data.get('data')
+        store_list = data_content.get('list', []) if isinstance(data_content, dict) else data_content or []
+        start_str, end_str = start_date.strftime('%Y-%m-%d'), end_date.strftime('%Y-%m-%d')
+        return sum(
+            1
+            for store in store_list if isinstance(store, dict) and isinstance(store.get('date_collect'), dict)
+            for day in store['date_collect'] if start_str <= day <= end_str
+        )
+    
     def sync_data_with_improved_logic(self, start_date: Optional[date] = None, end_date: Optional[date] = None) -> bool:
         """使用改进逻辑同步数据
         
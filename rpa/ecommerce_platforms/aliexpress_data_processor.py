@@ -7,6 +7,8 @@ import os
 file_path = '速卖通领星后台原始数据(3).xlsx'
 output_file = '速卖通5月处理后数据.xlsx'
 temp_file = '速卖通5月-temp.xlsx'
+# 处理引擎：'vectorized' 按列向量化处理，'legacy' 为原逐行处理（两者输出一致，见 benchmark_aliexpress_processor.py）
+engine = 'vectorized'
 def close_wps_processes():
     try:
         # 尝试关闭WPS Office相关进程
@@ -67,78 +69,205 @@ def unmerge_and_fill():
     if os.path.exists(temp_file):
         os.remove(temp_file)
 
+# 处理数字格式，避免科学计数法
+def format_number(x, current_col):
+    try:
+        if pd.isna(x):
+            return ''
+        if isinstance(x, (int, float)) or (isinstance(x, str) and any(c.isdigit() for c in str(x))):
+            num = float(str(x).strip())
+        if current_col == '商品金额':
+            return '{:.2f}'.format(num)
+        # 其他数字列保持原有处理逻辑
+        if isinstance(x, str) and ('e' in x.lower() or 'E' in x):
+            return '{:.2f}'.format(num)
+        elif isinstance(x, (int, float)):
+            return '{:.2f}'.format(num)
+        return x
+    except:
+        return x
+
+# ==================== 两种引擎共用的读写与处理 ====================
+# 读取、写盘和列格式由两种引擎共用，各步骤只有计算部分分别实现
+
+# sheet1 的列顺序（发货日期由发货时间解析得到），备注和订单状态为新增的空列
+SHEET1_COLUMN_ORDER = [
+    '发货日期', '平台单号', '系统单号', 'MSKU', 'SKU', '数量', 
+    '商品金额', '商品客付运费', '发货仓库', '状态', '客服备注', 
+    '运单号', '标签', '品名', '订单来源', '订单类型', 'ASIN/商品Id'
+]
+SHEET1_NEW_COLUMNS = ['备注', '订单状态']
+# 核对sheet页中按两位小数显示的列
+CHECK_AMOUNT_COLUMNS = ['订单金额', '物流费用', '产品金额', '商品金额', '商品客付运费', '实际商品金额']
+
+def _set_column_formats(worksheet, columns, formats=None):
+    """按列设置数字格式，formats 中没有的列设为文本格式 '@'"""
+    formats = formats or {}
+    for idx, col in enumerate(columns, 1):
+        col_letter = openpyxl.utils.get_column_letter(idx)
+        worksheet.column_dimensions[col_letter].number_format = formats.get(col, '@')
+
+def _output_writable():
+    """检查输出文件是否被其他程序占用"""
+    try:
+        with open(output_file, 'a'):
+            pass
+    except PermissionError:
+        print(f"错误: 文件 '{output_file}' 正在被其他程序使用。请关闭该文件后重试。")
+        return False
+    return True
+
+def _normalize_sheet1(df):
+    """解析发货日期、整数化数值列，并用 -1 拆单替换原订单"""
+    # 处理发货时间和发货日期
+    if '发货时间' in df.columns:
+        # 尝试以 MM/DD/YYYY 格式解析日期，如果失败则尝试其他常见格式
+        df['发货日期'] = pd.to_datetime(df['发货时间'], format='%m/%d/%Y', errors='coerce')
+        # 将日期格式化为 YYYY/MM/DD
+        df['发货日期'] = df['发货日期'].dt.strftime('%Y/%m/%d')
+    
+    # 处理科学计数法的列（如果需要）
+    numeric_columns = df.select_dtypes(include=['float64', 'int64']).columns
+    for col in numeric_columns:
+        df[col] = df[col].apply(lambda x: f'{float(x):.0f}' if pd.notnull(x) else x)
+    
+    # 处理平台单号
+    if '平台单号' in df.columns:
+        mask = df['平台单号'].str.endswith('-1', na=False)
+        base_orders = df[mask]['平台单号'].str.replace('-1', '')
+        df = df[~df['平台单号'].isin(base_orders) | mask]
+        df['平台单号'] = df['平台单号'].str.replace('-1', '')
+    return df
+
+def _fill_msku(df):
+    """MSKU 为空时用品名填充；品名也为空时按 ASIN/商品Id 填充特定值"""
+    mask_rule1 = (df['MSKU'].isna() | (df['MSKU'] == '')) & df['品名'].notna() & (df['品名'] != '')
+    df.loc[mask_rule1, 'MSKU'] = df.loc[mask_rule1, '品名']
+    
+    # 规则2：MSKU和品名都为空时，根据ASIN/商品Id填充特定值
+    mask_rule2a = ((df['MSKU'].isna() | (df['MSKU'] == '')) & 
+                  (df['品名'].isna() | (df['品名'] == '')) & 
+                  (df['ASIN/商品Id'] == '1005005889378484'))
+    df.loc[mask_rule2a, 'MSKU'] = 'GL-XE3000'
+    
+    mask_rule2b = ((df['MSKU'].isna() | (df['MSKU'] == '')) & 
+                  (df['品名'].isna() | (df['品名'] == '')) & 
+                  (df['ASIN/商品Id'] == '4001191579263'))
+    df.loc[mask_rule2b, 'MSKU'] = '运费'
+
+def _select_sheet1_columns(df):
+    """按 SHEET1_COLUMN_ORDER 取列（缺少的列为空），并追加新列"""
+    final_df = pd.DataFrame()
+    for col in SHEET1_COLUMN_ORDER:
+        if col in df.columns:
+            final_df[col] = df[col]
+        else:
+            final_df[col] = ''
+    for col in SHEET1_NEW_COLUMNS:
+        final_df[col] = ''
+    return final_df
+
+def _save_sheet1(final_df):
+    """覆盖写出只含 sheet1 的输出文件，所有列为文本格式；成功返回 True"""
+    try:
+        with pd.ExcelWriter(output_file, engine='openpyxl') as writer:
+            final_df.to_excel(writer, sheet_name='sheet1', index=False)
+            _set_column_formats(writer.sheets['sheet1'], final_df.columns)
+    except Exception as e:
+        print(f"保存文件时出错: {e}")
+        return False
+    return True
+
+def _save_backend_sheet(df_backend):
+    """把后台sheet页写入（替换）输出文件，输出文件不存在时新建；成功返回 True"""
+    try:
+        with pd.ExcelWriter(output_file, mode='a', engine='openpyxl', if_sheet_exists='replace') as writer:
+            df_backend.to_excel(writer, sheet_name='后台', index=False)
+    except PermissionError:
+        print(f"错误: 文件 '{output_file}' 正在被其他程序使用。请关闭该文件后重试。")
+        return False
+    except FileNotFoundError:
+        try:
+            df_backend.to_excel(output_file, sheet_name='后台', index=False)
+        except Exception as e:
+            print(f"保存文件时出错: {e}")
+            return False
+    except Exception as e:
+        print(f"处理后台数据时出错: {e}")
+        return False
+    return True
+
+def _read_status_inputs():
+    """订单状态步骤的输入：原始sheet1、处理后的sheet1和后台（均按原始类型读取）"""
+    df_original = pd.read_excel(file_path, sheet_name='sheet1')
+    df_sheet1 = pd.read_excel(output_file, sheet_name='sheet1')
+    df_backend = pd.read_excel(output_file, sheet_name='后台')
+    return df_original, df_sheet1, df_backend
+
+def _finalize_status_sheet(df_sheet1):
+    """发货日期统一为 YYYY-MM-DD，删除ASIN/商品Id列，系统单号和运单号转为文本"""
+    if '发货日期' in df_sheet1.columns:
+        df_sheet1['发货日期'] = pd.to_datetime(df_sheet1['发货日期'], errors='coerce').dt.strftime('%Y-%m-%d')
+    
+    columns = df_sheet1.columns.tolist()
+    if 'ASIN/商品Id' in columns:
+        columns.remove('ASIN/商品Id')
+    df_sheet1 = df_sheet1[columns]
+    
+    # 最终确认系统单号和运单号为文本格式
+    df_sheet1['系统单号'] = df_sheet1['系统单号'].astype(str)
+    df_sheet1['运单号'] = df_sheet1['运单号'].astype(str)
+    return df_sheet1
+
+def _save_status_sheets(df_sheet1, df_backend):
+    """覆盖写出 sheet1（发货日期为日期格式，其余为文本）和后台；成功返回 True"""
+    try:
+        with pd.ExcelWriter(output_file, engine='openpyxl') as writer:
+            df_sheet1.to_excel(writer, sheet_name='sheet1', index=False)
+            _set_column_formats(writer.sheets['sheet1'], df_sheet1.columns, {'发货日期': 'yyyy-mm-dd'})
+            df_backend.to_excel(writer, sheet_name='后台', index=False)
+    except PermissionError:
+        print(f"错误: 文件 '{output_file}' 正在被其他程序使用。请关闭该文件后重试。")
+        return False
+    except Exception as e:
+        print(f"保存文件时出错: {e}")
+        return False
+    return True
+
+def _read_check_inputs():
+    """核对步骤的输入：后台和sheet1（均按文本读取）"""
+    df_backend = pd.read_excel(output_file, sheet_name='后台', dtype=str)
+    df_sheet1 = pd.read_excel(output_file, sheet_name='sheet1', dtype=str)
+    return df_backend, df_sheet1
+
+def _replace_sheet(df, sheet_name, formats=None):
+    """在输出文件中替换 sheet_name 工作表，列格式见 _set_column_formats"""
+    with pd.ExcelWriter(output_file, mode='a', engine='openpyxl', if_sheet_exists='replace') as writer:
+        df.to_excel(writer, sheet_name=sheet_name, index=False)
+        _set_column_formats(writer.sheets[sheet_name], df.columns, formats)
+
+def _save_check_sheets(df_check, df_sheet1=None):
+    """写入核对sheet页；df_sheet1 不为 None 时先替换 sheet1（商品金额有更新）"""
+    if df_sheet1 is not None:
+        _replace_sheet(df_sheet1, 'sheet1', {'商品金额': '0.00', '发货日期': 'yyyy-mm-dd'})
+    _replace_sheet(df_check, '核对', {col: '0.00' for col in CHECK_AMOUNT_COLUMNS})
+
 def process_backend():
     try:
         # 读取sheet1和后台数据
         df = pd.read_excel(output_file, sheet_name='sheet1', dtype=str)
         df_backend = pd.read_excel(file_path, sheet_name='后台', dtype=str)  # 从原始文件读取后台sheet页
         
-        # 处理数字格式，避免科学计数法
-        def format_number(x, current_col):
-            try:
-                if pd.isna(x):
-                        return ''
-                if isinstance(x, (int, float)) or (isinstance(x, str) and any(c.isdigit() for c in str(x))):
-                        num = float(str(x).strip())
-                if current_col == '商品金额':
-                            return '{:.2f}'.format(num)
-                        # 其他数字列保持原有处理逻辑
-                if isinstance(x, str) and ('e' in x.lower() or 'E' in x):
-                            return '{:.2f}'.format(num)
-                elif isinstance(x, (int, float)):
-                            return '{:.2f}'.format(num)
-                return x
-            except:
-                return x
-        
         # 对所有列应用格式化
         for col in df.columns:
             df[col] = df[col].apply(lambda x: format_number(x, col))
         for col in df_backend.columns:
             df_backend[col] = df_backend[col].apply(lambda x: format_number(x, col))
         
-        # 处理发货时间和发货日期
-        if '发货时间' in df.columns:
-            # 尝试以 MM/DD/YYYY 格式解析日期，如果失败则尝试其他常见格式
-            df['发货日期'] = pd.to_datetime(df['发货时间'], format='%m/%d/%Y', errors='coerce')
-            # 将日期格式化为 YYYY/MM/DD
-            df['发货日期'] = df['发货日期'].dt.strftime('%Y/%m/%d')
-        
-        # 处理科学计数法的列（如果需要）
-        numeric_columns = df.select_dtypes(include=['float64', 'int64']).columns
-        for col in numeric_columns:
-            df[col] = df[col].apply(lambda x: f'{float(x):.0f}' if pd.notnull(x) else x)
-        
-        # 处理平台单号
-        if '平台单号' in df.columns:
-            mask = df['平台单号'].str.endswith('-1', na=False)
-            base_orders = df[mask]['平台单号'].str.replace('-1', '')
-            df = df[~df['平台单号'].isin(base_orders) | mask]
-            df['平台单号'] = df['平台单号'].str.replace('-1', '')
-    
-        # 定义需要的列（注意：发货日期已经在前面处理）
-        column_order = [
-            '发货日期', '平台单号', '系统单号', 'MSKU', 'SKU', '数量', 
-            '商品金额', '商品客付运费', '发货仓库', '状态', '客服备注', 
-            '运单号', '标签', '品名', '订单来源', '订单类型', 'ASIN/商品Id'
-        ]
-        if '商品金额' in df.columns:
-            column_order.append('商品金额')
-        new_columns = ['备注', '订单状态']
+        df = _normalize_sheet1(df)
         
         # 筛选现有列并添加新列
-        final_df = pd.DataFrame()
-        
-        # 添加现有列（如果存在）
-        for col in column_order:
-            if col in df.columns:
-                final_df[col] = df[col]
-            else:
-                final_df[col] = ''
-        
-        # 添加新列（空值）
-        for col in new_columns:
-            final_df[col] = ''
+        final_df = _select_sheet1_columns(df)
         
         # 保存sheet1的处理结果前，将所有数据转换为文本
         def convert_scientific_notation(x):
@@ -160,82 +289,17 @@ def process_backend():
             final_df[col] = final_df[col].astype(str)
             final_df[col] = final_df[col].apply(convert_scientific_notation)
         
-           
-        if 'MSKU' in df.columns and '品名' in df.columns:
-            # 处理MSKU的填充规则
-            mask_rule1 = (df['MSKU'].isna() | (df['MSKU'] == '')) & df['品名'].notna() & (df['品名'] != '')
-        df.loc[mask_rule1, 'MSKU'] = df.loc[mask_rule1, '品名']
-        
-        # 规则2：MSKU和品名都为空时，根据ASIN/商品Id填充特定值
-        mask_rule2a = ((df['MSKU'].isna() | (df['MSKU'] == '')) & 
-                      (df['品名'].isna() | (df['品名'] == '')) & 
-                      (df['ASIN/商品Id'] == '1005005889378484'))
-        df.loc[mask_rule2a, 'MSKU'] = 'GL-XE3000'
-        
-        mask_rule2b = ((df['MSKU'].isna() | (df['MSKU'] == '')) & 
-                      (df['品名'].isna() | (df['品名'] == '')) & 
-                      (df['ASIN/商品Id'] == '4001191579263'))
-        df.loc[mask_rule2b, 'MSKU'] = '运费'
+        # 处理MSKU的填充规则
+        _fill_msku(df)
             
         # 创建最终DataFrame时按新的列顺序排序
-        final_df = pd.DataFrame()
-        for col in column_order:
-            if col in df.columns:
-                final_df[col] = df[col]
-            else:
-                final_df[col] = ''
-    
-        # 添加现有列（如果存在）
-        for col in column_order:
-            if col in df.columns:
-                final_df[col] = df[col]
-            else:
-                final_df[col] = ''
-        
-        # 添加新列（空值）
-        for col in new_columns:
-            final_df[col] = ''
+        final_df = _select_sheet1_columns(df)
         
         # 保存sheet1的处理结果前检查文件是否被占用
-        # output_file = '速卖通订单管理202502-处理后.xlsx'
-        try:
-            # 尝试打开文件检查是否可写
-            with open(output_file, 'a'):
-                pass
-        except PermissionError:
-            print(f"错误: 文件 '{output_file}' 正在被其他程序使用。请关闭该文件后重试。")
+        if not _output_writable():
             return
-            
-        # 保存处理结果
-        try:
-            with pd.ExcelWriter(output_file, engine='openpyxl') as writer:
-                final_df.to_excel(writer, sheet_name='sheet1', index=False)
-                worksheet = writer.sheets['sheet1']
-                if '发货日期' in final_df.columns:
-                    final_df['发货日期'] = pd.to_datetime(final_df['发货日期'], errors='coerce').dt.strftime('%Y-%m-%d')
-                for idx, col in enumerate(final_df.columns, 1):
-                    col_letter = openpyxl.utils.get_column_letter(idx)
-                    if col == '发货日期':
-                        worksheet.column_dimensions[col_letter].number_format = 'yyyy-mm-dd'
-                    else:
-                        worksheet.column_dimensions[col_letter].number_format = '@'
-                # 设置列格式为文本，但商品金额列保持数字格式
-                workbook = writer.book
-                worksheet = writer.sheets['sheet1']
-                for idx, col in enumerate(final_df.columns, 1):
-                    col_letter = openpyxl.utils.get_column_letter(idx)
-                    if col == '商品金额':
-                        worksheet.column_dimensions[col_letter].number_format = '0.00'
-                    elif col == '发货日期':
-                        worksheet.column_dimensions[col_letter].number_format = 'yyyy-mm-dd'
-                    else:
-                        worksheet.column_dimensions[col_letter].number_format = '@'
-                for col in range(1, len(final_df.columns) + 1):
-                    worksheet.column_dimensions[openpyxl.utils.get_column_letter(col)].number_format = '@'
-        except Exception as e:
-            print(f"保存文件时出错: {e}")
+        if not _save_sheet1(final_df):
             return
-    
         
         # 处理后台sheet页
         df_backend = pd.read_excel(file_path, sheet_name='后台')
@@ -254,20 +318,7 @@ def process_backend():
             df_backend['发货日期'] = df_backend['发货时间'].astype(str).str[:10]  # 只取前10个字符，即日期部分
         
         # 保存处理后的数据
-        try:
-            with pd.ExcelWriter(output_file, mode='a', engine='openpyxl', if_sheet_exists='replace') as writer:
-                df_backend.to_excel(writer, sheet_name='后台', index=False)
-        except PermissionError:
-            print(f"错误: 文件 '{output_file}' 正在被其他程序使用。请关闭该文件后重试。")
-            return
-        except FileNotFoundError:
-            try:
-                df_backend.to_excel(output_file, sheet_name='后台', index=False)
-            except Exception as e:
-                print(f"保存文件时出错: {e}")
-                return
-        except Exception as e:
-            print(f"处理后台数据时出错: {e}")
+        if not _save_backend_sheet(df_backend):
             return
         
         print("后台sheet页处理完成！")
@@ -289,10 +340,7 @@ def format_order_number(x):
 def update_order_status():
     try:
         # 第一阶段：读取数据
-     
-        df_original = pd.read_excel(file_path, sheet_name='sheet1')
-        df_sheet1 = pd.read_excel(output_file, sheet_name='sheet1')
-        df_backend = pd.read_excel(output_file, sheet_name='后台')
+        df_original, df_sheet1, df_backend = _read_status_inputs()
         
         # 转换订单号和平台单号为标准文本格式
         df_backend['订单号'] = df_backend['订单号'].apply(format_order_number)
@@ -374,75 +422,11 @@ def update_order_status():
         mask_4px = ((df_sheet1['备注'].isna()) | (df_sheet1['备注'] == ''))
         df_sheet1.loc[mask_4px, '备注'] = df_sheet1.loc[mask_4px, '平台单号'].map(warehouse_map)
         
-        # 保存更新后的结果
-        try:
-            with pd.ExcelWriter(output_file, engine='openpyxl') as writer:
-                df_sheet1.to_excel(writer, sheet_name='sheet1', index=False)
-                worksheet = writer.sheets['sheet1']
-                if '发货日期' in df_sheet1.columns:
-                    df_sheet1['发货日期'] = pd.to_datetime(df_sheet1['发货日期'], errors='coerce').dt.strftime('%Y-%m-%d')
-                for idx, col in enumerate(df_sheet1.columns, 1):
-                    col_letter = openpyxl.utils.get_column_letter(idx)
-                    if col == '发货日期':
-                        worksheet.column_dimensions[col_letter].number_format = 'yyyy-mm-dd'
-                    else:
-                        worksheet.column_dimensions[col_letter].number_format = '@'
-                df_backend.to_excel(writer, sheet_name='后台', index=False)
-        except PermissionError:
-            print(f"错误: 文件 '{output_file}' 正在被其他程序使用。请关闭该文件后重试。")
-            return
-        except Exception as e:
-            print(f"保存文件时出错: {e}")
-            return
-        
-        # 重新排列列顺序，将发货日期放在第一列，并删除金额、运费、发货时间和ASIN/商品Id列
-        columns = df_sheet1.columns.tolist()
-
-        if 'ASIN/商品Id' in columns:
-            columns.remove('ASIN/商品Id')
-        
-        df_sheet1 = df_sheet1[columns]
-        
-        # 最终确认系统单号和运单号为文本格式
-        df_sheet1['系统单号'] = df_sheet1['系统单号'].astype(str)
-        df_sheet1['运单号'] = df_sheet1['运单号'].astype(str)
+        # 发货日期统一为 YYYY-MM-DD，删除ASIN/商品Id列
+        df_sheet1 = _finalize_status_sheet(df_sheet1)
         
         # 保存更新后的结果
-        try:
-            with pd.ExcelWriter(output_file, engine='openpyxl') as writer:
-                df_sheet1.to_excel(writer, sheet_name='sheet1', index=False)
-                worksheet = writer.sheets['sheet1']
-                if '发货日期' in df_sheet1.columns:
-                    df_sheet1['发货日期'] = pd.to_datetime(df_sheet1['发货日期'], errors='coerce').dt.strftime('%Y-%m-%d')
-                for idx, col in enumerate(df_sheet1.columns, 1):
-                    col_letter = openpyxl.utils.get_column_letter(idx)
-                    if col == '发货日期':
-                        worksheet.column_dimensions[col_letter].number_format = 'yyyy-mm-dd'
-                    else:
-                        worksheet.column_dimensions[col_letter].number_format = '@'
-                df_backend.to_excel(writer, sheet_name='后台', index=False)
-                
-                # 设置列格式为文本
-                workbook = writer.book
-                worksheet = writer.sheets['sheet1']
-                
-                # 找到系统单号和运单号的列索引
-                col_indices = {col: idx+1 for idx, col in enumerate(df_sheet1.columns)}
-                
-                # 设置这些列为文本格式
-                if '系统单号' in col_indices:
-                    col_letter = openpyxl.utils.get_column_letter(col_indices['系统单号'])
-                    worksheet.column_dimensions[col_letter].number_format = '@'
-                
-                if '运单号' in col_indices:
-                    col_letter = openpyxl.utils.get_column_letter(col_indices['运单号'])
-                    worksheet.column_dimensions[col_letter].number_format = '@'
-                
-        except PermissionError:
-            print(f"错误: 文件 '{output_file}' 正在被其他程序使用。请关闭该文件后重试。")
-            return
-        except Exception as e:
-            print(f"保存文件时出错: {e}")
+        if not _save_status_sheets(df_sheet1, df_backend):
             return
         
         print("订单状态和发货日期更新完成！")
@@ -589,29 +573,26 @@ def process_semi_warehouse():
     finally:
         if os.path.exists(temp_file):
             os.remove(temp_file)
+# 处理金额列，确保保留两位小数
+def clean_and_convert_amount(x):
+    if pd.notnull(x) and str(x).strip() != '':
+        # 移除货币符号和逗号
+        cleaned_x = str(x).replace('US $', '').replace('$', '').replace(',', '').strip()
+        try:
+            return '{:.2f}'.format(float(cleaned_x))
+        except ValueError:
+            return '0.00' # 如果转换失败，返回 '0.00'
+    return '0.00'
+
 def create_check_sheet():
     try:
-  
-        
         # 读取后台sheet页和sheet1数据
-        df_backend = pd.read_excel(output_file, sheet_name='后台', dtype=str)
-        df_sheet1 = pd.read_excel(output_file, sheet_name='sheet1', dtype=str)
+        df_backend, df_sheet1 = _read_check_inputs()
         
         # 创建新的DataFrame，只包含需要的列
         df_check = pd.DataFrame()
         df_check['订单号'] = df_backend['订单号']
         
-        # 处理金额列，确保保留两位小数
-        def clean_and_convert_amount(x):
-            if pd.notnull(x) and str(x).strip() != '':
-                # 移除货币符号和逗号
-                cleaned_x = str(x).replace('US $', '').replace('$', '').replace(',', '').strip()
-                try:
-                    return '{:.2f}'.format(float(cleaned_x))
-                except ValueError:
-                    return '0.00' # 如果转换失败，返回 '0.00'
-            return '0.00'
-
         df_check['订单金额'] = df_backend['订单金额'].apply(clean_and_convert_amount)
         df_check['物流费用'] = df_backend['物流费用'].apply(clean_and_convert_amount)
         
@@ -657,36 +638,305 @@ def create_check_sheet():
             # 更新sheet1中的商品金额
             mask = df_sheet1['平台单号'].isin(update_map.keys())
             df_sheet1.loc[mask, '商品金额'] = df_sheet1.loc[mask, '平台单号'].map(update_map)
+        
+        # 保存更新后的sheet1（如有）和核对sheet页
+        _save_check_sheets(df_check, df_sheet1 if not need_update.empty else None)
+                    
+    except Exception as e:
+        raise Exception(f"创建核对sheet页时出错 (行号: {e.__traceback__.tb_lineno}): {str(e)}")
+
+# ==================== 向量化引擎 ====================
+# process_backend_vectorized / update_order_status_vectorized / create_check_sheet_vectorized
+# 与上面三个函数共用读取、写盘和列格式，写出相同的工作表，区别只在计算方式：
+#   - 数字/文本规整按列进行：先用字符串方法筛出可能需要转换的单元格，
+#     逐值函数只作用于这些候选值，且每个不同取值只计算一次
+#   - 发货仓库/订单状态/发货日期/备注等映射表改为按键去重后的 Series，用 Series.map 连接（等价于左连接）
+#   - 核对页按平台单号一次连接 sheet1，不再逐行筛选整个 sheet1
+#   - 原实现中结果没有被使用的计算（按文本格式化的后台数据、金额/运费映射、第一次构建的 final_df）不再执行
+
+def _map_unique(values, func):
+    """对 values 中每个不同取值只调用一次 func，再按位置展开"""
+    codes, uniques = pd.factorize(values, use_na_sentinel=False)
+    mapped = np.empty(len(uniques), dtype=object)
+    for i, value in enumerate(uniques):
+        mapped[i] = func(value)
+    return mapped[codes]
+
+def _as_series(values, like):
+    return pd.Series(values, index=like.index, name=like.name)
+
+def _format_number_column(series, current_col):
+    """整列执行 format_number"""
+    values = series.to_numpy(dtype=object)
+    result = values.copy()
+    # 只有含数字的单元格可能被转换（float 只接受 0-9 或其他 Unicode 数字）；
+    # 商品金额以外的列还要求含 e/E；非字符串单元格全部交给 format_number
+    digit_pattern = r'[0-9]|[^\x00-\x7f]'
+    try:
+        if current_col == '商品金额':
+            candidates = series.str.contains(digit_pattern, regex=True, na=True).to_numpy(dtype=bool)
+        else:
+            candidates = np.array(series.str.contains('[eE]', regex=True, na=True), dtype=bool)
+            candidates[candidates] = series[candidates].str.contains(digit_pattern, regex=True, na=True).to_numpy(dtype=bool)
+    except AttributeError:
+        # 列中没有字符串（如整列为空）
+        candidates = np.ones(len(values), dtype=bool)
+    result[candidates] = _map_unique(values[candidates], lambda x: format_number(x, current_col))
+    return _as_series(result, series)
+
+def _format_order_numbers(series):
+    """整列执行 format_order_number"""
+    if series.dtype.kind in 'iuf':
+        # 数值列：'{:.0f}'.format(float(x)) 即按银行家舍入取整
+        values = series.to_numpy(dtype=np.float64)
+        result = np.empty(len(values), dtype=object)
+        missing = np.isnan(values)
+        result[missing] = ''
+        rounded = np.rint(values)
+        exact = ~missing & (np.abs(rounded) < 2 ** 63)
+        result[exact] = rounded[exact].astype(np.int64).astype(str)
+        result[exact & (rounded == 0) & np.signbit(rounded)] = '-0'
+        rest = ~missing & ~exact
+        result[rest] = ['{:.0f}'.format(value) for value in values[rest]]
+        return _as_series(result, series)
+    return _as_series(_map_unique(series.to_numpy(dtype=object), format_order_number), series)
+
+def _check_order_numbers(series):
+    """有意与原实现保持一致：update_order_status 对已格式化的订单号再转换一次，结果不变，
+    但去掉小数点后是数字却不能转换为浮点数的文本（如 '1.2.3'）会抛出 ValueError，整步报错且不写盘。
+    这里不做转换，只在同样的数据上抛出同样的异常，保证两种引擎在异常数据下行为相同"""
+    digits = series.str.replace('.', '', regex=False).str.isdigit()
+    if digits.any():
+        series[digits].to_numpy(dtype=object).astype(np.float64)
+
+def _startswith(series, prefix):
+    """isinstance(x, str) and x.startswith(prefix) 的列版本"""
+    try:
+        return series.str.startswith(prefix, na=False).astype(bool)
+    except AttributeError:
+        return pd.Series(False, index=series.index)
+
+def _lookup_table(keys, values, keep='last'):
+    """按键去重的映射表，keep='last' 时与 dict(zip(keys, values)) 相同，keep='first' 时保留首次出现的值"""
+    table = pd.DataFrame({'key': keys.to_numpy(dtype=object), 'value': values.to_numpy(dtype=object)})
+    table = table.drop_duplicates('key', keep=keep)
+    if table.empty:
+        # Series.map(空 dict) 的结果为 float64 的 NaN
+        return pd.Series(dtype=np.float64)
+    return pd.Series(table['value'].tolist(), index=table['key'].tolist())
+
+def _format_fixed(values, fmt):
+    """按 fmt 格式化浮点数组（factorize 把 0.0 和 -0.0 视为同一取值，单独处理）"""
+    result = _map_unique(values, fmt.format)
+    zero = values == 0
+    result[zero & ~np.signbit(values)] = fmt.format(0.0)
+    result[zero & np.signbit(values)] = fmt.format(-0.0)
+    return result
+
+def process_backend_vectorized():
+    try:
+        # 读取sheet1和后台数据（后台只需要按原始类型读取一次）
+        df = pd.read_excel(output_file, sheet_name='sheet1', dtype=str)
+        df_backend = pd.read_excel(file_path, sheet_name='后台')
+        
+        # 对所有列应用格式化
+        for col in df.columns:
+            df[col] = _format_number_column(df[col], col)
+        
+        df = _normalize_sheet1(df)
+        
+        # 处理MSKU的填充规则，按列顺序创建最终DataFrame
+        _fill_msku(df)
+        final_df = _select_sheet1_columns(df)
+        
+        # 保存sheet1的处理结果前检查文件是否被占用
+        if not _output_writable():
+            return
+        if not _save_sheet1(final_df):
+            return
+        
+        # 处理实际发货单号
+        if '实际发货单号' in df_backend.columns:
+            df_backend['实际发货单号'] = df_backend['实际发货单号'].astype(str)
+            shipment_no = df_backend['实际发货单号']
+            df_backend.insert(
+                df_backend.columns.get_loc('实际发货单号') + 1,
+                '发货单号',
+                shipment_no.str[:23].where(shipment_no != 'nan', '')
+            )
+        
+        # 处理发货时间和发货日期
+        if '发货时间' in df_backend.columns:
+            df_backend['发货日期'] = df_backend['发货时间'].astype(str).str[:10]  # 只取前10个字符，即日期部分
+        
+        # 保存处理后的数据
+        if not _save_backend_sheet(df_backend):
+            return
+        
+        print("后台sheet页处理完成！")
+
+    except Exception as e:
+        print(f"处理后台数据时出错: {e}")
+        return
+
+def update_order_status_vectorized():
+    try:
+        # 第一阶段：读取数据
+        df_original, df_sheet1, df_backend = _read_status_inputs()
+        
+        # 转换订单号和平台单号为标准文本格式
+        df_backend['订单号'] = _format_order_numbers(df_backend['订单号'])
+        df_sheet1['平台单号'] = _format_order_numbers(df_sheet1['平台单号'])
+        _check_order_numbers(df_backend['订单号'])
+        
+        # 确保系统单号和运单号为文本格式
+        system_no = df_sheet1['系统单号'].astype(str)
+        df_sheet1['系统单号'] = system_no.where(system_no != 'nan', '')
+        # 处理运单号：转为文本并移除小数点
+        waybill_no = df_sheet1['运单号'].astype(str)
+        df_sheet1['运单号'] = waybill_no.str.replace('.', '', regex=False).where(waybill_no != 'nan', '')
+        
+        # 发货仓库映射：原始sheet1中以 4PX- 开头的发货仓库
+        warehouse_map = pd.Series(dtype=np.float64)
+        if '发货仓库' in df_original.columns:
+            mask_4px_source = _startswith(df_original['发货仓库'], '4PX-')
+            if mask_4px_source.any():
+                warehouse_map = _lookup_table(
+                    _format_order_numbers(df_original.loc[mask_4px_source, '平台单号']),
+                    df_original.loc[mask_4px_source, '发货仓库']
+                )
+        
+        # 订单号到订单状态、发货日期的映射
+        status_map = _lookup_table(df_backend['订单号'], df_backend['订单状态'])
+        date_map = _lookup_table(df_backend['订单号'], df_backend['发货日期'])
+        
+        # 订单号到业务模式备注的映射
+        remark_map = pd.Series(dtype=np.float64)
+        if '订单业务模式' in df_backend.columns:
+            mode = df_backend['订单业务模式']
+            mask_semi = mode == '半托管仓发订单'
+            mask_weihai = ~mask_semi & (mode == '非半托管订单')
+            if '发货单号' in df_backend.columns:
+                mask_weihai &= df_backend['发货单号'] == 'CAINIAO_STANDARD_WEIHAI'
+            else:
+                mask_weihai &= False
+            mask_remark = mask_semi | mask_weihai
+            remarks = pd.Series(np.where(mask_semi, '半托管仓发订单', '威海仓'), index=df_backend.index)
+            remark_map = _lookup_table(df_backend.loc[mask_remark, '订单号'], remarks[mask_remark])
+        
+        # 然后更新sheet1中的订单状态
+        df_sheet1['订单状态'] = df_sheet1['平台单号'].map(status_map)
+        
+        # 更新发货日期（仅更新空值）
+        mask = df_sheet1['发货日期'].isna() | (df_sheet1['发货日期'] == '')
+        df_sheet1.loc[mask, '发货日期'] = df_sheet1.loc[mask, '平台单号'].map(date_map)
+        
+        # 如果发货日期不为空，则将状态改为"仓库已出库"
+        mask_shipped = (df_sheet1['发货日期'].notna()) & (df_sheet1['发货日期'] != '')
+        df_sheet1.loc[mask_shipped, '状态'] = '仓库已出库'
+        
+        # 更新备注（包括小包仓发货标记）
+        small_parcel = df_sheet1['平台单号'].str.endswith('-1').to_numpy(dtype=bool)
+        df_sheet1['备注'] = _as_series(np.where(small_parcel, '小包仓发货', '').astype(object), df_sheet1['平台单号'])
+        # 更新其他备注信息
+        other_remarks = df_sheet1['平台单号'].str.replace('-1', '').map(remark_map)
+        # 合并备注信息，保留非空的备注
+        df_sheet1['备注'] = df_sheet1['备注'].combine_first(other_remarks)
+        
+        # 添加香港仓发货备注
+        mask_hk = ((df_sheet1['发货日期'].notna()) & 
+                   (df_sheet1['发货日期'] != '') & 
+                   (df_sheet1['状态'] == '不发货') & 
+                   ((df_sheet1['备注'].isna()) | (df_sheet1['备注'] == '')))
+        df_sheet1.loc[mask_hk, '备注'] = '香港仓发货'
+        
+        # 更新4PX发货仓库信息到备注
+        mask_4px = ((df_sheet1['备注'].isna()) | (df_sheet1['备注'] == ''))
+        df_sheet1.loc[mask_4px, '备注'] = df_sheet1.loc[mask_4px, '平台单号'].map(warehouse_map)
+        
+        # 发货日期统一为 YYYY-MM-DD，删除ASIN/商品Id列
+        df_sheet1 = _finalize_status_sheet(df_sheet1)
+        
+        # 保存更新后的结果
+        if not _save_status_sheets(df_sheet1, df_backend):
+            return
+        
+        print("订单状态和发货日期更新完成！")
+        
+    except PermissionError:
+        print(f"错误: 文件正在被其他程序使用。请关闭该文件后重试。")
+        return
+    except Exception as e:
+        print(f"更新订单状态时出错: {str(e)}")
+        return
+
+def create_check_sheet_vectorized():
+    try:
+        # 读取后台sheet页和sheet1数据
+        df_backend, df_sheet1 = _read_check_inputs()
+        
+        # 创建新的DataFrame，只包含需要的列
+        df_check = pd.DataFrame()
+        df_check['订单号'] = df_backend['订单号']
+        
+        # 金额保留两位小数，产品金额 = 订单金额 - 物流费用
+        df_check['订单金额'] = _as_series(_map_unique(df_backend['订单金额'].to_numpy(dtype=object), clean_and_convert_amount), df_backend['订单金额'])
+        df_check['物流费用'] = _as_series(_map_unique(df_backend['物流费用'].to_numpy(dtype=object), clean_and_convert_amount), df_backend['物流费用'])
+        order_amount = df_check['订单金额'].to_numpy(dtype=object).astype(np.float64)
+        shipping_fee = df_check['物流费用'].to_numpy(dtype=object).astype(np.float64)
+        df_check['产品金额'] = _as_series(_format_fixed(order_amount - shipping_fee, '{:.2f}'), df_check['订单号'])
+        
+        # 按平台单号连接sheet1（取第一条匹配记录），未匹配的为空字符串
+        sheet1_first = df_sheet1[df_sheet1['平台单号'].notna()].drop_duplicates('平台单号', keep='first')
+        goods_amount_map = pd.Series(sheet1_first['商品金额'].to_numpy(dtype=object), index=sheet1_first['平台单号'].to_numpy(dtype=object))
+        matched = df_check['订单号'].isin(goods_amount_map.index)
+        df_check['平台单号'] = df_check['订单号'].where(matched, '')  # E列
+        df_check['商品金额'] = df_check['订单号'].map(goods_amount_map).where(matched, '')  # F列
+        
+        # 判断是否需要修改
+        goods_amount = df_check['商品金额'].to_numpy(dtype=object).copy()
+        goods_amount[goods_amount == ''] = '0.00'
+        need_change = np.where(df_check['产品金额'].to_numpy(dtype=object).astype(np.float64) == goods_amount.astype(np.float64), '否', '是')
+        df_check['是否需要修改'] = _as_series(need_change.astype(object), df_check['订单号'])
+        
+        # 更新sheet1中的商品金额
+        need_update = df_check[
+            (df_check['是否需要修改'] == '是') & 
+            (df_check['平台单号'].notna()) & 
+            (df_check['平台单号'] != '')
+        ]
+        
+        if not need_update.empty:
+            # 平台单号到产品金额的映射
+            update_map = _lookup_table(need_update['平台单号'], need_update['产品金额'])
             
-            # 保存更新后的sheet1
-            with pd.ExcelWriter(output_file, mode='a', engine='openpyxl', if_sheet_exists='replace') as writer:
-                df_sheet1.to_excel(writer, sheet_name='sheet1', index=False)
-                worksheet = writer.sheets['sheet1']
-                for idx, col in enumerate(df_sheet1.columns, 1):
-                    col_letter = openpyxl.utils.get_column_letter(idx)
-                    if col == '商品金额':
-                        worksheet.column_dimensions[col_letter].number_format = '0.00'
-                    elif col == '发货日期':
-                        worksheet.column_dimensions[col_letter].number_format = 'yyyy-mm-dd'
-                    else:
-                        worksheet.column_dimensions[col_letter].number_format = '@'
-        
-        # 保存核对sheet页
-        with pd.ExcelWriter(output_file, mode='a', engine='openpyxl', if_sheet_exists='replace') as writer:
-            df_check.to_excel(writer, sheet_name='核对', index=False)
-            
-            # 设置列格式
-            worksheet = writer.sheets['核对']
-            for idx, col in enumerate(df_check.columns, 1):
-                col_letter = openpyxl.utils.get_column_letter(idx)
-                if col in ['订单金额', '物流费用', '产品金额', '商品金额', '商品客付运费', '实际商品金额']:
-                    worksheet.column_dimensions[col_letter].number_format = '0.00'
-                else:
-                    worksheet.column_dimensions[col_letter].number_format = '@'
+            mask = df_sheet1['平台单号'].isin(update_map.index)
+            df_sheet1.loc[mask, '商品金额'] = df_sheet1.loc[mask, '平台单号'].map(update_map)
+        
+        # 保存更新后的sheet1（如有）和核对sheet页
+        _save_check_sheets(df_check, df_sheet1 if not need_update.empty else None)
                     
     except Exception as e:
         raise Exception(f"创建核对sheet页时出错 (行号: {e.__traceback__.tb_lineno}): {str(e)}")
 
+# 各引擎在第2、3、6步使用的函数
+ENGINE_STEPS = {
+    'legacy': (process_backend, update_order_status, create_check_sheet),
+    'vectorized': (process_backend_vectorized, update_order_status_vectorized, create_check_sheet_vectorized),
+}
+
+def pipeline_steps(engine_name=None):
+    """按执行顺序返回处理步骤 [(步骤名, 函数)]，engine_name 默认为全局 engine"""
+    backend_step, status_step, check_step = ENGINE_STEPS[engine_name or engine]
+    return [
+        ('合并单元格', unmerge_and_fill),
+        ('后台数据', backend_step),
+        ('订单状态', status_step),
+        ('仓库数据', process_warehouse_sheets),
+        ('半托仓发货', process_semi_warehouse),
+        ('核对', check_step),
+    ]
+
 # 在主程序中添加新步骤
 if __name__ == "__main__":
     try:
@@ -695,7 +945,8 @@ if __name__ == "__main__":
         print("=== WPS进程关闭尝试完成 ===")
         
         print("\n=== Excel文件处理工具 ===")
-        print("开始处理Excel文件...")
+        print(f"开始处理Excel文件...（处理引擎: {engine}）")
+        backend_step, status_step, check_step = ENGINE_STEPS[engine]
         
         print("\n第1步：处理合并单元格")
         print("✨ 正在拆分合并单元格并填充数据...")
@@ -707,7 +958,7 @@ if __name__ == "__main__":
         print("• 处理订单号格式")
         print("• 处理发货单号")
         print("• 更新发货日期")
-        process_backend()
+        backend_step()
         print("✅ 后台数据处理完成")
         
         print("\n第3步：更新订单状态")
@@ -716,7 +967,7 @@ if __name__ == "__main__":
         print("• 更新发货日期")
         print("• 处理备注信息")
         print("• 更新仓库信息")
-        update_order_status()
+        status_step()
         print("✅ 订单状态更新完成")
         
         print("\n第4步：处理仓库数据")
@@ -732,7 +983,7 @@ if __name__ == "__main__":
         # 新增第6步
         print("\n第6步：创建核对sheet页")
         print("✨ 正在创建核对sheet页...")
-        create_check_sheet()
+        check_step()
         print("✅ 核对sheet页创建完成")
         
         print("\n=== 处理完成 ===")
@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+速卖通订单处理流程：逐行引擎(legacy)与向量化引擎(vectorized)对比
+  - 生成合成工作簿(sheet1 / 后台 / 香港仓和威海仓发货 / 半托仓发货), 默认 10 万订单,
+    包含合并单元格、数字/文本混合的单号、科学计数法文本、空值、-1 拆单和重复订单
+  - 两种引擎分别在独立目录中跑完整的 6 个步骤, 记录每步耗时
+  - 逐个比较输出 xlsx 中的各个部件(工作表 XML、共享字符串、样式等), 只跳过记录生成时间的 docProps/core.xml
+
+用法: python benchmark_aliexpress_processor.py --orders 100000
+"""
+
+import os
+import sys
+import time
+import random
+import shutil
+import zipfile
+import argparse
+import tempfile
+from datetime import datetime, timedelta
+
+import openpyxl
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import aliexpress_data_processor as processor
+
+SHEET1_COLUMNS = [
+    '平台单号', '系统单号', 'MSKU', 'SKU', '数量', '商品金额', '商品客付运费', '发货仓库', '状态',
+    '客服备注', '运单号', '标签', '品名', '订单来源', '订单类型', 'ASIN/商品Id', '发货时间'
+]
+BACKEND_COLUMNS = ['订单号', '订单状态', '订单金额', '物流费用', '发货时间', '实际发货单号', '订单业务模式']
+WAREHOUSE_COLUMNS = ['用户订单号', '店铺编码', '货品ID', '商品编码', '订单状态', '仓库名称']
+SEMI_COLUMNS = ['交易主单', '仓库名称', '货品ID', '商品编码', '数量', '创建时间', '出库时间',
+                '物流单号', '店铺', '备注', '操作人', None]  # 第 12 列表头为空, 读入后为 Unnamed: 11
+
+
+def pick(rng, weighted):
+    """weighted: [(概率, 取值函数或值), ...]"""
+    r = rng.random()
+    for p, value in weighted:
+        if r < p:
+            return value() if callable(value) else value
+        r -= p
+    value = weighted[-1][1]
+    return value() if callable(value) else value
+
+
+def generate_workbook(path, orders, seed):
+    rng = random.Random(seed)
+    base_day = datetime(2025, 5, 1)
+    order_ids = rng.sample(range(8190000000000000, 8199999999999999), orders)
+
+    wb = openpyxl.Workbook()
+    ws = wb.active
+    ws.title = 'sheet1'
+    ws.append(SHEET1_COLUMNS)
+    row_count = 1  # ws.max_row 每次都遍历全部单元格, 自行计数
+    merges = []
+    for order_id in order_ids:
+        day = base_day + timedelta(days=rng.randrange(30))
+        shipped = pick(rng, [
+            (0.6, day.strftime('%m/%d/%Y')), (0.3, None), (0.05, day), (0.05, 'pending'),
+        ])
+        lines = 2 if rng.random() < 0.03 else 1
+        platform_ids = [pick(rng, [(0.88, order_id), (0.12, str(order_id))])]
+        if rng.random() < 0.05:
+            platform_ids.append(f'{order_id}-1')
+        for platform_id in platform_ids:
+            first_row = row_count + 1
+            for _ in range(lines):
+                row_count += 1
+                ws.append([
+                    platform_id,
+                    pick(rng, [(0.95, lambda: rng.randrange(10 ** 17, 10 ** 18)), (0.05, None)]),
+                    pick(rng, [(0.75, lambda: f'MSKU-{rng.randrange(500)}'), (0.25, None)]),
+                    f'SKU-{rng.randrange(800)}',
+                    rng.randint(1, 5),
+                    pick(rng, [
+                        (0.78, lambda: round(rng.uniform(1, 300), 2)), (0.1, lambda: f'{rng.uniform(1, 300):.3f}'),
+                        (0.04, '1.2E+3'), (0.08, None),
+                    ]),
+                    pick(rng, [(0.7, lambda: round(rng.uniform(0, 20), 2)), (0.3, 0)]),
+                    pick(rng, [(0.2, '4PX-深圳仓'), (0.1, '香港仓'), (0.7, None)]),
+                    pick(rng, [(0.3, '不发货'), (0.4, '待发货'), (0.3, '已发货')]),
+                    pick(rng, [(0.9, None), (0.03, 'call 3e5 later'), (0.07, '加急')]),
+                    pick(rng, [
+                        (0.6, lambda: f'LP00{rng.randrange(10 ** 9, 10 ** 10)}CN'),
+                        (0.1, lambda: float(rng.randrange(10 ** 12, 10 ** 13))), (0.3, None),
+                    ]),
+                    pick(rng, [(0.5, None), (0.5, '促销')]),
+                    pick(rng, [(0.7, lambda: f'商品 {rng.randrange(300)}'), (0.3, None)]),
+                    pick(rng, [(0.5, '速卖通'), (0.5, '领星')]),
+                    pick(rng, [(0.8, '普通订单'), (0.2, '补发订单')]),
+                    pick(rng, [
+                        (0.05, '1005005889378484'), (0.05, '4001191579263'),
+                        (0.9, lambda: rng.randrange(10 ** 15, 10 ** 16)),
+                    ]),
+                    shipped,
+                ])
+            if lines > 1:
+                last_row = row_count
+                for col in (1, 17):
+                    merges.append(f'{openpyxl.utils.get_column_letter(col)}{first_row}:'
+                                  f'{openpyxl.utils.get_column_letter(col)}{last_row}')
+    for cell_range in merges:
+        ws.merge_cells(cell_range)
+
+    backend = wb.create_sheet('后台')
+    backend.append(BACKEND_COLUMNS)
+    backend_ids = order_ids + rng.sample(order_ids, orders // 50) + \
+        [order_id + 7 for order_id in rng.sample(order_ids, orders // 30)]
+    for order_id in backend_ids:
+        day = base_day + timedelta(days=rng.randrange(30), seconds=rng.randrange(86400))
+        backend.append([
+            pick(rng, [(0.85, order_id), (0.1, str(order_id)), (0.05, float(order_id))]),
+            pick(rng, [(0.4, '已完成'), (0.3, '等待买家收货'), (0.2, '已取消'), (0.1, None)]),
+            pick(rng, [
+                (0.6, lambda: f'US ${rng.uniform(1, 400):,.2f}'), (0.3, lambda: round(rng.uniform(1, 400), 2)),
+                (0.05, None), (0.05, 'abc'),
+            ]),
+            pick(rng, [(0.5, lambda: round(rng.uniform(0, 20), 2)), (0.3, lambda: f'US ${rng.uniform(0, 20):.2f}'),
+                       (0.2, None)]),
+            pick(rng, [(0.6, day.strftime('%Y-%m-%d %H:%M:%S')), (0.2, day), (0.2, None)]),
+            pick(rng, [
+                (0.2, lambda: f'CAINIAO_STANDARD_WEIHAI-{rng.randrange(10 ** 6)}'),
+                (0.6, lambda: f'LP00{rng.randrange(10 ** 9, 10 ** 10)}CN'), (0.2, None),
+            ]),
+            pick(rng, [(0.2, '半托管仓发订单'), (0.6, '非半托管订单'), (0.2, None)]),
+        ])
+
+    warehouse = wb.create_sheet('香港仓和威海仓发货')
+    warehouse.append(WAREHOUSE_COLUMNS)
+    for order_id in rng.sample(order_ids, orders // 10):
+        warehouse.append([
+            pick(rng, [(0.8, order_id), (0.2, str(order_id))]),
+            rng.randrange(10 ** 6), rng.randrange(10 ** 12), rng.randrange(10 ** 8),
+            pick(rng, [(0.4, '已 签收'), (0.3, '交航成功'), (0.3, '已取消')]),
+            pick(rng, [(0.5, '香港仓'), (0.5, '威海仓')]),
+        ])
+
+    semi = wb.create_sheet('半托仓发货')
+    semi.append(SEMI_COLUMNS)
+    row = 1
+    for order_id in rng.sample(order_ids, orders // 10):
+        semi.append([
+            str(order_id), pick(rng, [(0.5, '东莞仓'), (0.5, '义乌仓')]), rng.randrange(10 ** 12),
+            rng.randrange(10 ** 8), rng.randint(1, 5), '2025-05-02', '2025-05-03',
+            f'LP00{rng.randrange(10 ** 9, 10 ** 10)}CN', '店铺A', None, '系统', None,
+        ])
+        row += 1
+        business = pick(rng, [(0.5, 'TOC销售'), (0.3, '销售出库'), (0.2, '调拨出库')])
+        if rng.random() < 0.1:
+            # 业务类型与前一列合并, 取右侧单元格的值
+            semi.cell(row=row, column=11, value='TOC销售')
+            semi.merge_cells(start_row=row, start_column=11, end_row=row, end_column=12)
+        else:
+            semi.cell(row=row, column=12, value=business)
+
+    wb.save(path)
+
+
+def run_engine(engine, source, workdir):
+    os.makedirs(workdir, exist_ok=True)
+    shutil.copy(source, os.path.join(workdir, processor.file_path))
+    cwd = os.getcwd()
+    os.chdir(workdir)
+    timings = []
+    try:
+        for name, step in processor.pipeline_steps(engine):
+            start = time.perf_counter()
+            step()
+            timings.append((name, time.perf_counter() - start))
+            print(f"   {engine} / {name}: {timings[-1][1]:.2f} 秒")
+    finally:
+        os.chdir(cwd)
+    return timings, os.path.join(workdir, processor.output_file)
+
+
+def compare_xlsx(left, right):
+    """返回内容不一致的 xlsx 部件名列表(忽略记录生成时间的 docProps/core.xml)"""
+    with zipfile.ZipFile(left) as a, zipfile.ZipFile(right) as b:
+        names = set(a.namelist()) | set(b.namelist())
+        names.discard('docProps/core.xml')
+        return sorted(
+            name for name in names
+            if name not in a.namelist() or name not in b.namelist() or a.read(name) != b.read(name)
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description='速卖通订单处理: 逐行与向量化引擎对比')
+    parser.add_argument('--orders', type=int, default=100000, help='合成订单数')
+    parser.add_argument('--seed', type=int, default=20250501, help='随机种子')
+    parser.add_argument('--workdir', default=None, help='工作目录(默认临时目录, 结束后删除)')
+    args = parser.parse_args()
+
+    workdir = args.workdir or tempfile.mkdtemp(prefix='aliexpress_bench_')
+    os.makedirs(workdir, exist_ok=True)
+    try:
+        source = os.path.join(workdir, 'source.xlsx')
+        start = time.perf_counter()
+        generate_workbook(source, args.orders, args.seed)
+        print(f"📄 合成工作簿: {args.orders} 订单, 生成耗时 {time.perf_counter() - start:.1f} 秒")
+
+        results = {}
+        for engine in ('legacy', 'vectorized'):
+            print(f"⏱️  运行 {engine} 引擎...")
+            results[engine] = run_engine(engine, source, os.path.join(workdir, engine))
+
+        print(f"\n{'步骤':<12}{'legacy(秒)':>12}{'vectorized(秒)':>16}{'加速':>8}")
+        legacy_timings, vectorized_timings = results['legacy'][0], results['vectorized'][0]
+        for (name, legacy_seconds), (_, vectorized_seconds) in zip(legacy_timings, vectorized_timings):
+            print(f"{name:<12}{legacy_seconds:>12.2f}{vectorized_seconds:>16.2f}"
+                  f"{legacy_seconds / max(vectorized_seconds, 1e-9):>7.1f}x")
+        legacy_total = sum(seconds for _, seconds in legacy_timings)
+        vectorized_total = sum(seconds for _, seconds in vectorized_timings)
+        print(f"{'合计':<12}{legacy_total:>12.2f}{vectorized_total:>16.2f}"
+              f"{legacy_total / max(vectorized_total, 1e-9):>7.1f}x")
+
+        mismatched = compare_xlsx(results['legacy'][1], results['vectorized'][1])
+        if mismatched:
+            print(f"\n❌ 输出不一致的部件: {mismatched}")
+            sys.exit(1)
+        print("\n✅ 两种引擎输出的工作表逐字节一致")
+    finally:
+        if args.workdir is None:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()